@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from utils.logger import get_logger
 from services.data_processor import DataProcessor
 from config import config
+from services.result_cache import get_result_cache
+from utils.metrics import metrics
 
 api_bp = Blueprint('api', __name__)
 logger = get_logger(__name__)
@@ -19,6 +21,24 @@ def validate_api_key():
     api_key = request.headers.get("x-api-key")
     return api_key and api_key == config.API_KEY
 
+def classification_response(result, report):
+    """
+    분류 결과 응답을 만듭니다.
+
+    로컬 사전 분류를 사용했으면 로컬 모델이 처리한 이미지 비율을 X-Local-Classification-Fraction 헤더로 알립니다.
+
+    Args:
+        result (list): process_data의 분류 결과.
+        report (dict): process_data에 넘긴 작업 통계.
+
+    Returns:
+        flask.Response: JSON 응답.
+    """
+    response = jsonify(result)
+    if report.get('local'):
+        response.headers['X-Local-Classification-Fraction'] = str(report['local']['local_fraction'])
+    return response
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """
@@ -29,6 +49,44 @@ def health_check():
     """
     return "OK", 200
 
+@api_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    메트릭 조회 엔드포인트.
+
+    이미지 다운로드 처리량, 캐시 적중률 등 프로세스 전역 메트릭과
+    최근 분류 작업 요약을 반환합니다.
+
+    Returns:
+        dict: 메트릭 스냅샷
+    """
+    if not validate_api_key():
+        return jsonify({"message": "유효하지 않은 API 키"}), 403
+    return jsonify(metrics.snapshot()), 200
+
+@api_bp.route('/api/result-cache/<workspace_id>', methods=['DELETE'])
+def invalidate_result_cache(workspace_id):
+    """
+    분류 결과 캐시 무효화 엔드포인트.
+
+    지정된 작업 공간에서 기록된 분류 결과 캐시 항목을 모두 삭제합니다.
+
+    Args:
+        workspace_id (str): 작업공간 ID
+
+    Returns:
+        dict: 삭제된 항목 수
+            - workspaceId (str): 작업공간 ID
+            - removed (int): 삭제된 항목 수
+    """
+    if not validate_api_key():
+        return jsonify({"message": "유효하지 않은 API 키"}), 403
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return jsonify({"message": "분류 결과 캐시가 비활성화되어 있습니다."}), 404
+    removed = result_cache.invalidate_workspace(workspace_id)
+    return jsonify({"workspaceId": workspace_id, "removed": removed}), 200
+
 @api_bp.route('/api/testclassify', methods=['POST'])
 def test_classify():
     """
@@ -42,11 +100,13 @@ def test_classify():
             - id (str): 이미지 ID
             - url (str): 이미지 URL
             - fileName (str): 이미지 파일명
+        categoryGroups (Dict[str, List[str]], optional): 계층 분류에 사용할 그룹 이름별 카테고리 목록
     
     Returns:
         List[dict]: 분류 결과 목록
             - label (str): 분류된 레이블
             - ids (List[str]): 해당 레이블로 분류된 이미지 ID 목록
+        로컬 사전 분류를 사용했으면 X-Local-Classification-Fraction 헤더에 로컬 처리 비율이 담깁니다.
     """
     logger.info("Test classification request received")
     print("DEBUG: Test classification request received in enhanced version")
@@ -63,9 +123,10 @@ def test_classify():
     logger.info(f"Request contains {len(data.get('testImages', []))} test images")
     
     try:
-        result = data_processor.process_data(request, "test")
+        report = {}
+        result = data_processor.process_data(request, "test", report)
         logger.info(f"Test classification completed with {len(result)} results")
-        return jsonify(result), 200
+        return classification_response(result, report), 200
     except Exception as e:
         logger.error(f"Test classification error: {e}")
         import traceback
@@ -85,6 +146,7 @@ def classify():
             - id (str): 이미지 ID
             - url (str): 이미지 URL
             - fileName (str): 이미지 파일명
+        categoryGroups (Dict[str, List[str]], optional): 계층 분류에 사용할 그룹 이름별 카테고리 목록
         workspaceId (int): 작업공간 ID
         requesterId (int): 요청자 ID
     
@@ -92,15 +154,17 @@ def classify():
         List[dict]: 분류 결과 목록
             - label (str): 분류된 레이블
             - ids (List[str]): 해당 레이블로 분류된 이미지 ID 목록
+        로컬 사전 분류를 사용했으면 X-Local-Classification-Fraction 헤더에 로컬 처리 비율이 담깁니다.
     """
     if not validate_api_key():
         return jsonify({"message": "유효하지 않은 API 키"}), 403
     
     try:
         logger.info("Classification request received")
-        result = data_processor.process_data(request, "classify")
+        report = {}
+        result = data_processor.process_data(request, "classify", report)
         logger.info(f"Classification completed with {len(result)} results")
-        return jsonify(result), 200
+        return classification_response(result, report), 200
     except Exception as e:
         logger.error(f"Classification error: {e}")
         return jsonify({"message": "분류 중 오류가 발생했습니다.", "error": str(e)}), 500
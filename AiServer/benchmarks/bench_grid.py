@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+격자(contact sheet) 분류 모드의 정확도/처리량/비용 벤치마크 스크립트입니다.
+
+레이블별 하위 디렉토리에 이미지가 들어 있는 데이터셋(작업 공간 디렉토리와 같은 구조)을
+여러 격자 크기로 분류하여 정확도, 초당 처리 이미지 수, 이미지당 비용을 비교합니다.
+격자 크기 0은 기존처럼 이미지를 개별 슬롯으로 전송하는 모드입니다.
+
+실제 LLM을 호출하므로 .env에 API 키가 필요합니다. --offline을 지정하면 LLM을 호출하지 않고
+요청 페이로드 준비 처리량과 이미지당 페이로드 크기만 측정합니다.
+
+사용 예:
+    python benchmarks/bench_grid.py --dataset C:/AutoClass/workspace/1 --grid-sizes 0,2,3,4 --images 60
+    python benchmarks/bench_grid.py --dataset ./samples --offline
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import litellm
+
+from config import config
+from services.classification_service import ClassificationService
+from services.image_service import ImageService
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def load_dataset(dataset_dir, limit, seed):
+    """레이블별 하위 디렉토리에서 (레이블, 이미지 바이트) 목록을 읽습니다."""
+    samples = []
+    for label in sorted(os.listdir(dataset_dir)):
+        label_dir = os.path.join(dataset_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(label_dir, name), "rb") as f:
+                    samples.append((label, f.read()))
+    random.Random(seed).shuffle(samples)
+    return samples[:limit] if limit else samples
+
+
+class CostTracker:
+    """litellm 성공 콜백으로 요청 비용과 토큰 사용량을 누적합니다."""
+
+    def __init__(self):
+        self.cost = 0.0
+        self.prompt_tokens = 0
+        self.requests = 0
+
+    def __call__(self, kwargs, completion_response, start_time, end_time):
+        self.requests += 1
+        self.cost += kwargs.get("response_cost") or 0.0
+        usage = getattr(completion_response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+
+    def reset(self):
+        self.cost, self.prompt_tokens, self.requests = 0.0, 0, 0
+
+
+def chunk_size_for(grid_size, sheets_per_request, per_image_chunk):
+    return grid_size * grid_size * sheets_per_request if grid_size else per_image_chunk
+
+
+async def run_online(service, samples, categories, grid_size, chunk_size, concurrency):
+    urls = [f"http://localhost/bench/{index}.jpg" for index in range(len(samples))]
+    image_data = {url: image_bytes for url, (_, image_bytes) in zip(urls, samples)}
+    semaphore = asyncio.Semaphore(concurrency)
+    predictions = {}
+
+    async def classify(chunk_urls):
+        async with semaphore:
+            try:
+                labels, _ = await service.classify_images_detailed(
+                    chunk_urls, categories, image_data=image_data, grid_size=grid_size or None
+                )
+            except Exception as e:
+                print(f"    chunk failed: {e}")
+                labels = ["NONE"] * len(chunk_urls)
+            predictions.update(zip(chunk_urls, labels))
+
+    await asyncio.gather(*(classify(urls[i:i + chunk_size]) for i in range(0, len(urls), chunk_size)))
+    correct = sum(predictions.get(url) == label for url, (label, _) in zip(urls, samples))
+    return correct / len(samples)
+
+
+async def run_offline(samples, grid_size, chunk_size):
+    urls = [f"http://localhost/bench/{index}.jpg" for index in range(len(samples))]
+    image_data = {url: image_bytes for url, (_, image_bytes) in zip(urls, samples)}
+    payload_bytes = 0
+    for i in range(0, len(urls), chunk_size):
+        chunk_urls = urls[i:i + chunk_size]
+        if grid_size:
+            content = await ImageService.prepare_contact_sheets_async(
+                chunk_urls, image_data, grid_size, config.CLASSIFICATION_GRID_CELL_SIZE
+            )
+        else:
+            content = await ImageService.prepare_images_for_ai_async(chunk_urls, image_data)
+        payload_bytes += sum(len(part["image_url"]["url"]) for part in content if part["type"] == "image_url")
+    return payload_bytes / len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid (contact sheet) classification benchmark")
+    parser.add_argument("--dataset", required=True, help="directory with one sub-directory per label")
+    parser.add_argument("--grid-sizes", default="0,2,3,4", help="comma separated grid sizes, 0 = one image per slot")
+    parser.add_argument("--images", type=int, default=60, help="number of images to sample (0 = all)")
+    parser.add_argument("--sheets-per-request", type=int, default=config.CLASSIFICATION_GRID_SHEETS_PER_REQUEST)
+    parser.add_argument("--chunk-size", type=int, default=config.DATA_PROCESSOR_CHUNK_SIZE,
+                        help="images per request in per-image mode")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--offline", action="store_true", help="measure payload preparation only, no LLM calls")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.dataset, args.images, args.seed)
+    if not samples:
+        print(f"No images found under {args.dataset}")
+        return
+    categories = sorted({label for label, _ in samples})
+    grid_sizes = [int(value) for value in args.grid_sizes.split(",")]
+    print(f"{len(samples)} images, {len(categories)} categories: {categories}")
+
+    tracker = CostTracker()
+    service = None
+    if not args.offline:
+        litellm.success_callback = [tracker]
+        service = ClassificationService()
+
+    for grid_size in grid_sizes:
+        chunk_size = chunk_size_for(grid_size, args.sheets_per_request, args.chunk_size)
+        mode = f"grid {grid_size}x{grid_size}" if grid_size else "per-image"
+        tracker.reset()
+        start = time.perf_counter()
+        if args.offline:
+            payload_per_image = asyncio.run(run_offline(samples, grid_size, chunk_size))
+            elapsed = time.perf_counter() - start
+            print(f"  {mode:<12} chunk={chunk_size:<3} prepare {len(samples) / elapsed:8.1f} images/s  "
+                  f"payload {payload_per_image / 1024:6.1f} KiB/image")
+            continue
+
+        accuracy = asyncio.run(run_online(service, samples, categories, grid_size, chunk_size, args.concurrency))
+        elapsed = time.perf_counter() - start
+        images_per_second = len(samples) / elapsed
+        cost_per_image = tracker.cost / len(samples)
+        value = images_per_second / cost_per_image if cost_per_image else float("inf")
+        print(f"  {mode:<12} chunk={chunk_size:<3} accuracy {accuracy:6.1%}  {images_per_second:6.2f} images/s  "
+              f"requests {tracker.requests:<3} tokens/image {tracker.prompt_tokens / len(samples):7.1f}  "
+              f"${cost_per_image * 1000:.4f}/1k images  images/s per $ {value:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+분류 결과 스키마(full / compact)의 출력 토큰과 지연 시간 비교 벤치마크 스크립트입니다.
+
+같은 데이터셋과 같은 청크를 두 스키마로 분류하여 정확도, 요청당 지연 시간(p50/p95),
+이미지당 출력 토큰을 비교합니다. 데이터셋 구조는 bench_grid.py와 같습니다 (레이블별 하위 디렉토리).
+
+실제 LLM을 호출하므로 .env에 API 키가 필요합니다. --offline을 지정하면 LLM을 호출하지 않고
+정답 레이블로 만든 이상적인 도구 호출 인자의 토큰 수만 비교합니다.
+
+사용 예:
+    python benchmarks/bench_schema.py --dataset C:/AutoClass/workspace/1 --images 60
+    python benchmarks/bench_schema.py --dataset ./samples --offline --model gpt-4.1-mini
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import litellm
+
+from bench_grid import load_dataset
+from config import config
+from services.classification_service import ClassificationService
+
+SCHEMAS = ('full', 'compact')
+
+
+class UsageTracker:
+    """litellm 성공 콜백으로 요청별 지연 시간과 출력 토큰을 누적합니다."""
+
+    def __init__(self):
+        self.latencies = []
+        self.completion_tokens = 0
+
+    def __call__(self, kwargs, completion_response, start_time, end_time):
+        self.latencies.append((end_time - start_time).total_seconds())
+        usage = getattr(completion_response, "usage", None)
+        if usage is not None:
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def reset(self):
+        self.latencies, self.completion_tokens = [], 0
+
+
+def ideal_arguments(schema, labels, categories):
+    """정답 레이블로 스키마별 도구 호출 인자 JSON을 만듭니다."""
+    if schema == 'compact':
+        return json.dumps({"labels": [categories.index(label) + 1 for label in labels]})
+    return json.dumps({"classifications": [{"index": index, "category": label}
+                                           for index, label in enumerate(labels)]})
+
+
+def run_offline(samples, categories, chunk_size, model):
+    labels = [label for label, _ in samples]
+    for schema in SCHEMAS:
+        tokens = sum(
+            litellm.token_counter(model=model, text=ideal_arguments(schema, labels[i:i + chunk_size], categories))
+            for i in range(0, len(labels), chunk_size)
+        )
+        print(f"  {schema:<8} chunk={chunk_size:<3} output tokens/image {tokens / len(samples):6.2f}")
+
+
+async def run_online(service, samples, categories, chunk_size, concurrency):
+    urls = [f"http://localhost/bench/{index}.jpg" for index in range(len(samples))]
+    image_data = {url: image_bytes for url, (_, image_bytes) in zip(urls, samples)}
+    semaphore = asyncio.Semaphore(concurrency)
+    predictions = {}
+
+    async def classify(chunk_urls):
+        async with semaphore:
+            try:
+                labels = await service.classify_images(chunk_urls, categories, image_data=image_data)
+            except Exception as e:
+                print(f"    chunk failed: {e}")
+                labels = ["NONE"] * len(chunk_urls)
+            predictions.update(zip(chunk_urls, labels))
+
+    await asyncio.gather(*(classify(urls[i:i + chunk_size]) for i in range(0, len(urls), chunk_size)))
+    correct = sum(predictions.get(url) == label for url, (label, _) in zip(urls, samples))
+    return correct / len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs compact output schema benchmark")
+    parser.add_argument("--dataset", required=True, help="directory with one sub-directory per label")
+    parser.add_argument("--images", type=int, default=60, help="number of images to sample (0 = all)")
+    parser.add_argument("--chunk-size", type=int, default=config.DATA_PROCESSOR_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="gpt-4.1-mini", help="tokenizer model for --offline")
+    parser.add_argument("--offline", action="store_true", help="count ideal output tokens only, no LLM calls")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.dataset, args.images, args.seed)
+    if not samples:
+        print(f"No images found under {args.dataset}")
+        return
+    categories = sorted({label for label, _ in samples})
+    print(f"{len(samples)} images, {len(categories)} categories: {categories}")
+
+    if args.offline:
+        run_offline(samples, categories, args.chunk_size, args.model)
+        return
+
+    tracker = UsageTracker()
+    litellm.success_callback = [tracker]
+    service = ClassificationService()
+    for schema in SCHEMAS:
+        service.output_schema = schema
+        tracker.reset()
+        start = time.perf_counter()
+        accuracy = asyncio.run(run_online(service, samples, categories, args.chunk_size, args.concurrency))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(tracker.latencies) or [0.0]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  {schema:<8} chunk={args.chunk_size:<3} accuracy {accuracy:6.1%}  "
+              f"{len(samples) / elapsed:6.2f} images/s  requests {len(tracker.latencies):<3} "
+              f"latency p50 {statistics.median(latencies):5.2f}s p95 {p95:5.2f}s  "
+              f"output tokens/image {tracker.completion_tokens / len(samples):6.2f}")
+
+
+if __name__ == "__main__":
+    main()
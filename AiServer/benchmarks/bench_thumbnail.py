@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+썸네일 생성 마이크로 벤치마크 스크립트입니다.
+
+기존 구현(전체 해상도 디코딩 후 thumbnail, 기본 품질 JPEG)과 디코더 단계 축소를 사용하는
+utils.image_resize.render_thumbnail을 단일 코어에서 비교하여 코어당 초당 처리 이미지 수를 출력합니다.
+
+사용 예:
+    python benchmarks/bench_thumbnail.py --width 4032 --height 3024 --iterations 30
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from utils.image_resize import cv2, render_thumbnail
+
+
+def make_photo(width, height):
+    """노이즈와 도형이 섞인 사진 크기의 JPEG을 생성합니다 (단색 이미지는 디코딩이 지나치게 빠름)."""
+    img = Image.effect_noise((width, height), 24).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for i in range(0, min(width, height) // 2, max(1, min(width, height) // 40)):
+        draw.ellipse((i, i, width - i, height - i), outline=(i % 256, 128, 255 - i % 256), width=8)
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=90)
+    return buffered.getvalue()
+
+
+def legacy_render(image_bytes, max_size):
+    """기존 ImageService.resize_image의 디코딩/리사이즈/인코딩 과정."""
+    img = Image.open(io.BytesIO(image_bytes))
+    img.thumbnail(max_size)
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+def measure(func, iterations):
+    func()  # 워밍업
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thumbnail rendering micro-benchmark (single core)")
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--size", type=int, default=224, help="thumbnail bounding box")
+    parser.add_argument("--quality", type=int, default=75)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    image_bytes = make_photo(args.width, args.height)
+    max_size = (args.size, args.size)
+    print(f"Source: {args.width}x{args.height} JPEG ({len(image_bytes) / 1024:.0f} KiB), "
+          f"target {args.size}px, {args.iterations} iterations")
+
+    cases = [
+        ("legacy (full decode)", lambda: legacy_render(image_bytes, max_size)),
+        ("pil draft JPEG", lambda: render_thumbnail(image_bytes, max_size, "JPEG", args.quality, "pil")),
+        ("pil draft WEBP", lambda: render_thumbnail(image_bytes, max_size, "WEBP", args.quality, "pil")),
+    ]
+    if cv2 is not None:
+        cv2.setNumThreads(1)  # 코어당 처리량을 비교하기 위해 OpenCV 내부 스레드를 끕니다.
+        cases += [
+            ("opencv reduced JPEG", lambda: render_thumbnail(image_bytes, max_size, "JPEG", args.quality, "opencv")),
+            ("opencv reduced WEBP", lambda: render_thumbnail(image_bytes, max_size, "WEBP", args.quality, "opencv")),
+        ]
+
+    baseline = None
+    for name, func in cases:
+        rate = measure(func, args.iterations)
+        baseline = baseline or rate
+        output_size = len(func())
+        print(f"  {name:<22} {rate:8.1f} images/sec/core  x{rate / baseline:5.2f}  ({output_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,12 +38,167 @@ class Config:
     # DataProcessor configuration
     DATA_PROCESSOR_CHUNK_SIZE: int = int(os.getenv('DATA_PROCESSOR_CHUNK_SIZE', '8'))
     DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS: int = int(os.getenv('DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS', '10'))
-    
+    # 실패한 청크를 반으로 나눠 재시도할 때 작업당 허용하는 추가 LLM 호출 수 (0이면 청크 전체를 NONE 처리)
+    DATA_PROCESSOR_BISECT_MAX_EXTRA_CALLS: int = int(os.getenv('DATA_PROCESSOR_BISECT_MAX_EXTRA_CALLS', '32'))
+
+    # 청크 플래너 설정 (요청 크기/토큰 추정으로 청크 구성, 비활성화 시 이미지 수 기반 청크 크기 사용)
+    CHUNK_PLANNER_ENABLED: bool = os.getenv('CHUNK_PLANNER_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    CHUNK_PLANNER_MAX_IMAGES: int = int(os.getenv('CHUNK_PLANNER_MAX_IMAGES', '24'))
+    CHUNK_PLANNER_TARGET_LATENCY: float = float(os.getenv('CHUNK_PLANNER_TARGET_LATENCY', '45'))
+
+    # 프로바이더별 적응형(AIMD) 동시성 제어 설정 (초기 한도는 DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS)
+    LLM_ADAPTIVE_CONCURRENCY: bool = os.getenv('LLM_ADAPTIVE_CONCURRENCY', 'True').lower() in ('true', '1', 'yes')
+    LLM_CONCURRENCY_MIN: int = int(os.getenv('LLM_CONCURRENCY_MIN', '1'))
+    LLM_CONCURRENCY_MAX: int = int(os.getenv('LLM_CONCURRENCY_MAX', '32'))
+    LLM_LATENCY_SPIKE_RATIO: float = float(os.getenv('LLM_LATENCY_SPIKE_RATIO', '3'))
+
+    # LLM 프로바이더별 회로 차단기 설정 (연속 실패 시 회로를 열고 복구 대기 후 한 건씩 탐색)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', '3'))
+    LLM_CIRCUIT_RECOVERY_TIMEOUT: float = float(os.getenv('LLM_CIRCUIT_RECOVERY_TIMEOUT', '30'))
+    LLM_HEALTH_WINDOW: int = int(os.getenv('LLM_HEALTH_WINDOW', '100'))
+
+    # 응답에서 빠졌거나 유효하지 않은 이미지만 다시 질의하는 최대 횟수 (0이면 'NONE' 처리)
+    LLM_MISSING_RETRY_COUNT: int = int(os.getenv('LLM_MISSING_RETRY_COUNT', '1'))
+
+    # 분류 결과 스키마: 'full'은 {"index", "category"} 객체 배열, 'compact'는 이미지 순서대로 나열한 정수 코드 배열
+    LLM_OUTPUT_SCHEMA: str = os.getenv('LLM_OUTPUT_SCHEMA', 'full').lower()
+
+    # 계층 분류: 카테고리가 이 수 이상이면 이름으로 그룹을 만들어 그룹 -> 그룹 내 카테고리 순으로 2단계 분류
+    # (기본값 0: 요청에 categoryGroups가 있을 때만 사용), GROUP_SIZE는 그룹당 목표 카테고리 수 (0이면 제곱근)
+    LLM_HIERARCHICAL_MIN_CATEGORIES: int = int(os.getenv('LLM_HIERARCHICAL_MIN_CATEGORIES', '0'))
+    LLM_HIERARCHICAL_GROUP_SIZE: int = int(os.getenv('LLM_HIERARCHICAL_GROUP_SIZE', '0'))
+
+    # 스트리밍 모드: 도구 호출 인자를 조각 단위로 파싱해 레이블이 완성되는 즉시 저장을 시작
+    LLM_STREAMING_ENABLED: bool = os.getenv('LLM_STREAMING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+
+    # 헤징 요청 설정 (기본 요청이 최근 지연 백분위수를 넘으면 다음 정상 프로바이더에 중복 요청)
+    LLM_HEDGING_ENABLED: bool = os.getenv('LLM_HEDGING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv('LLM_HEDGE_PERCENTILE', '0.9'))
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv('LLM_HEDGE_MIN_DELAY', '2'))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+    LLM_HEDGE_BUDGET: float = float(os.getenv('LLM_HEDGE_BUDGET', '0.1'))
+
+    # 대량 모드: 이미지가 MIN_IMAGES 이상인 ClassifyQueue 작업을 프로바이더 배치 API로 제출하고 주기적으로 폴링
+    # (BASE_URL이 비어 있으면 프로바이더 기본 주소, 배치 상태는 DATABASE_URI 데이터베이스에 저장)
+    LLM_BATCH_ENABLED: bool = os.getenv('LLM_BATCH_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    LLM_BATCH_MIN_IMAGES: int = int(os.getenv('LLM_BATCH_MIN_IMAGES', '500'))
+    LLM_BATCH_PROVIDER: str = os.getenv('LLM_BATCH_PROVIDER', 'openai').lower()
+    LLM_BATCH_BASE_URL: str = os.getenv('LLM_BATCH_BASE_URL', '')
+    LLM_BATCH_POLL_INTERVAL: float = float(os.getenv('LLM_BATCH_POLL_INTERVAL', '60'))
+    LLM_BATCH_COMPLETION_WINDOW: str = os.getenv('LLM_BATCH_COMPLETION_WINDOW', '24h')
+
+    # 로컬 사전 분류: 훈련된 YOLO 모델이 있는 작업 공간은 먼저 로컬로 분류하고 보정된 임계값 미만만 LLM으로 전송
+    # (임계값은 모델 버전마다 CALIBRATION_IMAGES개 이하의 레이블 이미지로 TARGET_PRECISION을 만족하도록 보정,
+    #  보정 이미지는 훈련할 때 레이블별로 CALIBRATION_FRACTION만큼 훈련 데이터에서 분리해 둔 이미지)
+    YOLO_CASCADE_ENABLED: bool = os.getenv('YOLO_CASCADE_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    YOLO_CASCADE_TARGET_PRECISION: float = float(os.getenv('YOLO_CASCADE_TARGET_PRECISION', '0.95'))
+    YOLO_CASCADE_MIN_SAMPLES: int = int(os.getenv('YOLO_CASCADE_MIN_SAMPLES', '30'))
+    YOLO_CASCADE_CALIBRATION_IMAGES: int = int(os.getenv('YOLO_CASCADE_CALIBRATION_IMAGES', '500'))
+    YOLO_CASCADE_CALIBRATION_FRACTION: float = float(os.getenv('YOLO_CASCADE_CALIBRATION_FRACTION', '0.1'))
+    YOLO_CASCADE_BATCH_SIZE: int = int(os.getenv('YOLO_CASCADE_BATCH_SIZE', '32'))
+
+    # 이미지 다운로드(fetcher) 설정
+    IMAGE_FETCH_TIMEOUT: float = float(os.getenv('IMAGE_FETCH_TIMEOUT', '10'))
+    IMAGE_FETCH_CONNECT_TIMEOUT: float = float(os.getenv('IMAGE_FETCH_CONNECT_TIMEOUT', '3'))
+    IMAGE_FETCH_MAX_CONNECTIONS: int = int(os.getenv('IMAGE_FETCH_MAX_CONNECTIONS', '64'))
+    IMAGE_FETCH_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv('IMAGE_FETCH_MAX_CONNECTIONS_PER_HOST', '16'))
+    IMAGE_FETCH_MAX_RETRIES: int = int(os.getenv('IMAGE_FETCH_MAX_RETRIES', '2'))
+    IMAGE_FETCH_RETRY_BUDGET: float = float(os.getenv('IMAGE_FETCH_RETRY_BUDGET', '0.2'))
+    # 'inline': 다운로드 응답으로 검증 (기본값), 'head': 사전 HEAD 요청으로 검증
+    IMAGE_VALIDATION_MODE: str = os.getenv('IMAGE_VALIDATION_MODE', 'inline')
+    IMAGE_NEGATIVE_CACHE_TTL: float = float(os.getenv('IMAGE_NEGATIVE_CACHE_TTL', '300'))
+
+    # 디스크 이미지 캐시 설정 (기본 비활성, DIR을 비워두면 BASE_DIR/cache/images 사용, 여러 레플리카가 공유 가능)
+    IMAGE_CACHE_ENABLED: bool = os.getenv('IMAGE_CACHE_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    IMAGE_CACHE_DIR: str = os.getenv('IMAGE_CACHE_DIR', '')
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+    IMAGE_CACHE_FRESHNESS_SECONDS: float = float(os.getenv('IMAGE_CACHE_FRESHNESS_SECONDS', '3600'))
+
+    # 작업 내 중복 이미지 제거 설정 (64비트 dHash의 최대 해밍 거리, 0이면 완전히 같은 이미지만)
+    # 지각 해시는 서로 다른 이미지를 묶을 수 있으므로 명시적으로 켠 경우에만 사용합니다.
+    IMAGE_DEDUP_ENABLED: bool = os.getenv('IMAGE_DEDUP_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    IMAGE_DEDUP_THRESHOLD: int = int(os.getenv('IMAGE_DEDUP_THRESHOLD', '3'))
+
+    # 분류 결과 캐시 설정 (DATABASE_URI의 SQLite 파일에 저장, TTL 0 이하이면 만료 없음)
+    RESULT_CACHE_ENABLED: bool = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    RESULT_CACHE_TTL_SECONDS: float = float(os.getenv('RESULT_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '200000'))
+
+    # 격자(contact sheet) 분류 모드: GRID_SIZE x GRID_SIZE개 이미지를 한 장으로 합쳐 요청당 SHEETS_PER_REQUEST장 전송
+    CLASSIFICATION_GRID_MODE: bool = os.getenv('CLASSIFICATION_GRID_MODE', 'False').lower() in ('true', '1', 'yes')
+    CLASSIFICATION_GRID_SIZE: int = int(os.getenv('CLASSIFICATION_GRID_SIZE', '3'))
+    CLASSIFICATION_GRID_CELL_SIZE: int = int(os.getenv('CLASSIFICATION_GRID_CELL_SIZE', '224'))
+    CLASSIFICATION_GRID_SHEETS_PER_REQUEST: int = int(os.getenv('CLASSIFICATION_GRID_SHEETS_PER_REQUEST', '2'))
+
+    # 이미지 디코딩/리사이즈 워커 풀 설정 ('thread' 또는 'process', 크기 0이면 CPU 코어 수)
+    IMAGE_WORKER_POOL_TYPE: str = os.getenv('IMAGE_WORKER_POOL_TYPE', 'thread')
+    IMAGE_WORKER_POOL_SIZE: int = int(os.getenv('IMAGE_WORKER_POOL_SIZE', '0'))
+
+    # LLM 전송용 썸네일 설정 (포맷: 'JPEG' 또는 'WEBP', 디코더: 'pil' 또는 'opencv')
+    THUMBNAIL_FORMAT: str = os.getenv('THUMBNAIL_FORMAT', 'JPEG')
+    THUMBNAIL_QUALITY: int = int(os.getenv('THUMBNAIL_QUALITY', '75'))
+    THUMBNAIL_DECODER: str = os.getenv('THUMBNAIL_DECODER', 'pil')
+
+    # 인코딩된 썸네일 메모리 캐시 설정 (SPILL_DIR을 지정하면 밀려난 항목을 디스크에 보관)
+    THUMBNAIL_CACHE_ENABLED: bool = os.getenv('THUMBNAIL_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    THUMBNAIL_CACHE_MAX_BYTES: int = int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', str(64 * 1024 ** 2)))
+    THUMBNAIL_CACHE_SPILL_DIR: str = os.getenv('THUMBNAIL_CACHE_SPILL_DIR', '')
+    THUMBNAIL_CACHE_SPILL_MAX_BYTES: int = int(os.getenv('THUMBNAIL_CACHE_SPILL_MAX_BYTES', str(512 * 1024 ** 2)))
+
     # API 키 우선순위 순서
     OPENROUTER_API_KEY: str = os.getenv('OPENROUTER_API_KEY', '')
     GEMINI_API_KEY: str = os.getenv('GEMINI_API_KEY', '')
     OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY', '')
     ANTHROPIC_API_KEY: str = os.getenv('ANTHROPIC_API_KEY', '')
+    # 프로바이더별 추가 API 키 목록 (쉼표로 구분, 단일 키 설정과 합쳐 키 풀로 사용)
+    OPENROUTER_API_KEYS: str = os.getenv('OPENROUTER_API_KEYS', '')
+    GEMINI_API_KEYS: str = os.getenv('GEMINI_API_KEYS', '')
+    OPENAI_API_KEYS: str = os.getenv('OPENAI_API_KEYS', '')
+    ANTHROPIC_API_KEYS: str = os.getenv('ANTHROPIC_API_KEYS', '')
+
+    # API 키별 분당 요청 수(RPM)/토큰 수(TPM) 한도 (0이면 제한 없음, 키 풀이면 키마다 적용)
+    OPENROUTER_RPM: int = int(os.getenv('OPENROUTER_RPM', '0'))
+    OPENROUTER_TPM: int = int(os.getenv('OPENROUTER_TPM', '0'))
+    GEMINI_RPM: int = int(os.getenv('GEMINI_RPM', '0'))
+    GEMINI_TPM: int = int(os.getenv('GEMINI_TPM', '0'))
+    OPENAI_RPM: int = int(os.getenv('OPENAI_RPM', '0'))
+    OPENAI_TPM: int = int(os.getenv('OPENAI_TPM', '0'))
+    ANTHROPIC_RPM: int = int(os.getenv('ANTHROPIC_RPM', '0'))
+    ANTHROPIC_TPM: int = int(os.getenv('ANTHROPIC_TPM', '0'))
+    # weighted 라우팅에서의 프로바이더별 비중 (관측된 처리량/성공률과 곱해 사용)
+    OPENROUTER_WEIGHT: float = float(os.getenv('OPENROUTER_WEIGHT', '1'))
+    GEMINI_WEIGHT: float = float(os.getenv('GEMINI_WEIGHT', '1'))
+    OPENAI_WEIGHT: float = float(os.getenv('OPENAI_WEIGHT', '1'))
+    ANTHROPIC_WEIGHT: float = float(os.getenv('ANTHROPIC_WEIGHT', '1'))
+    # 해상도 단계 상향: 작은 썸네일로 먼저 분류하고 NONE/누락 이미지만 큰 해상도로 다시 분류
+    LLM_RESOLUTION_ESCALATION: bool = os.getenv('LLM_RESOLUTION_ESCALATION', 'False').lower() in ('true', '1', 'yes')
+    LLM_LOW_DETAIL_SIZE: int = int(os.getenv('LLM_LOW_DETAIL_SIZE', '96'))
+    LLM_HIGH_DETAIL_SIZE: int = int(os.getenv('LLM_HIGH_DETAIL_SIZE', '768'))
+    # 프로바이더별 "1차,2차" 썸네일 크기 (비어 있으면 위의 공통 크기 사용)
+    OPENROUTER_DETAIL_SIZES: str = os.getenv('OPENROUTER_DETAIL_SIZES', '')
+    GEMINI_DETAIL_SIZES: str = os.getenv('GEMINI_DETAIL_SIZES', '')
+    OPENAI_DETAIL_SIZES: str = os.getenv('OPENAI_DETAIL_SIZES', '')
+    ANTHROPIC_DETAIL_SIZES: str = os.getenv('ANTHROPIC_DETAIL_SIZES', '')
+    # 모델 계층 캐스케이드: 가장 저렴한 모델로 먼저 분류하고 confidence가 임계값보다 낮은 이미지만 상위 모델로 재분류
+    LLM_CASCADE_ENABLED: bool = os.getenv('LLM_CASCADE_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    # 계층 전환마다의 confidence 임계값 (쉼표로 구분, 부족하면 마지막 값을 반복)
+    LLM_CASCADE_THRESHOLDS: str = os.getenv('LLM_CASCADE_THRESHOLDS', '0.8')
+    # 프로바이더별 계층 모델 (쉼표로 구분, 저렴한 모델부터, 비어 있으면 기본 모델 하나)
+    OPENROUTER_CASCADE_MODELS: str = os.getenv(
+        'OPENROUTER_CASCADE_MODELS',
+        'openrouter/google/gemini-2.5-flash-lite,openrouter/google/gemini-2.5-flash-preview'
+    )
+    GEMINI_CASCADE_MODELS: str = os.getenv('GEMINI_CASCADE_MODELS',
+                                           'gemini/gemini-2.5-flash-lite,gemini/gemini-2.5-flash')
+    OPENAI_CASCADE_MODELS: str = os.getenv('OPENAI_CASCADE_MODELS', 'gpt-4.1-nano,gpt-4.1-mini')
+    ANTHROPIC_CASCADE_MODELS: str = os.getenv('ANTHROPIC_CASCADE_MODELS',
+                                              'claude-3-haiku-20240307,claude-3-5-haiku-latest')
+    # 'fallback': 우선순위 순서대로 시도 (기본값), 'weighted': 정상 프로바이더에 가중치로 분산
+    LLM_ROUTING_POLICY: str = os.getenv('LLM_ROUTING_POLICY', 'fallback')
+    # 한도 대기가 이 시간(초)보다 길면 다음 프로바이더로 넘어갑니다 (마지막 프로바이더는 REQUEST_TIMEOUT까지 대기)
+    LLM_RATE_LIMIT_MAX_WAIT: float = float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT', '30'))
+    # LLM 요청 하나의 타임아웃(초)
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv('LLM_REQUEST_TIMEOUT', '120'))
 
     def __init__(self, **kwargs: Any) -> None:
         """
@@ -90,46 +245,136 @@ class Config:
             )
         return configs[0]
     
+    @staticmethod
+    def _collect_api_keys(api_key: str, api_keys: str) -> list:
+        """
+        단일 키 설정과 쉼표로 구분된 키 목록을 중복 없이 합칩니다.
+
+        Args:
+            api_key (str): *_API_KEY 값
+            api_keys (str): *_API_KEYS 값
+
+        Returns:
+            list: 순서를 유지한 API 키 목록
+        """
+        keys = [api_key] + api_keys.split(',')
+        return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
+    def _detail_sizes(self, sizes: str) -> tuple:
+        """
+        "1차,2차" 형식의 썸네일 크기 설정을 해석합니다.
+
+        Args:
+            sizes (str): *_DETAIL_SIZES 값
+
+        Returns:
+            tuple: (1차 크기, 2차 크기). 비어 있거나 잘못된 값이면 공통 크기를 사용합니다.
+        """
+        try:
+            low, high = (int(size) for size in sizes.split(','))
+            return low, high
+        except ValueError:
+            return self.LLM_LOW_DETAIL_SIZE, self.LLM_HIGH_DETAIL_SIZE
+
+    def get_cascade_thresholds(self) -> list:
+        """
+        모델 계층 전환마다 사용할 confidence 임계값 목록을 반환합니다.
+
+        Returns:
+            list: float 임계값 목록 (잘못된 항목은 건너뜁니다).
+        """
+        thresholds = []
+        for value in self.LLM_CASCADE_THRESHOLDS.split(','):
+            try:
+                thresholds.append(float(value))
+            except ValueError:
+                continue
+        return thresholds
+
+    @staticmethod
+    def _cascade_models(models: str, model: str) -> list:
+        """
+        쉼표로 구분된 계층 모델 목록을 해석합니다.
+
+        Args:
+            models (str): *_CASCADE_MODELS 값
+            model (str): 프로바이더 기본 모델
+
+        Returns:
+            list: 저렴한 모델부터의 모델 ID 목록. 비어 있으면 [기본 모델].
+        """
+        return [name.strip() for name in models.split(',') if name.strip()] or [model]
+
     def get_all_available_llm_configs(self) -> list:
         """
         사용 가능한 모든 LLM 설정을 우선순위 순으로 반환합니다.
         
         Returns:
-            list: 우선순위 순으로 정렬된 LLM 설정 목록
+            list: 우선순위 순으로 정렬된 LLM 설정 목록 (api_keys는 키 풀, rpm/tpm은 키당 분당 요청/토큰 한도로
+                0이면 제한 없음, weight는 weighted 라우팅 비중, detail_sizes는 해상도 단계별 썸네일 크기,
+                cascade_models는 저렴한 모델부터의 캐스케이드 계층 모델)
         """
         configs = []
         
         # 우선순위: OPENROUTER -> GEMINI -> OPENAI -> ANTHROPIC
-        if self.OPENROUTER_API_KEY:
+        openrouter_keys = self._collect_api_keys(self.OPENROUTER_API_KEY, self.OPENROUTER_API_KEYS)
+        if openrouter_keys:
             configs.append({
-                'api_key': self.OPENROUTER_API_KEY,
+                'api_key': openrouter_keys[0],
+                'api_keys': openrouter_keys,
                 'model': 'openrouter/google/gemini-2.5-flash-preview',
                 'base_url': 'https://openrouter.ai/api/v1',
-                'provider': 'openrouter'
+                'provider': 'openrouter',
+                'rpm': self.OPENROUTER_RPM,
+                'tpm': self.OPENROUTER_TPM,
+                'weight': self.OPENROUTER_WEIGHT,
+                'detail_sizes': self._detail_sizes(self.OPENROUTER_DETAIL_SIZES),
+                'cascade_models': self._cascade_models(self.OPENROUTER_CASCADE_MODELS, 'openrouter/google/gemini-2.5-flash-preview')
             })
         
-        if self.GEMINI_API_KEY:
+        gemini_keys = self._collect_api_keys(self.GEMINI_API_KEY, self.GEMINI_API_KEYS)
+        if gemini_keys:
             configs.append({
-                'api_key': self.GEMINI_API_KEY,
+                'api_key': gemini_keys[0],
+                'api_keys': gemini_keys,
                 'model': 'gemini/gemini-2.5-flash',
                 'base_url': None,
-                'provider': 'gemini'
+                'provider': 'gemini',
+                'rpm': self.GEMINI_RPM,
+                'tpm': self.GEMINI_TPM,
+                'weight': self.GEMINI_WEIGHT,
+                'detail_sizes': self._detail_sizes(self.GEMINI_DETAIL_SIZES),
+                'cascade_models': self._cascade_models(self.GEMINI_CASCADE_MODELS, 'gemini/gemini-2.5-flash')
             })
         
-        if self.OPENAI_API_KEY:
+        openai_keys = self._collect_api_keys(self.OPENAI_API_KEY, self.OPENAI_API_KEYS)
+        if openai_keys:
             configs.append({
-                'api_key': self.OPENAI_API_KEY,
+                'api_key': openai_keys[0],
+                'api_keys': openai_keys,
                 'model': 'gpt-4.1-mini',
                 'base_url': None,
-                'provider': 'openai'
+                'provider': 'openai',
+                'rpm': self.OPENAI_RPM,
+                'tpm': self.OPENAI_TPM,
+                'weight': self.OPENAI_WEIGHT,
+                'detail_sizes': self._detail_sizes(self.OPENAI_DETAIL_SIZES),
+                'cascade_models': self._cascade_models(self.OPENAI_CASCADE_MODELS, 'gpt-4.1-mini')
             })
         
-        if self.ANTHROPIC_API_KEY:
+        anthropic_keys = self._collect_api_keys(self.ANTHROPIC_API_KEY, self.ANTHROPIC_API_KEYS)
+        if anthropic_keys:
             configs.append({
-                'api_key': self.ANTHROPIC_API_KEY,
+                'api_key': anthropic_keys[0],
+                'api_keys': anthropic_keys,
                 'model': 'claude-3-5-haiku-latest',
                 'base_url': None,
-                'provider': 'anthropic'
+                'provider': 'anthropic',
+                'rpm': self.ANTHROPIC_RPM,
+                'tpm': self.ANTHROPIC_TPM,
+                'weight': self.ANTHROPIC_WEIGHT,
+                'detail_sizes': self._detail_sizes(self.ANTHROPIC_DETAIL_SIZES),
+                'cascade_models': self._cascade_models(self.ANTHROPIC_CASCADE_MODELS, 'claude-3-5-haiku-latest')
             })
         
         return configs
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ImageDto(BaseModel):
     """
@@ -22,10 +22,12 @@ class ClassificationRequest(BaseModel):
         workspaceId (int): 분류가 수행되는 작업 공간의 ID.
         testClass (List[str]): 테스트할 분류 카테고리 목록.
         testImages (List[ImageDto]): 분류할 이미지 목록.
+        categoryGroups (Dict[str, List[str]], optional): 계층 분류에 사용할 그룹 이름별 카테고리 목록.
     """
     workspaceId: int
     testClass: List[str]
     testImages: List[ImageDto]
+    categoryGroups: Optional[Dict[str, List[str]]] = None
 
 class ClassificationResult(BaseModel):
     """
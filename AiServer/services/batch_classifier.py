@@ -0,0 +1,521 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import litellm
+
+from config import config
+from services.chunk_planner import chunk_planner
+from services.image_fetcher import ImageFetcher
+from services.image_service import ImageService
+from services.operation_enum import Operation
+from services.result_cache import ResultCache
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# 배치 API 상태 중 더 이상 바뀌지 않는 상태
+BATCH_COMPLETED = "completed"
+BATCH_FAILED_STATES = ("failed", "expired", "cancelled")
+# 결과를 저장했지만 아직 응답을 보내지 못한 배치의 상태
+PUBLISHING = "publishing"
+
+
+class BatchJobStore:
+    """
+    제출한 배치 작업의 상태를 저장하는 SQLite 저장소.
+
+    원본 메시지, 응답에 사용할 상관 ID, 결과 줄(custom_id)과 testImages 인덱스의 대응을 함께
+    저장하여 서버가 재시작되어도 폴링을 이어서 결과를 DTO id로 되돌릴 수 있게 합니다.
+    제출할 때 받은 이미지 바이트도 저장하여 결과를 처리할 때 이미지를 다시 받지 않습니다.
+    결과를 되돌리면 응답을 보내기 전에 'publishing' 상태로 결과를 저장하므로, 응답 전송이 실패하거나
+    서버가 중단되어도 다음 폴링에서 분류를 다시 하지 않고 응답만 다시 보냅니다.
+
+    Attributes:
+        db_path (str): SQLite 데이터베이스 파일 경로.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or ResultCache.db_path_from_uri(config.DATABASE_URI)
+        self._local = threading.local()
+        self._initialize()
+
+    def _connect(self):
+        # sqlite3 연결은 스레드 간에 공유할 수 없으므로 스레드마다 하나씩 엽니다.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classification_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    correlation_id TEXT,
+                    status TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    requests TEXT NOT NULL,
+                    submitted_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    results TEXT,
+                    outcome TEXT
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(classification_batches)")}
+            for column in ("results", "outcome"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE classification_batches ADD COLUMN {column} TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_batches_status ON classification_batches (status)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classification_batch_images (
+                    batch_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    PRIMARY KEY (batch_id, url)
+                )
+                """
+            )
+
+    def add(self, batch_id, provider, model, correlation_id, message, requests, image_data=None):
+        """
+        제출한 배치를 저장합니다.
+
+        Args:
+            batch_id (str): 프로바이더가 발급한 배치 ID.
+            provider (str): 배치를 제출한 프로바이더.
+            model (str): 배치 요청의 모델 ID.
+            correlation_id (str | None): 응답 메시지에 사용할 상관 ID.
+            message (dict): 원본 분류 메시지.
+            requests (dict): custom_id를 키로 하는 testImages 인덱스 목록.
+            image_data (dict, optional): URL을 키로 하는 제출 시점의 이미지 바이트.
+        """
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO classification_batches "
+                "(batch_id, provider, model, correlation_id, status, message, requests, submitted_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch_id, provider, model, correlation_id, "submitted",
+                 json.dumps(message, ensure_ascii=False), json.dumps(requests), now, now),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO classification_batch_images (batch_id, url, content) VALUES (?, ?, ?)",
+                [(batch_id, url, content) for url, content in (image_data or {}).items()],
+            )
+
+    def image_data(self, batch_id, urls):
+        """
+        제출할 때 저장한 이미지 바이트를 반환합니다.
+
+        Args:
+            batch_id (str): 배치 ID.
+            urls (list of str): 이미지 URL 목록.
+
+        Returns:
+            dict: URL을 키로 하는 이미지 바이트. 저장되지 않은 URL은 포함되지 않습니다.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        if not unique_urls:
+            return {}
+        placeholders = ",".join("?" * len(unique_urls))
+        rows = self._connect().execute(
+            f"SELECT url, content FROM classification_batch_images WHERE batch_id = ? AND url IN ({placeholders})",
+            [batch_id, *unique_urls],
+        ).fetchall()
+        return {url: bytes(content) for url, content in rows}
+
+    def pending(self):
+        """
+        아직 결과를 처리하지 않은 배치 목록을 제출 순으로 반환합니다.
+
+        Returns:
+            list of dict: batch_id, provider, model, correlation_id, status, message, requests, submitted_at,
+                results ('publishing' 상태에서 저장된 응답 결과, 그 밖에는 None).
+        """
+        rows = self._connect().execute(
+            "SELECT batch_id, provider, model, correlation_id, status, message, requests, submitted_at, results "
+            "FROM classification_batches WHERE status NOT IN ('done', 'fallback') ORDER BY submitted_at"
+        ).fetchall()
+        return [
+            {
+                'batch_id': batch_id,
+                'provider': provider,
+                'model': model,
+                'correlation_id': correlation_id,
+                'status': status,
+                'message': json.loads(message),
+                'requests': json.loads(requests),
+                'submitted_at': submitted_at,
+                'results': json.loads(results) if results else None,
+            }
+            for batch_id, provider, model, correlation_id, status, message, requests, submitted_at, results in rows
+        ]
+
+    def set_status(self, batch_id, status):
+        """배치 상태를 기록합니다. 'done'과 'fallback'은 처리가 끝난 배치입니다."""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE classification_batches SET status = ?, updated_at = ? WHERE batch_id = ?",
+                         (status, time.time(), batch_id))
+
+    def set_results(self, batch_id, results, outcome):
+        """
+        응답으로 보낼 결과를 저장하고 배치를 'publishing' 상태로 바꿉니다.
+
+        Args:
+            batch_id (str): 배치 ID.
+            results (list of dict): {"label", "ids"} 목록.
+            outcome (str): 응답을 보낸 뒤 기록할 최종 상태 ('done' 또는 'fallback').
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE classification_batches SET status = ?, results = ?, outcome = ?, updated_at = ? "
+                         "WHERE batch_id = ?",
+                         (PUBLISHING, json.dumps(results, ensure_ascii=False), outcome, time.time(), batch_id))
+
+    def finish(self, batch_id):
+        """응답을 보낸 배치를 최종 상태로 바꾸고 저장한 이미지 바이트를 삭제합니다."""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE classification_batches SET status = COALESCE(outcome, 'done'), updated_at = ? "
+                         "WHERE batch_id = ?", (time.time(), batch_id))
+            conn.execute("DELETE FROM classification_batch_images WHERE batch_id = ?", (batch_id,))
+
+
+class LiteLLMBatchClient:
+    """
+    liteLLM 파일/배치 API로 배치를 제출하고 조회하는 클라이언트.
+
+    테스트나 로컬 대체 엔드포인트에서는 같은 메서드(submit, retrieve, content)를 가진 객체로 바꿀 수 있습니다.
+
+    Attributes:
+        provider (str): liteLLM custom_llm_provider 값 (예: 'openai').
+        api_key (str): 배치 API 키.
+        base_url (str | None): 배치 API 주소. None이면 프로바이더 기본 주소입니다.
+    """
+
+    def __init__(self, provider, api_key, base_url=None):
+        self.provider = provider
+        self.api_key = api_key
+        self.base_url = base_url or None
+
+    def _kwargs(self):
+        return {'custom_llm_provider': self.provider, 'api_key': self.api_key, 'api_base': self.base_url}
+
+    async def submit(self, data, completion_window):
+        """
+        JSONL 입력 파일을 업로드하고 배치를 만듭니다.
+
+        Args:
+            data (bytes): 배치 입력 파일 내용.
+            completion_window (str): 배치 완료 기한 (예: '24h').
+
+        Returns:
+            str: 배치 ID.
+        """
+        input_file = await litellm.acreate_file(file=("classification_batch.jsonl", data), purpose="batch",
+                                                **self._kwargs())
+        batch = await litellm.acreate_batch(completion_window=completion_window, endpoint=BATCH_ENDPOINT,
+                                            input_file_id=input_file.id, **self._kwargs())
+        return batch.id
+
+    async def retrieve(self, batch_id):
+        """
+        배치 상태를 조회합니다.
+
+        Returns:
+            dict: status, output_file_id, error_file_id.
+        """
+        batch = await litellm.aretrieve_batch(batch_id=batch_id, **self._kwargs())
+        return {
+            'status': batch.status,
+            'output_file_id': getattr(batch, 'output_file_id', None),
+            'error_file_id': getattr(batch, 'error_file_id', None),
+        }
+
+    async def content(self, file_id):
+        """결과 파일 내용을 텍스트로 반환합니다."""
+        response = await litellm.afile_content(file_id=file_id, **self._kwargs())
+        return response.content.decode("utf-8")
+
+
+class BatchClassifier:
+    """
+    대량 분류 작업을 프로바이더 배치 API로 처리하는 클래스.
+
+    이미지가 LLM_BATCH_MIN_IMAGES 이상인 ClassifyQueue 메시지는 온라인 호출 대신 청크마다 한 줄씩
+    배치 입력 파일에 기록해 한 번에 제출합니다. 제출한 배치는 BatchJobStore에 저장되고 poll()이
+    주기적으로 상태를 확인하여, 완료되면 결과를 DTO id로 되돌리고 이미지를 저장한 뒤 응답을 보냅니다.
+    배치가 실패하거나 만료되면 원본 메시지를 온라인 경로로 다시 처리합니다. 한 배치의 처리가 실패해도
+    다른 배치는 계속 처리하고, 실패한 배치는 다음 폴링에서 다시 시도합니다.
+
+    Attributes:
+        data_processor (DataProcessor): 청크 구성, 온라인 분류 폴백에 사용하는 데이터 처리기.
+        store (BatchJobStore): 배치 상태 저장소.
+        client: 배치 API 클라이언트 (LiteLLMBatchClient와 같은 메서드).
+        min_images (int): 배치로 보낼 최소 이미지 수.
+        poll_interval (float): 폴링 간격(초).
+    """
+
+    def __init__(self, data_processor, store=None, client=None):
+        self.data_processor = data_processor
+        self.classification_service = data_processor.classification_service
+        self.enabled = config.LLM_BATCH_ENABLED
+        self.min_images = config.LLM_BATCH_MIN_IMAGES
+        self.poll_interval = config.LLM_BATCH_POLL_INTERVAL
+        self.completion_window = config.LLM_BATCH_COMPLETION_WINDOW
+        self.llm_config = next((llm_config for llm_config in self.classification_service.available_configs
+                                if llm_config['provider'] == config.LLM_BATCH_PROVIDER), None)
+        self.client = client
+        if self.client is None and self.llm_config:
+            self.client = LiteLLMBatchClient(self.llm_config['provider'], self.llm_config['api_key'],
+                                             config.LLM_BATCH_BASE_URL or self.llm_config['base_url'])
+        self._store = store
+        self._last_poll = 0.0
+        self._stats = {
+            'submitted': 0,
+            'submitted_images': 0,
+            'completed': 0,
+            'fallbacks': 0,
+            'requeried_requests': 0,
+        }
+        if self.enabled:
+            metrics.register_collector('batch', self.get_stats)
+
+    @property
+    def store(self):
+        # 대량 모드를 쓰지 않으면 데이터베이스에 테이블을 만들지 않도록 처음 사용할 때 엽니다.
+        if self._store is None:
+            self._store = BatchJobStore()
+        return self._store
+
+    def should_batch(self, message):
+        """
+        메시지를 배치 API로 처리할지 결정합니다.
+
+        Args:
+            message (dict): 분류 메시지.
+
+        Returns:
+            bool: 대량 모드가 켜져 있고, 배치 프로바이더 키가 있으며, 이미지 수가 임계값 이상이면 True.
+        """
+        return bool(self.enabled and self.client and self.llm_config
+                    and len(message.get("testImages") or []) >= self.min_images)
+
+    def submit(self, message, correlation_id=None):
+        """
+        분류 메시지를 배치로 제출하고 상태를 저장합니다.
+
+        Args:
+            message (dict): 분류 메시지 (testClass, testImages, workspaceId 등).
+            correlation_id (str, optional): 완료 응답에 사용할 상관 ID.
+
+        Returns:
+            str: 배치 ID.
+        """
+        return asyncio.run(self._submit(message, correlation_id))
+
+    async def _submit(self, message, correlation_id):
+        test_class = message.get("testClass", [])
+        dtos = message.get("testImages", [])
+        model = self.llm_config['model']
+        pairs = [(index, dto["url"]) for index, dto in enumerate(dtos)]
+
+        # 배치는 나중에 실행되므로 이미지를 지금 받아 인라인합니다. 받을 수 없는 이미지는 온라인 경로처럼 건너뜁니다.
+        async with ImageFetcher(url_resolver=ImageService._convert_url_for_docker) as fetcher:
+            fetched = await fetcher.fetch_many(list(dict.fromkeys(url for _, url in pairs)), validate=True)
+        image_data = {url: result.content for url, result in fetched.items() if result.ok}
+        pairs = [(index, url) for index, url in pairs if url in image_data]
+        if len(pairs) < len(dtos):
+            logger.info(f"Skipping {len(dtos) - len(pairs)} invalid images in batch job")
+
+        lines = []
+        requests = {}
+        for number, chunk in enumerate(self._plan_chunks(pairs, test_class)):
+            custom_id = f"chunk-{number}"
+            urls = [url for _, url in chunk]
+            body = await self.classification_service.build_batch_body(urls, test_class, image_data, model)
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                                     "body": body}, ensure_ascii=False))
+            requests[custom_id] = [index for index, _ in chunk]
+
+        batch_id = await self.client.submit("\n".join(lines).encode("utf-8"), self.completion_window)
+        # 결과를 처리할 때 이미지를 다시 받지 않도록 제출한 이미지의 바이트를 함께 저장합니다.
+        submitted = {url: image_data[url] for _, url in pairs}
+        await asyncio.to_thread(self.store.add, batch_id, self.llm_config['provider'], model, correlation_id,
+                                message, requests, submitted)
+        self._stats['submitted'] += 1
+        self._stats['submitted_images'] += len(pairs)
+        logger.info(f"Submitted batch {batch_id}: {len(pairs)} images in {len(requests)} requests "
+                    f"({self.llm_config['provider']}, {model})")
+        return batch_id
+
+    def _plan_chunks(self, pairs, categories):
+        """
+        배치 요청 단위의 청크를 구성합니다.
+
+        배치는 모든 이미지를 인라인하고 격자 이미지를 쓰지 않으므로, 격자 모드와 무관하게 배치
+        프로바이더의 한도만으로 청크 플래너를 실행합니다.
+        """
+        if not self.data_processor.chunk_planner_enabled:
+            return list(self.data_processor._chunk_list(pairs, self.data_processor.chunk_size))
+        return chunk_planner.plan(pairs, categories, [self.llm_config['provider']], lambda url: True)
+
+    def poll_due(self, on_complete):
+        """폴링 간격이 지났으면 poll()을 실행합니다. 소비자 루프에서 매 반복 호출합니다."""
+        if not self.enabled or time.monotonic() - self._last_poll < self.poll_interval:
+            return 0
+        self._last_poll = time.monotonic()
+        return self.poll(on_complete)
+
+    def poll(self, on_complete):
+        """
+        저장된 배치의 상태를 확인하고 끝난 배치의 결과를 처리합니다.
+
+        Args:
+            on_complete (callable): (correlation_id, message, labels_and_ids)로 호출되어 응답을 보냅니다.
+
+        Returns:
+            int: 이번 폴링에서 처리를 마친 배치 수.
+        """
+        finished = 0
+        for job in self.store.pending():
+            try:
+                finished += self._poll_job(job, on_complete)
+            except Exception as e:
+                # 한 배치의 실패가 나머지 배치의 처리를 막지 않도록 다음 폴링에서 다시 시도합니다.
+                logger.error(f"Failed to finish batch {job['batch_id']} ({job['status']}): {e}")
+        return finished
+
+    def _poll_job(self, job, on_complete):
+        """
+        배치 하나의 상태를 확인하고, 끝났으면 결과를 저장한 뒤 응답을 보냅니다.
+
+        결과는 응답을 보내기 전에 'publishing' 상태로 저장하고, 응답을 보낸 뒤에 최종 상태로 바꿉니다.
+        'publishing' 상태의 배치는 저장된 결과로 응답만 다시 보냅니다.
+
+        Returns:
+            int: 응답을 보냈으면 1, 아직 끝나지 않았으면 0.
+        """
+        if job['status'] == PUBLISHING and job['results'] is not None:
+            labels_and_ids = job['results']
+        else:
+            try:
+                state = asyncio.run(self.client.retrieve(job['batch_id']))
+            except Exception as e:
+                logger.warning(f"Failed to poll batch {job['batch_id']}: {e}")
+                return 0
+
+            status = state['status']
+            if status == BATCH_COMPLETED:
+                labels_and_ids = asyncio.run(self._collect_results(job, state))
+                self.store.set_results(job['batch_id'], labels_and_ids, "done")
+                self._stats['completed'] += 1
+            elif status in BATCH_FAILED_STATES:
+                # 배치가 끝내 실행되지 않았으면 원본 메시지를 온라인 경로로 처리합니다.
+                logger.warning(f"Batch {job['batch_id']} {status}; classifying job online")
+                labels_and_ids = self.data_processor.process_data(_MessageRequest(job['message']),
+                                                                  Operation.CLASSIFY)
+                self.store.set_results(job['batch_id'], labels_and_ids, "fallback")
+                self._stats['fallbacks'] += 1
+            else:
+                if status != job['status']:
+                    self.store.set_status(job['batch_id'], status)
+                return 0
+            metrics.observe('batch_turnaround_seconds', time.time() - job['submitted_at'])
+
+        on_complete(job['correlation_id'], job['message'], labels_and_ids)
+        self.store.finish(job['batch_id'])
+        return 1
+
+    async def _collect_results(self, job, state):
+        """
+        배치 결과 파일을 DTO id별 레이블로 되돌리고 제출할 때 저장한 바이트로 이미지를 저장합니다.
+
+        결과 파일에 없거나 오류로 끝난 요청은 온라인으로 다시 분류하고, 응답에서 빠진 이미지는 'NONE'으로 둡니다.
+
+        Args:
+            job (dict): BatchJobStore.pending() 항목.
+            state (dict): 클라이언트의 retrieve() 결과.
+
+        Returns:
+            list of dict: {"label", "ids"} 목록 (온라인 경로의 process_data 결과와 같은 형식).
+        """
+        message = job['message']
+        test_class = message.get("testClass", [])
+        dtos = message.get("testImages", [])
+        workspace_id = message.get("workspaceId")
+
+        bodies = {}
+        if state.get('output_file_id'):
+            for line in (await self.client.content(state['output_file_id'])).splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") == 200 and not result.get("error"):
+                    bodies[result["custom_id"]] = response.get("body") or {}
+
+        labels_to_ids = {}
+        for custom_id, indices in job['requests'].items():
+            urls = [dtos[index]["url"] for index in indices]
+            image_data = await asyncio.to_thread(self.store.image_data, job['batch_id'], urls)
+            if custom_id in bodies:
+                labels = self.classification_service.parse_batch_response(bodies[custom_id], test_class, len(urls))
+            else:
+                self._stats['requeried_requests'] += 1
+                try:
+                    labels = await self.classification_service.classify_images(urls, test_class,
+                                                                               image_data=image_data)
+                except Exception as e:
+                    logger.error(f"Online retry of batch request {custom_id} failed: {e}")
+                    labels = [None] * len(urls)
+
+            for index, url, label in zip(indices, urls, labels):
+                label = label or "NONE"
+                dto = dtos[index]
+                await asyncio.to_thread(ImageService.save_image, url, label, workspace_id, dto['fileName'],
+                                        image_bytes=image_data.get(url))
+                if "id" in dto:
+                    labels_to_ids.setdefault(label, []).append(dto["id"])
+                else:
+                    logger.warning(f"'id' is not found in dto: {dto}")
+
+        logger.info(f"Batch {job['batch_id']} completed: {sum(map(len, labels_to_ids.values()))} images")
+        return [{"label": label, "ids": ids} for label, ids in labels_to_ids.items()]
+
+    def get_stats(self):
+        """
+        대량 모드 통계를 반환합니다.
+
+        Returns:
+            dict: 제출/완료/폴백 배치 수, 제출 이미지 수, 온라인으로 다시 보낸 요청 수, 대기 중인 배치 수.
+        """
+        stats = dict(self._stats)
+        stats['pending'] = len(self.store.pending()) if self._store is not None else 0
+        return stats
+
+
+class _MessageRequest:
+    """DataProcessor.process_data에 메시지를 넘기기 위한 요청 객체 (request.json만 사용)."""
+
+    def __init__(self, message):
+        self.json = message
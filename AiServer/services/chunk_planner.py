@@ -0,0 +1,281 @@
+import logging
+import math
+import threading
+from collections import OrderedDict
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 프로바이더별 요청 한도 기본값 (알려진 API 한도보다 보수적으로 설정)
+DEFAULT_PROVIDER_LIMITS = {
+    'openrouter': {'max_images': 20, 'max_request_bytes': 20 * 1024 ** 2, 'max_prompt_tokens': 100000,
+                   'max_output_tokens': 8192, 'tokens_per_image': 258},
+    'gemini': {'max_images': 50, 'max_request_bytes': 20 * 1024 ** 2, 'max_prompt_tokens': 200000,
+               'max_output_tokens': 8192, 'tokens_per_image': 258},
+    'openai': {'max_images': 50, 'max_request_bytes': 20 * 1024 ** 2, 'max_prompt_tokens': 120000,
+               'max_output_tokens': 16384, 'tokens_per_image': 255},
+    'anthropic': {'max_images': 100, 'max_request_bytes': 30 * 1024 ** 2, 'max_prompt_tokens': 180000,
+                  'max_output_tokens': 8192, 'tokens_per_image': 70},
+}
+FALLBACK_PROVIDER_LIMITS = {'max_images': 10, 'max_request_bytes': 10 * 1024 ** 2, 'max_prompt_tokens': 32000,
+                            'max_output_tokens': 4096, 'tokens_per_image': 258}
+
+PROMPT_OVERHEAD_TOKENS = 150      # 지시문과 도구 스키마 고정 부분
+INDEX_TEXT_TOKENS = 6             # 이미지 앞의 "Image N:" 텍스트
+OUTPUT_TOKENS_PER_IMAGE = 20      # {"index": N, "category": "..."} 한 항목
+COMPACT_OUTPUT_TOKENS_PER_IMAGE = 2  # 압축 스키마의 정수 코드와 구분자
+REQUEST_OVERHEAD_BYTES = 4096     # 메시지/스키마 JSON
+IMAGE_PART_OVERHEAD_BYTES = 96    # image_url 항목 JSON
+DEFAULT_INLINE_IMAGE_BYTES = 16 * 1024  # 관측 전 base64 썸네일 크기 추정치
+INLINE_BYTES_SMOOTHING = 0.2
+MAX_ENCODED_SIZES = 10000         # 요청에 실제로 인라인된 크기를 기억하는 URL 수
+
+PAYLOAD_ERROR_MARKERS = (
+    '413', 'too large', 'payload', 'request entity', 'too many images', 'context length', 'context_length',
+    'context window', 'maximum context', 'token limit', 'too many tokens', 'max_tokens', 'exceeds the limit',
+)
+
+
+def is_payload_error(error):
+    """
+    요청 크기(이미지 수, 바이트, 토큰)가 한도를 넘어 실패한 오류인지 판단합니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        bool: 요청 크기 관련 오류이면 True.
+    """
+    if "ContextWindow" in type(error).__name__:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in PAYLOAD_ERROR_MARKERS)
+
+
+class ChunkPlanner:
+    """
+    예상 요청 크기와 토큰 비용을 기준으로 이미지를 청크로 묶는 플래너.
+
+    각 이미지의 요청 바이트(인라인 썸네일 또는 URL)와 토큰(이미지, 인덱스 텍스트, 출력 항목)을
+    추정하고, 카테고리 수에 따른 도구 스키마 비용을 더해 프로바이더 한도 안에 들어가도록
+    first-fit decreasing 방식으로 빈 패킹합니다. 폴백 프로바이더로 재전송할 수 있도록 설정된
+    모든 프로바이더 한도의 최솟값을 사용합니다.
+
+    유효 이미지 수 한도는 관측 결과로 조정됩니다. 크기 관련 오류가 나면 실패한 청크의 절반으로
+    줄이고, 목표 지연 시간 안에 성공하면 하나씩 늘립니다 (설정된 상한까지).
+    요청에 실제로 인라인된 URL별 크기를 기억해 두고 같은 URL을 다시 계획할 때 사용하며,
+    처음 보는 URL은 인라인 썸네일 크기의 지수 이동 평균으로 추정합니다.
+
+    Attributes:
+        max_images_cap (int): 청크당 이미지 수의 절대 상한.
+        target_latency (float): 이 시간(초)을 넘긴 요청은 청크를 줄이는 신호로 사용합니다.
+        output_schema (str): 출력 토큰 추정에 사용할 분류 스키마 ('full' 또는 'compact').
+    """
+
+    def __init__(self, max_images_cap=None, target_latency=None, output_schema=None):
+        self.max_images_cap = config.CHUNK_PLANNER_MAX_IMAGES if max_images_cap is None else max_images_cap
+        self.target_latency = (config.CHUNK_PLANNER_TARGET_LATENCY if target_latency is None
+                               else target_latency)
+        self.output_schema = config.LLM_OUTPUT_SCHEMA if output_schema is None else output_schema
+        self._lock = threading.Lock()
+        self._learned = {}
+        self._inline_image_bytes = DEFAULT_INLINE_IMAGE_BYTES
+        self._encoded_sizes = OrderedDict()
+
+    def _provider_state(self, provider):
+        state = self._learned.get(provider)
+        if state is None:
+            limits = DEFAULT_PROVIDER_LIMITS.get(provider, FALLBACK_PROVIDER_LIMITS)
+            state = {
+                'max_images': min(limits['max_images'], self.max_images_cap),
+                'max_request_bytes': limits['max_request_bytes'],
+                'payload_errors': 0,
+                'slow_requests': 0,
+            }
+            self._learned[provider] = state
+        return state
+
+    def get_limits(self, providers):
+        """
+        주어진 프로바이더들에 공통으로 적용할 유효 한도를 반환합니다.
+
+        Args:
+            providers (list of str): 요청을 보낼 수 있는 프로바이더 목록.
+
+        Returns:
+            dict: max_images, max_request_bytes, max_prompt_tokens, max_output_tokens, tokens_per_image.
+        """
+        if not providers:
+            providers = [None]
+        with self._lock:
+            limits = []
+            for provider in providers:
+                base = DEFAULT_PROVIDER_LIMITS.get(provider, FALLBACK_PROVIDER_LIMITS)
+                state = self._provider_state(provider)
+                limits.append({**base, 'max_images': state['max_images'],
+                               'max_request_bytes': state['max_request_bytes']})
+        return {
+            'max_images': min(limit['max_images'] for limit in limits),
+            'max_request_bytes': min(limit['max_request_bytes'] for limit in limits),
+            'max_prompt_tokens': min(limit['max_prompt_tokens'] for limit in limits),
+            'max_output_tokens': min(limit['max_output_tokens'] for limit in limits),
+            'tokens_per_image': max(limit['tokens_per_image'] for limit in limits),
+        }
+
+    def estimate_image(self, url, inline, tokens_per_image, encoded_size=None):
+        """
+        이미지 하나가 요청에 더하는 바이트와 토큰을 추정합니다.
+
+        Args:
+            url (str): 이미지 URL.
+            inline (bool): base64 썸네일로 인라인되는지 여부.
+            tokens_per_image (int): 이미지 한 장의 입력 토큰 수.
+            encoded_size (int, optional): 이전 요청에 실제로 인라인된 크기. 주어지면 추정치 대신 사용합니다.
+
+        Returns:
+            tuple: (요청 바이트, 입력 토큰, 출력 토큰)
+        """
+        if encoded_size is not None:
+            size = encoded_size
+        else:
+            size = self._inline_image_bytes if inline else len(url)
+        return (size + IMAGE_PART_OVERHEAD_BYTES, tokens_per_image + INDEX_TEXT_TOKENS,
+                self.output_tokens_per_image(self.output_schema))
+
+    @staticmethod
+    def output_tokens_per_image(output_schema):
+        """분류 결과 한 항목의 출력 토큰 수를 스키마에 따라 추정합니다."""
+        return COMPACT_OUTPUT_TOKENS_PER_IMAGE if output_schema == 'compact' else OUTPUT_TOKENS_PER_IMAGE
+
+    @staticmethod
+    def estimate_schema_tokens(categories):
+        """도구 스키마의 enum에 들어가는 카테고리 목록의 토큰 수를 추정합니다 (약 4자당 1토큰)."""
+        return sum(math.ceil(len(category) / 4) + 2 for category in categories)
+
+    def estimate_request_tokens(self, provider, image_parts, result_count, categories, output_schema=None):
+        """
+        요청 하나의 입력+출력 토큰 수를 추정합니다 (TPM 한도 예약용).
+
+        Args:
+            provider (str): 요청을 보낼 프로바이더.
+            image_parts (int): 요청에 포함되는 이미지 파트 수.
+            result_count (int): 분류 결과 항목 수.
+            categories (list of str): 분류 카테고리 목록.
+            output_schema (str, optional): 분류 스키마. 생략하면 플래너의 설정을 따릅니다.
+
+        Returns:
+            int: 예상 토큰 수.
+        """
+        tokens_per_image = DEFAULT_PROVIDER_LIMITS.get(provider, FALLBACK_PROVIDER_LIMITS)['tokens_per_image']
+        output_tokens = self.output_tokens_per_image(output_schema or self.output_schema)
+        return (PROMPT_OVERHEAD_TOKENS + self.estimate_schema_tokens(categories)
+                + image_parts * (tokens_per_image + INDEX_TEXT_TOKENS) + result_count * output_tokens)
+
+    def plan(self, pairs, categories, providers, is_inline):
+        """
+        (DTO, URL) 목록을 한도 안에 들어가는 청크로 묶습니다.
+
+        Args:
+            pairs (list): (DTO, URL) 튜플 목록.
+            categories (list of str): 분류 카테고리 목록.
+            providers (list of str): 요청을 보낼 수 있는 프로바이더 목록 (우선순위 순).
+            is_inline (callable): URL을 받아 base64로 인라인되는지 반환하는 함수.
+
+        Returns:
+            list of list: 청크 목록. 각 청크 안의 순서는 입력 순서를 따릅니다.
+        """
+        if not pairs:
+            return []
+        limits = self.get_limits(providers)
+        fixed_tokens = PROMPT_OVERHEAD_TOKENS + self.estimate_schema_tokens(categories)
+        token_budget = limits['max_prompt_tokens'] - fixed_tokens
+        byte_budget = limits['max_request_bytes'] - REQUEST_OVERHEAD_BYTES
+
+        with self._lock:
+            encoded_sizes = [self._encoded_sizes.get(url) for _, url in pairs]
+        estimates = [self.estimate_image(url, is_inline(url), limits['tokens_per_image'], encoded_size)
+                     for (_, url), encoded_size in zip(pairs, encoded_sizes)]
+        order = sorted(range(len(pairs)), key=lambda index: estimates[index][0], reverse=True)
+
+        bins = []  # [바이트, 입력 토큰, 출력 토큰, 인덱스 목록]
+        for index in order:
+            size, tokens, output_tokens = estimates[index]
+            for chunk in bins:
+                if (len(chunk[3]) < limits['max_images']
+                        and chunk[0] + size <= byte_budget
+                        and chunk[1] + tokens <= token_budget
+                        and chunk[2] + output_tokens <= limits['max_output_tokens']):
+                    chunk[0] += size
+                    chunk[1] += tokens
+                    chunk[2] += output_tokens
+                    chunk[3].append(index)
+                    break
+            else:
+                bins.append([size, tokens, output_tokens, [index]])
+
+        logger.info(f"Chunk planner: {len(pairs)} images -> {len(bins)} chunks "
+                    f"(max_images={limits['max_images']}, providers={providers})")
+        return [[pairs[index] for index in sorted(chunk[3])] for chunk in bins]
+
+    def record_result(self, provider, image_count, request_bytes, latency, error=None,
+                      inline_bytes=0, inline_count=0, encoded_sizes=None):
+        """
+        LLM 요청 결과를 관측하여 유효 한도와 썸네일 크기 추정치를 갱신합니다.
+
+        Args:
+            provider (str): 요청을 보낸 프로바이더.
+            image_count (int): 요청에 담긴 이미지 수.
+            request_bytes (int): 요청의 이미지 파트 바이트 수.
+            latency (float): 요청 소요 시간(초).
+            error (Exception, optional): 요청이 실패한 경우의 예외.
+            inline_bytes (int): base64로 인라인된 썸네일의 전체 바이트 수.
+            inline_count (int): base64로 인라인된 썸네일 수.
+            encoded_sizes (dict, optional): 원본 URL을 키로 하는 실제 인라인 data URL 크기.
+        """
+        with self._lock:
+            state = self._provider_state(provider)
+            if error is not None:
+                if is_payload_error(error):
+                    state['payload_errors'] += 1
+                    state['max_images'] = max(1, min(state['max_images'], image_count // 2))
+                    if request_bytes:
+                        state['max_request_bytes'] = min(state['max_request_bytes'], int(request_bytes * 0.8))
+                    logger.warning(f"Chunk planner: payload error from {provider} with {image_count} images, "
+                                   f"max_images -> {state['max_images']}")
+                return
+
+            if inline_count:
+                observed = inline_bytes / inline_count
+                self._inline_image_bytes += INLINE_BYTES_SMOOTHING * (observed - self._inline_image_bytes)
+            for url, size in (encoded_sizes or {}).items():
+                self._encoded_sizes[url] = size
+                self._encoded_sizes.move_to_end(url)
+            while len(self._encoded_sizes) > MAX_ENCODED_SIZES:
+                self._encoded_sizes.popitem(last=False)
+
+            if latency > self.target_latency:
+                state['slow_requests'] += 1
+                state['max_images'] = max(1, min(state['max_images'], int(image_count * 0.75)))
+            elif image_count >= state['max_images']:
+                limit = DEFAULT_PROVIDER_LIMITS.get(provider, FALLBACK_PROVIDER_LIMITS)['max_images']
+                state['max_images'] = min(state['max_images'] + 1, limit, self.max_images_cap)
+
+    def get_stats(self):
+        """
+        플래너 상태를 반환합니다.
+
+        Returns:
+            dict: 프로바이더별 유효 한도, 학습된 인라인 썸네일 크기와 실제 크기를 기억하는 URL 수.
+        """
+        with self._lock:
+            return {
+                'inline_image_bytes': round(self._inline_image_bytes),
+                'encoded_sizes': len(self._encoded_sizes),
+                'providers': {provider: dict(state) for provider, state in self._learned.items()},
+            }
+
+
+chunk_planner = ChunkPlanner()
+metrics.register_collector('chunk_planner', chunk_planner.get_stats)
@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Optional
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker pattern implementation for connection resilience.
+
+    RabbitMQ 연결과 LLM 프로바이더 호출에서 함께 사용합니다. half_open_max_calls를 지정하면
+    반열림 상태에서 동시에 허용하는 탐색(probe) 호출 수를 제한합니다.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 60.0,
+                 half_open_max_calls: Optional[int] = None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_count = 0
+        self.last_failure_time = None
+        self.state = 'CLOSED'  # CLOSED(닫힘), OPEN(열림), HALF_OPEN(반열림)
+        self.half_open_calls = 0
+        self._lock = threading.Lock()
+    
+    def can_execute(self) -> bool:
+        """회로가 실행을 허용하는지 확인합니다."""
+        with self._lock:
+            if self.state == 'CLOSED':
+                return True
+            elif self.state == 'OPEN':
+                if time.time() - self.last_failure_time >= self.recovery_timeout:
+                    self.state = 'HALF_OPEN'
+                    self.half_open_calls = 1
+                    return True
+                return False
+            else:  # HALF_OPEN
+                if self.half_open_max_calls is not None and self.half_open_calls >= self.half_open_max_calls:
+                    return False
+                self.half_open_calls += 1
+                return True
+    
+    def record_success(self):
+        """성공적인 작업을 기록합니다."""
+        with self._lock:
+            self.failure_count = 0
+            self.half_open_calls = 0
+            self.state = 'CLOSED'
+    
+    def record_failure(self):
+        """실패한 작업을 기록합니다."""
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            
+            if self.state == 'HALF_OPEN' or self.failure_count >= self.failure_threshold:
+                self.state = 'OPEN'
+                self.half_open_calls = 0
+
+    def release(self):
+        """성공도 실패도 아닌 결과로 끝난 호출의 반열림 탐색 슬롯을 반환합니다."""
+        with self._lock:
+            if self.state == 'HALF_OPEN' and self.half_open_calls > 0:
+                self.half_open_calls -= 1
@@ -1,11 +1,81 @@
 import asyncio
+import json
 import logging
+import math
 import os
+import threading
+import time
 from litellm import acompletion
 from config import config
+from services.chunk_planner import IMAGE_PART_OVERHEAD_BYTES, chunk_planner
+from services.hedging import hedge_budget
+from services.provider_health import is_key_failure, provider_health
+from services.provider_router import provider_router
+from services.concurrency_limiter import OUTCOME_ERROR, OUTCOME_SUCCESS, classify_outcome, get_provider_limiter
+from services.key_pool import get_key_pool
+from services.rate_limiter import is_rate_limit_error, parse_retry_after
 from services.image_service import ImageService
-from utils.function_schemas import get_image_classification_tool
-from exceptions.custom_exceptions import InvalidAPIKeyError
+from utils.category_groups import describe_category_groups, resolve_category_groups
+from utils.function_schemas import decode_compact_label, get_compact_classification_tool, get_image_classification_tool
+from utils.incremental_json import ArrayItemStreamParser, IntArrayStreamParser
+from exceptions.custom_exceptions import ExternalServiceError, InvalidAPIKeyError, RateLimitError
+from utils.metrics import metrics
+
+DEFAULT_INSTRUCTION = ("Classify the following images based on the provided categories. "
+                       "Each image is preceded by its index number.")
+GRID_INSTRUCTION = ("Each picture below is a contact sheet: a grid of separate images divided by red lines. "
+                    "Every cell shows its image index in the top-left corner. Classify each numbered cell "
+                    "independently based on the provided categories, using the cell number as the index.")
+# 이미지 항목의 detail 힌트를 전달하는 프로바이더 (나머지는 썸네일 크기만 적용)
+DETAIL_HINT_PROVIDERS = ('openai', 'openrouter')
+COMPACT_INSTRUCTION = (" Answer with the category codes listed in the tool description, "
+                       "exactly one code per image in index order.")
+
+
+class OmissionTracker:
+    """
+    프로바이더/모델별로 응답에서 빠졌거나 유효하지 않은 이미지 비율을 집계합니다.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, requested, omitted):
+        """
+        응답 하나의 요청 이미지 수와 누락 이미지 수를 기록합니다.
+
+        Args:
+            provider (str): LLM 프로바이더 이름.
+            model (str): 모델 ID.
+            requested (int): 요청한 이미지 수.
+            omitted (int): 응답에서 빠졌거나 유효하지 않은 이미지 수.
+        """
+        key = f"{provider}:{model}"
+        with self._lock:
+            counts = self._counts.setdefault(key, {'requested': 0, 'omitted': 0})
+            counts['requested'] += requested
+            counts['omitted'] += omitted
+        if omitted:
+            metrics.increment(f"llm_omitted_images.{key}", omitted)
+
+    def get_stats(self):
+        """
+        프로바이더/모델별 누락 통계를 반환합니다.
+
+        Returns:
+            dict: 'provider:model'을 키로 하는 요청/누락 이미지 수와 누락률.
+        """
+        with self._lock:
+            return {
+                key: {**counts, 'omission_rate': round(counts['omitted'] / counts['requested'], 4)
+                      if counts['requested'] else 0.0}
+                for key, counts in self._counts.items()
+            }
+
+
+omission_tracker = OmissionTracker()
+metrics.register_collector('llm_omissions', omission_tracker.get_stats)
 
 
 class ClassificationService:
@@ -27,6 +97,7 @@ class ClassificationService:
         우선순위에 따라 사용 가능한 API 키를 확인하고 LLM 설정을 초기화합니다.
         """
         self.config = config
+        self.output_schema = self.config.LLM_OUTPUT_SCHEMA
         self.available_configs = self.config.get_all_available_llm_configs()
         self.primary_config = self.config.get_llm_config() if self.available_configs else None
         
@@ -36,21 +107,394 @@ class ClassificationService:
         else:
             logging.error("No API keys available for LLM services")
 
-    async def classify_images(self, images, categories):
+    async def classify_images(self, images, categories, image_data=None, grid_size=None, on_label=None,
+                              report=None, category_groups=None):
         """
         주어진 이미지들을 지정된 카테고리로 분류합니다.
 
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int, optional): 주어지면 이미지를 grid_size x grid_size 격자 이미지로 합쳐 전송합니다.
+            on_label (callable, optional): 스트리밍 모드에서 레이블이 확정될 때마다 (인덱스, 레이블)로 호출됩니다.
+            report (dict, optional): 해상도 단계 상향, 캐스케이드, 계층 분류 통계를 누적할 딕셔너리.
+            category_groups (dict, optional): 계층 분류에 사용할 그룹 (classify_images_detailed 참고).
+
+        Returns:
+            list of str: 각 이미지에 대한 분류 결과 목록.
+
+        Raises:
+            RateLimitError: 마지막 프로바이더의 한도 대기가 요청 타임아웃을 넘은 경우.
+            Exception: 모든 API 호출이 실패한 경우.
+        """
+        labels, _ = await self.classify_images_detailed(images, categories, image_data, grid_size, on_label,
+                                                        report, category_groups)
+        return labels
+
+    async def classify_images_detailed(self, images, categories, image_data=None, grid_size=None, on_label=None,
+                                       report=None, category_groups=None):
+        """
+        주어진 이미지들을 지정된 카테고리로 분류하고 결과를 반환한 모델을 함께 반환합니다.
+
+        카테고리 그룹이 있으면 계층 분류(_classify_hierarchical)를, 없으면 평면 분류(_classify_flat)를
+        사용합니다. category_groups를 생략하면 카테고리 수에 따라 이름으로 자동 그룹을 만듭니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int, optional): 주어지면 이미지를 grid_size x grid_size 격자 이미지로 합쳐 전송하고
+                셀 번호를 인덱스로 분류합니다.
+            on_label (callable, optional): 레이블이 확정될 때마다 (images에서의 인덱스, 레이블)로 호출됩니다.
+            report (dict, optional): 해상도 단계 상향('resolution'), 캐스케이드 계층별('cascade'),
+                계층 분류('hierarchical') 통계를 누적할 딕셔너리.
+            category_groups (dict, optional): 그룹 이름을 키로 하는 카테고리 목록. 빈 딕셔너리이면 평면 분류.
+
+        Returns:
+            tuple: (각 이미지에 대한 분류 결과 목록, 1차 분류 결과를 반환한 모델 ID).
+
+        Raises:
+            RateLimitError: 마지막 프로바이더의 한도 대기가 요청 타임아웃을 넘은 경우.
+            Exception: 모든 API 호출이 실패한 경우.
+        """
+        groups = self.resolve_category_groups(categories) if category_groups is None else category_groups
+        if groups:
+            return await self._classify_hierarchical(images, categories, groups, image_data, grid_size, on_label,
+                                                     report)
+        return await self._classify_flat(images, categories, image_data, grid_size, on_label, report)
+
+    def resolve_category_groups(self, categories, user_groups=None):
+        """
+        계층 분류에 사용할 카테고리 그룹을 설정에 따라 결정합니다.
+
+        Args:
+            categories (list of str): 분류 카테고리 목록.
+            user_groups (dict, optional): 요청에 포함된 그룹 이름별 카테고리 목록.
+
+        Returns:
+            dict: 그룹 이름을 키로 하는 카테고리 목록. 계층 분류를 쓰지 않으면 빈 딕셔너리.
+        """
+        return resolve_category_groups(categories, user_groups, self.config.LLM_HIERARCHICAL_MIN_CATEGORIES,
+                                       self.config.LLM_HIERARCHICAL_GROUP_SIZE)
+
+    async def _classify_hierarchical(self, images, categories, groups, image_data=None, grid_size=None,
+                                     on_label=None, report=None):
+        """
+        그룹을 먼저 고르고 그룹 안의 카테고리를 고르는 2단계로 분류합니다.
+
+        1단계는 그룹 이름만 enum으로 보내고, 2단계는 1단계 결과별로 이미지를 모아 그룹의 카테고리만
+        enum으로 보내므로 요청마다 다시 보내는 스키마가 작아집니다. 이미지는 두 번 전송되므로
+        평면 분류 대비 예상 프롬프트 토큰과 단계별 소요 시간을 report['hierarchical']에 누적합니다.
+        1단계에서 'NONE'이거나 답을 받지 못한 이미지는 그룹이 맞지 않았을 수 있으므로 전체 카테고리로
+        한 번 더 평면 분류합니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 전체 카테고리 목록.
+            groups (dict): 그룹 이름을 키로 하는 카테고리 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int, optional): 격자 크기.
+            on_label (callable, optional): 최종 레이블이 확정될 때마다 (인덱스, 레이블)로 호출됩니다.
+            report (dict, optional): 통계를 누적할 딕셔너리.
+
+        Returns:
+            tuple: (각 이미지에 대한 분류 결과 목록, 1단계 분류 결과를 반환한 모델 ID).
+
+        Raises:
+            Exception: 1단계 또는 2단계 분류가 실패한 경우.
+        """
+        # 이름만으로 구성을 알 수 없는 그룹은 enum 값 대신 도구 설명에 한 번만 적습니다.
+        group_notes = describe_category_groups(groups)
+        started_at = time.monotonic()
+        group_labels, model = await self._classify_flat(images, list(groups), image_data, grid_size, None, report,
+                                                        category_notes=group_notes)
+        group_seconds = time.monotonic() - started_at
+
+        indices_by_group = {}
+        ungrouped = []
+        for index, group in enumerate(group_labels):
+            if group in groups:
+                indices_by_group.setdefault(group, []).append(index)
+            else:
+                ungrouped.append(index)
+        labels = ["NONE"] * len(images)
+
+        async def classify_group(group_categories, indices):
+            group_label = (lambda index, label: on_label(indices[index], label)) if on_label else None
+            group_result, _ = await self._classify_flat([images[index] for index in indices], group_categories,
+                                                        image_data, grid_size, group_label, report)
+            for index, label in zip(indices, group_result):
+                labels[index] = label
+
+        passes = [(groups[group], indices) for group, indices in indices_by_group.items()]
+        if ungrouped:
+            passes.append((categories, ungrouped))
+        started_at = time.monotonic()
+        results = await asyncio.gather(*(classify_group(group_categories, indices)
+                                         for group_categories, indices in passes), return_exceptions=True)
+        category_seconds = time.monotonic() - started_at
+
+        count = len(images)
+        prompt_tokens = chunk_planner.estimate_request_tokens(None, count, count, list(groups)) + (
+            math.ceil(len(group_notes) / 4) if group_notes else 0) + sum(
+            chunk_planner.estimate_request_tokens(None, len(indices), len(indices), group_categories)
+            for group_categories, indices in passes
+        )
+        flat_prompt_tokens = chunk_planner.estimate_request_tokens(None, count, count, categories)
+        metrics.increment('llm_hierarchical_schema_tokens_saved',
+                          max(0, flat_prompt_tokens - prompt_tokens))
+        if report is not None:
+            stats = report.setdefault('hierarchical', {
+                'groups': len(groups), 'chunks': 0, 'requests': 0, 'prompt_tokens': 0, 'flat_prompt_tokens': 0,
+                'group_pass_seconds': 0.0, 'category_pass_seconds': 0.0, 'flat_fallback_images': 0,
+            })
+            stats['chunks'] += 1
+            stats['requests'] += 1 + len(passes)
+            stats['flat_fallback_images'] += len(ungrouped)
+            stats['prompt_tokens'] += prompt_tokens
+            stats['flat_prompt_tokens'] += flat_prompt_tokens
+            stats['group_pass_seconds'] += group_seconds
+            stats['category_pass_seconds'] += category_seconds
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+        return labels, model
+
+    async def _classify_flat(self, images, categories, image_data=None, grid_size=None, on_label=None,
+                             report=None, category_notes=None):
+        """
+        모든 카테고리를 하나의 enum으로 보내 이미지를 분류합니다.
+
         이 메서드는 사용 가능한 API들을 우선순위에 따라 시도하여 이미지를 분류합니다.
         각 이미지는 제공된 카테고리 중 하나로 분류되며, 적절한 카테고리가 없는 경우 'NONE'으로 분류됩니다.
+        응답에서 빠졌거나 유효하지 않은 인덱스의 이미지만 모아 최대 LLM_MISSING_RETRY_COUNT번 다시 질의하고
+        결과를 합칩니다. 끝까지 답을 받지 못한 이미지는 'NONE'이 됩니다.
+
+        스트리밍 모드(LLM_STREAMING_ENABLED)에서는 도구 호출 인자를 조각 단위로 파싱하여 항목이 완성되는
+        즉시 on_label을 호출합니다. 폴백, 헤징, 재질의로 같은 이미지가 여러 번 답을 받더라도 on_label은
+        이미지마다 한 번만 호출되며, 반환값도 먼저 전달된 레이블을 따릅니다.
+
+        해상도 단계 상향(LLM_RESOLUTION_ESCALATION, 격자 모드 제외)에서는 프로바이더별 작은 썸네일로 먼저
+        분류하고, 'NONE'이거나 끝내 답을 받지 못한 이미지만 큰 썸네일로 한 번 더 분류합니다.
+        1차 결과의 'NONE'은 상향될 수 있으므로 on_label로 먼저 전달하지 않습니다.
+
+        모델 캐스케이드(LLM_CASCADE_ENABLED)에서는 각 프로바이더의 가장 저렴한 계층 모델이 confidence와 함께
+        분류하고, confidence가 임계값보다 낮은 이미지만 다음 계층 모델로 넘깁니다. 확신이 낮은 레이블은
+        on_label로 먼저 전달하지 않습니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int, optional): 주어지면 이미지를 grid_size x grid_size 격자 이미지로 합쳐 전송하고
+                셀 번호를 인덱스로 분류합니다.
+            on_label (callable, optional): 레이블이 확정될 때마다 (images에서의 인덱스, 레이블)로 호출됩니다.
+            report (dict, optional): 해상도 단계 상향('resolution')과 캐스케이드 계층별('cascade') 통계를
+                누적할 딕셔너리.
+            category_notes (str, optional): 도구 설명에 덧붙일 카테고리 설명 (계층 분류의 그룹 구성).
+
+        Returns:
+            tuple: (각 이미지에 대한 분류 결과 목록, 1차 분류 결과를 반환한 모델 ID).
+
+        Raises:
+            RateLimitError: 마지막 프로바이더의 한도 대기가 요청 타임아웃을 넘은 경우.
+            Exception: 모든 API 호출이 실패한 경우.
+        """
+        emitted = {}
+
+        def emit(index, label):
+            if index in emitted:
+                return
+            emitted[index] = label
+            if on_label:
+                on_label(index, label)
+
+        escalate = self.config.LLM_RESOLUTION_ESCALATION and not grid_size
+        detail = 'low' if escalate else None
+        thresholds = self._cascade_thresholds()
+        tier = 0 if thresholds else None
+        min_confidence = thresholds[0] if thresholds else None
+        first_emit = (lambda index, label: label != "NONE" and emit(index, label)) if escalate else emit
+
+        started_at = time.monotonic()
+        labels, model, confidences = await self._classify_once(
+            images, categories, image_data, grid_size, first_emit, detail, tier, min_confidence,
+            category_notes=category_notes
+        )
+        if thresholds:
+            self._record_tier(report, 0, len(images), time.monotonic() - started_at)
+        for attempt in range(self.config.LLM_MISSING_RETRY_COUNT):
+            missing = [index for index, label in enumerate(labels) if label is None]
+            if not missing:
+                break
+            logging.warning(f"Re-querying {len(missing)} of {len(images)} images missing from the response "
+                            f"(attempt {attempt + 1})")
+            metrics.increment('llm_requery_requests')
+            try:
+                retry_labels, _, retry_confidences = await self._classify_once(
+                    [images[index] for index in missing], categories, image_data, grid_size,
+                    lambda index, label, missing=missing: first_emit(missing[index], label), detail,
+                    tier, min_confidence, category_notes=category_notes
+                )
+            except Exception as e:
+                logging.error(f"Re-query of missing images failed: {e}")
+                break
+            for index, label, confidence in zip(missing, retry_labels, retry_confidences):
+                labels[index] = label
+                confidences[index] = confidence
+        if escalate:
+            await self._escalate_resolution(images, categories, image_data, labels, confidences, emitted, emit,
+                                            report, tier, min_confidence, category_notes)
+        if thresholds:
+            await self._escalate_cascade(images, categories, image_data, grid_size, labels, confidences, emitted,
+                                         emit, report, thresholds, 'high' if escalate else None, category_notes)
+        for index, label in emitted.items():
+            labels[index] = label
+        return [label or "NONE" for label in labels], model
+
+    def _cascade_thresholds(self):
+        """
+        모델 캐스케이드의 계층 전환별 confidence 임계값을 반환합니다.
+
+        Returns:
+            list of float: 계층 i에서 i+1로 넘길 임계값 목록. 캐스케이드가 꺼져 있거나 계층이 하나뿐이면 빈 목록.
+        """
+        if not self.config.LLM_CASCADE_ENABLED or not self.available_configs:
+            return []
+        tiers = max(len(llm_config.get('cascade_models') or [llm_config['model']])
+                    for llm_config in self.available_configs)
+        thresholds = self.config.get_cascade_thresholds() or [0.8]
+        return [thresholds[min(index, len(thresholds) - 1)] for index in range(tiers - 1)]
+
+    def first_tier_model(self, llm_config):
+        """프로바이더 설정으로 1차 분류에 사용할 모델 ID를 반환합니다 (캐스케이드가 꺼져 있으면 기본 모델)."""
+        return self._tier_model(llm_config, 0 if self._cascade_thresholds() else None)
+
+    @staticmethod
+    def _record_tier(report, tier, image_count, seconds):
+        """캐스케이드 계층별 분류 이미지 수, 요청 수, 소요 시간을 누적합니다."""
+        metrics.increment(f'llm_cascade_tier{tier}_images', image_count)
+        metrics.observe(f'llm_cascade_tier{tier}_seconds', seconds)
+        if report is not None:
+            stats = report.setdefault('cascade', {}).setdefault(tier, {'images': 0, 'calls': 0, 'seconds': 0.0})
+            stats['images'] += image_count
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+
+    async def _escalate_resolution(self, images, categories, image_data, labels, confidences, emitted, emit,
+                                   report, tier=None, min_confidence=None, category_notes=None):
+        """
+        1차(저해상도) 결과가 'NONE'이거나 없거나 확신이 낮은 이미지만 큰 썸네일로 다시 분류해 labels를 갱신합니다.
+
+        Args:
+            images (list of str): 분류한 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            labels (list): 1차 분류 결과 (제자리에서 갱신됩니다).
+            confidences (list): 인덱스별 confidence (제자리에서 갱신됩니다).
+            emitted (dict): 이미 on_label로 전달된 인덱스와 레이블.
+            emit (callable): 확정된 레이블을 전달하는 함수.
+            report (dict | None): 단계 상향 통계('resolution')를 누적할 딕셔너리.
+            tier (int, optional): 캐스케이드 계층 (1차 분류와 같은 모델을 사용합니다).
+            min_confidence (float, optional): 이 값보다 confidence가 낮은 이미지도 상향합니다.
+            category_notes (str, optional): 도구 설명에 덧붙일 카테고리 설명.
+        """
+        uncertain = [index for index, label in enumerate(labels)
+                     if index not in emitted and (label in (None, "NONE")
+                                                  or not self.is_confident(confidences[index], min_confidence))]
+        if report is not None:
+            stats = report.setdefault('resolution', {'first_pass_images': 0, 'escalated_images': 0})
+            stats['first_pass_images'] += len(images)
+            stats['escalated_images'] += len(uncertain)
+        metrics.increment('llm_resolution_first_pass_images', len(images))
+        if not uncertain:
+            return
+        logging.info(f"Escalating {len(uncertain)} of {len(images)} images to high-detail thumbnails")
+        metrics.increment('llm_resolution_escalated_images', len(uncertain))
+        try:
+            high_labels, _, high_confidences = await self._classify_once(
+                [images[index] for index in uncertain], categories, image_data, None,
+                lambda index, label: emit(uncertain[index], label), 'high', tier, min_confidence,
+                category_notes=category_notes
+            )
+        except Exception as e:
+            logging.error(f"High-detail escalation failed: {e}")
+            return
+        for index, label, confidence in zip(uncertain, high_labels, high_confidences):
+            if label is not None:
+                labels[index] = label
+                confidences[index] = confidence
+
+    async def _escalate_cascade(self, images, categories, image_data, grid_size, labels, confidences, emitted,
+                                emit, report, thresholds, detail=None, category_notes=None):
+        """
+        confidence가 계층 임계값보다 낮은 이미지만 다음(더 강한) 계층 모델로 차례로 재분류합니다.
+
+        Args:
+            images (list of str): 분류한 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int | None): 격자 크기.
+            labels (list): 현재 분류 결과 (제자리에서 갱신됩니다).
+            confidences (list): 인덱스별 confidence (제자리에서 갱신됩니다).
+            emitted (dict): 이미 on_label로 전달된 인덱스와 레이블.
+            emit (callable): 확정된 레이블을 전달하는 함수.
+            report (dict | None): 계층별 통계('cascade')를 누적할 딕셔너리.
+            thresholds (list of float): 계층 전환별 confidence 임계값.
+            detail (str, optional): 재분류에 사용할 해상도 단계.
+            category_notes (str, optional): 도구 설명에 덧붙일 카테고리 설명.
+        """
+        for tier in range(1, len(thresholds) + 1):
+            uncertain = [index for index, label in enumerate(labels)
+                         if index not in emitted
+                         and (label is None or not self.is_confident(confidences[index], thresholds[tier - 1]))]
+            if not uncertain:
+                return
+            logging.info(f"Cascading {len(uncertain)} of {len(images)} low-confidence images to tier {tier}")
+            started_at = time.monotonic()
+            try:
+                tier_labels, _, tier_confidences = await self._classify_once(
+                    [images[index] for index in uncertain], categories, image_data, grid_size,
+                    lambda index, label, uncertain=uncertain: emit(uncertain[index], label), detail, tier,
+                    thresholds[tier] if tier < len(thresholds) else None, category_notes=category_notes
+                )
+            except Exception as e:
+                logging.error(f"Cascade tier {tier} failed: {e}")
+                return
+            finally:
+                self._record_tier(report, tier, len(uncertain), time.monotonic() - started_at)
+            for index, label, confidence in zip(uncertain, tier_labels, tier_confidences):
+                if label is not None:
+                    labels[index] = label
+                    confidences[index] = confidence
+
+    async def _classify_once(self, images, categories, image_data=None, grid_size=None, on_label=None,
+                             detail=None, tier=None, min_confidence=None, category_notes=None):
+        """
+        요청 한 번(프로바이더 폴백 포함)으로 이미지를 분류합니다.
 
         Args:
             images (list of str): 분류할 이미지 URL 목록.
             categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int, optional): 주어지면 이미지를 grid_size x grid_size 격자 이미지로 합쳐 전송하고
+                셀 번호를 인덱스로 분류합니다.
+            on_label (callable, optional): 스트리밍 모드에서 항목이 완성될 때마다 (인덱스, 레이블)로 호출됩니다.
+            detail (str, optional): 'low' 또는 'high'이면 프로바이더별 해당 단계 크기의 썸네일로 모든 이미지를
+                인라인합니다 (격자 모드에서는 무시).
+            tier (int, optional): 캐스케이드 계층. 주어지면 프로바이더의 해당 계층 모델로 보내고 항목마다
+                confidence를 함께 받습니다.
+            min_confidence (float, optional): 스트리밍 모드에서 이 confidence 이상인 레이블만 먼저 전달합니다.
+            category_notes (str, optional): 도구 설명에 덧붙일 카테고리 설명.
 
         Returns:
-            list of str: 각 이미지에 대한 분류 결과 목록. 각 결과는 카테고리 문자열입니다.
+            tuple: (각 이미지에 대한 분류 결과 목록, 결과를 반환한 모델 ID, 인덱스별 confidence 목록).
+                응답에서 빠졌거나 유효하지 않은 항목의 결과와 confidence는 None입니다.
 
         Raises:
+            RateLimitError: 마지막 프로바이더의 한도 대기가 요청 타임아웃을 넘은 경우.
             Exception: 모든 API 호출이 실패한 경우.
 
         Note:
@@ -65,13 +509,48 @@ class ClassificationService:
                 }
             )
         
-        images_for_ai = ImageService.prepare_images_for_ai(images)
-        tool = get_image_classification_tool(categories)
+        # 해상도 단계가 지정되면 프로바이더마다 썸네일 크기가 다르므로 호출 직전에 준비합니다.
+        payload = None
+        if grid_size:
+            images_for_ai = await ImageService.prepare_contact_sheets_async(
+                images, image_data, grid_size, self.config.CLASSIFICATION_GRID_CELL_SIZE
+            )
+            payload = self._build_payload(images_for_ai, planner_inline=False)
+            instruction = GRID_INSTRUCTION
+        else:
+            if not detail:
+                images_for_ai = await ImageService.prepare_images_for_ai_async(images, image_data)
+                payload = self._build_payload(images_for_ai, images=images)
+            instruction = DEFAULT_INSTRUCTION
+        with_confidence = tier is not None
+        if self.output_schema == 'compact':
+            tool = get_compact_classification_tool(categories, with_confidence, category_notes)
+            instruction += COMPACT_INSTRUCTION
+        else:
+            tool = get_image_classification_tool(categories, with_confidence, category_notes)
+        # 라우팅 정책에 따라 이번 요청의 프로바이더 시도 순서를 정합니다.
+        configs = provider_router.order(self.available_configs)
+        request = {
+            'configs': configs,
+            'instruction': instruction,
+            'images': images,
+            'image_data': image_data,
+            'detail': None if grid_size else detail,
+            'payload': payload,
+            'payloads': {},
+            'tool': tool,
+            'schema': self.output_schema,
+            'categories': categories,
+            'image_count': len(images),
+            'on_label': on_label,
+            'tier': tier,
+            'min_confidence': min_confidence,
+        }
         
         failed_providers = []
         last_exception = None
         
-        for config_idx, llm_config in enumerate(self.available_configs):
+        for config_idx, llm_config in enumerate(configs):
             provider = llm_config['provider']
             
             # 이미 실패한 provider는 건너뛰기
@@ -79,57 +558,356 @@ class ClassificationService:
                 continue
             
             try:
-                if config_idx == 0:
-                    logging.info(f"Attempting classification with primary API: {provider} ({llm_config['model']})")
-                else:
-                    logging.warning(f"Fallback to API #{config_idx + 1}: {provider} ({llm_config['model']})")
-                
-                response = await acompletion(
-                    model=llm_config['model'],
-                    api_key=llm_config['api_key'],
-                    base_url=llm_config['base_url'],
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": "Classify the following images based on the provided categories. Each image is preceded by its index number.",
-                                },
-                                *images_for_ai,
-                            ],
-                        }
-                    ],
-                    tools=[tool],
-                    tool_choice={"type": "function", "function": {"name": "classify_images"}},
-                )
-                
-                result = self._parse_classification_response(response, categories, len(images))
-                
-                if config_idx == 0:
-                    logging.info(f"Classification successful with primary API: {provider}")
-                else:
-                    logging.warning(f"Classification successful with fallback API #{config_idx + 1}: {provider}")
-                
-                return result
-                
+                if self.config.LLM_HEDGING_ENABLED:
+                    return await self._call_with_hedge(config_idx, request, failed_providers)
+                return await self._call_provider(config_idx, request)
             except Exception as e:
                 last_exception = e
                 failed_providers.append(provider)
-                
-                if config_idx == 0:
-                    logging.error(f"Primary API failed ({provider}): {e}")
-                else:
-                    logging.error(f"Fallback API #{config_idx + 1} failed ({provider}): {e}")
-                
-                # 마지막 config가 아니면 다음 시도
-                if config_idx < len(self.available_configs) - 1:
-                    continue
         
         # 모든 API가 실패한 경우
         logging.error(f"All available APIs failed. Failed providers: {failed_providers}")
+        if isinstance(last_exception, RateLimitError):
+            # 마지막 프로바이더까지 한도 대기가 요청 타임아웃을 넘은 경우 호출자가 나중에 재시도할 수 있도록 그대로 전달합니다.
+            raise last_exception
         raise Exception(f"All API calls failed. Last error: {last_exception}")
 
+    @staticmethod
+    def _tier_model(llm_config, tier):
+        """캐스케이드 계층에 해당하는 프로바이더 모델을 반환합니다 (계층이 모자라면 가장 강한 모델)."""
+        if tier is None:
+            return llm_config['model']
+        models = llm_config.get('cascade_models') or [llm_config['model']]
+        return models[min(tier, len(models) - 1)]
+
+    @staticmethod
+    def _build_payload(images_for_ai, planner_inline=True, images=None):
+        """
+        메시지 콘텐츠와 함께 청크 플래너/한도 추정에 쓰는 요청 크기 정보를 묶습니다.
+
+        Args:
+            images_for_ai (list): 인덱스 텍스트와 이미지 항목으로 구성된 메시지 콘텐츠.
+            planner_inline (bool): 인라인 썸네일 크기를 청크 플래너에 학습시킬지 여부 (격자 이미지는 제외).
+            images (list of str, optional): 이미지 항목과 같은 순서의 원본 URL. 주어지면 URL별 실제 인라인
+                크기를 청크 플래너에 전달합니다.
+
+        Returns:
+            dict: images_for_ai, image_parts, request_bytes, planner_sizes.
+        """
+        # 청크 플래너가 한도와 썸네일 크기를 학습할 수 있도록 요청 크기를 기록합니다.
+        image_parts = [part["image_url"]["url"] for part in images_for_ai if part["type"] == "image_url"]
+        inline_parts = [url for url in image_parts if url.startswith("data:")] if planner_inline else []
+        encoded_sizes = ({image: len(part) for image, part in zip(images, image_parts) if part.startswith("data:")}
+                         if planner_inline and images else {})
+        return {
+            'images_for_ai': images_for_ai,
+            'image_parts': len(image_parts),
+            'request_bytes': sum(len(url) + IMAGE_PART_OVERHEAD_BYTES for url in image_parts),
+            'planner_sizes': {'inline_bytes': sum(map(len, inline_parts)), 'inline_count': len(inline_parts),
+                              'encoded_sizes': encoded_sizes},
+        }
+
+    async def _provider_payload(self, request, llm_config):
+        """
+        프로바이더에 보낼 메시지 콘텐츠를 반환합니다.
+
+        해상도 단계가 지정된 요청은 프로바이더의 단계별 썸네일 크기로 이미지를 인라인하고,
+        detail 힌트를 지원하는 프로바이더에는 힌트를 붙입니다. 같은 크기/힌트는 요청 안에서 재사용합니다.
+
+        Args:
+            request (dict): _classify_once가 준비한 요청 내용.
+            llm_config (dict): 요청을 보낼 프로바이더 설정.
+
+        Returns:
+            dict: _build_payload 형식의 요청 내용.
+        """
+        if request['payload'] is not None:
+            return request['payload']
+        low, high = llm_config.get('detail_sizes') or (self.config.LLM_LOW_DETAIL_SIZE,
+                                                       self.config.LLM_HIGH_DETAIL_SIZE)
+        size = low if request['detail'] == 'low' else high
+        hint = request['detail'] if llm_config['provider'] in DETAIL_HINT_PROVIDERS else None
+        payload = request['payloads'].get((size, hint))
+        if payload is None:
+            images_for_ai = await ImageService.prepare_images_for_ai_async(
+                request['images'], request['image_data'], max_size=(size, size), inline_all=True, detail=hint
+            )
+            payload = request['payloads'][(size, hint)] = self._build_payload(images_for_ai,
+                                                                              images=request['images'])
+        return payload
+
+    @staticmethod
+    def _chat_request(instruction, images_for_ai, tool):
+        """분류 요청의 messages/tools/tool_choice 인자를 만듭니다 (온라인 호출과 배치 파일이 같은 본문을 사용)."""
+        return {
+            'messages': [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": instruction,
+                        },
+                        *images_for_ai,
+                    ],
+                }
+            ],
+            'tools': [tool],
+            'tool_choice': {"type": "function", "function": {"name": "classify_images"}},
+        }
+
+    async def build_batch_body(self, images, categories, image_data, model):
+        """
+        배치 API 입력 파일 한 줄의 요청 본문(chat completions)을 만듭니다.
+
+        배치는 제출 후 몇 시간 뒤에 실행될 수 있으므로 원본 URL 대신 이미 받은 이미지를 모두
+        썸네일로 인라인합니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 가능한 분류 카테고리 목록.
+            image_data (dict): URL을 키로 하는 다운로드된 이미지 바이트.
+            model (str): 배치를 실행할 모델 ID.
+
+        Returns:
+            dict: model, messages, tools, tool_choice를 담은 요청 본문.
+        """
+        images_for_ai = await ImageService.prepare_images_for_ai_async(images, image_data, inline_all=True)
+        if self.output_schema == 'compact':
+            tool = get_compact_classification_tool(categories)
+            instruction = DEFAULT_INSTRUCTION + COMPACT_INSTRUCTION
+        else:
+            tool = get_image_classification_tool(categories)
+            instruction = DEFAULT_INSTRUCTION
+        return {'model': model, **self._chat_request(instruction, images_for_ai, tool)}
+
+    def parse_batch_response(self, body, categories, image_count):
+        """
+        배치 결과 파일의 응답 본문(chat completion JSON)을 분류 결과로 변환합니다.
+
+        Args:
+            body (dict): 결과 줄의 response.body.
+            categories (list of str): 유효한 분류 카테고리 목록.
+            image_count (int): 요청한 이미지 수.
+
+        Returns:
+            list: 각 이미지의 분류 결과. 누락되었거나 유효하지 않은 항목은 None입니다.
+        """
+        try:
+            tool_calls = body["choices"][0]["message"].get("tool_calls") or []
+            if tool_calls and tool_calls[0]["function"]["name"] == "classify_images":
+                return self._labels_from_arguments(tool_calls[0]["function"]["arguments"], categories, image_count)
+            logging.warning("Unexpected tool call or no tool call found in batch response")
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logging.error(f"Error parsing batch response: {e}")
+        return [None] * image_count
+
+    async def _call_provider(self, config_idx, request, excluded_keys=()):
+        """
+        프로바이더 하나에 분류 요청을 보냅니다.
+
+        회로 차단기, RPM/TPM 한도, 적응형 동시성 슬롯을 거쳐 호출하고 결과를 각 제어기에 기록합니다.
+        인증 실패나 할당량 소진처럼 키에만 해당하는 오류는 그 키의 회로에만 기록하고, 풀에 남은 키가
+        있으면 다음 키로 다시 보냅니다. 프로바이더 회로에는 프로바이더 전체 장애만 기록됩니다.
+
+        Args:
+            config_idx (int): 이번 요청의 프로바이더 순서(request['configs'])에서의 순번.
+            request (dict): classify_images_detailed가 준비한 요청 내용.
+            excluded_keys (tuple of str): 이번 요청에서 키 오류로 실패한 키 식별자.
+
+        Returns:
+            tuple: (각 이미지에 대한 분류 결과 목록, 결과를 반환한 모델 ID, 인덱스별 confidence 목록).
+
+        Raises:
+            ExternalServiceError: 프로바이더 회로가 열려 있는 경우.
+            RateLimitError: 요청 한도 대기가 너무 길거나 429 응답을 받은 경우.
+            Exception: API 호출이 실패한 경우.
+        """
+        llm_config = request['configs'][config_idx]
+        provider = llm_config['provider']
+        model = self._tier_model(llm_config, request.get('tier'))
+        image_count = request['image_count']
+
+        # 회로가 열린 프로바이더는 타임아웃을 기다리지 않고 바로 건너뜁니다.
+        if not provider_health.can_attempt(provider):
+            logging.warning(f"Skipping {provider}: circuit {provider_health.get_state(provider)}")
+            raise ExternalServiceError(f"Circuit open for {provider}", service_name=provider)
+        payload = await self._provider_payload(request, llm_config)
+        
+        # 키 풀에서 가장 한가한 키를 고르고, 그 키의 RPM/TPM 한도 안에서 보낼 수 있을 때까지 기다립니다.
+        # 대기가 길면 다음 프로바이더로 넘어가고, 마지막 프로바이더는 요청 타임아웃까지만 기다립니다.
+        estimated_tokens = chunk_planner.estimate_request_tokens(provider, payload['image_parts'], image_count,
+                                                                 request['categories'], request['schema'])
+        key_pool = get_key_pool(llm_config)
+        is_last = config_idx == len(request['configs']) - 1
+        key = None
+        try:
+            key = key_pool.acquire(estimated_tokens, excluded_keys)
+            await key.rate_limiter.acquire(estimated_tokens, self.config.LLM_REQUEST_TIMEOUT if is_last
+                                           else self.config.LLM_RATE_LIMIT_MAX_WAIT)
+        except BaseException as e:
+            provider_health.record(provider)
+            if key:
+                key_pool.release(key, completed=False)
+            if isinstance(e, Exception):
+                logging.warning(f"Skipping {provider}: {e}")
+            raise
+        rate_limiter = key.rate_limiter
+
+        # 프로바이더별 적응형 동시성 슬롯을 얻은 뒤 호출합니다 (대기 시간은 지연 시간에서 제외).
+        limiter = get_provider_limiter(provider)
+        slot = None
+        attempt_start = time.monotonic()
+        health_pending = True
+        key_pending = True
+        retry_with_next_key = False
+        try:
+            slot = await limiter.acquire() if limiter else None
+            attempt_start = time.monotonic()
+            streaming = self.config.LLM_STREAMING_ENABLED
+            if config_idx == 0:
+                logging.info(f"Attempting classification with primary API: {provider} ({model})")
+            else:
+                logging.warning(f"Fallback to API #{config_idx + 1}: {provider} ({model})")
+            
+            confidences = [None] * image_count
+            response = await acompletion(
+                model=model,
+                api_key=key.api_key,
+                base_url=llm_config['base_url'],
+                timeout=self.config.LLM_REQUEST_TIMEOUT,
+                **self._chat_request(request['instruction'], payload['images_for_ai'], request['tool']),
+                **({'stream': True} if streaming else {}),
+            )
+            if streaming:
+                result = await self._consume_stream(response, request, attempt_start, confidences)
+            
+            latency = time.monotonic() - attempt_start
+            if limiter:
+                limiter.release(slot, OUTCOME_SUCCESS, latency, image_count)
+                limiter = None
+            provider_health.record(provider, latency)
+            health_pending = False
+            chunk_planner.record_result(provider, image_count, payload['request_bytes'], latency,
+                                        **payload['planner_sizes'])
+            usage = getattr(response, 'usage', None)
+            rate_limiter.record_usage(estimated_tokens, getattr(usage, 'total_tokens', None))
+            key_pool.release(key, tokens=getattr(usage, 'total_tokens', None))
+            key_pending = False
+            if not streaming:
+                result = self._extract_classifications(response, request['categories'], image_count, confidences)
+            omission_tracker.record(provider, model, image_count, result.count(None))
+            
+            if config_idx == 0:
+                logging.info(f"Classification successful with primary API: {provider}")
+            else:
+                logging.warning(f"Classification successful with fallback API #{config_idx + 1}: {provider}")
+            
+            return result, model, confidences
+            
+        except Exception as e:
+            error = e
+            key_failure = is_key_failure(e)
+            if is_rate_limit_error(e) and not key_failure and not isinstance(e, RateLimitError):
+                retry_after = parse_retry_after(e)
+                rate_limiter.penalize(retry_after)
+                error = RateLimitError(str(e), service_name=provider,
+                                       retry_after=int(retry_after + 0.999) if retry_after else None)
+            latency = time.monotonic() - attempt_start
+            if limiter:
+                limiter.release(slot, classify_outcome(error), latency, image_count)
+                limiter = None
+            # 키 오류는 프로바이더 상태에 결과로 남기지 않고 탐색 슬롯만 반환합니다.
+            provider_health.record(provider, None if key_failure else latency, error=error)
+            health_pending = False
+            key_pool.release(key, error=error)
+            key_pending = False
+            chunk_planner.record_result(provider, image_count, payload['request_bytes'], latency, error=error)
+
+            excluded_keys = (*excluded_keys, key.key_id)
+            if key_failure and key_pool.has_available(excluded_keys):
+                logging.warning(f"API key {key.key_id} for {provider} failed ({error}); retrying with next key")
+                retry_with_next_key = True
+            elif config_idx == 0:
+                logging.error(f"Primary API failed ({provider}): {error}")
+            else:
+                logging.error(f"Fallback API #{config_idx + 1} failed ({provider}): {error}")
+            if not retry_with_next_key:
+                if error is e:
+                    raise
+                raise error from e
+        finally:
+            # 취소 등으로 위에서 반환되지 않은 슬롯을 돌려줍니다.
+            if limiter and slot is not None:
+                limiter.release(slot, OUTCOME_ERROR)
+            if health_pending:
+                provider_health.record(provider)
+            if key_pending:
+                key_pool.release(key, completed=False)
+        return await self._call_provider(config_idx, request, excluded_keys)
+
+    async def _call_with_hedge(self, config_idx, request, failed_providers):
+        """
+        헤징(hedging) 요청으로 분류합니다.
+
+        기본 요청이 프로바이더의 최근 지연 시간 백분위수(LLM_HEDGE_PERCENTILE)를 넘기면 다음 정상
+        프로바이더에 같은 요청을 하나 더 보내고, 먼저 성공한 결과를 사용하며 나머지는 취소합니다.
+        추가 요청 수는 hedge_budget이 제한합니다.
+
+        Args:
+            config_idx (int): 기본 요청을 보낼 프로바이더 순번.
+            request (dict): classify_images_detailed가 준비한 요청 내용.
+            failed_providers (list of str): 실패한 프로바이더 목록. 헤지 요청이 실패하면 추가됩니다.
+
+        Returns:
+            tuple: (각 이미지에 대한 분류 결과 목록, 결과를 반환한 모델 ID, 인덱스별 confidence 목록).
+
+        Raises:
+            Exception: 기본 요청(과 헤지 요청)이 모두 실패한 경우 기본 요청의 예외.
+        """
+        primary_provider = request['configs'][config_idx]['provider']
+        hedge_budget.record_request()
+        tasks = {asyncio.create_task(self._call_provider(config_idx, request)): config_idx}
+        primary = next(iter(tasks))
+        try:
+            delay = hedge_budget.get_delay(primary_provider)
+            hedge_idx = self._next_hedge_index(config_idx, request, failed_providers)
+            if delay is None or hedge_idx is None:
+                return await primary
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not hedge_budget.try_hedge():
+                return await primary
+
+            hedge_provider = request['configs'][hedge_idx]['provider']
+            logging.info(f"Hedging {primary_provider} request to {hedge_provider} after {delay:.1f}s")
+            tasks[asyncio.create_task(self._call_provider(hedge_idx, request))] = hedge_idx
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedge_budget.record_win(hedged=task is not primary)
+                        return task.result()
+                    if task is not primary:
+                        failed_providers.append(hedge_provider)
+            raise primary.exception()
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def _next_hedge_index(self, config_idx, request, failed_providers):
+        """기본 요청 다음 순번에서 회로가 열리지 않은 다른 프로바이더의 순번을 찾습니다."""
+        primary_provider = request['configs'][config_idx]['provider']
+        for index in range(config_idx + 1, len(request['configs'])):
+            provider = request['configs'][index]['provider']
+            if (provider != primary_provider and provider not in failed_providers
+                    and provider_health.get_state(provider) != 'OPEN'):
+                return index
+        return None
+
     def _parse_classification_response(self, response, categories, image_count):
         """
         AI API의 분류 응답을 파싱합니다.
@@ -147,23 +925,189 @@ class ClassificationService:
         Note:
             이 메서드는 내부적으로 사용되며, 직접 호출하지 않는 것이 좋습니다.
         """
+        return [label or "NONE" for label in self._extract_classifications(response, categories, image_count)]
+
+    def _extract_classifications(self, response, categories, image_count, confidences=None):
+        """
+        AI API의 분류 응답에서 인덱스별 분류 결과를 추출합니다.
+
+        모델이 빠뜨렸거나 범위 밖 인덱스, 목록에 없는 카테고리로 답한 이미지는 None으로 남겨
+        재질의 대상으로 구분합니다. 모델이 명시적으로 답한 'NONE'은 그대로 유지합니다.
+
+        Args:
+            response: liteLLM API의 응답 객체.
+            categories (list of str): 유효한 분류 카테고리 목록.
+            image_count (int): 분류된 이미지의 총 개수.
+            confidences (list, optional): 주어지면 인덱스별 confidence를 기록합니다.
+
+        Returns:
+            list: 각 이미지의 분류 결과. 누락되었거나 유효하지 않은 항목은 None입니다.
+        """
         try:
             tool_calls = response.choices[0].message.tool_calls
             if tool_calls and tool_calls[0].function.name == "classify_images":
-                classifications = eval(tool_calls[0].function.arguments)
-                result = ["NONE"] * image_count
-                for classification in classifications["classifications"]:
-                    index = classification["index"]
-                    category = classification["category"]
-                    if 0 <= index < image_count:
-                        result[index] = category if category in categories else "NONE"
-                return result
-            else:
-                logging.warning("Unexpected tool call or no tool call found")
-                return ["NONE"] * image_count
+                return self._labels_from_arguments(tool_calls[0].function.arguments, categories, image_count,
+                                                   confidences)
+            logging.warning("Unexpected tool call or no tool call found")
         except Exception as e:
             logging.error(f"Error parsing classification response: {e}")
-            return ["NONE"] * image_count
+        return [None] * image_count
+
+    def _labels_from_arguments(self, arguments, categories, image_count, confidences=None):
+        """
+        classify_images 도구 호출 인자(JSON)를 인덱스별 분류 결과로 변환합니다.
+
+        전체 스키마의 {"classifications": [...]}와 압축 스키마의 {"labels": [코드, ...]}를 모두 받으며,
+        압축 스키마의 코드는 배열 위치를 인덱스로 하여 카테고리 이름으로 되돌립니다. 위치에는 인덱스가 없어
+        이미지를 하나 건너뛰면 뒤의 레이블이 모두 밀리므로, 레이블 수가 image_count와 다르면 응답 전체를
+        누락으로 처리합니다.
+
+        Args:
+            arguments (str | dict): 도구 호출 인자.
+            categories (list of str): 유효한 분류 카테고리 목록.
+            image_count (int): 분류된 이미지의 총 개수.
+            confidences (list, optional): 주어지면 인덱스별 confidence를 기록합니다.
+
+        Returns:
+            list: 각 이미지의 분류 결과. 누락되었거나 유효하지 않은 항목은 None입니다.
+
+        Raises:
+            ValueError: 인자가 올바른 JSON이 아닌 경우.
+        """
+        data = json.loads(arguments) if isinstance(arguments, str) else arguments
+        result = [None] * image_count
+        if "labels" in data:
+            labels = data.get("labels") or []
+            scores = data.get("confidences") or []
+            if len(labels) != image_count:
+                logging.warning(f"Compact response has {len(labels)} labels for {image_count} images; ignoring it")
+                labels = []
+            classifications = [
+                self._compact_classification(index, code, categories, scores[index] if index < len(scores) else None)
+                for index, code in enumerate(labels)
+            ]
+        else:
+            classifications = data.get("classifications") or []
+        for classification in classifications:
+            self._accept_classification(result, classification, categories, confidences)
+        return result
+
+    @staticmethod
+    def _compact_classification(index, code, categories, confidence=None):
+        """압축 스키마의 (배열 위치, 코드)를 {"index", "category", "confidence"} 항목으로 변환합니다."""
+        return {"index": index, "category": decode_compact_label(code, categories), "confidence": confidence}
+
+    @staticmethod
+    def _accept_classification(result, classification, categories, confidences=None):
+        """
+        분류 항목 하나를 검증하여 result에 기록합니다.
+
+        Args:
+            result (list): 인덱스별 분류 결과 (None은 아직 답이 없는 항목).
+            classification (dict): {"index": int, "category": str, "confidence": float(선택)} 항목.
+            categories (list of str): 유효한 분류 카테고리 목록.
+            confidences (list, optional): 주어지면 0~1 범위의 confidence를 기록합니다 (없거나 무효하면 None).
+
+        Returns:
+            int | None: 새로 기록한 인덱스. 무효하거나 이미 답이 있는 항목이면 None.
+        """
+        if not isinstance(classification, dict):
+            return None
+        index = classification.get("index")
+        category = classification.get("category")
+        if (isinstance(index, int) and 0 <= index < len(result) and result[index] is None
+                and (category in categories or category == "NONE")):
+            result[index] = category
+            if confidences is not None:
+                confidence = classification.get("confidence")
+                valid = isinstance(confidence, (int, float)) and not isinstance(confidence, bool)
+                confidences[index] = float(confidence) if valid and 0 <= confidence <= 1 else None
+            return index
+        return None
+
+    @staticmethod
+    def is_confident(confidence, min_confidence):
+        """min_confidence가 없거나 confidence가 그 이상이면 True (confidence가 없으면 확신하지 않은 것으로 봅니다)."""
+        return min_confidence is None or (confidence is not None and confidence >= min_confidence)
+
+    async def _consume_stream(self, stream, request, started_at, confidences):
+        """
+        스트리밍 응답의 도구 호출 인자를 조각 단위로 파싱하며 완성된 레이블을 즉시 전달합니다.
+
+        요청에 min_confidence가 있으면 confidence가 그 이상인 레이블만 먼저 전달합니다. 압축 스키마는
+        confidence가 레이블 배열 뒤에 오므로 스트림이 끝난 뒤에 전달합니다. 압축 스키마의 레이블은 배열
+        위치로 인덱스를 정하므로 배열이 닫히고 레이블 수가 이미지 수와 같을 때에만 받아들입니다.
+
+        Args:
+            stream: acompletion(stream=True)가 반환한 비동기 스트림.
+            request (dict): _classify_once가 준비한 요청 내용.
+            started_at (float): 요청 시작 시각 (time.monotonic).
+            confidences (list): 인덱스별 confidence를 기록할 목록.
+
+        Returns:
+            list: 각 이미지의 분류 결과. 누락되었거나 유효하지 않은 항목은 None입니다.
+        """
+        categories = request['categories']
+        on_label = request.get('on_label')
+        min_confidence = request.get('min_confidence')
+        result = [None] * request['image_count']
+        compact = request.get('schema') == 'compact'
+        parser = IntArrayStreamParser() if compact else ArrayItemStreamParser()
+        first_label_seen = False
+        emitted = set()
+        compact_items = []
+
+        def accept(classification):
+            nonlocal first_label_seen
+            index = self._accept_classification(result, classification, categories, confidences)
+            if index is None:
+                return
+            if not first_label_seen:
+                first_label_seen = True
+                metrics.observe('llm_time_to_first_label_seconds', time.monotonic() - started_at)
+            emit(index)
+
+        def emit(index):
+            if on_label and index not in emitted and self.is_confident(confidences[index], min_confidence):
+                emitted.add(index)
+                on_label(index, result[index])
+
+        async for chunk in stream:
+            choices = getattr(chunk, 'choices', None)
+            if not choices:
+                continue
+            for tool_call in getattr(choices[0].delta, 'tool_calls', None) or []:
+                if (getattr(tool_call, 'index', 0) or 0) != 0 or not getattr(tool_call, 'function', None):
+                    continue
+                items = parser.feed(tool_call.function.arguments or '')
+                if not compact:
+                    for item in items:
+                        accept(item)
+                    continue
+                if compact_items is None:
+                    continue
+                compact_items.extend(items)
+                if parser.done:
+                    # 배열이 닫힌 뒤에야 레이블 수가 이미지 수와 맞는지 확인할 수 있습니다.
+                    if len(compact_items) == len(result):
+                        for item in compact_items:
+                            accept(self._compact_classification(*item, categories))
+                    compact_items = None
+
+        # 스트림이 끝나면 전체 인자를 한 번 더 파싱해 조각 단위에서 놓친 항목과 confidence를 보완합니다.
+        if parser.text:
+            try:
+                final_confidences = [None] * len(result)
+                final = self._labels_from_arguments(parser.text, categories, len(result), final_confidences)
+                for index, label in enumerate(final):
+                    if result[index] is None:
+                        accept({"index": index, "category": label, "confidence": final_confidences[index]})
+                    elif confidences[index] is None and result[index] == label:
+                        confidences[index] = final_confidences[index]
+                        emit(index)
+            except (ValueError, AttributeError, TypeError) as e:
+                logging.warning(f"Streamed tool arguments are not valid JSON: {e}")
+        return result
 
     def get_api_status(self) -> dict:
         """
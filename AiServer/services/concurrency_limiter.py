@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import threading
+import time
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_SUCCESS = 'success'
+OUTCOME_OVERLOAD = 'overload'  # 429, 타임아웃, 과부하 응답
+OUTCOME_ERROR = 'error'        # 그 외 오류 (동시성과 무관하므로 한도를 바꾸지 않음)
+
+OVERLOAD_MARKERS = ('429', 'rate limit', 'ratelimit', 'too many requests', 'timeout', 'timed out',
+                    'overloaded', '503', 'resource_exhausted', 'resource exhausted')
+
+
+def classify_outcome(error):
+    """
+    LLM 호출 오류를 동시성 제어 관점의 결과로 분류합니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        str: 과부하(429, 타임아웃 등)이면 OUTCOME_OVERLOAD, 아니면 OUTCOME_ERROR.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return OUTCOME_OVERLOAD
+    name = type(error).__name__.lower()
+    if 'ratelimit' in name or 'timeout' in name:
+        return OUTCOME_OVERLOAD
+    message = str(error).lower()
+    return OUTCOME_OVERLOAD if any(marker in message for marker in OVERLOAD_MARKERS) else OUTCOME_ERROR
+
+
+class AIMDLimiter:
+    """
+    AIMD(가산 증가, 곱셈 감소) 방식의 적응형 동시성 제한기.
+
+    성공한 요청마다 한도를 1/limit씩 늘려 한 라운드(한도만큼의 요청)가 모두 건강하면 한도가 1 증가합니다.
+    429, 타임아웃 또는 지연 시간 급증(기준 지연의 latency_spike_ratio배 초과)이 관측되면 한도를
+    decrease_factor배로 줄입니다. 같은 혼잡 신호에 여러 번 줄어들지 않도록 마지막 감소 이전에
+    시작된 요청의 실패는 무시합니다.
+
+    지연 시간은 청크 크기와 무관하도록 이미지 한 장당 시간으로 비교하며, 기준 지연은 급증을 포함한
+    모든 성공 요청의 지수 이동 평균입니다. 따라서 지연이 지속적으로 늘어나면 기준도 따라 올라가
+    한도가 다시 회복됩니다.
+
+    Flask 요청마다 asyncio.run으로 새 이벤트 루프가 만들어지므로 asyncio 동기화 객체 대신
+    스레드 락과 짧은 폴링으로 슬롯을 획득하여 여러 루프가 같은 한도를 공유합니다.
+
+    Attributes:
+        name (str): 제한기 이름 (프로바이더).
+        limit (float): 현재 동시성 한도.
+        min_limit (int): 최소 한도.
+        max_limit (int): 최대 한도.
+    """
+
+    POLL_INTERVAL = 0.05
+    LATENCY_SMOOTHING = 0.1
+
+    def __init__(self, name, initial_limit=None, min_limit=None, max_limit=None,
+                 decrease_factor=0.5, latency_spike_ratio=None):
+        self.name = name
+        self.min_limit = config.LLM_CONCURRENCY_MIN if min_limit is None else min_limit
+        self.max_limit = config.LLM_CONCURRENCY_MAX if max_limit is None else max_limit
+        initial = config.DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS if initial_limit is None else initial_limit
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_spike_ratio = (config.LLM_LATENCY_SPIKE_RATIO if latency_spike_ratio is None
+                                    else latency_spike_ratio)
+        self.in_flight = 0
+        self.baseline_latency = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'overloads': 0, 'errors': 0, 'latency_spikes': 0, 'decreases': 0}
+
+    def _try_acquire(self):
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    async def acquire(self):
+        """
+        슬롯을 획득할 때까지 기다립니다.
+
+        Returns:
+            float: 요청 시작 시각 (release에 전달).
+        """
+        while not self._try_acquire():
+            await asyncio.sleep(self.POLL_INTERVAL)
+        self._publish()
+        return time.monotonic()
+
+    def release(self, started_at, outcome, latency=None, image_count=1):
+        """
+        슬롯을 반환하고 결과에 따라 한도를 조정합니다.
+
+        Args:
+            started_at (float): acquire()가 반환한 요청 시작 시각.
+            outcome (str): OUTCOME_SUCCESS, OUTCOME_OVERLOAD, OUTCOME_ERROR 중 하나.
+            latency (float, optional): 요청 소요 시간(초). 생략하면 시작 시각으로 계산합니다.
+            image_count (int): 요청에 담긴 이미지 수. 지연 시간을 이미지당 시간으로 정규화합니다.
+        """
+        latency = time.monotonic() - started_at if latency is None else latency
+        latency /= max(1, image_count)
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if outcome == OUTCOME_SUCCESS:
+                self._stats['successes'] += 1
+                if (self.baseline_latency is not None
+                        and latency > self.baseline_latency * self.latency_spike_ratio):
+                    self._stats['latency_spikes'] += 1
+                    self._decrease(started_at)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                # 급증도 기준에 반영해야 지연이 계속 늘어난 상태에서 모든 요청이 급증으로 판정되지 않습니다.
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency += self.LATENCY_SMOOTHING * (latency - self.baseline_latency)
+            elif outcome == OUTCOME_OVERLOAD:
+                self._stats['overloads'] += 1
+                self._decrease(started_at)
+            else:
+                self._stats['errors'] += 1
+        self._publish()
+
+    def _decrease(self, started_at):
+        # 마지막 감소 이전에 시작된 요청은 이미 반영된 혼잡 신호로 보고 무시합니다.
+        if started_at < self._last_decrease:
+            return
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self._stats['decreases'] += 1
+        logger.warning(f"Concurrency limit for {self.name} decreased {previous:.1f} -> {self.limit:.1f}")
+
+    def _publish(self):
+        metrics.set_gauge(f"llm_concurrency_limit.{self.name}", round(self.limit, 2))
+        metrics.set_gauge(f"llm_in_flight.{self.name}", self.in_flight)
+
+    def get_stats(self):
+        """
+        제한기 상태를 반환합니다.
+
+        Returns:
+            dict: 현재 한도, 진행 중인 요청 수, 이미지당 기준 지연 시간, 결과별 횟수.
+        """
+        with self._lock:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'baseline_latency': round(self.baseline_latency, 3) if self.baseline_latency is not None else None,
+                **self._stats,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(provider):
+    """
+    프로바이더별 프로세스 전역 동시성 제한기를 반환합니다.
+
+    Args:
+        provider (str): LLM 프로바이더 이름.
+
+    Returns:
+        AIMDLimiter | None: LLM_ADAPTIVE_CONCURRENCY가 False이면 None.
+    """
+    if not config.LLM_ADAPTIVE_CONCURRENCY:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = AIMDLimiter(provider)
+            _limiters[provider] = limiter
+    return limiter
+
+
+def get_limiter_stats():
+    """모든 프로바이더 제한기의 상태를 반환합니다."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.get_stats() for provider, limiter in limiters.items()}
+
+
+metrics.register_collector('llm_concurrency', get_limiter_stats)
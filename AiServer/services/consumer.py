@@ -62,6 +62,7 @@ class Consumer:
                     while not shutdown_event.is_set():
                         connection.check_connection()
                         connection._connection.process_data_events(time_limit=1)
+                        rabbitmq_handler.poll_batches()
 
                 except RabbitMQConnectionError as e:
                     if shutdown_event.is_set():
@@ -1,10 +1,18 @@
 import asyncio
+import hashlib
 import logging
 from flask import jsonify
 from config import config
 from services.image_service import ImageService
+from services.image_fetcher import ImageFetcher
+from services.image_worker_pool import run_in_image_pool
+from services.chunk_planner import chunk_planner
 from services.classification_service import ClassificationService
+from services.result_cache import get_result_cache
 from services.yolo_service import YOLOService
+from exceptions.custom_exceptions import ModelNotFoundError
+from utils.image_hash import HashIndex, image_fingerprint
+from utils.metrics import metrics
 
 
 class DataProcessor:
@@ -19,12 +27,20 @@ class DataProcessor:
         yolo_service (YOLOService): YOLO 모델 훈련 및 추론 서비스 인스턴스.
         chunk_size (int): 각 청크당 처리할 이미지 수 (기본값: 8).
         max_concurrent_chunks (int): 동시에 처리할 수 있는 청크 수 (기본값: 5).
+        dedup_enabled (bool): 작업 내 중복 이미지를 한 번만 분류할지 여부.
+        dedup_threshold (int): 중복으로 볼 지각 해시의 최대 해밍 거리.
+        chunk_planner_enabled (bool): 요청 크기/토큰 추정 기반 청크 플래너 사용 여부.
+        grid_size (int | None): 격자 분류 모드의 격자 한 변 셀 수. None이면 이미지를 개별 전송합니다.
+        grid_capacity (int | None): 격자 모드에서 요청 하나에 담을 최대 이미지 수.
+        bisect_max_extra_calls (int): 실패한 청크를 나눠 재시도할 때 작업당 허용하는 추가 호출 수.
+        local_cascade_enabled (bool): 훈련된 YOLO 모델로 먼저 분류하고 불확실한 이미지만 LLM으로 보낼지 여부.
     """
     
     # Configuration constants for chunking strategy
     DEFAULT_CHUNK_SIZE = 8  # Optimal size for LLM API payload limits
     MAX_CHUNK_SIZE = 10     # Maximum recommended chunk size
     DEFAULT_CONCURRENCY = 10  # Default concurrent chunk processing limit
+    MAX_REPORTED_RETRY_TREES = 20  # 작업 통계에 남길 재시도 트리 수
 
     def __init__(self, chunk_size=None, max_concurrent_chunks=None):
         """
@@ -41,16 +57,29 @@ class DataProcessor:
         # Use config values first, then fallback to parameters, then class defaults
         self.chunk_size = chunk_size or getattr(config, 'DATA_PROCESSOR_CHUNK_SIZE', self.DEFAULT_CHUNK_SIZE)
         self.max_concurrent_chunks = max_concurrent_chunks or getattr(config, 'DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS', self.DEFAULT_CONCURRENCY)
+        self.validation_mode = getattr(config, 'IMAGE_VALIDATION_MODE', 'inline')
+        self.dedup_enabled = getattr(config, 'IMAGE_DEDUP_ENABLED', False)
+        self.dedup_threshold = getattr(config, 'IMAGE_DEDUP_THRESHOLD', 3)
+        self.chunk_planner_enabled = getattr(config, 'CHUNK_PLANNER_ENABLED', True)
+        self.grid_size = getattr(config, 'CLASSIFICATION_GRID_SIZE', 3) if getattr(
+            config, 'CLASSIFICATION_GRID_MODE', False) else None
+        # 격자 모드에서는 요청당 이미지 수가 이미지 슬롯 수가 아니라 격자 칸 수로 제한됩니다.
+        self.grid_capacity = (self.grid_size * self.grid_size *
+                              getattr(config, 'CLASSIFICATION_GRID_SHEETS_PER_REQUEST', 2)) if self.grid_size else None
+        self.bisect_max_extra_calls = getattr(config, 'DATA_PROCESSOR_BISECT_MAX_EXTRA_CALLS', 32)
+        self.resolution_escalation = getattr(config, 'LLM_RESOLUTION_ESCALATION', False)
+        self.cascade_enabled = getattr(config, 'LLM_CASCADE_ENABLED', False)
+        self.local_cascade_enabled = getattr(config, 'YOLO_CASCADE_ENABLED', False)
         
         # Validate chunk size
-        if self.chunk_size > self.MAX_CHUNK_SIZE:
+        if self.chunk_size > self.MAX_CHUNK_SIZE and not self.grid_size:
             logging.warning(f"Chunk size {self.chunk_size} exceeds recommended maximum {self.MAX_CHUNK_SIZE}. "
                           f"This may cause LLM API payload limit issues.")
         
         logging.info(f"DataProcessor initialized with chunk_size={self.chunk_size}, "
                     f"max_concurrent_chunks={self.max_concurrent_chunks}")
 
-    def process_data(self, request, operation):
+    def process_data(self, request, operation, report=None):
         """
         이미지 분류를 위한 수신 요청 데이터를 처리합니다.
 
@@ -60,6 +89,7 @@ class DataProcessor:
         Args:
             request (flask.Request): Flask 요청 객체.
             operation (str): 수행할 작업 유형 ('test' 또는 'classify').
+            report (dict, optional): 주어지면 로컬 사전 분류 통계를 'local' 키에 기록합니다 (사용하지 않았으면 None).
 
         Returns:
             list: 레이블과 해당하는 이미지 ID를 포함하는 딕셔너리 목록.
@@ -68,111 +98,568 @@ class DataProcessor:
         data = request.json
         workspace_id = data.get("workspaceId")
         test_class = data.get("testClass", [])
+        category_groups = data.get("categoryGroups")
         test_dtos = data.get("testImages", [])
         test_images = [dto["url"] for dto in test_dtos]
 
-        filtered_dto_image_pairs = [
-            (dto, url)
-            for dto, url in zip(test_dtos, test_images)
-            if ImageService.is_url_image(url)
-        ]
+        if self.validation_mode == 'head':
+            # URL당 HEAD 요청은 한 번만 보내고 그 결과를 필터링과 로깅에 함께 사용합니다.
+            validity = {url: ImageService.is_url_image(url) for url in dict.fromkeys(test_images)}
+            filtered_dto_image_pairs = [
+                (dto, url)
+                for dto, url in zip(test_dtos, test_images)
+                if validity[url]
+            ]
+        else:
+            # inline 모드에서는 청크 처리 중 다운로드 응답으로 검증하므로 여기서는 필터링하지 않습니다.
+            validity = None
+            filtered_dto_image_pairs = list(zip(test_dtos, test_images))
         
         # Debug logging
         logging.info(f"Total test images: {len(test_images)}")
-        logging.info(f"Filtered images after validation: {len(filtered_dto_image_pairs)}")
-        for dto, url in zip(test_dtos, test_images):
-            is_valid = ImageService.is_url_image(url)
-            logging.info(f"Image URL: {url} - Valid: {is_valid}")
+        logging.info(f"Filtered images after validation: {len(filtered_dto_image_pairs)} "
+                    f"(validation_mode={self.validation_mode})")
+        if validity is not None:
+            for url, is_valid in validity.items():
+                logging.debug(f"Image URL: {url} - Valid: {is_valid}")
         
         # Handle case where no valid images are found
         if not filtered_dto_image_pairs:
             logging.warning("No valid images found after filtering")
             return []
         
-        # Use adaptive chunk size to avoid LLM API payload limits
-        # Optimal size for image processing while maintaining efficiency
-        adaptive_chunk_size = self._get_adaptive_chunk_size(len(filtered_dto_image_pairs))
-        chunks = list(self._chunk_list(filtered_dto_image_pairs, adaptive_chunk_size))
+        # 예상 요청 크기와 토큰이 LLM API 한도 안에 들어가도록 청크를 구성합니다.
+        chunks = self._plan_chunks(filtered_dto_image_pairs, test_class)
         
         logging.info(f"Processing {len(filtered_dto_image_pairs)} images in {len(chunks)} chunks "
-                    f"(adaptive_chunk_size={adaptive_chunk_size})")
+                    f"(largest chunk={max(len(chunk) for chunk in chunks)})")
 
         labels_to_ids = asyncio.run(
-            self._process_chunks(chunks, test_class, operation, workspace_id)
+            self._process_chunks(chunks, test_class, operation, workspace_id, category_groups, report)
         )
 
         return [
             {"label": label, "ids": ids} for label, ids in labels_to_ids.items()
         ]
 
-    async def _process_chunks(self, chunks, test_class, operation, workspace_id=0):
+    async def _process_chunks(self, chunks, test_class, operation, workspace_id=0, category_groups=None,
+                              report=None):
         """
         청크를 비동기적으로 처리합니다.
 
         이 메서드는 이미지 청크를 병렬로 처리하여 분류 작업의 효율성을 높입니다.
+        중복 제거가 활성화되어 있으면 청크마다 받은 이미지를 지각 해시로 작업 전체의 대표 이미지와
+        비교합니다. 대표와 같은 그룹인 이미지는 청크에서 빼고, 대표의 레이블이 정해지면 그 레이블을 씁니다.
 
         Args:
             chunks (list): 처리할 이미지 청크 목록.
             test_class (list): 분류에 사용할 클래스 목록.
             operation (str): 수행할 작업 유형 ('test' 또는 'classify').
             workspace_id (int, optional): 작업 공간 ID. 기본값은 0.
+            category_groups (dict, optional): 요청의 categoryGroups (그룹 이름별 카테고리 목록).
+                카테고리가 많으면 생략해도 이름으로 자동 그룹을 만들어 계층 분류합니다.
+            report (dict, optional): 주어지면 로컬 사전 분류 통계를 'local' 키에 기록합니다.
 
         Returns:
             dict: 레이블을 키로, 해당 레이블로 분류된 이미지 ID 목록을 값으로 하는 딕셔너리.
         """
         labels_to_ids = {}
+        validate_inline = self.validation_mode != 'head'
         # Reduce concurrency to handle more but smaller chunks efficiently
         # This prevents overwhelming the API with too many simultaneous requests
-        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
-
-        async def process_chunk(chunk):
-            async with semaphore:
-                try:
-                    images = [url for _, url in chunk]
-                    chunk_start_time = asyncio.get_event_loop().time()
-                    chunk_labels = await self.classification_service.classify_images(images, test_class)
-                    chunk_end_time = asyncio.get_event_loop().time()
-                    
-                    logging.info(f"Successfully processed chunk of {len(images)} images in "
-                               f"{chunk_end_time - chunk_start_time:.2f} seconds")
-
-                    if operation != "test":
-                        for label, (dto, url) in zip(chunk_labels, chunk):
-                            ImageService.save_image(url, label, workspace_id, dto['fileName'])
-
-                    for label, dto_url_tuple in zip(chunk_labels, chunk):
-                        dto, _ = dto_url_tuple
-                        if "id" in dto:
-                            labels_to_ids.setdefault(label, []).append(dto["id"])
-                        else:
-                            logging.warning(f"'id' is not found in dto: {dto}")
-
-                except Exception as e:
-                    logging.error(f"Error processing chunk of {len(chunk)} images: {e}")
-                    # Log chunk details for debugging
-                    image_urls = [url for _, url in chunk]
-                    logging.error(f"Failed chunk contained images: {image_urls[:3]}{'...' if len(image_urls) > 3 else ''}")
-                    for dto, _ in chunk:
-                        if "id" in dto:
-                            labels_to_ids.setdefault("NONE", []).append(dto["id"])
-
-        # Process chunks with timing
-        start_time = asyncio.get_event_loop().time()
-        tasks = [process_chunk(chunk) for chunk in chunks]
-        await asyncio.gather(*tasks)
-        end_time = asyncio.get_event_loop().time()
-        
+        # 적응형 동시성이 켜져 있으면 실제 LLM 호출 수는 프로바이더별 AIMD 제한기가 조절하고,
+        # 세마포어는 다운로드/전처리가 앞서 나갈 수 있는 청크 수의 상한만 정합니다.
+        semaphore = asyncio.Semaphore(self._chunk_concurrency_cap())
+        result_cache = get_result_cache()
+        bisect = self._new_bisect_stats()
+        streaming = {'early_labels': 0, 'overlap_seconds': 0.0}
+        # 해상도 단계 상향('resolution'), 캐스케이드 계층별('cascade'), 계층 분류('hierarchical') 통계
+        classification_report = {}
+        # 계층 분류 그룹은 작업마다 한 번만 정해 모든 청크에 같은 그룹을 사용합니다.
+        groups = self.classification_service.resolve_category_groups(test_class, category_groups)
+        if groups:
+            logging.info(f"Hierarchical classification: {len(test_class)} categories in {len(groups)} groups")
+
+        async with ImageFetcher(url_resolver=ImageService._convert_url_for_docker) as fetcher:
+            prefetched = {}
+            # 작업 전체의 대표 이미지 해시 인덱스와 대표 DTO의 id()별 레이블 Future.
+            # 해시만 보관하므로 청크 단위로 받은 이미지 바이트는 청크 처리가 끝나면 해제됩니다.
+            dedup_index = HashIndex(self.dedup_threshold) if self.dedup_enabled else None
+            representative_labels = {}
+            duplicate_tasks = []
+
+            async def process_chunk(chunk):
+                async with semaphore:
+                    early_labels = {}
+                    save_tasks = {}
+                    # 레이블이 기록된 청크 인덱스 (실패 처리에서 NONE으로 중복 기록하지 않도록)
+                    stored = set()
+                    try:
+                        images = [url for _, url in chunk]
+                        # LLM에 인라인할 이미지와 저장할 이미지를 청크당 한 번만 동시에 다운로드합니다.
+                        # inline 검증 모드에서는 같은 GET 응답으로 이미지 여부를 확인하므로 모든 이미지를 받습니다.
+                        urls_to_fetch = images if (operation != "test" or validate_inline or self.grid_size
+                                                   or dedup_index is not None) else [
+                            url for url in images if ImageService.is_local_url(url)
+                        ]
+                        # 로컬 분류 단계에서 받아 둔 이미지는 꺼내 가져와, 청크 처리가 끝나면 바이트가 해제되게 합니다.
+                        fetched = {url: prefetched.pop(url) for url in images if url in prefetched}
+                        fetched.update(await fetcher.fetch_many(
+                            [url for url in urls_to_fetch if url not in fetched], validate=validate_inline
+                        ))
+                        image_data = {url: result.content for url, result in fetched.items() if result.ok}
+
+                        if validate_inline:
+                            invalid_urls = [url for url in images if url not in image_data]
+                            if invalid_urls:
+                                logging.info(f"Skipping {len(invalid_urls)} invalid images in chunk: "
+                                           f"{invalid_urls[:3]}{'...' if len(invalid_urls) > 3 else ''}")
+                            chunk = [(dto, url) for dto, url in chunk if url in image_data]
+                            images = [url for _, url in chunk]
+                            if not chunk:
+                                return
+
+                        if dedup_index is not None:
+                            chunk = await deduplicate_chunk(chunk, image_data)
+                            images = [url for _, url in chunk]
+                            if not chunk:
+                                return
+
+                        chunk_start_time = asyncio.get_event_loop().time()
+                        # 스트리밍 모드에서는 레이블이 도착하는 즉시 저장을 시작해 응답 생성과 겹치게 합니다.
+                        def on_label(index, label):
+                            if index not in early_labels:
+                                early_labels[index] = label
+                                dto, url = chunk[index]
+                                save_tasks[index] = asyncio.ensure_future(store_label(dto, url, label, image_data))
+
+                        chunk_labels, retry_tree = await self._classify_with_bisect(
+                            images, test_class, image_data, result_cache, workspace_id, bisect, on_label=on_label,
+                            report=classification_report, category_groups=groups
+                        )
+                        if not retry_tree['ok']:
+                            bisect['failed_chunks'] += 1
+                            if len(bisect['trees']) < self.MAX_REPORTED_RETRY_TREES:
+                                bisect['trees'].append(retry_tree)
+                        chunk_end_time = asyncio.get_event_loop().time()
+
+                        logging.info(f"Successfully processed chunk of {len(images)} images in "
+                                   f"{chunk_end_time - chunk_start_time:.2f} seconds")
+
+                        for index, (label, (dto, url)) in enumerate(zip(chunk_labels, chunk)):
+                            if index not in early_labels:
+                                await store_label(dto, url, label, image_data)
+                                stored.add(index)
+                        spans = await asyncio.gather(*save_tasks.values())
+                        if spans:
+                            overlap = sum(max(0.0, min(end, chunk_end_time) - start) for start, end in spans)
+                            streaming['early_labels'] += len(spans)
+                            streaming['overlap_seconds'] += overlap
+                            metrics.observe('save_generation_overlap_seconds', overlap)
+
+                    except Exception as e:
+                        logging.error(f"Error processing chunk of {len(chunk)} images: {e}")
+                        # Log chunk details for debugging
+                        image_urls = [url for _, url in chunk]
+                        logging.error(f"Failed chunk contained images: {image_urls[:3]}{'...' if len(image_urls) > 3 else ''}")
+                        # 이미 저장을 마친 이미지(순차 저장과 먼저 시작한 저장 모두)는 레이블이 기록되었으므로 건너뜁니다.
+                        results = await asyncio.gather(*save_tasks.values(), return_exceptions=True)
+                        stored.update(index for index, result in zip(save_tasks, results)
+                                      if not isinstance(result, BaseException))
+                        for index, (dto, url) in enumerate(chunk):
+                            if index in stored:
+                                continue
+                            resolve_representative(dto, None)
+                            if "id" in dto:
+                                labels_to_ids.setdefault("NONE", []).append(dto["id"])
+
+            def resolve_representative(dto, label):
+                future = representative_labels.get(id(dto))
+                if future is not None and not future.done():
+                    future.set_result(label)
+
+            async def deduplicate_chunk(chunk, image_data):
+                """작업에서 이미 본 대표와 같은 그룹인 이미지를 청크에서 빼고, 대표의 레이블을 기다리게 합니다."""
+                fingerprints = await asyncio.gather(*(
+                    run_in_image_pool(image_fingerprint, image_data[url]) if url in image_data else asyncio.sleep(0)
+                    for _, url in chunk
+                ))
+                remaining = []
+                for (dto, url), fingerprint in zip(chunk, fingerprints):
+                    value, color = fingerprint or (None, None)
+                    match = dedup_index.find_or_add(id(dto), value, color)
+                    if match is None:
+                        if value is not None:
+                            representative_labels[id(dto)] = asyncio.get_event_loop().create_future()
+                        remaining.append((dto, url))
+                        continue
+                    duplicate_tasks.append(asyncio.ensure_future(
+                        store_duplicate(dto, url, representative_labels[match], image_data.get(url))))
+                return remaining
+
+            async def store_duplicate(dto, url, representative_label, image_bytes):
+                """대표 이미지의 레이블을 기다렸다가 중복 이미지에 적용합니다 (세마포어를 잡지 않습니다)."""
+                label = await representative_label
+                if label is None:
+                    # 대표 분류가 실패하면 중복 이미지도 분류되지 않은 것으로 기록합니다.
+                    if "id" in dto:
+                        labels_to_ids.setdefault("NONE", []).append(dto["id"])
+                    return
+                await store_label(dto, url, label, {url: image_bytes} if image_bytes is not None else {})
+
+            async def store_label(dto, url, label, image_data):
+                """레이블을 기록하고 (classify 작업이면) 이미지를 저장합니다. (시작, 종료) 시각을 반환합니다."""
+                start = asyncio.get_event_loop().time()
+                if operation != "test":
+                    await asyncio.to_thread(ImageService.save_image, url, label, workspace_id, dto['fileName'],
+                                            image_bytes=image_data.get(url))
+                if "id" in dto:
+                    labels_to_ids.setdefault(label, []).append(dto["id"])
+                else:
+                    logging.warning(f"'id' is not found in dto: {dto}")
+                # 이 이미지를 대표로 하는 중복 이미지가 같은 레이블을 쓰도록 알립니다.
+                resolve_representative(dto, label)
+                return start, asyncio.get_event_loop().time()
+
+            # Process chunks with timing
+            start_time = asyncio.get_event_loop().time()
+            local = None
+            if self.local_cascade_enabled and workspace_id is not None:
+                chunks, local = await self._classify_locally(chunks, test_class, workspace_id, fetcher, prefetched,
+                                                             validate_inline, store_label)
+            tasks = [process_chunk(chunk) for chunk in chunks]
+            await asyncio.gather(*tasks)
+            # 레이블을 받지 못한 대표(예: 취소된 청크)의 중복 이미지가 무한히 기다리지 않게 합니다.
+            for future in representative_labels.values():
+                if not future.done():
+                    future.set_result(None)
+            await asyncio.gather(*duplicate_tasks)
+            end_time = asyncio.get_event_loop().time()
+            fetch_stats = fetcher.get_stats()
+
         # Log final processing statistics
         total_processed = sum(len(labels_to_ids.get(label, [])) for label in labels_to_ids)
-        if len(chunks) > 0:
-            avg_time = (end_time - start_time) / len(chunks)
+        duplicate_count = len(duplicate_tasks)
+        if duplicate_count:
+            metrics.increment('dedup_duplicate_images', duplicate_count)
+            logging.info(f"Deduplicated {duplicate_count} images (threshold={self.dedup_threshold})")
+        if report is not None:
+            report['local'] = local
+        if len(chunks) > 0 or local:
+            avg_time = (end_time - start_time) / max(len(chunks), 1)
             logging.info(f"Completed processing {total_processed} images across {len(chunks)} chunks "
                         f"in {end_time - start_time:.2f} seconds (avg: {avg_time:.2f}s per chunk)")
+            logging.info(f"Image fetch throughput: {fetch_stats['succeeded']} images, "
+                        f"{fetch_stats['images_per_second']} images/s, {fetch_stats['mbytes_per_second']} MB/s "
+                        f"(retries={fetch_stats['retries']}, failed={fetch_stats['failed']})")
+            metrics.record_job({
+                'operation': str(operation),
+                'workspace_id': workspace_id,
+                'images': total_processed,
+                'chunks': len(chunks),
+                'duplicates': duplicate_count,
+                'bisect': bisect,
+                'streaming': {'early_labels': streaming['early_labels'],
+                              'overlap_seconds': round(streaming['overlap_seconds'], 3)},
+                'resolution': classification_report.get('resolution', {'first_pass_images': 0,
+                                                                        'escalated_images': 0}),
+                'cascade': self._cascade_summary(classification_report.get('cascade', {})),
+                'hierarchical': self._hierarchical_summary(classification_report.get('hierarchical')),
+                'local': local,
+                'elapsed_seconds': round(end_time - start_time, 3),
+                'fetch': fetch_stats,
+            })
         else:
             logging.info(f"No chunks to process (0 valid images)")
 
         return labels_to_ids
 
+    async def _classify_locally(self, chunks, categories, workspace_id, fetcher, prefetched, validate_inline,
+                                store_label):
+        """
+        작업 공간의 최신 YOLO 모델로 이미지를 먼저 분류합니다.
+
+        보정된 임계값 이상이고 요청 카테고리에 있는 예측은 바로 저장하고, 나머지만 다시 청크로 묶어
+        LLM으로 보냅니다. LLM으로 보낼 이미지만 prefetched에 남겨 LLM 청크 처리에서 다시 받지 않게 하고,
+        로컬에서 저장을 마친 이미지의 바이트는 바로 버립니다.
+
+        Args:
+            chunks (list): 계획된 청크 목록.
+            categories (list of str): 분류 카테고리 목록.
+            workspace_id (int): 작업 공간 ID (모델 선택에 사용).
+            fetcher (ImageFetcher): 이미지 다운로더.
+            prefetched (dict): URL을 키로 하는 이미 받은 FetchResult (이 메서드가 채우고, 청크 처리가 꺼내 갑니다).
+            validate_inline (bool): 다운로드 응답으로 이미지 여부를 검증할지 여부.
+            store_label (callable): (dto, url, label, image_data)로 레이블을 기록하는 코루틴 함수.
+
+        Returns:
+            tuple: (LLM으로 보낼 청크 목록, 로컬 분류 통계). 사용할 모델이 없으면 통계는 None입니다.
+        """
+        try:
+            calibration = await asyncio.to_thread(self.yolo_service.get_cascade_threshold, workspace_id)
+        except ModelNotFoundError:
+            return chunks, None
+        except Exception as e:
+            logging.warning(f"Local classifier unavailable for workspace {workspace_id}: {e}")
+            return chunks, None
+
+        start = asyncio.get_event_loop().time()
+        threshold = calibration.get('threshold')
+        pairs = [pair for chunk in chunks for pair in chunk]
+        accepted = []
+        if threshold is not None:
+            missing = list(dict.fromkeys(url for _, url in pairs if url not in prefetched))
+            prefetched.update(await fetcher.fetch_many(missing, validate=validate_inline))
+            candidates = [(dto, url) for dto, url in pairs if prefetched[url].ok]
+            image_data = {url: prefetched[url].content for _, url in candidates}
+            try:
+                predictions = await asyncio.to_thread(self.yolo_service.predict_batch,
+                                                      [image_data[url] for _, url in candidates], workspace_id,
+                                                      calibration['version'])
+            except Exception as e:
+                logging.warning(f"Local classification failed for workspace {workspace_id}: {e}")
+                predictions = []
+            accepted = [(dto, url, label) for (dto, url), (label, confidence) in zip(candidates, predictions)
+                        if label in categories and confidence >= threshold]
+            await asyncio.gather(*(store_label(dto, url, label, image_data) for dto, url, label in accepted))
+
+        served = {id(dto) for dto, _, _ in accepted}
+        remaining = [(dto, url) for dto, url in pairs if id(dto) not in served]
+        remaining_urls = {url for _, url in remaining}
+        for _, url, _ in accepted:
+            if url not in remaining_urls:
+                prefetched.pop(url, None)
+        stats = {
+            'model_version': calibration.get('version'),
+            'threshold': threshold,
+            'images': len(pairs),
+            'served_locally': len(accepted),
+            'local_fraction': round(len(accepted) / len(pairs), 4) if pairs else 0.0,
+            'seconds': round(asyncio.get_event_loop().time() - start, 3),
+        }
+        metrics.increment('local_classified_images', len(accepted))
+        logging.info(f"Local classifier served {len(accepted)}/{len(pairs)} images "
+                     f"(workspace {workspace_id}, threshold={threshold})")
+        return (self._plan_chunks(remaining, categories) if accepted else chunks), stats
+
+    @staticmethod
+    def _cascade_summary(tiers):
+        """
+        캐스케이드 계층별 누적 통계를 작업 요약 형식으로 변환합니다.
+
+        Args:
+            tiers (dict): 계층 번호를 키로 하는 {'images', 'calls', 'seconds'}.
+
+        Returns:
+            list of dict: 계층별 이미지 수, 요청 수, 평균 지연 시간, 이전 계층 대비 상향 비율.
+        """
+        summary = []
+        previous_images = None
+        for tier in sorted(tiers):
+            stats = tiers[tier]
+            summary.append({
+                'tier': tier,
+                'images': stats['images'],
+                'calls': stats['calls'],
+                'avg_latency_seconds': round(stats['seconds'] / stats['calls'], 3) if stats['calls'] else 0.0,
+                'escalation_rate': (round(stats['images'] / previous_images, 3)
+                                    if previous_images else None),
+            })
+            previous_images = stats['images']
+        return summary
+
+    @staticmethod
+    def _hierarchical_summary(stats):
+        """
+        계층 분류 누적 통계를 작업 요약 형식으로 변환합니다.
+
+        Args:
+            stats (dict | None): ClassificationService가 누적한 'hierarchical' 통계.
+
+        Returns:
+            dict | None: 평면 분류 대비 예상 프롬프트 토큰 절감량과 단계별 평균 소요 시간. 계층 분류를 쓰지
+                않았으면 None.
+        """
+        if not stats:
+            return None
+        chunks = stats['chunks'] or 1
+        return {
+            'groups': stats['groups'],
+            'chunks': stats['chunks'],
+            'requests': stats['requests'],
+            'prompt_tokens': stats['prompt_tokens'],
+            'flat_prompt_tokens': stats['flat_prompt_tokens'],
+            'saved_prompt_tokens': stats['flat_prompt_tokens'] - stats['prompt_tokens'],
+            'flat_fallback_images': stats['flat_fallback_images'],
+            'avg_group_pass_seconds': round(stats['group_pass_seconds'] / chunks, 3),
+            'avg_category_pass_seconds': round(stats['category_pass_seconds'] / chunks, 3),
+        }
+
+    def _new_bisect_stats(self):
+        """작업 하나의 분할 재시도 통계를 초기화합니다."""
+        return {
+            'max_extra_calls': self.bisect_max_extra_calls,
+            'failed_chunks': 0,
+            'extra_calls': 0,
+            'max_depth': 0,
+            'recovered_images': 0,
+            'isolated_failures': 0,
+            'abandoned_images': 0,
+            'trees': [],
+        }
+
+    async def _classify_with_bisect(self, images, categories, image_data, result_cache, workspace_id, bisect,
+                                    depth=0, on_label=None, report=None, category_groups=None):
+        """
+        이미지를 분류하고, 실패하면 반으로 나눠 재귀적으로 재시도합니다.
+
+        손상된 이미지 하나나 너무 큰 요청 때문에 청크 전체가 'NONE'이 되지 않도록, 실패한 묶음을
+        이미지 한 장까지 나눠 다시 보냅니다. 혼자서도 실패한 이미지와 추가 호출 예산
+        (bisect_max_extra_calls)이 바닥나 재시도하지 못한 이미지만 'NONE'이 됩니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 분류 카테고리 목록.
+            image_data (dict): URL을 키로 하는 이미지 바이트.
+            result_cache (ResultCache | None): 분류 결과 캐시.
+            workspace_id (int): 작업 공간 ID.
+            bisect (dict): 작업 단위 재시도 통계 (_new_bisect_stats). 예산 차감과 결과 집계에 사용합니다.
+            depth (int): 재시도 트리에서의 깊이.
+            on_label (callable, optional): 레이블이 먼저 확정될 때마다 (images에서의 인덱스, 레이블)로 호출됩니다.
+            report (dict, optional): 해상도 단계 상향, 캐스케이드, 계층 분류 통계를 누적할 딕셔너리.
+            category_groups (dict, optional): 계층 분류 그룹 (빈 딕셔너리이면 평면 분류).
+
+        Returns:
+            tuple: (images와 같은 순서의 분류 결과, 재시도 트리 노드 {'size', 'depth', 'ok', 'error', 'children'}).
+        """
+        node = {'size': len(images), 'depth': depth}
+        try:
+            labels = await self._classify_with_cache(images, categories, image_data, result_cache, workspace_id,
+                                                     on_label, report, category_groups)
+            node['ok'] = True
+            if depth > 0:
+                bisect['recovered_images'] += len(images)
+            return labels, node
+        except Exception as e:
+            node['ok'] = False
+            node['error'] = type(e).__name__
+            if len(images) == 1:
+                bisect['isolated_failures'] += 1
+                logging.warning(f"Image failed classification on its own: {images[0]} ({e})")
+                return ["NONE"], node
+            if bisect['extra_calls'] + 2 > bisect['max_extra_calls']:
+                bisect['abandoned_images'] += len(images)
+                logging.error(f"Retry budget exhausted, labeling {len(images)} images NONE: {e}")
+                return ["NONE"] * len(images), node
+
+            bisect['extra_calls'] += 2
+            bisect['max_depth'] = max(bisect['max_depth'], depth + 1)
+            logging.warning(f"Chunk of {len(images)} images failed ({e}), retrying in halves")
+            middle = len(images) // 2
+            second_half_label = (lambda index, label: on_label(index + middle, label)) if on_label else None
+            halves = await asyncio.gather(
+                self._classify_with_bisect(images[:middle], categories, image_data, result_cache, workspace_id,
+                                           bisect, depth + 1, on_label, report, category_groups),
+                self._classify_with_bisect(images[middle:], categories, image_data, result_cache, workspace_id,
+                                           bisect, depth + 1, second_half_label, report, category_groups),
+            )
+            node['children'] = [child for _, child in halves]
+            return halves[0][0] + halves[1][0], node
+
+    async def _classify_with_cache(self, images, categories, image_data, result_cache, workspace_id, on_label=None,
+                                   report=None, category_groups=None):
+        """
+        분류 결과 캐시를 먼저 조회하고 캐시에 없는 이미지만 LLM으로 분류합니다.
+
+        캐시 키는 이미지 내용의 SHA-256, 정규화된 카테고리 목록, 모델 ID, 작업 공간 ID이며 현재 설정된
+        모델들의 결과만 사용합니다. 바이트가 없는 이미지(URL로만 전달되는 이미지)는 항상 LLM으로 보냅니다.
+        'NONE'은 응답 파싱 실패 시에도 반환되므로 캐시하지 않습니다.
+
+        Args:
+            images (list of str): 분류할 이미지 URL 목록.
+            categories (list of str): 분류 카테고리 목록.
+            image_data (dict): URL을 키로 하는 이미지 바이트.
+            result_cache (ResultCache | None): 분류 결과 캐시. None이면 항상 LLM으로 분류합니다.
+            workspace_id (int): 작업 공간 ID.
+            on_label (callable, optional): LLM이 레이블을 먼저 확정할 때마다 (images에서의 인덱스, 레이블)로
+                호출됩니다. 캐시에서 찾은 레이블은 호출하지 않습니다.
+            report (dict, optional): 해상도 단계 상향, 캐스케이드, 계층 분류 통계를 누적할 딕셔너리.
+            category_groups (dict, optional): 계층 분류 그룹 (빈 딕셔너리이면 평면 분류).
+
+        Returns:
+            list of str: images와 같은 순서의 분류 결과.
+        """
+        if result_cache is None:
+            return await self.classification_service.classify_images(
+                images, categories, image_data=image_data, grid_size=self.grid_size, on_label=on_label, report=report,
+                category_groups=category_groups
+            )
+
+        hash_by_url = await asyncio.to_thread(
+            lambda: {url: hashlib.sha256(image_data[url]).hexdigest() for url in images if url in image_data}
+        )
+        hierarchical = bool(category_groups)
+        models = [self._result_cache_model_key(self.classification_service.first_tier_model(llm_config),
+                                               hierarchical)
+                  for llm_config in self.classification_service.available_configs]
+        cached = await asyncio.to_thread(result_cache.lookup_many, list(hash_by_url.values()), categories, models,
+                                         workspace_id)
+        label_by_url = {url: cached[image_hash] for url, image_hash in hash_by_url.items() if image_hash in cached}
+
+        pending_positions = [index for index, url in enumerate(images) if url not in label_by_url]
+        pending = [images[index] for index in pending_positions]
+        if pending:
+            pending_label = ((lambda index, label: on_label(pending_positions[index], label))
+                             if on_label else None)
+            labels, model = await self.classification_service.classify_images_detailed(
+                pending, categories, image_data=image_data, grid_size=self.grid_size, on_label=pending_label,
+                report=report, category_groups=category_groups
+            )
+            label_by_url.update(zip(pending, labels))
+            to_store = {
+                hash_by_url[url]: label
+                for url, label in zip(pending, labels)
+                if url in hash_by_url and label != "NONE"
+            }
+            await asyncio.to_thread(result_cache.store_many, to_store, categories,
+                                    self._result_cache_model_key(model, hierarchical), workspace_id)
+
+        if len(pending) < len(images):
+            logging.info(f"Result cache served {len(images) - len(pending)}/{len(images)} images in chunk")
+        return [label_by_url[url] for url in images]
+
+    def _result_cache_model_key(self, model, hierarchical=False):
+        """
+        격자 모드, 해상도 단계 상향, 모델 캐스케이드, 계층 분류 결과는 정확도가 다를 수 있으므로 별도의 모델 키로
+        캐시합니다. 캐스케이드와 계층 분류에서 model은 1차 계층/1단계 모델입니다.
+        """
+        if self.grid_size:
+            key = f"{model}#grid{self.grid_size}"
+        else:
+            key = f"{model}#escalation" if self.resolution_escalation else model
+        if self.cascade_enabled:
+            key = f"{key}#cascade"
+        return f"{key}#hier" if hierarchical else key
+
+    def _plan_chunks(self, pairs, categories):
+        """
+        (DTO, URL) 목록을 LLM 요청 단위의 청크로 나눕니다.
+
+        청크 플래너가 활성화되어 있으면 설정된 프로바이더들의 요청 바이트/토큰 한도에 맞춰 빈 패킹하고,
+        비활성화되어 있거나 격자 모드이면 이미지 수 기반의 고정 청크 크기를 사용합니다.
+
+        Args:
+            pairs (list): (DTO, URL) 튜플 목록.
+            categories (list of str): 분류 카테고리 목록 (도구 스키마 크기 추정에 사용).
+
+        Returns:
+            list of list: 청크 목록.
+        """
+        if self.grid_size or not self.chunk_planner_enabled:
+            return list(self._chunk_list(pairs, self._get_adaptive_chunk_size(len(pairs))))
+        providers = [llm_config['provider'] for llm_config in self.classification_service.available_configs]
+        return chunk_planner.plan(pairs, categories, providers, ImageService.is_local_url)
+
     def _get_adaptive_chunk_size(self, total_images):
         """
         전체 이미지 수에 따라 청크 크기를 동적으로 조정합니다.
@@ -189,6 +676,10 @@ class DataProcessor:
         # Handle edge case where there are no images
         if total_images == 0:
             return 1  # Return minimum chunk size to avoid division by zero
+
+        if self.grid_size:
+            # 격자 모드에서는 격자를 최대한 채워 요청 수를 줄입니다.
+            return min(total_images, self.grid_capacity)
             
         if total_images <= 5:
             # 소수 이미지의 경우 오버헤드를 줄이기 위해 더 작은 청크 사용
@@ -200,6 +691,17 @@ class DataProcessor:
             # 대량 배치에 대해 최대 효율성을 위해 더 큰 청크 사용
             return min(self.MAX_CHUNK_SIZE, self.chunk_size)
     
+    def _chunk_concurrency_cap(self):
+        """
+        동시에 진행할 수 있는 청크 수의 상한을 반환합니다.
+
+        Returns:
+            int: 적응형 동시성이 활성화되어 있으면 제한기의 최대 한도까지, 아니면 max_concurrent_chunks.
+        """
+        if config.LLM_ADAPTIVE_CONCURRENCY:
+            return max(self.max_concurrent_chunks, config.LLM_CONCURRENCY_MAX)
+        return self.max_concurrent_chunks
+
     @staticmethod
     def _chunk_list(lst, n):
         """
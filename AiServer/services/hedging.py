@@ -0,0 +1,96 @@
+import threading
+
+from config import config
+from services.provider_health import provider_health
+from utils.metrics import metrics
+
+
+class HedgeBudget:
+    """
+    헤징(hedging) 요청의 지연 기준과 추가 요청 예산을 관리합니다.
+
+    기본 요청마다 budget_ratio만큼 크레딧이 쌓이고(최대 MAX_CREDITS), 헤지 요청 하나가 1을 씁니다.
+    따라서 장기적으로 추가 요청 비율은 budget_ratio를 넘지 않고, 잠잠하던 뒤의 지연 급증에도
+    몰아서 쓸 수 있는 양이 제한됩니다.
+
+    Attributes:
+        percentile (float): 헤지 지연으로 사용할 최근 지연 시간 백분위.
+        min_delay (float): 최소 헤지 지연(초).
+        min_samples (int): 백분위를 신뢰하기 위한 최소 표본 수.
+        budget_ratio (float): 기본 요청 대비 허용하는 헤지 요청 비율.
+    """
+
+    MAX_CREDITS = 10.0
+
+    def __init__(self, percentile=None, min_delay=None, min_samples=None, budget_ratio=None):
+        self.percentile = config.LLM_HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_delay = config.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.min_samples = config.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.budget_ratio = config.LLM_HEDGE_BUDGET if budget_ratio is None else budget_ratio
+        self._credits = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_exhausted': 0}
+
+    def get_delay(self, provider):
+        """
+        프로바이더의 헤지 지연을 반환합니다.
+
+        Args:
+            provider (str): 기본 요청을 보낸 프로바이더.
+
+        Returns:
+            float | None: 헤지 요청을 보내기 전 기다릴 시간(초). 표본이 부족하면 None (헤지하지 않음).
+        """
+        delay = provider_health.latency_percentile(provider, self.percentile, self.min_samples)
+        return None if delay is None else max(self.min_delay, delay)
+
+    def record_request(self):
+        """기본 요청 하나를 기록하고 예산 크레딧을 적립합니다."""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._credits = min(self.MAX_CREDITS, self._credits + self.budget_ratio)
+        metrics.increment('llm_hedge_requests')
+
+    def try_hedge(self):
+        """
+        헤지 요청 하나의 예산을 사용합니다.
+
+        Returns:
+            bool: 예산이 남아 있으면 True.
+        """
+        with self._lock:
+            if self._credits < 1.0:
+                self._stats['budget_exhausted'] += 1
+                return False
+            self._credits -= 1.0
+            self._stats['hedged'] += 1
+        metrics.increment('llm_hedges_sent')
+        return True
+
+    def record_win(self, hedged):
+        """헤징된 요청에서 어느 쪽이 먼저 성공했는지 기록합니다."""
+        if hedged:
+            with self._lock:
+                self._stats['hedge_wins'] += 1
+            metrics.increment('llm_hedge_wins')
+
+    def get_stats(self):
+        """
+        헤징 상태를 반환합니다.
+
+        Returns:
+            dict: 요청/헤지/헤지 승리 횟수, 헤지 비율, 남은 크레딧.
+        """
+        with self._lock:
+            requests = self._stats['requests']
+            hedged = self._stats['hedged']
+            return {
+                **self._stats,
+                'hedge_rate': round(hedged / requests, 4) if requests else 0.0,
+                'hedge_win_rate': round(self._stats['hedge_wins'] / hedged, 4) if hedged else 0.0,
+                'credits': round(self._credits, 2),
+            }
+
+
+hedge_budget = HedgeBudget()
+metrics.register_collector('llm_hedging', hedge_budget.get_stats)
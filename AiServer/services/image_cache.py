@@ -0,0 +1,354 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """
+    디스크 기반 content-addressed 이미지 캐시.
+
+    이미지 본문은 SHA-256 다이제스트 이름의 blob으로 한 번만 저장하고, URL별 인덱스에는
+    다이제스트와 ETag/Last-Modified 검증자를 기록합니다. 검증자가 바뀌면 새 blob을 가리키고,
+    같은 내용은 URL이 달라도 blob을 공유합니다.
+
+    모든 쓰기는 임시 파일 작성 후 os.replace로 교체하므로 여러 AiServer 레플리카가
+    같은 볼륨을 공유해도 안전합니다. 바이트 예산을 넘으면 가장 오래 사용하지 않은
+    blob부터 제거하고 (읽을 때마다 mtime을 갱신하여 LRU 순서를 유지), blob이 없어진
+    URL 인덱스도 함께 정리합니다.
+
+    Attributes:
+        cache_dir (str): 캐시 루트 디렉토리.
+        max_bytes (int): blob 전체의 최대 바이트 수.
+        freshness_seconds (float): 마지막 검증 후 재검증 없이 사용할 수 있는 시간(초).
+    """
+
+    EVICTION_TARGET_RATIO = 0.9  # 제거 후 목표 사용량 (예산 대비)
+    EVICTION_CHECK_RATIO = 0.05  # 이 비율만큼 새로 쓰일 때마다 사용량을 검사
+
+    def __init__(self, cache_dir=None, max_bytes=None, freshness_seconds=None):
+        self.cache_dir = cache_dir or config.IMAGE_CACHE_DIR or os.path.join(config.BASE_DIR, "cache", "images")
+        self.max_bytes = config.IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.freshness_seconds = (config.IMAGE_CACHE_FRESHNESS_SECONDS if freshness_seconds is None
+                                  else freshness_seconds)
+        self.blob_dir = os.path.join(self.cache_dir, "blobs")
+        self.index_dir = os.path.join(self.cache_dir, "index")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._bytes_since_check = 0
+        self._stats = {
+            'hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'stores': 0,
+            'links': 0,
+            'evictions': 0,
+            'evicted_bytes': 0,
+        }
+
+    @staticmethod
+    def _url_key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _index_path(self, url):
+        key = self._url_key(url)
+        return os.path.join(self.index_dir, key[:2], f"{key}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    @staticmethod
+    def _atomic_write(path, data):
+        """임시 파일에 쓴 뒤 교체하여 다른 프로세스가 불완전한 파일을 읽지 않도록 합니다."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def lookup(self, url):
+        """
+        URL의 캐시 항목을 조회합니다.
+
+        Args:
+            url (str): 이미지 URL.
+
+        Returns:
+            dict | None: 다이제스트, 검증자, 콘텐츠 타입, 검증 시각을 담은 항목.
+                인덱스가 없거나 blob이 제거된 경우 None.
+        """
+        try:
+            with open(self._index_path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._blob_path(entry.get('digest', ''))):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        """항목이 재검증 없이 사용할 수 있을 만큼 최근에 검증되었는지 확인합니다."""
+        return time.time() - entry.get('validated_at', 0) < self.freshness_seconds
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        항목의 검증자로 조건부 요청 헤더를 만듭니다.
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since 헤더.
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, entry, count_hit=True):
+        """
+        항목의 blob을 읽고 LRU 순서를 갱신합니다.
+
+        Args:
+            entry (dict): lookup()이 반환한 항목.
+            count_hit (bool): True이면 캐시 적중으로 집계합니다.
+
+        Returns:
+            bytes | None: 이미지 바이트. 그 사이 blob이 제거되었으면 None.
+        """
+        blob_path = self._blob_path(entry['digest'])
+        try:
+            with open(blob_path, "rb") as f:
+                content = f.read()
+            os.utime(blob_path)
+        except OSError:
+            return None
+        if count_hit:
+            self._count('hits')
+        return content
+
+    def store(self, url, content, headers=None):
+        """
+        이미지를 저장하고 URL 인덱스를 갱신합니다.
+
+        Args:
+            url (str): 이미지 URL.
+            content (bytes): 이미지 바이트.
+            headers (dict, optional): 응답 헤더 (소문자 키). ETag/Last-Modified/Content-Type을 기록합니다.
+
+        Returns:
+            dict: 저장된 캐시 항목.
+        """
+        headers = headers or {}
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            self._atomic_write(blob_path, content)
+            with self._lock:
+                self._bytes_since_check += len(content)
+        else:
+            os.utime(blob_path)
+
+        entry = {
+            'url': url,
+            'digest': digest,
+            'size': len(content),
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_type': headers.get('content-type', ''),
+            'validated_at': time.time(),
+        }
+        self._atomic_write(self._index_path(url), json.dumps(entry).encode("utf-8"))
+        self._count('stores')
+        self._count('misses')
+
+        if self._bytes_since_check >= self.max_bytes * self.EVICTION_CHECK_RATIO:
+            self.evict()
+        return entry
+
+    def mark_validated(self, entry):
+        """
+        조건부 요청이 304로 응답한 항목의 검증 시각을 갱신합니다.
+
+        Args:
+            entry (dict): lookup()이 반환한 항목.
+        """
+        entry = {**entry, 'validated_at': time.time()}
+        self._atomic_write(self._index_path(entry['url']), json.dumps(entry).encode("utf-8"))
+        self._count('revalidated')
+        return entry
+
+    def link_to(self, url, dest_path, expected_digest=None):
+        """
+        캐시된 이미지를 지정된 경로에 하드링크(불가능하면 복사)합니다.
+
+        Args:
+            url (str): 이미지 URL.
+            dest_path (str): 생성할 파일 경로.
+            expected_digest (str, optional): 주어지면 캐시된 내용의 다이제스트가 일치할 때만 연결합니다.
+
+        Returns:
+            bool: 캐시된 이미지를 연결했으면 True, 캐시에 없거나 내용이 다르면 False.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return False
+        if expected_digest is not None and entry['digest'] != expected_digest:
+            return False
+        blob_path = self._blob_path(entry['digest'])
+        try:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            try:
+                os.link(blob_path, dest_path)
+            except OSError:
+                # 다른 파일 시스템이거나 하드링크를 지원하지 않는 경우
+                shutil.copyfile(blob_path, dest_path)
+            os.utime(blob_path)
+        except OSError as e:
+            logger.warning(f"Failed to link cached image {url} -> {dest_path}: {e}")
+            return False
+        self._count('links')
+        return True
+
+    def _scan_blobs(self):
+        blobs = []
+        for root, _, files in os.walk(self.blob_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def _prune_index(self):
+        """
+        blob이 제거된 URL 인덱스 항목을 삭제합니다.
+
+        Returns:
+            int: 삭제된 인덱스 항목 수.
+        """
+        pruned = 0
+        for root, _, files in os.walk(self.index_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        digest = json.load(f).get('digest', '')
+                except (OSError, ValueError):
+                    continue
+                if os.path.exists(self._blob_path(digest)):
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue  # 다른 레플리카가 먼저 제거한 경우
+                except OSError as e:
+                    logger.warning(f"Failed to prune image cache index {path}: {e}")
+                    continue
+                pruned += 1
+        return pruned
+
+    def evict(self):
+        """
+        blob 전체 크기가 예산을 넘으면 가장 오래 사용되지 않은 blob부터 제거하고, 제거된 blob을
+        가리키는 URL 인덱스 항목도 삭제합니다.
+
+        Returns:
+            int: 제거된 바이트 수.
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return 0  # 다른 스레드가 이미 제거 중
+        try:
+            with self._lock:
+                self._bytes_since_check = 0
+            blobs = self._scan_blobs()
+            total = sum(size for _, size, _ in blobs)
+            if total <= self.max_bytes:
+                return 0
+
+            target = self.max_bytes * self.EVICTION_TARGET_RATIO
+            removed_bytes = 0
+            removed_count = 0
+            for _, size, path in sorted(blobs):
+                if total - removed_bytes <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # 다른 레플리카가 먼저 제거한 경우
+                except OSError as e:
+                    logger.warning(f"Failed to evict cached image {path}: {e}")
+                    continue
+                removed_bytes += size
+                removed_count += 1
+
+            pruned = self._prune_index()
+            self._count('evictions', removed_count)
+            self._count('evicted_bytes', removed_bytes)
+            logger.info(f"Image cache eviction removed {removed_count} blobs ({removed_bytes} bytes) "
+                        f"and {pruned} index entries")
+            return removed_bytes
+        finally:
+            self._evict_lock.release()
+
+    def get_stats(self):
+        """
+        캐시 통계를 반환합니다.
+
+        Returns:
+            dict: 적중/재검증/미스/저장/링크/제거 횟수와 적중률.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['revalidated']) / lookups, 4) if lookups else 0.0
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """
+    프로세스 전역 이미지 캐시를 반환합니다.
+
+    Returns:
+        ImageCache | None: IMAGE_CACHE_ENABLED가 False이거나 캐시 디렉토리를 만들 수 없으면 None.
+    """
+    global _image_cache
+    if not config.IMAGE_CACHE_ENABLED:
+        return None
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                try:
+                    _image_cache = ImageCache()
+                except OSError as e:
+                    logger.error(f"Image cache disabled: cannot initialize cache directory: {e}")
+                    return None
+                metrics.register_collector('image_cache', _image_cache.get_stats)
+    return _image_cache
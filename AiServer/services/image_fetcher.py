@@ -0,0 +1,423 @@
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import config
+from services.image_cache import get_image_cache
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 HTTP 상태 코드
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 네거티브 캐시에 기록하는 HTTP 상태 코드 (다시 요청해도 결과가 바뀌지 않는 경우)
+NEGATIVE_CACHE_STATUS_CODES = (404, 410)
+
+# 허용되는 이미지 콘텐츠 타입과 매직 바이트
+IMAGE_CONTENT_TYPES = ("image/png", "image/jpeg", "image/jpg")
+# 일부 서버는 정적 파일을 일반 바이너리 타입으로 응답하므로 매직 바이트로 판별합니다.
+GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+# ImageFetcher(cache=...) 인자를 생략했을 때 전역 이미지 캐시를 사용하도록 표시하는 값
+DEFAULT_CACHE = object()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    동기 이미지 요청에 사용할 프로세스 전역 requests 세션을 반환합니다.
+
+    세션은 keep-alive 커넥션 풀과 urllib3 재시도 정책을 공유하므로
+    요청마다 TCP 핸드셰이크를 반복하지 않습니다.
+
+    Returns:
+        requests.Session: 공유 HTTP 세션.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=config.IMAGE_FETCH_MAX_RETRIES,
+                    backoff_factor=0.2,
+                    status_forcelist=RETRYABLE_STATUS_CODES,
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=config.IMAGE_FETCH_MAX_CONNECTIONS,
+                    pool_maxsize=config.IMAGE_FETCH_MAX_CONNECTIONS_PER_HOST,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_request_timeout():
+    """동기 요청에 사용할 (connect, read) 타임아웃 튜플을 반환합니다."""
+    return (config.IMAGE_FETCH_CONNECT_TIMEOUT, config.IMAGE_FETCH_TIMEOUT)
+
+
+def sniff_image_type(content):
+    """
+    매직 바이트로 이미지 형식을 판별합니다.
+
+    Args:
+        content (bytes): 이미지 본문 (앞부분만 있어도 됨).
+
+    Returns:
+        str | None: 판별된 MIME 타입. 지원하지 않는 형식이면 None.
+    """
+    if not content:
+        return None
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mime_type
+    return None
+
+
+def validate_image_response(content_type, content):
+    """
+    응답의 콘텐츠 타입과 매직 바이트가 모두 지원하는 이미지 형식인지 검사합니다.
+
+    Args:
+        content_type (str): 응답 Content-Type (파라미터 제외, 소문자).
+        content (bytes): 응답 본문.
+
+    Returns:
+        str | None: 유효하지 않은 경우 그 사유, 유효하면 None.
+    """
+    if content_type not in IMAGE_CONTENT_TYPES and content_type not in GENERIC_CONTENT_TYPES:
+        return f"Unsupported content type: {content_type}"
+    if sniff_image_type(content) is None:
+        return "Content is not a PNG/JPEG image"
+    return None
+
+
+class NegativeCache:
+    """
+    유효하지 않은 것으로 확인된 이미지 URL을 짧은 시간 동안 기억하는 캐시.
+
+    같은 잘못된 URL이 반복 요청될 때 다운로드를 생략합니다.
+    여러 작업 스레드에서 공유되므로 락으로 보호됩니다.
+
+    Attributes:
+        ttl (float): 항목 유지 시간(초).
+        max_entries (int): 최대 항목 수. 초과 시 가장 오래된 항목부터 제거합니다.
+    """
+
+    def __init__(self, ttl=None, max_entries=10000):
+        self.ttl = config.IMAGE_NEGATIVE_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, url, reason):
+        """URL을 유효하지 않은 것으로 기록합니다."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda key: self._entries[key][0])
+                del self._entries[oldest]
+            self._entries[url] = (time.monotonic() + self.ttl, reason)
+
+    def get(self, url):
+        """
+        만료되지 않은 항목이 있으면 실패 사유를 반환합니다.
+
+        Returns:
+            str | None: 기록된 실패 사유. 없거나 만료되었으면 None.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            expires_at, reason = entry
+            if expires_at < time.monotonic():
+                del self._entries[url]
+                return None
+            return reason
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+negative_cache = NegativeCache()
+
+
+class FetchResult:
+    """
+    단일 이미지 다운로드 결과.
+
+    Attributes:
+        url (str): 요청한 원본 URL.
+        content (bytes | None): 응답 본문. 실패 시 None.
+        status_code (int | None): HTTP 상태 코드.
+        headers (dict): 응답 헤더 (소문자 키).
+        elapsed (float): 재시도를 포함한 소요 시간(초).
+        error (str | None): 실패 사유.
+        from_cache (bool): 디스크 캐시에서 제공되었는지 여부.
+    """
+
+    def __init__(self, url, content=None, status_code=None, headers=None, elapsed=0.0, error=None,
+                 from_cache=False):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.elapsed = elapsed
+        self.error = error
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.content is not None and self.error is None
+
+    @property
+    def content_type(self):
+        return self.headers.get('content-type', '').split(';')[0].strip().lower()
+
+    @property
+    def image_type(self):
+        """매직 바이트로 판별한 이미지 MIME 타입."""
+        return sniff_image_type(self.content)
+
+
+class ImageFetcher:
+    """
+    커넥션 풀을 공유하는 비동기 이미지 다운로더.
+
+    하나의 분류 작업(job) 동안 httpx.AsyncClient 하나를 재사용하며, 호스트별 동시 연결 수,
+    타임아웃, 요청별 재시도 횟수 및 작업 전체의 재시도 예산을 적용합니다.
+    이벤트 루프마다 클라이언트가 필요하므로 `async with` 블록 안에서 사용해야 합니다.
+
+    Attributes:
+        max_connections (int): 전체 최대 동시 연결 수.
+        max_connections_per_host (int): 호스트별 최대 동시 연결 수.
+        max_retries (int): 요청당 최대 재시도 횟수.
+        retry_budget_ratio (float): 작업 전체 요청 대비 허용되는 재시도 비율.
+        cache (ImageCache | None): 디스크 이미지 캐시. 신선한 항목은 요청 없이 제공하고,
+            오래된 항목은 ETag/Last-Modified 조건부 요청으로 재검증합니다.
+    """
+
+    MIN_RETRY_BUDGET = 10  # 요청 수가 적을 때도 보장되는 최소 재시도 횟수
+    BACKOFF_BASE = 0.2  # 재시도 간 기본 대기 시간(초)
+
+    def __init__(self, max_connections=None, max_connections_per_host=None, timeout=None,
+                 connect_timeout=None, max_retries=None, retry_budget_ratio=None, url_resolver=None,
+                 transport=None, cache=DEFAULT_CACHE):
+        self.max_connections = max_connections or config.IMAGE_FETCH_MAX_CONNECTIONS
+        self.max_connections_per_host = max_connections_per_host or config.IMAGE_FETCH_MAX_CONNECTIONS_PER_HOST
+        self.timeout = timeout or config.IMAGE_FETCH_TIMEOUT
+        self.connect_timeout = connect_timeout or config.IMAGE_FETCH_CONNECT_TIMEOUT
+        self.max_retries = config.IMAGE_FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_budget_ratio = (config.IMAGE_FETCH_RETRY_BUDGET if retry_budget_ratio is None
+                                   else retry_budget_ratio)
+        self.url_resolver = url_resolver
+        self.transport = transport
+        self.cache = get_image_cache() if cache is DEFAULT_CACHE else cache
+        self._client = None
+        self._host_semaphores = {}
+        self._stats = {
+            'requests': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'retries': 0,
+            'bytes': 0,
+            'invalid': 0,
+            'negative_cache_hits': 0,
+            'cache_hits': 0,
+            'cache_revalidated': 0,
+        }
+        self._first_request_at = None
+        self._last_response_at = None
+
+    async def __aenter__(self):
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            follow_redirects=True,
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """내부 HTTP 클라이언트를 닫습니다."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
+    def _can_retry(self):
+        """작업 전체 재시도 예산이 남아있는지 확인합니다."""
+        budget = max(self.MIN_RETRY_BUDGET, int(self._stats['requests'] * self.retry_budget_ratio))
+        return self._stats['retries'] < budget
+
+    async def fetch(self, url, validate=False):
+        """
+        단일 이미지를 다운로드합니다.
+
+        일시적인 오류(연결 실패, 타임아웃, 5xx, 429)는 재시도 예산 안에서 지수 백오프로 재시도합니다.
+        예외를 발생시키지 않고 실패 정보를 담은 FetchResult를 반환합니다.
+
+        Args:
+            url (str): 다운로드할 이미지 URL.
+            validate (bool): True이면 같은 응답으로 콘텐츠 타입과 매직 바이트를 검사하고,
+                유효하지 않은 URL은 네거티브 캐시에 기록합니다.
+
+        Returns:
+            FetchResult: 다운로드 결과. 검증에 실패하면 content가 None이고 error에 사유가 담깁니다.
+        """
+        if self._client is None:
+            raise RuntimeError("ImageFetcher must be used inside 'async with'")
+
+        if validate:
+            cached_reason = negative_cache.get(url)
+            if cached_reason is not None:
+                self._stats['negative_cache_hits'] += 1
+                self._stats['invalid'] += 1
+                return FetchResult(url, error=cached_reason)
+
+        request_url = self.url_resolver(url) if self.url_resolver else url
+        self._stats['requests'] += 1
+        started = time.monotonic()
+        if self._first_request_at is None:
+            self._first_request_at = started
+
+        entry = await asyncio.to_thread(self.cache.lookup, url) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            content = await asyncio.to_thread(self.cache.read, entry)
+            if content is not None:
+                self._stats['cache_hits'] += 1
+                self._stats['succeeded'] += 1
+                self._last_response_at = time.monotonic()
+                return FetchResult(url, content=content, status_code=200,
+                                   headers={'content-type': entry['content_type']},
+                                   elapsed=time.monotonic() - started, from_cache=True)
+        request_headers = self.cache.conditional_headers(entry) if entry is not None else None
+
+        attempt = 0
+        result = None
+        async with self._host_semaphore(request_url):
+            while True:
+                try:
+                    response = await self._client.get(request_url, headers=request_headers)
+                    if response.status_code == 304 and entry is not None:
+                        content = await asyncio.to_thread(self.cache.read, entry, False)
+                        if content is None:
+                            # 재검증 사이에 blob이 제거된 경우 조건 없이 다시 요청합니다.
+                            entry = request_headers = None
+                            continue
+                        await asyncio.to_thread(self.cache.mark_validated, entry)
+                        self._stats['cache_revalidated'] += 1
+                        result = FetchResult(url, content=content, status_code=200,
+                                             headers={'content-type': entry['content_type']}, from_cache=True)
+                        break
+                    if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries and self._can_retry():
+                        raise httpx.HTTPStatusError(
+                            f"Retryable status {response.status_code}", request=response.request, response=response
+                        )
+                    if response.status_code >= 400:
+                        result = FetchResult(url, status_code=response.status_code, headers=response.headers,
+                                             error=f"HTTP {response.status_code}")
+                    else:
+                        result = FetchResult(url, content=response.content, status_code=response.status_code,
+                                             headers=response.headers)
+                    break
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if attempt < self.max_retries and self._can_retry():
+                        attempt += 1
+                        self._stats['retries'] += 1
+                        await asyncio.sleep(self.BACKOFF_BASE * (2 ** (attempt - 1)))
+                        continue
+                    result = FetchResult(url, error=f"{type(e).__name__}: {e}")
+                    break
+
+        result.elapsed = time.monotonic() - started
+        self._last_response_at = time.monotonic()
+        if validate and result.status_code is not None:
+            # 404/410 응답이나 이미지가 아닌 응답만 기록합니다. 429, 401/403처럼 시간이 지나거나 인증이
+            # 바뀌면 성공할 수 있는 응답과 일시적인 전송 오류는 캐시하지 않습니다.
+            reason = result.error if not result.ok else validate_image_response(
+                result.content_type if not result.from_cache else result.image_type, result.content
+            )
+            if reason is not None and (result.ok or result.status_code in NEGATIVE_CACHE_STATUS_CODES):
+                negative_cache.add(url, reason)
+            if reason is not None and result.ok:
+                self._stats['invalid'] += 1
+                self._stats['bytes'] += len(result.content)
+                result.content = None
+                result.error = reason
+                logger.info(f"Image validation failed: {request_url} - {reason}")
+                return result
+        if result.ok:
+            self._stats['succeeded'] += 1
+            if not result.from_cache:
+                self._stats['bytes'] += len(result.content)
+                if self.cache is not None and sniff_image_type(result.content) is not None:
+                    await asyncio.to_thread(self.cache.store, url, result.content, result.headers)
+        else:
+            self._stats['failed'] += 1
+            logger.warning(f"Image fetch failed: {request_url} - {result.error}")
+        return result
+
+    async def fetch_many(self, urls, validate=False):
+        """
+        여러 이미지를 동시에 다운로드합니다.
+
+        Args:
+            urls (list of str): 다운로드할 이미지 URL 목록 (중복은 한 번만 요청).
+            validate (bool): True이면 각 응답을 이미지로 검증합니다. fetch()를 참고하세요.
+
+        Returns:
+            dict: URL을 키로, FetchResult를 값으로 하는 딕셔너리.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.fetch(url, validate=validate) for url in unique_urls))
+        return dict(zip(unique_urls, results))
+
+    def get_stats(self):
+        """
+        이 fetcher로 처리한 다운로드의 처리량 통계를 반환합니다.
+
+        Returns:
+            dict: 요청 수, 성공/실패 수, 재시도 수, 전송 바이트, 활성 시간 및 초당 처리량.
+        """
+        stats = dict(self._stats)
+        if self._first_request_at is not None and self._last_response_at is not None:
+            active = max(self._last_response_at - self._first_request_at, 1e-6)
+        else:
+            active = 0.0
+        stats['active_seconds'] = round(active, 3)
+        stats['images_per_second'] = round(stats['succeeded'] / active, 2) if active else 0.0
+        stats['mbytes_per_second'] = round(stats['bytes'] / active / (1024 * 1024), 2) if active else 0.0
+        return stats
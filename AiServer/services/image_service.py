@@ -1,9 +1,18 @@
+import asyncio
 import base64
+import hashlib
+import time
 import requests
-from PIL import Image
-import io
 import os
 from config import config
+from services.image_fetcher import (NEGATIVE_CACHE_STATUS_CODES, get_http_session, get_request_timeout, negative_cache,
+                                    sniff_image_type)
+from services.image_cache import get_image_cache
+from services.thumbnail_cache import ThumbnailCache, get_thumbnail_cache
+from services.image_worker_pool import run_in_image_pool
+from utils.contact_sheet import build_contact_sheet
+from utils.image_resize import THUMBNAIL_FORMATS, render_thumbnail
+from utils.metrics import metrics
 
 
 class ImageService:
@@ -45,12 +54,65 @@ class ImageService:
         return url
 
     @staticmethod
-    def encode_image(image_url):
+    def is_local_url(url):
+        """
+        LLM이 직접 접근할 수 없어 base64로 인라인해야 하는 내부 URL인지 확인합니다.
+
+        Args:
+            url (str): 확인할 이미지 URL.
+
+        Returns:
+            bool: localhost 또는 UserServer 컨테이너를 가리키면 True.
+        """
+        return "localhost" in url or "UserServer" in ImageService._convert_url_for_docker(url)
+
+    @staticmethod
+    def fetch_image_bytes(image_url):
+        """
+        공유 커넥션 풀을 통해 이미지 원본 바이트를 다운로드합니다.
+
+        디스크 이미지 캐시가 활성화되어 있으면 신선한 항목은 요청 없이 반환하고,
+        오래된 항목은 조건부 요청으로 재검증합니다.
+
+        Args:
+            image_url (str): 다운로드할 이미지의 URL.
+
+        Returns:
+            bytes: 이미지 원본 바이트.
+
+        Raises:
+            requests.RequestException: 이미지 다운로드 중 오류 발생 시.
+        """
+        cache = get_image_cache()
+        entry = cache.lookup(image_url) if cache else None
+        if entry is not None and cache.is_fresh(entry):
+            content = cache.read(entry)
+            if content is not None:
+                return content
+
+        converted_url = ImageService._convert_url_for_docker(image_url)
+        headers = cache.conditional_headers(entry) if entry is not None else None
+        response = get_http_session().get(converted_url, timeout=get_request_timeout(), headers=headers)
+        if response.status_code == 304 and entry is not None:
+            content = cache.read(entry, count_hit=False)
+            if content is not None:
+                cache.mark_validated(entry)
+                return content
+            response = get_http_session().get(converted_url, timeout=get_request_timeout())
+        response.raise_for_status()  # 요청이 실패하면 예외를 발생시킵니다.
+
+        if cache is not None and sniff_image_type(response.content) is not None:
+            cache.store(image_url, response.content, {k.lower(): v for k, v in response.headers.items()})
+        return response.content
+
+    @staticmethod
+    def encode_image(image_url, image_bytes=None):
         """
         URL에서 이미지를 가져와 base64로 인코딩합니다.
 
         Args:
             image_url (str): 인코딩할 이미지의 URL.
+            image_bytes (bytes, optional): 이미 다운로드된 이미지 바이트. 주어지면 다시 요청하지 않습니다.
 
         Returns:
             str: Base64로 인코딩된 이미지 문자열.
@@ -58,10 +120,7 @@ class ImageService:
         Raises:
             requests.RequestException: 이미지 다운로드 중 오류 발생 시.
         """
-        converted_url = ImageService._convert_url_for_docker(image_url)
-        response = requests.get(converted_url)
-        response.raise_for_status()  # 요청이 실패하면 예외를 발생시킵니다.
-        image_content = response.content
+        image_content = image_bytes if image_bytes is not None else ImageService.fetch_image_bytes(image_url)
         base64_image = base64.b64encode(image_content)
         return base64_image.decode("utf-8")
 
@@ -78,8 +137,14 @@ class ImageService:
 
         Note:
             이 메서드는 HEAD 요청을 사용하여 콘텐츠 타입을 확인합니다.
+            404/410 응답이나 이미지가 아닌 2xx 응답을 받은 URL은 네거티브 캐시에 기록되어 일정 시간 동안 다시
+            요청하지 않습니다. 429, 5xx처럼 나중에 성공할 수 있는 응답은 기록하지 않습니다.
+            분류 작업에서는 IMAGE_VALIDATION_MODE=inline일 때 다운로드 응답으로 검증하므로 이 메서드를 사용하지 않습니다.
         """
         image_formats = ("image/png", "image/jpeg", "image/jpg")
+
+        if negative_cache.get(image_url) is not None:
+            return False
         
         # Convert localhost URLs for Docker networking
         check_url = ImageService._convert_url_for_docker(image_url)
@@ -87,10 +152,14 @@ class ImageService:
         try:
             import logging
             logging.info(f"Checking image URL: {check_url}")
-            r = requests.head(check_url)
+            r = get_http_session().head(check_url, timeout=get_request_timeout(), allow_redirects=True)
             content_type = r.headers.get("content-type", "")
             is_valid = content_type in image_formats
             logging.info(f"URL: {check_url} - Status: {r.status_code} - Content-Type: {content_type} - Valid: {is_valid}")
+            if not is_valid and r.status_code in NEGATIVE_CACHE_STATUS_CODES:
+                negative_cache.add(image_url, f"HTTP {r.status_code}")
+            elif not is_valid and 200 <= r.status_code < 300:
+                negative_cache.add(image_url, f"Unsupported content type: {content_type}")
             return is_valid
         except requests.RequestException as e:
             import logging
@@ -98,13 +167,14 @@ class ImageService:
             return False
 
     @staticmethod
-    def resize_image(image_url, max_size=(224, 224)):
+    def resize_image(image_url, max_size=(224, 224), image_bytes=None):
         """
         URL에서 이미지를 가져와 크기를 조정하고 base64로 인코딩된 문자열로 반환합니다.
 
         Args:
             image_url (str): 크기를 조정할 이미지의 URL.
             max_size (tuple): 조정된 이미지의 최대 너비와 높이. 기본값은 (224, 224).
+            image_bytes (bytes, optional): 이미 다운로드된 이미지 바이트. 주어지면 다시 요청하지 않습니다.
 
         Returns:
             str: 크기가 조정되고 Base64로 인코딩된 이미지 문자열.
@@ -112,18 +182,64 @@ class ImageService:
         Raises:
             requests.RequestException: 이미지 다운로드 중 오류 발생 시.
             PIL.UnidentifiedImageError: 이미지 형식을 인식할 수 없는 경우.
+
+        Note:
+            결과는 이미지 내용과 크기를 키로 썸네일 캐시에 저장되어, 같은 이미지를 다시 보낼 때
+            디코딩/리사이즈/인코딩을 생략합니다.
         """
-        converted_url = ImageService._convert_url_for_docker(image_url)
-        response = requests.get(converted_url)
-        response.raise_for_status()
-        img = Image.open(io.BytesIO(response.content))
-        img.thumbnail(max_size)
-        buffered = io.BytesIO()
-        img.save(buffered, format="JPEG")
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")
+        if image_bytes is None:
+            image_bytes = ImageService.fetch_image_bytes(image_url)
+
+        image_format, quality, decoder = ImageService.get_thumbnail_settings()
+        thumbnail_cache = get_thumbnail_cache()
+        cache_key = (ThumbnailCache.make_key(image_bytes, max_size, image_format, quality)
+                     if thumbnail_cache else None)
+        if cache_key is not None:
+            cached = thumbnail_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        encoded = ImageService._render_thumbnail(image_bytes, max_size, image_format, quality, decoder)
+        if cache_key is not None:
+            thumbnail_cache.put(cache_key, encoded)
+        return encoded
+
+    @staticmethod
+    def get_thumbnail_settings():
+        """
+        설정에서 썸네일 출력 포맷, 품질, 디코더를 읽습니다.
+
+        Returns:
+            tuple: (포맷, 품질, 디코더). 지원하지 않는 포맷이면 'JPEG'을 사용합니다.
+        """
+        image_format = config.THUMBNAIL_FORMAT.upper()
+        if image_format not in THUMBNAIL_FORMATS:
+            image_format = "JPEG"
+        return image_format, config.THUMBNAIL_QUALITY, config.THUMBNAIL_DECODER.lower()
+
+    @staticmethod
+    def _render_thumbnail(image_bytes, max_size, image_format="JPEG", quality=75, decoder="pil"):
+        """
+        이미지 바이트를 디코딩하고 썸네일로 줄인 뒤 base64로 인코딩합니다.
+
+        CPU를 사용하는 작업만 포함하며 워커 풀(프로세스 풀 포함)에서 실행될 수 있도록
+        인자와 반환값이 모두 pickle 가능합니다.
+
+        Args:
+            image_bytes (bytes): 원본 이미지 바이트.
+            max_size (tuple): 썸네일 최대 너비와 높이.
+            image_format (str): 출력 포맷 ('JPEG' 또는 'WEBP').
+            quality (int): 출력 품질.
+            decoder (str): 'pil' 또는 'opencv'.
+
+        Returns:
+            str: Base64로 인코딩된 썸네일.
+        """
+        encoded = render_thumbnail(image_bytes, max_size, image_format, quality, decoder)
+        return base64.b64encode(encoded).decode("utf-8")
 
     @staticmethod
-    def save_image(image_url, label, workspace_id, file_name):
+    def save_image(image_url, label, workspace_id, file_name, image_bytes=None):
         """
         URL에서 이미지를 가져와 지정된 경로에 저장합니다.
 
@@ -132,6 +248,7 @@ class ImageService:
             label (str): 이미지의 레이블 (디렉토리 이름으로 사용됨).
             workspace_id (int): 작업 공간 ID.
             file_name (str): 저장할 파일 이름.
+            image_bytes (bytes, optional): 이미 다운로드된 이미지 바이트. 주어지면 다시 요청하지 않습니다.
 
         Returns:
             str: 저장된 이미지의 경로.
@@ -145,11 +262,21 @@ class ImageService:
         os.makedirs(label_dir, exist_ok=True)
 
         image_path = os.path.join(label_dir, f"{file_name}.jpg")
-        converted_url = ImageService._convert_url_for_docker(image_url)
-        response = requests.get(converted_url)
-        response.raise_for_status()
+
+        # 캐시에 같은 내용이 있으면 다시 받거나 쓰지 않고 하드링크(또는 복사)합니다.
+        cache = get_image_cache()
+        if cache is not None:
+            expected_digest = hashlib.sha256(image_bytes).hexdigest() if image_bytes is not None else None
+            if cache.link_to(image_url, image_path, expected_digest=expected_digest):
+                return image_path
+
+        if image_bytes is None:
+            image_bytes = ImageService.fetch_image_bytes(image_url)
+        if os.path.exists(image_path):
+            # 기존 파일이 캐시 blob의 하드링크일 수 있으므로 덮어쓰지 않고 새로 만듭니다.
+            os.remove(image_path)
         with open(image_path, "wb") as img_file:
-            img_file.write(response.content)
+            img_file.write(image_bytes)
 
         return image_path
 
@@ -179,7 +306,7 @@ class ImageService:
         return organized_images
 
     @staticmethod
-    def prepare_images_for_ai(images):
+    def prepare_images_for_ai(images, image_data=None):
         """
         AI 처리를 위해 이미지를 준비합니다.
 
@@ -188,6 +315,7 @@ class ImageService:
 
         Args:
             images (list of str): 이미지 URL 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
 
         Returns:
             list: AI 처리를 위해 준비된 이미지 목록. 각 이미지는 텍스트와 URL 또는 base64 인코딩된 데이터로 구성됩니다.
@@ -195,6 +323,127 @@ class ImageService:
         Note:
             반환된 리스트의 각 요소는 이미지 인덱스를 나타내는 텍스트와 이미지 URL 또는 base64 인코딩된 데이터를 포함합니다.
         """
+        image_data = image_data or {}
+        encoded_images = {}
+        for url in images:
+            if ImageService.is_local_url(url) and url not in encoded_images:
+                # Convert localhost URLs to container network URLs for Docker environments
+                processed_url = ImageService._convert_url_for_docker(url)
+                encoded_images[url] = ImageService.resize_image(processed_url, image_bytes=image_data.get(url))
+        return ImageService._build_images_for_ai(images, encoded_images)
+
+    @staticmethod
+    async def prepare_images_for_ai_async(images, image_data=None, max_size=(224, 224), inline_all=False,
+                                          detail=None):
+        """
+        prepare_images_for_ai의 비동기 버전으로, 블로킹 작업을 이벤트 루프 밖에서 실행합니다.
+
+        누락된 이미지 다운로드는 기본 스레드 풀에서, 디코딩/리사이즈/인코딩은 이미지 워커 풀에서
+        동시에 실행되고 이벤트 루프는 결과만 기다립니다. 썸네일 캐시 키(SHA-256) 계산과 캐시 조회/저장은
+        디스크 spill 파일을 읽고 쓸 수 있으므로 호출한 프로세스의 기본 스레드 풀에서 처리합니다
+        (프로세스 풀을 사용해도 캐시가 공유됩니다).
+
+        Args:
+            images (list of str): 이미지 URL 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            max_size (tuple): 썸네일 최대 너비와 높이.
+            inline_all (bool): True이면 바이트가 있는 외부 이미지도 원본 URL 대신 썸네일로 인라인합니다.
+            detail (str, optional): 이미지 항목에 붙일 detail 힌트 ('low' 또는 'high').
+
+        Returns:
+            list: prepare_images_for_ai와 같은 형식의 이미지 목록.
+        """
+        image_data = image_data or {}
+        local_urls = list(dict.fromkeys(
+            url for url in images if ImageService.is_local_url(url) or (inline_all and url in image_data)
+        ))
+        thumbnail_cache = get_thumbnail_cache()
+        image_format, quality, decoder = ImageService.get_thumbnail_settings()
+
+        def lookup(image_bytes):
+            cache_key = ThumbnailCache.make_key(image_bytes, max_size, image_format, quality)
+            return cache_key, thumbnail_cache.get(cache_key)
+
+        async def encode(url):
+            image_bytes = image_data.get(url)
+            if image_bytes is None:
+                processed_url = ImageService._convert_url_for_docker(url)
+                image_bytes = await asyncio.to_thread(ImageService.fetch_image_bytes, processed_url)
+            cache_key = None
+            if thumbnail_cache:
+                cache_key, cached = await asyncio.to_thread(lookup, image_bytes)
+                if cached is not None:
+                    return cached
+            encoded = await run_in_image_pool(ImageService._render_thumbnail, image_bytes, max_size,
+                                              image_format, quality, decoder)
+            if cache_key is not None:
+                await asyncio.to_thread(thumbnail_cache.put, cache_key, encoded)
+            return encoded
+
+        start_time = time.monotonic()
+        encoded_list = await asyncio.gather(*(encode(url) for url in local_urls))
+        if local_urls:
+            metrics.observe('image_prepare_seconds', time.monotonic() - start_time)
+        return ImageService._build_images_for_ai(images, dict(zip(local_urls, encoded_list)), detail)
+
+    @staticmethod
+    async def prepare_contact_sheets_async(images, image_data=None, grid_size=3, cell_size=224):
+        """
+        이미지들을 번호가 붙은 격자 이미지(contact sheet)로 합쳐 AI 처리를 위해 준비합니다.
+
+        grid_size * grid_size개씩 한 장의 격자로 합치므로 요청당 이미지 슬롯 수와 이미지당 과금이
+        줄어듭니다. 셀 번호는 images의 인덱스와 같으므로 기존 분류 응답 형식을 그대로 사용할 수 있습니다.
+        URL로만 전달하던 외부 이미지도 격자에 넣어야 하므로 바이트가 없으면 다운로드합니다.
+
+        Args:
+            images (list of str): 이미지 URL 목록.
+            image_data (dict, optional): URL을 키로 하는 미리 다운로드된 이미지 바이트.
+            grid_size (int): 격자 한 변의 셀 수.
+            cell_size (int): 셀 한 변의 픽셀 크기.
+
+        Returns:
+            list: 격자마다 설명 텍스트와 base64 JPEG 이미지로 구성된 목록.
+        """
+        image_data = image_data or {}
+
+        async def load(url):
+            if url in image_data:
+                return image_data[url]
+            return await asyncio.to_thread(ImageService.fetch_image_bytes, ImageService._convert_url_for_docker(url))
+
+        images_bytes = await asyncio.gather(*(load(url) for url in images))
+        cells_per_sheet = grid_size * grid_size
+        starts = list(range(0, len(images_bytes), cells_per_sheet))
+        sheets = await asyncio.gather(*(
+            run_in_image_pool(build_contact_sheet, images_bytes[start:start + cells_per_sheet],
+                              grid_size, cell_size, start)
+            for start in starts
+        ))
+
+        content = []
+        for sheet_number, (start, sheet) in enumerate(zip(starts, sheets)):
+            end = min(start + cells_per_sheet, len(images)) - 1
+            content.append({"type": "text", "text": f"Sheet {sheet_number}: images {start} to {end}:"})
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{base64.b64encode(sheet).decode('utf-8')}"},
+            })
+        return content
+
+    @staticmethod
+    def _build_images_for_ai(images, encoded_images, detail=None):
+        """
+        이미지 인덱스 텍스트와 이미지 항목을 번갈아 배치한 메시지 콘텐츠를 만듭니다.
+
+        Args:
+            images (list of str): 이미지 URL 목록.
+            encoded_images (dict): 로컬 이미지 URL을 키로 하는 base64 썸네일.
+            detail (str, optional): 이미지 항목에 붙일 detail 힌트 ('low' 또는 'high').
+
+        Returns:
+            list: AI 처리를 위해 준비된 이미지 목록.
+        """
+        mime_type = THUMBNAIL_FORMATS[ImageService.get_thumbnail_settings()[0]]
         images_for_ai = []
         for index, url in enumerate(images):
             images_for_ai.append(
@@ -203,17 +452,15 @@ class ImageService:
                     "text": f"Image {index}:",
                 }
             )
-            
-            # Convert localhost URLs to container network URLs for Docker environments
-            processed_url = ImageService._convert_url_for_docker(url)
-            
+
             images_for_ai.append(
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/jpeg;base64,{ImageService.resize_image(processed_url)}"
-                        if "localhost" in url or "UserServer" in processed_url
-                        else url
+                        "url": f"data:{mime_type};base64,{encoded_images[url]}"
+                        if url in encoded_images
+                        else url,
+                        **({"detail": detail} if detail else {}),
                     },
                 }
             )
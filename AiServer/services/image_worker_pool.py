@@ -0,0 +1,88 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+POOL_TYPES = ('thread', 'process')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_pool_size():
+    """
+    이미지 워커 풀 크기를 반환합니다.
+
+    Returns:
+        int: IMAGE_WORKER_POOL_SIZE가 0 이하이면 CPU 코어 수.
+    """
+    size = config.IMAGE_WORKER_POOL_SIZE
+    return size if size > 0 else (os.cpu_count() or 1)
+
+
+def get_image_worker_pool():
+    """
+    이미지 디코딩/리사이즈/인코딩에 사용할 프로세스 전역 워커 풀을 반환합니다.
+
+    IMAGE_WORKER_POOL_TYPE이 'process'이면 GIL의 영향을 받지 않는 프로세스 풀을,
+    'thread'이면 스레드 풀을 생성합니다. 프로세스 풀은 Flask 스레드와 fork가 섞이지 않도록
+    spawn 컨텍스트를 사용합니다.
+
+    Returns:
+        concurrent.futures.Executor: 공유 워커 풀.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                pool_type = config.IMAGE_WORKER_POOL_TYPE.lower()
+                if pool_type not in POOL_TYPES:
+                    logger.warning(f"Unknown IMAGE_WORKER_POOL_TYPE '{pool_type}', falling back to 'thread'")
+                    pool_type = 'thread'
+                size = get_pool_size()
+                if pool_type == 'process':
+                    _executor = ProcessPoolExecutor(max_workers=size,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="image-worker")
+                metrics.set_gauge('image_worker_pool_size', size)
+                logger.info(f"Image worker pool started: type={pool_type}, workers={size}")
+    return _executor
+
+
+async def run_in_image_pool(func, *args):
+    """
+    함수를 이미지 워커 풀에서 실행하고 결과를 기다립니다.
+
+    이벤트 루프는 결과만 기다리므로 디코딩 중에도 다른 청크의 다운로드와 LLM 호출이 진행됩니다.
+    프로세스 풀을 사용할 때는 func와 인자가 pickle 가능해야 합니다.
+
+    Args:
+        func (callable): 실행할 함수.
+        *args: 함수 인자.
+
+    Returns:
+        Any: 함수의 반환값.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_image_worker_pool(), func, *args)
+
+
+def shutdown_image_worker_pool():
+    """워커 풀을 종료합니다. 다음 호출 시 새로 생성됩니다."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+atexit.register(shutdown_image_worker_pool)
@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import threading
+
+from config import config
+from exceptions.custom_exceptions import ExternalServiceError
+from services.circuit_breaker import CircuitBreaker
+from services.provider_health import is_key_failure
+from services.rate_limiter import get_rate_limiter, is_rate_limit_error
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def make_key_id(api_key):
+    """API 키를 노출하지 않고 구분하기 위한 짧은 식별자를 만듭니다."""
+    return hashlib.sha256((api_key or '').encode()).hexdigest()[:12]
+
+
+class PooledKey:
+    """
+    키 풀에 속한 API 키 하나의 상태.
+
+    Attributes:
+        api_key (str): API 키.
+        key_id (str): 로그/메트릭용 키 식별자.
+        rate_limiter (ProviderRateLimiter): 키별 RPM/TPM 제한기.
+        breaker (CircuitBreaker): 키별 회로 차단기 (폐기/무효 키 격리).
+        in_flight (int): 진행 중인 요청 수.
+    """
+
+    def __init__(self, llm_config, api_key):
+        self.api_key = api_key
+        self.key_id = make_key_id(api_key)
+        self.rate_limiter = get_rate_limiter({**llm_config, 'api_key': api_key})
+        self.breaker = CircuitBreaker(config.LLM_CIRCUIT_FAILURE_THRESHOLD, config.LLM_CIRCUIT_RECOVERY_TIMEOUT,
+                                      half_open_max_calls=1)
+        self.in_flight = 0
+        self.usage = {'requests': 0, 'successes': 0, 'failures': 0, 'rate_limited': 0, 'tokens': 0}
+
+
+class KeyPool:
+    """
+    프로바이더 하나의 API 키 풀.
+
+    요청마다 회로가 열리지 않은 키 중 가장 한가한 키(RPM/TPM 대기 시간, 진행 중인 요청 수,
+    누적 요청 수 순)를 고릅니다. 키마다 요청 한도 버킷이 따로 있으므로 키를 추가할수록
+    프로바이더의 유효 처리 한도가 늘어납니다.
+
+    Attributes:
+        provider (str): 프로바이더 이름.
+        keys (list of PooledKey): 풀에 속한 키 목록.
+    """
+
+    def __init__(self, llm_config):
+        self.provider = llm_config['provider']
+        api_keys = llm_config.get('api_keys') or [llm_config['api_key']]
+        self.keys = [PooledKey(llm_config, api_key) for api_key in api_keys]
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens, exclude=()):
+        """
+        요청에 사용할 키를 고르고 진행 중인 요청으로 표시합니다.
+
+        Args:
+            tokens (int): 요청의 예상 토큰 수.
+            exclude (iterable of str): 이번 요청에서 이미 실패한 키 식별자 (선택하지 않음).
+
+        Returns:
+            PooledKey: 선택된 키. 사용 후 반드시 release()를 호출해야 합니다.
+
+        Raises:
+            ExternalServiceError: 모든 키의 회로가 열려 있는 경우.
+        """
+        with self._lock:
+            ranked = sorted(self.keys, key=lambda key: (key.rate_limiter.peek_wait(tokens), key.in_flight,
+                                                        key.usage['requests']))
+            for key in ranked:
+                if key.key_id not in exclude and key.breaker.can_execute():
+                    key.in_flight += 1
+                    key.usage['requests'] += 1
+                    return key
+        raise ExternalServiceError(f"All API keys for {self.provider} are unavailable", service_name=self.provider)
+
+    def has_available(self, exclude=()):
+        """exclude에 없는 키 중 회로가 닫혀 있거나 탐색 가능한 키가 있는지 반환합니다 (탐색 슬롯을 쓰지 않음)."""
+        with self._lock:
+            return any(key.key_id not in exclude and key.breaker.state != 'OPEN' for key in self.keys)
+
+    def release(self, key, error=None, tokens=None, completed=True):
+        """
+        키 사용 결과를 기록합니다.
+
+        Args:
+            key (PooledKey): acquire()가 반환한 키.
+            error (Exception, optional): 실패한 경우 발생한 예외.
+            tokens (int, optional): 응답에 보고된 토큰 사용량.
+            completed (bool): 응답을 받았는지 여부. False이면 (취소, 한도 대기 포기) 결과를 기록하지 않습니다.
+        """
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            if not completed:
+                key.usage['requests'] -= 1
+            elif error is None:
+                key.usage['successes'] += 1
+                key.usage['tokens'] += tokens or 0
+            else:
+                key.usage['failures'] += 1
+                if is_rate_limit_error(error) and not is_key_failure(error):
+                    key.usage['rate_limited'] += 1
+        if completed and error is None:
+            key.breaker.record_success()
+            metrics.increment(f"llm_key_requests.{self.provider}.{key.key_id}")
+        elif completed and is_key_failure(error):
+            # 키 회로는 그 키에만 해당하는 오류로 엽니다. 프로바이더 장애는 프로바이더 회로가 처리합니다.
+            key.breaker.record_failure()
+            if key.breaker.state == 'OPEN':
+                logger.warning(f"API key {key.key_id} for {self.provider} disabled after repeated failures")
+        else:
+            key.breaker.release()
+
+    def get_stats(self):
+        """
+        키별 사용량과 상태를 반환합니다.
+
+        Returns:
+            dict: 키 식별자를 키로 하는 상태, 진행 중인 요청 수, 사용량.
+        """
+        with self._lock:
+            return {key.key_id: {'state': key.breaker.state, 'in_flight': key.in_flight, **key.usage}
+                    for key in self.keys}
+
+
+_key_pools = {}
+_key_pools_lock = threading.Lock()
+
+
+def get_key_pool(llm_config):
+    """
+    LLM 설정의 프로세스 전역 키 풀을 반환합니다.
+
+    Args:
+        llm_config (dict): get_all_available_llm_configs()의 항목.
+
+    Returns:
+        KeyPool: 프로바이더의 키 풀.
+    """
+    api_keys = llm_config.get('api_keys') or [llm_config['api_key']]
+    pool_id = (llm_config['provider'], tuple(make_key_id(api_key) for api_key in api_keys))
+    with _key_pools_lock:
+        pool = _key_pools.get(pool_id)
+        if pool is None:
+            pool = KeyPool(llm_config)
+            _key_pools[pool_id] = pool
+    return pool
+
+
+def get_key_pool_stats():
+    """모든 키 풀의 키별 사용량을 반환합니다."""
+    with _key_pools_lock:
+        pools = list(_key_pools.values())
+    return {pool.provider: pool.get_stats() for pool in pools}
+
+
+metrics.register_collector('llm_key_pools', get_key_pool_stats)
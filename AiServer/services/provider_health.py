@@ -0,0 +1,188 @@
+import logging
+import threading
+from collections import deque
+
+from config import config
+from services.chunk_planner import is_payload_error
+from services.circuit_breaker import CircuitBreaker
+from services.rate_limiter import is_rate_limit_error
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+KEY_FAILURE_STATUS_CODES = (401, 402, 403)
+KEY_FAILURE_MARKERS = ('invalid api key', 'invalid_api_key', 'incorrect api key', 'api key not valid',
+                       'api_key_invalid', 'api key expired', 'unauthorized', 'permission denied',
+                       'insufficient_quota', 'billing')
+
+
+def is_key_failure(error):
+    """
+    특정 API 키에만 해당하는 오류(인증 실패, 폐기된 키, 할당량/결제 소진)인지 확인합니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        bool: 같은 프로바이더의 다른 키로는 성공할 수 있는 오류이면 True.
+    """
+    if getattr(error, 'status_code', None) in KEY_FAILURE_STATUS_CODES:
+        return True
+    name = type(error).__name__
+    if 'Authentication' in name or 'PermissionDenied' in name:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in KEY_FAILURE_MARKERS)
+
+
+def is_health_failure(error):
+    """
+    프로바이더 장애로 볼 오류인지 확인합니다.
+
+    서버 오류(5xx), 타임아웃, 연결 실패처럼 프로바이더 전체에 해당하는 오류만 장애로 봅니다.
+    요청 한도 초과(429), 요청 크기 초과, 키별 오류, 그 밖의 4xx 응답은 프로바이더가 정상적으로 응답한
+    것이므로 장애로 보지 않습니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        bool: 회로 차단기에 실패로 기록해야 하면 True.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return False
+    return not (is_rate_limit_error(error) or is_payload_error(error) or is_key_failure(error))
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ProviderHealthRegistry:
+    """
+    LLM 프로바이더별 상태 보드.
+
+    프로바이더마다 CircuitBreaker를 두어 연속 실패 시 회로를 열고, 열린 프로바이더는 시도하지 않고
+    바로 다음 프로바이더로 넘어갑니다. recovery_timeout이 지나면 반열림 상태에서 한 건씩 탐색 호출을
+    허용합니다. 최근 결과 창으로 성공률과 p50/p95 지연 시간을 계산합니다.
+
+    Attributes:
+        failure_threshold (int): 회로를 여는 연속 실패 횟수.
+        recovery_timeout (float): 회로가 열린 뒤 탐색을 허용하기까지의 시간(초).
+        window (int): 성공률/지연 시간 계산에 쓰는 최근 결과 수.
+    """
+
+    def __init__(self, failure_threshold=None, recovery_timeout=None, window=None):
+        self.failure_threshold = failure_threshold or config.LLM_CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout if recovery_timeout is not None else config.LLM_CIRCUIT_RECOVERY_TIMEOUT
+        self.window = window or config.LLM_HEALTH_WINDOW
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, provider):
+        with self._lock:
+            entry = self._providers.get(provider)
+            if entry is None:
+                entry = {
+                    'breaker': CircuitBreaker(self.failure_threshold, self.recovery_timeout, half_open_max_calls=1),
+                    'results': deque(maxlen=self.window),
+                    'skipped': 0,
+                }
+                self._providers[provider] = entry
+            return entry
+
+    def can_attempt(self, provider):
+        """
+        프로바이더를 시도해도 되는지 확인합니다. 반열림 상태이면 탐색 슬롯을 차지합니다.
+
+        Args:
+            provider (str): LLM 프로바이더 이름.
+
+        Returns:
+            bool: 회로가 닫혀 있거나 탐색이 허용되면 True.
+        """
+        entry = self._entry(provider)
+        if entry['breaker'].can_execute():
+            return True
+        with self._lock:
+            entry['skipped'] += 1
+        metrics.increment(f"llm_provider_skipped.{provider}")
+        return False
+
+    def record(self, provider, latency=None, error=None):
+        """
+        호출 결과를 기록합니다.
+
+        Args:
+            provider (str): LLM 프로바이더 이름.
+            latency (float, optional): 호출 소요 시간(초). None이면 (취소 등) 결과 없이 탐색 슬롯만 반환합니다.
+            error (Exception, optional): 실패한 경우 발생한 예외.
+        """
+        entry = self._entry(provider)
+        breaker = entry['breaker']
+        if latency is None:
+            breaker.release()
+            return
+        with self._lock:
+            entry['results'].append((error is None, latency))
+        if error is None:
+            breaker.record_success()
+        elif is_health_failure(error):
+            previous = breaker.state
+            breaker.record_failure()
+            if breaker.state == 'OPEN' and previous != 'OPEN':
+                logger.warning(f"Circuit opened for LLM provider {provider} after {breaker.failure_count} failures")
+        else:
+            breaker.release()
+
+    def latency_percentile(self, provider, fraction, min_samples=1):
+        """
+        최근 성공한 호출의 지연 시간 백분위수를 반환합니다.
+
+        Args:
+            provider (str): LLM 프로바이더 이름.
+            fraction (float): 0~1 사이의 백분위 (예: 0.9).
+            min_samples (int): 필요한 최소 표본 수.
+
+        Returns:
+            float | None: 지연 시간(초). 표본이 부족하면 None.
+        """
+        entry = self._entry(provider)
+        with self._lock:
+            latencies = sorted(latency for ok, latency in entry['results'] if ok)
+        if len(latencies) < max(1, min_samples):
+            return None
+        return _percentile(latencies, fraction)
+
+    def get_state(self, provider):
+        """프로바이더 회로 상태('CLOSED', 'OPEN', 'HALF_OPEN')를 반환합니다."""
+        return self._entry(provider)['breaker'].state
+
+    def get_stats(self):
+        """
+        프로바이더별 상태를 반환합니다.
+
+        Returns:
+            dict: 프로바이더별 회로 상태, 성공률, p50/p95 지연 시간, 건너뛴 횟수.
+        """
+        with self._lock:
+            entries = {provider: (entry['breaker'], list(entry['results']), entry['skipped'])
+                       for provider, entry in self._providers.items()}
+        stats = {}
+        for provider, (breaker, results, skipped) in entries.items():
+            latencies = sorted(latency for ok, latency in results if ok)
+            stats[provider] = {
+                'state': breaker.state,
+                'samples': len(results),
+                'success_rate': round(sum(ok for ok, _ in results) / len(results), 3) if results else None,
+                'latency_p50': round(_percentile(latencies, 0.5), 3) if latencies else None,
+                'latency_p95': round(_percentile(latencies, 0.95), 3) if latencies else None,
+                'skipped': skipped,
+            }
+        return stats
+
+
+provider_health = ProviderHealthRegistry()
+metrics.register_collector('llm_provider_health', provider_health.get_stats)
@@ -0,0 +1,114 @@
+import logging
+import threading
+
+from config import config
+from services.concurrency_limiter import get_provider_limiter
+from services.provider_health import provider_health
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROUTING_POLICIES = ('fallback', 'weighted')
+
+
+class ProviderRouter:
+    """
+    요청마다 LLM 프로바이더 시도 순서를 정하는 라우터.
+
+    - fallback: get_all_available_llm_configs()의 우선순위 순서를 그대로 사용합니다.
+    - weighted: 회로가 열리지 않은 프로바이더 중에서 가중치에 비례해 첫 번째 프로바이더를 고르고,
+      나머지는 우선순위 순서대로 폴백합니다. 가중치는 설정된 비중(weight)에 관측된 처리량
+      (동시성 한도 / p50 지연 시간)과 성공률을 곱한 값입니다. 선택은 부드러운 가중 라운드 로빈
+      (smooth weighted round-robin)으로 하여 짧은 구간에서도 비중대로 고르게 분산됩니다.
+
+    Attributes:
+        policy (str): 라우팅 정책 ('fallback' 또는 'weighted').
+    """
+
+    MIN_SAMPLES = 5
+
+    def __init__(self, policy=None):
+        policy = (policy or config.LLM_ROUTING_POLICY).lower()
+        if policy not in ROUTING_POLICIES:
+            logger.warning(f"Unknown LLM routing policy '{policy}', using 'fallback'")
+            policy = 'fallback'
+        self.policy = policy
+        self._current = {}
+        self._lock = threading.Lock()
+        self._routed = {}
+
+    def get_weights(self, configs):
+        """
+        프로바이더별 라우팅 가중치를 계산합니다.
+
+        Args:
+            configs (list of dict): LLM 설정 목록.
+
+        Returns:
+            dict: 프로바이더를 키로 하는 가중치. 회로가 열린 프로바이더는 0입니다.
+        """
+        health = provider_health.get_stats()
+        throughputs = {}
+        for llm_config in configs:
+            provider = llm_config['provider']
+            stats = health.get(provider, {})
+            if stats.get('samples', 0) >= self.MIN_SAMPLES and stats.get('latency_p50'):
+                limiter = get_provider_limiter(provider)
+                concurrency = limiter.limit if limiter else config.DATA_PROCESSOR_MAX_CONCURRENT_CHUNKS
+                throughputs[provider] = concurrency / stats['latency_p50']
+        # 관측되지 않은 프로바이더는 관측된 처리량의 평균으로 두어 탐색 기회를 줍니다.
+        default_throughput = sum(throughputs.values()) / len(throughputs) if throughputs else 1.0
+
+        weights = {}
+        for llm_config in configs:
+            provider = llm_config['provider']
+            if provider_health.get_state(provider) == 'OPEN':
+                weights[provider] = 0.0
+                continue
+            success_rate = health.get(provider, {}).get('success_rate')
+            weights[provider] = (llm_config.get('weight', 1.0)
+                                 * throughputs.get(provider, default_throughput)
+                                 * (success_rate if success_rate is not None else 1.0))
+        return weights
+
+    def order(self, configs):
+        """
+        이번 요청의 프로바이더 시도 순서를 반환합니다.
+
+        Args:
+            configs (list of dict): 우선순위 순서의 LLM 설정 목록.
+
+        Returns:
+            list of dict: 시도 순서대로 정렬된 LLM 설정 목록.
+        """
+        if self.policy == 'fallback' or len(configs) < 2:
+            return list(configs)
+        weights = self.get_weights(configs)
+        total = sum(weights.values())
+        if total <= 0:
+            return list(configs)
+
+        with self._lock:
+            for provider, weight in weights.items():
+                self._current[provider] = self._current.get(provider, 0.0) + weight
+            chosen = max(weights, key=lambda provider: (weights[provider] > 0, self._current[provider]))
+            self._current[chosen] -= total
+            self._routed[chosen] = self._routed.get(chosen, 0) + 1
+        metrics.increment(f"llm_routed.{chosen}")
+
+        first = next(llm_config for llm_config in configs if llm_config['provider'] == chosen)
+        return [first] + [llm_config for llm_config in configs if llm_config is not first]
+
+    def get_stats(self):
+        """
+        라우팅 상태를 반환합니다.
+
+        Returns:
+            dict: 정책과 프로바이더별 첫 번째로 선택된 횟수.
+        """
+        with self._lock:
+            return {'policy': self.policy, 'routed': dict(self._routed)}
+
+
+provider_router = ProviderRouter()
+metrics.register_collector('llm_routing', provider_router.get_stats)
@@ -9,6 +9,8 @@ import pika
 from pika.exceptions import AMQPConnectionError, AMQPError, StreamLostError, AMQPChannelError
 from config import config
 from services.data_processor import DataProcessor
+from services.batch_classifier import BatchClassifier
+from services.circuit_breaker import CircuitBreaker
 from exceptions.custom_exceptions import (
     RabbitMQConnectionError, MessageProcessingError, ValidationError,
     ModelNotFoundError, ExportError, QueueFullError, ExternalServiceError,
@@ -28,48 +30,6 @@ PROGRESS_QUEUE = 'ProgressQueue'
 
 logger = logging.getLogger(__name__)
 
-class CircuitBreaker:
-    """
-    Circuit breaker pattern implementation for RabbitMQ connection resilience.
-    """
-    
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 60.0):
-        self.failure_threshold = failure_threshold
-        self.recovery_timeout = recovery_timeout
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = 'CLOSED'  # CLOSED(닫힘), OPEN(열림), HALF_OPEN(반열림)
-        self._lock = threading.Lock()
-    
-    def can_execute(self) -> bool:
-        """회로가 실행을 허용하는지 확인합니다."""
-        with self._lock:
-            if self.state == 'CLOSED':
-                return True
-            elif self.state == 'OPEN':
-                if time.time() - self.last_failure_time >= self.recovery_timeout:
-                    self.state = 'HALF_OPEN'
-                    return True
-                return False
-            else:  # HALF_OPEN
-                return True
-    
-    def record_success(self):
-        """성공적인 작업을 기록합니다."""
-        with self._lock:
-            self.failure_count = 0
-            self.state = 'CLOSED'
-    
-    def record_failure(self):
-        """실패한 작업을 기록합니다."""
-        with self._lock:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
-            
-            if self.failure_count >= self.failure_threshold:
-                self.state = 'OPEN'
-
-
 class RabbitMQConnection:
     """
     RabbitMQ 연결을 관리하는 싱글톤 클래스.
@@ -372,6 +332,39 @@ class RabbitMQHandler:
 
     def __init__(self):
         self.data_processor = DataProcessor()
+        self.batch_classifier = BatchClassifier(self.data_processor)
+
+    def poll_batches(self) -> None:
+        """
+        제출한 배치 중 끝난 배치의 결과를 응답 큐로 보냅니다.
+
+        pika 연결은 스레드 간에 공유할 수 없으므로 소비자 스레드의 루프에서 호출합니다.
+        폴링 간격(LLM_BATCH_POLL_INTERVAL)이 지나지 않았으면 아무것도 하지 않습니다.
+        """
+        try:
+            self.batch_classifier.poll_due(
+                lambda correlation_id, message, result: self.send_response_to_queue(
+                    correlation_id, self._create_response(message, result))
+            )
+        except Exception as e:
+            logger.error(f"Batch polling failed: {e}")
+
+    def _submit_batch(self, message: Dict[str, Any], correlation_id: str) -> bool:
+        """
+        대량 분류 메시지를 배치 API로 제출합니다.
+
+        Returns:
+            bool: 제출했으면 True. 대상이 아니거나 제출에 실패하면 False (온라인으로 처리).
+        """
+        if not self.batch_classifier.should_batch(message):
+            return False
+        try:
+            batch_id = self.batch_classifier.submit(message, correlation_id)
+        except Exception as e:
+            logger.warning(f"Batch submission failed, classifying online: {e}")
+            return False
+        logger.info(f"Classification job submitted as batch {batch_id}. Correlation ID: {correlation_id}")
+        return True
 
     def process_data_wrapper(self, ch: pika.channel.Channel, method: pika.spec.Basic.Deliver, 
                              properties: pika.spec.BasicProperties, body: bytes) -> None:
@@ -559,12 +552,18 @@ class RabbitMQHandler:
         try:
             logger.info(f"{operation} message received")
             message = self._parse_message(body)
+            # 대량 작업은 배치로 제출하고 바로 확인 응답하며, 결과는 poll_batches()가 보냅니다.
+            if operation == Operation.CLASSIFY and self._submit_batch(message, properties.correlation_id):
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return
+
             dummy_request = self._create_dummy_request(message)
 
-            result = self.data_processor.process_data(dummy_request, operation)
+            report = {}
+            result = self.data_processor.process_data(dummy_request, operation, report)
             
             if operation == Operation.CLASSIFY:
-                response = self._create_response(message, result)
+                response = self._create_response(message, result, report.get('local'))
             else:  # Operation.TRAIN
                 response = self._create_train_response(message, result)
 
@@ -621,22 +620,32 @@ class RabbitMQHandler:
         return DummyRequest(message)
 
     @staticmethod
-    def _create_response(message: Dict[str, Any], labels_and_ids: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _create_response(message: Dict[str, Any], labels_and_ids: List[Dict[str, Any]],
+                         local: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         분류 응답 데이터를 생성합니다.
 
         Args:
             message (Dict[str, Any]): 원본 메시지 데이터.
             labels_and_ids (List[Dict[str, Any]]): 분류 결과 데이터.
+            local (Optional[Dict[str, Any]]): 로컬 사전 분류 통계. 주어지면 localClassification으로 포함합니다.
 
         Returns:
             Dict[str, Any]: 생성된 응답 데이터.
         """
-        return {
+        response = {
             "requesterId": message.get("requesterId"),
             "workspaceId": message.get("workspaceId"),
             "labelsAndIds": labels_and_ids,
         }
+        if local:
+            response["localClassification"] = {
+                "images": local['images'],
+                "servedLocally": local['served_locally'],
+                "fraction": local['local_fraction'],
+                "modelVersion": local['model_version'],
+            }
+        return response
 
     @staticmethod
     def _create_train_response(message: Dict[str, Any], train_result: Any) -> Dict[str, Any]:
@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from config import config
+from exceptions.custom_exceptions import RateLimitError
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MARKERS = ('429', 'rate limit', 'ratelimit', 'too many requests', 'resource_exhausted',
+                      'resource exhausted', 'quota')
+RETRY_AFTER_PATTERNS = (
+    re.compile(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"'),
+    re.compile(r'(?:retry|try again) (?:after|in) (\d+(?:\.\d+)?)\s*(ms|milliseconds?|s|sec|seconds?)?', re.I),
+)
+
+
+def is_rate_limit_error(error):
+    """
+    LLM 호출 오류가 요청 한도 초과(429)인지 확인합니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        bool: 요청 한도 초과 오류이면 True.
+    """
+    if isinstance(error, RateLimitError) or getattr(error, 'status_code', None) == 429:
+        return True
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+def _header_value(headers, name):
+    try:
+        return headers.get(name) or headers.get(name.title())
+    except AttributeError:
+        return None
+
+
+def parse_retry_after(error):
+    """
+    오류의 응답 헤더(retry-after-ms, Retry-After) 또는 메시지에서 재시도 대기 시간을 추출합니다.
+
+    Args:
+        error (Exception): LLM 호출 중 발생한 예외.
+
+    Returns:
+        float | None: 대기 시간(초). 찾지 못하면 None.
+    """
+    header_sources = (
+        getattr(error, 'litellm_response_headers', None),
+        getattr(getattr(error, 'response', None), 'headers', None),
+        getattr(error, 'headers', None),
+    )
+    for headers in header_sources:
+        if not headers:
+            continue
+        value = _header_value(headers, 'retry-after-ms')
+        if value:
+            try:
+                return max(0.0, float(value) / 1000)
+            except ValueError:
+                pass
+        value = _header_value(headers, 'retry-after')
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+    message = str(error)
+    for pattern in RETRY_AFTER_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            seconds = float(match.group(1))
+            unit = match.group(2) if pattern.groups > 1 else None
+            return seconds / 1000 if unit and unit.lower().startswith('m') else seconds
+    return None
+
+
+class TokenBucket:
+    """
+    분당 한도를 갖는 토큰 버킷.
+
+    요청은 즉시 토큰을 예약하고 부족한 만큼 음수가 되며, 반환된 대기 시간 뒤에 보내면 됩니다.
+    예약 방식이므로 대기 중인 호출자를 깨우는 동기화 객체 없이 여러 이벤트 루프에서 공유할 수 있습니다.
+
+    Attributes:
+        capacity (float): 버킷 크기 (분당 한도, 최대 1분치 버스트 허용).
+        tokens (float): 현재 사용 가능한 토큰 수.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """amount를 예약했을 때 기다려야 하는 시간(초)을 반환합니다 (예약하지 않음)."""
+        self._refill(now)
+        # 버킷보다 큰 요청은 버킷을 가득 채운 뒤 보낼 수 있도록 잘라서 계산합니다.
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """예약량과 실제 사용량의 차이를 반영합니다 (양수면 추가 차감)."""
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderRateLimiter:
+    """
+    프로바이더/API 키별 RPM·TPM 토큰 버킷과 Retry-After 차단을 관리합니다.
+
+    Attributes:
+        name (str): 제한기 이름 (프로바이더).
+        requests (TokenBucket | None): 분당 요청 수 버킷. 한도가 없으면 None.
+        tokens (TokenBucket | None): 분당 토큰 수 버킷. 한도가 없으면 None.
+    """
+
+    def __init__(self, name, rpm=0, tpm=0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'waits': 0, 'wait_seconds': 0.0, 'rate_limited': 0, 'skipped': 0}
+
+    def reserve(self, tokens, max_wait=None):
+        """
+        요청 1건과 예상 토큰을 예약하고 기다려야 할 시간을 반환합니다.
+
+        Args:
+            tokens (int): 요청의 예상 토큰 수.
+            max_wait (float, optional): 허용할 최대 대기 시간(초). None이면 제한 없음.
+
+        Returns:
+            float: 요청 전에 기다려야 하는 시간(초).
+
+        Raises:
+            RateLimitError: 대기 시간이 max_wait를 넘는 경우 (예약하지 않음).
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if max_wait is not None and wait > max_wait:
+                self._stats['skipped'] += 1
+                raise RateLimitError(f"Rate limit for {self.name} requires waiting {wait:.1f}s",
+                                     service_name=self.name, retry_after=int(wait + 0.999))
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+            if wait > 0:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds'] += wait
+            return wait
+
+    def peek_wait(self, tokens):
+        """
+        지금 예약하면 기다려야 할 시간(초)을 반환합니다 (예약하지 않음).
+
+        Args:
+            tokens (int): 요청의 예상 토큰 수.
+
+        Returns:
+            float: 대기 시간(초).
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            return wait
+
+    async def acquire(self, tokens, max_wait=None):
+        """
+        한도 내에서 요청을 보낼 수 있을 때까지 기다립니다.
+
+        Args:
+            tokens (int): 요청의 예상 토큰 수.
+            max_wait (float, optional): 허용할 최대 대기 시간(초).
+
+        Raises:
+            RateLimitError: 대기 시간이 max_wait를 넘는 경우.
+        """
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            metrics.observe('llm_rate_limit_wait_seconds', wait)
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """
+        응답의 실제 토큰 사용량으로 TPM 버킷을 보정합니다.
+
+        Args:
+            estimated_tokens (int): 예약했던 토큰 수.
+            actual_tokens (int | None): 응답에 보고된 실제 토큰 수.
+        """
+        if self.tokens and actual_tokens:
+            with self._lock:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def penalize(self, retry_after=None):
+        """
+        429 응답을 반영합니다. Retry-After 동안 새 요청을 막고 버킷을 비웁니다.
+
+        Args:
+            retry_after (float, optional): 서버가 알려준 대기 시간(초).
+        """
+        with self._lock:
+            self._stats['rate_limited'] += 1
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.drain()
+        metrics.increment(f"llm_rate_limited.{self.name}")
+        logger.warning(f"Rate limited by {self.name}, retry after {retry_after}s")
+
+    def get_stats(self):
+        """
+        제한기 상태를 반환합니다.
+
+        Returns:
+            dict: 버킷 잔량, 차단 남은 시간, 대기/429 횟수.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'requests_available': round(self.requests.tokens, 1) if self.requests else None,
+                'tokens_available': round(self.tokens.tokens) if self.tokens else None,
+                'blocked_for': round(max(0.0, self.blocked_until - now), 1),
+                **{key: round(value, 3) if isinstance(value, float) else value
+                   for key, value in self._stats.items()},
+            }
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(llm_config):
+    """
+    LLM 설정(프로바이더와 API 키)별 프로세스 전역 요청 한도 제한기를 반환합니다.
+
+    RPM/TPM이 설정되지 않은 경우에도 Retry-After 차단을 위해 제한기를 만듭니다.
+
+    Args:
+        llm_config (dict): get_all_available_llm_configs()의 항목.
+
+    Returns:
+        ProviderRateLimiter: 요청 한도 제한기.
+    """
+    key_id = hashlib.sha256((llm_config.get('api_key') or '').encode()).hexdigest()[:12]
+    key = (llm_config['provider'], key_id)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = ProviderRateLimiter(llm_config['provider'], llm_config.get('rpm', 0), llm_config.get('tpm', 0))
+            _rate_limiters[key] = limiter
+    return limiter
+
+
+def get_rate_limiter_stats():
+    """모든 요청 한도 제한기의 상태를 반환합니다."""
+    with _rate_limiters_lock:
+        limiters = dict(_rate_limiters)
+    return {f"{provider}:{key_id}": limiter.get_stats() for (provider, key_id), limiter in limiters.items()}
+
+
+metrics.register_collector('llm_rate_limits', get_rate_limiter_stats)
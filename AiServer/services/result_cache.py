@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SQLITE_URI_PREFIX = "sqlite:///"
+
+
+def make_categories_key(categories):
+    """
+    카테고리 목록을 순서와 중복에 무관한 캐시 키로 정규화합니다.
+
+    Args:
+        categories (list of str): 분류 카테고리 목록.
+
+    Returns:
+        str: 공백을 제거하고 정렬한 카테고리의 JSON 문자열.
+    """
+    return json.dumps(sorted({category.strip() for category in categories}), ensure_ascii=False)
+
+
+class ResultCache:
+    """
+    SQLite 기반 분류 결과 캐시.
+
+    (이미지 내용 해시, 정규화된 카테고리 목록, 모델 ID, 작업 공간 ID)를 키로 LLM이 반환한 레이블을 저장합니다.
+    같은 작업 공간에서 같은 이미지를 같은 testClass로 다시 분류하면 LLM을 호출하지 않고 저장된 레이블을
+    사용합니다. 작업 공간이 키에 포함되므로 한 작업 공간의 항목이 다른 작업 공간의 항목을 덮어쓰지 않고,
+    작업 공간 단위 무효화는 그 작업 공간의 항목만 정확히 삭제합니다.
+    항목은 TTL이 지나면 무시되고, 항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제됩니다.
+
+    Attributes:
+        db_path (str): SQLite 데이터베이스 파일 경로.
+        ttl_seconds (float): 항목 유효 시간(초). 0 이하이면 만료되지 않습니다.
+        max_entries (int): 보관할 최대 항목 수.
+    """
+
+    EVICTION_CHECK_INTERVAL = 200  # 이 개수만큼 저장할 때마다 만료/초과 항목을 정리
+
+    def __init__(self, db_path=None, ttl_seconds=None, max_entries=None):
+        self.db_path = db_path or self.db_path_from_uri(config.DATABASE_URI)
+        self.ttl_seconds = config.RESULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = config.RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores_since_check = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+        self._initialize()
+
+    @staticmethod
+    def db_path_from_uri(uri):
+        """
+        DATABASE_URI에서 SQLite 파일 경로를 추출합니다.
+
+        Args:
+            uri (str): 'sqlite:///경로' 형식의 URI.
+
+        Returns:
+            str: 데이터베이스 파일 경로.
+
+        Raises:
+            ValueError: SQLite URI가 아닌 경우.
+        """
+        if not uri.startswith(SQLITE_URI_PREFIX):
+            raise ValueError(f"Result cache requires a sqlite:/// DATABASE_URI, got: {uri}")
+        return uri[len(SQLITE_URI_PREFIX):]
+
+    def _connect(self):
+        # sqlite3 연결은 스레드 간에 공유할 수 없으므로 스레드마다 하나씩 엽니다.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self):
+        conn = self._connect()
+        with conn:
+            columns = conn.execute("PRAGMA table_info(classification_results)").fetchall()
+            if columns and not any(column[1] == 'workspace_id' and column[5] for column in columns):
+                # 작업 공간이 기본 키에 없던 이전 스키마는 소유 작업 공간이 덮어써졌을 수 있으므로 비웁니다.
+                logger.info("Result cache schema changed; dropping entries stored without workspace keys")
+                conn.execute("DROP TABLE classification_results")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS classification_results (
+                    image_hash TEXT NOT NULL,
+                    categories_key TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    workspace_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    PRIMARY KEY (image_hash, categories_key, model, workspace_id)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_workspace ON classification_results (workspace_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_used ON classification_results (last_used_at)")
+
+    @staticmethod
+    def _workspace_key(workspace_id):
+        # SQLite 기본 키에서 NULL은 서로 다른 값으로 취급되므로 작업 공간이 없으면 빈 문자열을 사용합니다.
+        return str(workspace_id) if workspace_id is not None else ''
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def lookup_many(self, image_hashes, categories, models, workspace_id=None):
+        """
+        작업 공간에 저장된 여러 이미지의 캐시된 레이블을 조회합니다.
+
+        Args:
+            image_hashes (list of str): 이미지 내용 해시 목록.
+            categories (list of str): 분류 카테고리 목록.
+            models (list of str): 허용할 모델 ID 목록 (우선순위 순). 여러 모델의 결과가 있으면 앞선 모델을 사용합니다.
+            workspace_id (int | str, optional): 결과를 요청한 작업 공간 ID.
+
+        Returns:
+            dict: 이미지 해시를 키로 하는 레이블. 캐시에 없는 해시는 포함되지 않습니다.
+        """
+        unique_hashes = list(dict.fromkeys(image_hashes))
+        if not unique_hashes or not models:
+            return {}
+        categories_key = make_categories_key(categories)
+        workspace = self._workspace_key(workspace_id)
+        now = time.time()
+        min_created_at = now - self.ttl_seconds if self.ttl_seconds > 0 else 0
+
+        hash_placeholders = ",".join("?" * len(unique_hashes))
+        model_placeholders = ",".join("?" * len(models))
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT image_hash, model, label FROM classification_results "
+            f"WHERE categories_key = ? AND workspace_id = ? AND created_at >= ? "
+            f"AND image_hash IN ({hash_placeholders}) AND model IN ({model_placeholders})",
+            [categories_key, workspace, min_created_at, *unique_hashes, *models],
+        ).fetchall()
+
+        model_rank = {model: rank for rank, model in enumerate(models)}
+        best = {}
+        for image_hash, model, label in rows:
+            if image_hash not in best or model_rank[model] < model_rank[best[image_hash][0]]:
+                best[image_hash] = (model, label)
+
+        if best:
+            with conn:
+                conn.executemany(
+                    "UPDATE classification_results SET last_used_at = ? "
+                    "WHERE image_hash = ? AND categories_key = ? AND model = ? AND workspace_id = ?",
+                    [(now, image_hash, categories_key, model, workspace)
+                     for image_hash, (model, _) in best.items()],
+                )
+        self._count('hits', len(best))
+        self._count('misses', len(unique_hashes) - len(best))
+        return {image_hash: label for image_hash, (_, label) in best.items()}
+
+    def store_many(self, labels_by_hash, categories, model, workspace_id=None):
+        """
+        분류 결과를 저장합니다.
+
+        Args:
+            labels_by_hash (dict): 이미지 해시를 키로 하는 레이블.
+            categories (list of str): 분류 카테고리 목록.
+            model (str): 결과를 반환한 모델 ID.
+            workspace_id (int | str, optional): 결과를 요청한 작업 공간 ID.
+        """
+        if not labels_by_hash:
+            return
+        categories_key = make_categories_key(categories)
+        now = time.time()
+        workspace = self._workspace_key(workspace_id)
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO classification_results "
+                "(image_hash, categories_key, model, label, workspace_id, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(image_hash, categories_key, model, label, workspace, now, now)
+                 for image_hash, label in labels_by_hash.items()],
+            )
+        self._count('stores', len(labels_by_hash))
+
+        with self._lock:
+            self._stores_since_check += len(labels_by_hash)
+            should_evict = self._stores_since_check >= self.EVICTION_CHECK_INTERVAL
+            if should_evict:
+                self._stores_since_check = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """
+        만료된 항목을 삭제하고, 남은 항목이 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+
+        Returns:
+            int: 삭제된 항목 수.
+        """
+        conn = self._connect()
+        removed = 0
+        with conn:
+            if self.ttl_seconds > 0:
+                removed += conn.execute(
+                    "DELETE FROM classification_results WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                ).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM classification_results").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM classification_results WHERE rowid IN ("
+                    "SELECT rowid FROM classification_results ORDER BY last_used_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        if removed:
+            self._count('evictions', removed)
+            logger.info(f"Result cache eviction removed {removed} entries")
+        return removed
+
+    def invalidate_workspace(self, workspace_id):
+        """
+        작업 공간에서 기록된 항목을 모두 삭제합니다.
+
+        Args:
+            workspace_id (int | str): 작업 공간 ID.
+
+        Returns:
+            int: 삭제된 항목 수.
+        """
+        conn = self._connect()
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM classification_results WHERE workspace_id = ?", (str(workspace_id),)
+            ).rowcount
+        self._count('invalidations', removed)
+        logger.info(f"Result cache invalidated {removed} entries for workspace {workspace_id}")
+        return removed
+
+    def get_stats(self):
+        """
+        캐시 통계를 반환합니다.
+
+        Returns:
+            dict: 적중/미스/저장/제거/무효화 횟수, 항목 수, 적중률.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['entries'] = self._connect().execute("SELECT COUNT(*) FROM classification_results").fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    프로세스 전역 분류 결과 캐시를 반환합니다.
+
+    Returns:
+        ResultCache | None: RESULT_CACHE_ENABLED가 False이거나 데이터베이스를 열 수 없으면 None.
+    """
+    global _result_cache
+    if not config.RESULT_CACHE_ENABLED:
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                try:
+                    _result_cache = ResultCache()
+                except (ValueError, sqlite3.Error, OSError) as e:
+                    logger.error(f"Result cache disabled: {e}")
+                    return None
+                metrics.register_collector('result_cache', _result_cache.get_stats)
+    return _result_cache
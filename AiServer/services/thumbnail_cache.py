@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailCache:
+    """
+    LLM 전송용으로 인코딩된 썸네일(base64 문자열)의 메모리 LRU 캐시.
+
+    키는 원본 이미지 바이트의 다이제스트와 목표 크기/포맷/품질로 구성되므로, 같은 이미지를
+    다른 testClass로 다시 분류하거나 프로바이더 폴백으로 재전송할 때 PIL 디코딩/리사이즈/
+    인코딩을 건너뜁니다. 메모리 예산을 넘어 밀려난 항목은 spill 디렉토리가 설정된 경우
+    디스크에 기록되고, 다시 조회되면 메모리로 승격됩니다.
+
+    Attributes:
+        max_bytes (int): 메모리에 보관할 썸네일 문자열의 최대 바이트 수.
+        spill_dir (str | None): 밀려난 항목을 기록할 디렉토리. None이면 디스크 spill을 사용하지 않습니다.
+        spill_max_bytes (int): spill 디렉토리의 최대 바이트 수.
+    """
+
+    SPILL_CHECK_INTERVAL = 100  # spill 파일을 이 개수만큼 쓸 때마다 디렉토리 크기를 검사
+
+    def __init__(self, max_bytes=None, spill_dir=None, spill_max_bytes=None):
+        self.max_bytes = config.THUMBNAIL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.spill_dir = spill_dir if spill_dir is not None else (config.THUMBNAIL_CACHE_SPILL_DIR or None)
+        self.spill_max_bytes = (config.THUMBNAIL_CACHE_SPILL_MAX_BYTES if spill_max_bytes is None
+                                else spill_max_bytes)
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._spills_since_check = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'spills': 0,
+        }
+
+    @staticmethod
+    def make_key(image_bytes, max_size, image_format="JPEG", quality=None):
+        """
+        썸네일 캐시 키를 만듭니다.
+
+        Args:
+            image_bytes (bytes): 원본 이미지 바이트.
+            max_size (tuple): 썸네일 최대 너비와 높이.
+            image_format (str): 인코딩 포맷.
+            quality (int, optional): 인코딩 품질. None이면 포맷 기본값.
+
+        Returns:
+            str: 이미지 내용과 인코딩 파라미터를 식별하는 키.
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{digest}:{max_size[0]}x{max_size[1]}:{image_format}:{quality}"
+
+    def _spill_path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, name[:2], f"{name}.b64")
+
+    def get(self, key):
+        """
+        썸네일을 조회합니다.
+
+        Args:
+            key (str): make_key()로 만든 키.
+
+        Returns:
+            str | None: base64 인코딩된 썸네일. 없으면 None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return value
+
+        value = self._read_spill(key)
+        if value is not None:
+            with self._lock:
+                self._stats['disk_hits'] += 1
+            self.put(key, value, spill=False)
+            return value
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key, value, spill=True):
+        """
+        썸네일을 저장하고 예산을 넘으면 가장 오래 사용되지 않은 항목을 밀어냅니다.
+
+        Args:
+            key (str): make_key()로 만든 키.
+            value (str): base64 인코딩된 썸네일.
+            spill (bool): 밀려난 항목을 spill 디렉토리에 기록할지 여부.
+        """
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= len(old_value)
+                self._stats['evictions'] += 1
+                evicted.append((old_key, old_value))
+
+        if spill and self.spill_dir:
+            for old_key, old_value in evicted:
+                self._write_spill(old_key, old_value)
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, "r", encoding="ascii") as f:
+                value = f.read()
+            os.utime(path)
+            return value
+        except OSError:
+            return None
+
+    def _write_spill(self, key, value):
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="ascii") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to spill thumbnail to {path}: {e}")
+            return
+        with self._lock:
+            self._stats['spills'] += 1
+            self._spills_since_check += 1
+            should_prune = self._spills_since_check >= self.SPILL_CHECK_INTERVAL
+            if should_prune:
+                self._spills_since_check = 0
+        if should_prune:
+            self._prune_spill()
+
+    def _prune_spill(self):
+        """spill 디렉토리가 예산을 넘으면 가장 오래 사용되지 않은 파일부터 제거합니다."""
+        files = []
+        for root, _, names in os.walk(self.spill_dir):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """메모리 항목을 모두 제거합니다."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """
+        캐시 통계를 반환합니다.
+
+        Returns:
+            dict: 적중/디스크 적중/미스/제거/spill 횟수, 항목 수, 사용 바이트, 적중률.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """
+    프로세스 전역 썸네일 캐시를 반환합니다.
+
+    Returns:
+        ThumbnailCache | None: THUMBNAIL_CACHE_ENABLED가 False이면 None.
+    """
+    global _thumbnail_cache
+    if not config.THUMBNAIL_CACHE_ENABLED:
+        return None
+    if _thumbnail_cache is None:
+        with _thumbnail_cache_lock:
+            if _thumbnail_cache is None:
+                try:
+                    _thumbnail_cache = ThumbnailCache()
+                except OSError as e:
+                    logger.error(f"Thumbnail cache disabled: cannot initialize spill directory: {e}")
+                    return None
+                metrics.register_collector('thumbnail_cache', _thumbnail_cache.get_stats)
+    return _thumbnail_cache
@@ -1,14 +1,24 @@
 from ultralytics import YOLO
 from config import config
+import io
 import os
 import logging
 import json
+import random
+import shutil
+import threading
 from datetime import datetime
 import torch
+from PIL import Image
 from exceptions.custom_exceptions import ModelNotFoundError, ExportError
+from utils.calibration import calibrate_confidence_threshold
 
 logger = logging.getLogger(__name__)
 
+# 레이블 디렉토리가 아닌 작업 공간 하위 디렉토리 (훈련용 분할)
+SPLIT_DIRS = ('train', 'val', 'test')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
 class YOLOService:
     """
     YOLO 모델 훈련 및 추론을 처리하는 서비스 클래스.
@@ -24,6 +34,9 @@ class YOLOService:
         self.models_dir = os.path.join(config.BASE_DIR, "models")
         os.makedirs(self.models_dir, exist_ok=True)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # 로컬 사전 분류에 사용하는 (작업 공간, 버전)별 모델. 추론은 한 번에 하나씩 실행합니다.
+        self._cascade_models = {}
+        self._cascade_lock = threading.Lock()
         logger.info(f"Using device: {self.device}")
 
     def train(self, workspace_id, epochs=10, imgsz=416, batch_size=16, progress_callback=None):
@@ -41,6 +54,11 @@ class YOLOService:
             dict: 훈련 결과 및 메트릭스.
         """
         workspace_dir = os.path.join(config.BASE_DIR, "workspace", str(workspace_id))
+        data_dir, held_out = workspace_dir, None
+        if config.YOLO_CASCADE_ENABLED:
+            # 로컬 사전 분류 임계값을 훈련에 쓰이지 않은 이미지로 보정할 수 있도록 일부를 뺀 데이터셋으로 훈련합니다.
+            data_dir, held_out = self._build_training_set(workspace_id, config.YOLO_CASCADE_CALIBRATION_FRACTION,
+                                                          config.YOLO_CASCADE_CALIBRATION_IMAGES)
         self.model = YOLO("yolov8n-cls.pt").to(self.device)  # 분류 모델 사용
 
         def on_train_epoch_end(trainer):
@@ -63,22 +81,30 @@ class YOLOService:
                 }
                 progress_callback(progress)
 
-        results = self.model.train(
-            data=workspace_dir,
-            epochs=epochs,
-            imgsz=imgsz,
-            batch=batch_size,
-            device=self.device,
-            callbacks={
-                'on_train_epoch_end': on_train_epoch_end,
-                'on_train_end': on_train_end
-            }
-        )
+        try:
+            results = self.model.train(
+                data=data_dir,
+                epochs=epochs,
+                imgsz=imgsz,
+                batch=batch_size,
+                device=self.device,
+                callbacks={
+                    'on_train_epoch_end': on_train_epoch_end,
+                    'on_train_end': on_train_end
+                }
+            )
+        finally:
+            if data_dir != workspace_dir:
+                shutil.rmtree(data_dir, ignore_errors=True)
 
         # 모델 버전 관리 및 저장
         version = datetime.now().strftime("%Y%m%d_%H%M%S")
         model_path = os.path.join(self.models_dir, f"model_{workspace_id}_{version}.pt")
         self.model.save(model_path)
+        if held_out is not None:
+            # 이 버전의 보정에는 훈련에서 뺀 이미지만 사용합니다.
+            with open(self._holdout_path(workspace_id, version), 'w') as f:
+                json.dump(held_out, f)
 
         # 훈련 결과 저장
         results_path = os.path.join(self.models_dir, f"results_{workspace_id}_{version}.json")
@@ -181,8 +207,8 @@ class YOLOService:
         Raises:
             ModelNotFoundError: 훈련된 모델이 없는 경우.
         """
-        model_files = [f for f in os.listdir(self.models_dir) if f.startswith(f"model_{workspace_id}_")]
-        if not model_files:
+        versions = self.get_model_versions(workspace_id)
+        if not versions:
             raise ModelNotFoundError(
                 f"작업 공간 {workspace_id}에 대한 훈련된 모델이 없습니다.",
                 model_name=f"model_{workspace_id}",
@@ -191,7 +217,7 @@ class YOLOService:
                     'models_dir': self.models_dir
                 }
             )
-        return max(model_files).split('_')[2].split('.')[0]
+        return versions[0]
 
     def get_model_versions(self, workspace_id):
         """
@@ -203,10 +229,185 @@ class YOLOService:
         Returns:
             list: 모델 버전 목록.
         """
-        model_files = [f for f in os.listdir(self.models_dir) if f.startswith(f"model_{workspace_id}_")]
-        versions = [f.split('_')[2].split('.')[0] for f in model_files]
+        # 버전 문자열("%Y%m%d_%H%M%S")에도 '_'가 있으므로 접두사와 확장자만 잘라냅니다.
+        prefix = f"model_{workspace_id}_"
+        versions = [f[len(prefix):-len(".pt")] for f in os.listdir(self.models_dir)
+                    if f.startswith(prefix) and f.endswith(".pt")]
         return sorted(versions, reverse=True)
 
+    def _load_cascade_model(self, workspace_id, version):
+        """(작업 공간, 버전)의 모델을 한 번만 불러와 재사용합니다. _cascade_lock을 잡은 상태에서 호출합니다."""
+        key = (workspace_id, version)
+        model = self._cascade_models.get(key)
+        if model is None:
+            model = YOLO(self._get_model_path(workspace_id, version)).to(self.device)
+            # 새 버전이 생기면 이전 버전 모델은 더 이상 쓰지 않으므로 작업 공간당 하나만 보관합니다.
+            self._cascade_models = {k: v for k, v in self._cascade_models.items() if k[0] != workspace_id}
+            self._cascade_models[key] = model
+        return model
+
+    def predict_batch(self, images, workspace_id, version=None, batch_size=None):
+        """
+        여러 이미지를 배치로 분류합니다.
+
+        Args:
+            images (list): 이미지 바이트, 파일 경로 또는 PIL 이미지 목록.
+            workspace_id (int): 사용할 모델의 작업 공간 ID.
+            version (str, optional): 사용할 모델의 버전. 기본값은 None (최신 버전 사용).
+            batch_size (int, optional): 추론 배치 크기. 기본값은 YOLO_CASCADE_BATCH_SIZE.
+
+        Returns:
+            list of tuple: 이미지별 (top-1 레이블, confidence).
+        """
+        version = version or self._get_latest_version(workspace_id)
+        batch_size = batch_size or config.YOLO_CASCADE_BATCH_SIZE
+        predictions = []
+        with self._cascade_lock:
+            model = self._load_cascade_model(workspace_id, version)
+            for start in range(0, len(images), batch_size):
+                # 큰 작업에서도 메모리를 아끼도록 배치마다 디코딩합니다.
+                sources = [Image.open(io.BytesIO(image)).convert("RGB") if isinstance(image, bytes) else image
+                           for image in images[start:start + batch_size]]
+                results = model.predict(sources, device=self.device, verbose=False)
+                predictions.extend(
+                    (result.names[int(result.probs.top1)], float(result.probs.top1conf)) for result in results
+                )
+        return predictions
+
+    def get_cascade_threshold(self, workspace_id, version=None):
+        """
+        로컬 사전 분류에 사용할 작업 공간 모델의 confidence 임계값을 반환합니다.
+
+        모델 버전마다 한 번 보정하여 calibration_{workspace_id}_{version}.json에 저장하고 이후에는 저장된 값을
+        사용합니다. 보정 샘플은 그 버전을 훈련할 때 훈련 데이터에서 뺀 이미지(_build_training_set)만 사용합니다.
+        훈련에 쓰인 이미지로 보정하면 임계값이 낙관적이 되므로, 보정용 이미지가 없으면 threshold는 None입니다
+        (모든 이미지를 LLM으로 보냄).
+
+        Args:
+            workspace_id (int): 작업 공간 ID.
+            version (str, optional): 모델 버전. 기본값은 None (최신 버전 사용).
+
+        Returns:
+            dict: version, threshold (목표 정밀도를 만족하는 지점이 없으면 None), precision 목표, samples 수.
+
+        Raises:
+            ModelNotFoundError: 훈련된 모델이 없는 경우.
+        """
+        version = version or self._get_latest_version(workspace_id)
+        calibration_path = os.path.join(self.models_dir, f"calibration_{workspace_id}_{version}.json")
+        if os.path.exists(calibration_path):
+            with open(calibration_path) as f:
+                return json.load(f)
+
+        samples = self._calibration_samples(workspace_id, version, config.YOLO_CASCADE_CALIBRATION_IMAGES)
+        if not samples:
+            # 보정용 이미지를 남기고 훈련한 모델에는 적용되지 않으므로 결과를 저장하지 않습니다.
+            logger.info(f"No held-out calibration images for workspace {workspace_id} ({version}); "
+                        f"local classifier disabled")
+            return {'version': version, 'threshold': None,
+                    'target_precision': config.YOLO_CASCADE_TARGET_PRECISION, 'samples': 0}
+        predictions = self.predict_batch([path for path, _ in samples], workspace_id, version)
+        scored = [(confidence, label == expected)
+                  for (label, confidence), (_, expected) in zip(predictions, samples)]
+        calibration = {
+            'version': version,
+            'threshold': calibrate_confidence_threshold(scored, config.YOLO_CASCADE_TARGET_PRECISION,
+                                                        config.YOLO_CASCADE_MIN_SAMPLES),
+            'target_precision': config.YOLO_CASCADE_TARGET_PRECISION,
+            'samples': len(scored),
+        }
+        with open(calibration_path, 'w') as f:
+            json.dump(calibration, f)
+        logger.info(f"Calibrated local classifier for workspace {workspace_id} ({version}): "
+                    f"threshold={calibration['threshold']} on {len(scored)} samples")
+        return calibration
+
+    def _holdout_path(self, workspace_id, version):
+        return os.path.join(self.models_dir, f"holdout_{workspace_id}_{version}.json")
+
+    @staticmethod
+    def _label_images(root, skip_splits=False):
+        """root 아래 레이블별 디렉토리의 이미지 파일 이름을 {레이블: [이름]} 으로 반환합니다."""
+        if not os.path.isdir(root):
+            return {}
+        images = {}
+        for label in sorted(os.listdir(root)):
+            label_dir = os.path.join(root, label)
+            if not os.path.isdir(label_dir) or (skip_splits and label in SPLIT_DIRS):
+                continue
+            images[label] = [name for name in sorted(os.listdir(label_dir))
+                             if name.lower().endswith(IMAGE_EXTENSIONS)]
+        return images
+
+    @staticmethod
+    def _link_or_copy(src, dest):
+        try:
+            os.link(src, dest)
+        except OSError:
+            # 다른 파일 시스템이거나 하드링크를 지원하지 않는 경우
+            shutil.copyfile(src, dest)
+
+    def _build_training_set(self, workspace_id, fraction, limit):
+        """
+        보정용 이미지를 뺀 훈련 데이터셋을 작업 공간 밖에 만듭니다.
+
+        레이블마다 fraction만큼의 이미지를 무작위(고정 시드)로 골라 보정용으로 남기고(전체 limit개 이하),
+        나머지 이미지는 BASE_DIR/training/{workspace_id} 아래에 같은 구조로 하드링크(불가능하면 복사)합니다.
+        작업 공간에 train 분할이 있으면 그 안의 레이블 디렉토리에서 고르고 val/test 분할은 그대로 연결합니다.
+        작업 공간의 이미지는 옮기거나 수정하지 않습니다.
+
+        Args:
+            workspace_id (int): 작업 공간 ID.
+            fraction (float): 레이블별로 보정용으로 남길 이미지 비율 (0이면 남기지 않음).
+            limit (int): 보정용 이미지의 최대 수.
+
+        Returns:
+            tuple: (훈련 데이터 디렉토리, 보정용 (이미지 경로, 레이블) 목록).
+        """
+        workspace_dir = os.path.join(config.BASE_DIR, "workspace", str(workspace_id))
+        training_dir = os.path.join(config.BASE_DIR, "training", str(workspace_id))
+        if os.path.isdir(os.path.join(workspace_dir, "train")):
+            roots = [(os.path.join(workspace_dir, split), os.path.join(training_dir, split), split == "train")
+                     for split in SPLIT_DIRS if os.path.isdir(os.path.join(workspace_dir, split))]
+        else:
+            roots = [(workspace_dir, training_dir, True)]
+
+        rng = random.Random(workspace_id)
+        budget = limit
+        held_out = []
+        shutil.rmtree(training_dir, ignore_errors=True)
+        for source_root, dest_root, holds_out in roots:
+            for label, names in self._label_images(source_root, skip_splits=source_root == workspace_dir).items():
+                count = min(int(len(names) * fraction), budget) if holds_out else 0
+                excluded = set(rng.sample(names, count)) if count > 0 else set()
+                budget -= len(excluded)
+                held_out.extend((os.path.join(source_root, label, name), label) for name in sorted(excluded))
+                os.makedirs(os.path.join(dest_root, label), exist_ok=True)
+                for name in names:
+                    if name not in excluded:
+                        self._link_or_copy(os.path.join(source_root, label, name),
+                                           os.path.join(dest_root, label, name))
+        logger.info(f"Held out {len(held_out)} images of workspace {workspace_id} for cascade calibration")
+        return training_dir, held_out
+
+    def _calibration_samples(self, workspace_id, version, limit):
+        """
+        모델 버전을 훈련할 때 남겨 둔 보정용 이미지를 고릅니다.
+
+        Returns:
+            list of tuple: (이미지 경로, 레이블) 목록. 레이블 순서와 무관하게 최대 limit개를 무작위(고정 시드)로
+                고릅니다. 보정용 이미지 목록이 없으면 빈 목록이며, 그 사이 삭제된 이미지는 제외합니다.
+        """
+        try:
+            with open(self._holdout_path(workspace_id, version)) as f:
+                held_out = json.load(f)
+        except (OSError, ValueError):
+            return []
+        samples = [(path, label) for path, label in held_out if os.path.exists(path)]
+        if len(samples) > limit:
+            samples = random.Random(workspace_id).sample(samples, limit)
+        return samples
+
     def export_model(self, workspace_id, version=None, format='onnx'):
         """
         훈련된 모델을 지정된 형식으로 내보냅니다.
@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 from flask import json
 from app import app
 from config import config
@@ -8,6 +11,13 @@ class TestAPI(unittest.TestCase):
         self.app = app.test_client()
         self.app.testing = True
         self.api_key = config.API_KEY
+        # 분류 요청이 만드는 결과 캐시 데이터베이스를 작업 디렉터리 대신 임시 디렉터리에 둡니다.
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        for active in (patch.object(config, 'DATABASE_URI', 'sqlite:///' + os.path.join(temp_dir.name, 'test.db')),
+                       patch('services.result_cache._result_cache', None)):
+            active.start()
+            self.addCleanup(active.stop)
 
     def test_health_check(self):
         response = self.app.get('/health')
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import config
+from services.batch_classifier import BatchClassifier, BatchJobStore
+from services.data_processor import DataProcessor
+from services.image_fetcher import FetchResult
+
+OPENAI_CONFIG = {'provider': 'openai', 'model': 'gpt-4.1-mini', 'api_key': 'k', 'base_url': None}
+
+
+class FakeFetcher:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def fetch_many(self, urls, validate=False):
+        return {url: FetchResult(url, content=None if 'broken' in url else b'image', status_code=200,
+                                 error='not an image' if 'broken' in url else None) for url in urls}
+
+
+class LocalBatchEndpoint:
+    """배치 API 대체 엔드포인트: 모든 이미지를 'cat'으로 분류하고 failed_ids 요청은 오류로 돌려줍니다."""
+
+    def __init__(self, failed_ids=()):
+        self.status = 'in_progress'
+        self.failed_ids = set(failed_ids)
+        self.requests = []
+
+    async def submit(self, data, completion_window):
+        self.requests = [json.loads(line) for line in data.decode('utf-8').splitlines()]
+        return 'batch-1'
+
+    async def retrieve(self, batch_id):
+        return {'status': self.status, 'output_file_id': 'file-out' if self.status == 'completed' else None,
+                'error_file_id': None}
+
+    async def content(self, file_id):
+        lines = []
+        for request in self.requests:
+            if request['custom_id'] in self.failed_ids:
+                lines.append({'custom_id': request['custom_id'], 'response': {'status_code': 500, 'body': {}}})
+                continue
+            count = sum(part['type'] == 'image_url' for part in request['body']['messages'][0]['content'])
+            arguments = json.dumps({'classifications': [{'index': i, 'category': 'cat'} for i in range(count)]})
+            body = {'choices': [{'message': {'tool_calls': [
+                {'function': {'name': 'classify_images', 'arguments': arguments}}]}}]}
+            lines.append({'custom_id': request['custom_id'], 'response': {'status_code': 200, 'body': body}})
+        return '\n'.join(json.dumps(line) for line in lines)
+
+
+def prepared_images(images, image_data=None, **kwargs):
+    parts = []
+    for index, url in enumerate(images):
+        parts.append({'type': 'text', 'text': str(index)})
+        parts.append({'type': 'image_url', 'image_url': {'url': 'data:image/jpeg;base64,' + url}})
+    return parts
+
+
+class TestBatchClassifier(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'batches.db')
+        self.data_processor = DataProcessor()
+        self.data_processor.classification_service.available_configs = [OPENAI_CONFIG]
+        self.data_processor.chunk_planner_enabled = False
+        self.data_processor.chunk_size = 2
+        self.save_image = MagicMock()
+        self.message = {
+            'workspaceId': 7,
+            'requesterId': 3,
+            'testClass': ['cat', 'dog'],
+            'testImages': [{'id': str(i), 'url': f'http://img/{name}.jpg', 'fileName': f'{name}.jpg'}
+                           for i, name in enumerate(['a', 'broken', 'b', 'c', 'd'])],
+        }
+        patches = [
+            patch.object(config, 'LLM_BATCH_ENABLED', True),
+            patch.object(config, 'LLM_BATCH_MIN_IMAGES', 5),
+            patch.object(config, 'LLM_BATCH_PROVIDER', 'openai'),
+            patch('services.batch_classifier.ImageFetcher', FakeFetcher),
+            patch('services.batch_classifier.ImageService.save_image', self.save_image),
+            patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                  AsyncMock(side_effect=prepared_images)),
+        ]
+        for active in patches:
+            active.start()
+            self.addCleanup(active.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_classifier(self, endpoint):
+        return BatchClassifier(self.data_processor, store=BatchJobStore(self.db_path), client=endpoint)
+
+    def test_should_batch_above_threshold(self):
+        classifier = self.make_classifier(LocalBatchEndpoint())
+        self.assertTrue(classifier.should_batch(self.message))
+        self.assertFalse(classifier.should_batch({**self.message, 'testImages': self.message['testImages'][:4]}))
+
+    def test_pending_batch_survives_restart_and_maps_results_to_ids(self):
+        endpoint = LocalBatchEndpoint(failed_ids=['chunk-1'])
+        classifier = self.make_classifier(endpoint)
+        batch_id = classifier.submit(self.message, 'corr-1')
+
+        self.assertEqual(batch_id, 'batch-1')
+        self.assertEqual([request['custom_id'] for request in endpoint.requests], ['chunk-0', 'chunk-1'])
+        completed = []
+        self.assertEqual(classifier.poll(lambda *args: completed.append(args)), 0)
+
+        # 재시작: 새 인스턴스가 저장된 상태에서 폴링을 이어 갑니다.
+        endpoint.status = 'completed'
+        restarted = self.make_classifier(endpoint)
+        restarted.classification_service.classify_images = AsyncMock(return_value=['dog', None])
+        self.assertEqual(restarted.poll(lambda *args: completed.append(args)), 1)
+
+        correlation_id, message, labels_and_ids = completed[0]
+        self.assertEqual((correlation_id, message['workspaceId']), ('corr-1', 7))
+        self.assertEqual(labels_and_ids, [{'label': 'cat', 'ids': ['0', '2']},
+                                          {'label': 'dog', 'ids': ['3']},
+                                          {'label': 'NONE', 'ids': ['4']}])
+        restarted.classification_service.classify_images.assert_awaited_once_with(
+            ['http://img/c.jpg', 'http://img/d.jpg'], ['cat', 'dog'],
+            image_data={'http://img/c.jpg': b'image', 'http://img/d.jpg': b'image'})
+        self.assertEqual(restarted.store.pending(), [])
+
+    def count_content_calls(self, endpoint, fail_first=False):
+        original_content = endpoint.content
+
+        async def content(file_id):
+            if fail_first and not endpoint.content.await_args_list[:-1]:
+                raise ValueError("corrupt output file")
+            return await original_content(file_id)
+
+        endpoint.content = AsyncMock(side_effect=content)
+
+    def test_results_survive_publish_failure(self):
+        endpoint = LocalBatchEndpoint()
+        classifier = self.make_classifier(endpoint)
+        classifier.submit(self.message, 'corr-1')
+        endpoint.status = 'completed'
+        self.count_content_calls(endpoint)
+
+        def failing_publish(*args):
+            raise ConnectionError("broker unavailable")
+
+        self.assertEqual(classifier.poll(failing_publish), 0)
+        self.assertEqual([job['status'] for job in classifier.store.pending()], ['publishing'])
+        # 결과를 처리할 때 제출 시점에 저장한 바이트를 사용하므로 이미지를 다시 받지 않습니다.
+        self.assertEqual({call.kwargs['image_bytes'] for call in self.save_image.call_args_list}, {b'image'})
+
+        completed = []
+        self.assertEqual(classifier.poll(lambda *args: completed.append(args)), 1)
+
+        # 저장된 결과로 응답만 다시 보내고 결과 파일을 다시 처리하지 않습니다.
+        self.assertEqual(endpoint.content.await_count, 1)
+        self.assertEqual(completed, [('corr-1', self.message, [{'label': 'cat', 'ids': ['0', '2', '3', '4']}])])
+        self.assertEqual(classifier.store.pending(), [])
+
+    def test_failing_job_does_not_block_later_jobs(self):
+        endpoint = LocalBatchEndpoint()
+        classifier = self.make_classifier(endpoint)
+        classifier.store.add('batch-broken', 'openai', 'gpt-4.1-mini', 'corr-0', self.message, {'chunk-0': [0]})
+        classifier.submit(self.message, 'corr-1')
+        endpoint.status = 'completed'
+        self.count_content_calls(endpoint, fail_first=True)
+        completed = []
+
+        self.assertEqual(classifier.poll(lambda *args: completed.append(args)), 1)
+
+        self.assertEqual([args[0] for args in completed], ['corr-1'])
+        self.assertEqual([job['batch_id'] for job in classifier.store.pending()], ['batch-broken'])
+
+    def test_failed_batch_falls_back_to_online(self):
+        endpoint = LocalBatchEndpoint()
+        classifier = self.make_classifier(endpoint)
+        classifier.submit(self.message, 'corr-1')
+        endpoint.status = 'expired'
+        self.data_processor.process_data = MagicMock(return_value=[{'label': 'dog', 'ids': ['0']}])
+        completed = []
+
+        self.assertEqual(classifier.poll(lambda *args: completed.append(args)), 1)
+
+        self.assertEqual(self.data_processor.process_data.call_args[0][0].json, self.message)
+        self.assertEqual(completed[0][2], [{'label': 'dog', 'ids': ['0']}])
+        self.assertEqual(classifier.get_stats()['fallbacks'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
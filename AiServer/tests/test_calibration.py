@@ -0,0 +1,22 @@
+import unittest
+
+from utils.calibration import calibrate_confidence_threshold
+
+
+class TestCalibrateConfidenceThreshold(unittest.TestCase):
+    def test_lowest_threshold_meeting_target_precision(self):
+        scored = [(0.99, True), (0.95, True), (0.9, True), (0.8, False), (0.7, True), (0.6, False)]
+
+        self.assertEqual(calibrate_confidence_threshold(scored, 0.75), 0.7)
+        self.assertEqual(calibrate_confidence_threshold(scored, 1.0), 0.9)
+        self.assertEqual(calibrate_confidence_threshold(scored, 1.0, min_accepted=4), None)
+
+    def test_ties_are_not_split(self):
+        scored = [(0.9, True), (0.8, True), (0.8, False)]
+
+        self.assertEqual(calibrate_confidence_threshold(scored, 1.0), 0.9)
+        self.assertIsNone(calibrate_confidence_threshold([], 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from utils.category_groups import describe_category_groups, group_category_names, resolve_category_groups
+
+
+class TestCategoryGroups(unittest.TestCase):
+    def test_names_with_shared_prefix_stay_together(self):
+        categories = ['dog_beagle', 'cat_siamese', 'dog_poodle', 'bird', 'cat_persian', 'fish', 'dog_husky']
+
+        groups = group_category_names(categories, group_size=3)
+
+        self.assertEqual(groups, {
+            'cat': ['cat_siamese', 'cat_persian'],
+            'dog': ['dog_beagle', 'dog_poodle', 'dog_husky'],
+            'group 1': ['bird', 'fish'],
+        })
+        # 이름이 접두어인 그룹은 설명하지 않고, 나머지 그룹만 도구 설명에 한 번 적습니다.
+        self.assertEqual(describe_category_groups(groups), 'Groups: group 1 = bird, fish')
+
+    def test_group_pass_schema_is_smaller_than_flat(self):
+        categories = [f'{prefix}_breed_{i}' for prefix in ('dog', 'cat', 'bird', 'fish') for i in range(50)]
+
+        groups = group_category_names(categories)
+
+        self.assertEqual(list(groups), ['bird', 'cat', 'dog', 'fish'])
+        self.assertIsNone(describe_category_groups(groups))
+        self.assertLess(len(''.join(groups)), len(''.join(categories)) // 10)
+
+    def test_leftover_groups_are_described(self):
+        categories = [f'c{i}' for i in range(30)]
+
+        groups = group_category_names(categories, group_size=10)
+
+        self.assertEqual(list(groups), ['group 1', 'group 2', 'group 3'])
+        entries = describe_category_groups(groups).removeprefix('Groups: ').split('; ')
+        described = {name: members.split(', ') for name, members in (entry.split(' = ') for entry in entries)}
+        self.assertEqual(described, groups)
+
+    def test_user_groups_keep_known_categories_and_collect_the_rest(self):
+        groups = resolve_category_groups(['a', 'b', 'c', 'd'], {'first': ['a', 'x'], 'NONE': ['b', 'a']})
+
+        self.assertEqual(groups, {'first': ['a'], 'NONE group': ['b'], 'Other': ['c', 'd']})
+
+    def test_small_category_lists_stay_flat(self):
+        self.assertEqual(resolve_category_groups(['a', 'b', 'c'], min_categories=100), {})
+        self.assertEqual(resolve_category_groups(['a', 'b'], {'all': ['a', 'b']}), {})
+        self.assertEqual(len(resolve_category_groups([f'c{i}' for i in range(100)], min_categories=100)), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from services.chunk_planner import ChunkPlanner, DEFAULT_PROVIDER_LIMITS, is_payload_error
+
+
+def make_pairs(count, prefix="http://localhost:8080/img"):
+    return [({'id': str(index)}, f"{prefix}{index}.jpg") for index in range(count)]
+
+
+class TestChunkPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = ChunkPlanner(max_images_cap=24, target_latency=30)
+
+    def test_plan_uses_largest_safe_chunks(self):
+        chunks = self.planner.plan(make_pairs(50), ['cat', 'dog'], ['openrouter'], lambda url: True)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [20, 20, 10])
+        self.assertEqual(sorted(dto['id'] for chunk in chunks for dto, _ in chunk),
+                         sorted(str(index) for index in range(50)))
+
+    def test_plan_uses_strictest_provider(self):
+        chunks = self.planner.plan(make_pairs(30), ['cat'], ['anthropic', 'openrouter'], lambda url: True)
+        self.assertEqual(max(len(chunk) for chunk in chunks), DEFAULT_PROVIDER_LIMITS['openrouter']['max_images'])
+
+    def test_plan_respects_request_bytes(self):
+        self.planner._provider_state('openai')['max_request_bytes'] = 4096 + 3 * (16 * 1024 + 96)
+
+        chunks = self.planner.plan(make_pairs(7), ['cat'], ['openai'], lambda url: True)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+
+    def test_remote_urls_are_cheaper_than_inline_images(self):
+        self.planner._provider_state('openai')['max_request_bytes'] = 4096 + 3 * (16 * 1024 + 96)
+
+        chunks = self.planner.plan(make_pairs(7, "http://example.com/img"), ['cat'], ['openai'], lambda url: False)
+
+        self.assertEqual(len(chunks), 1)
+
+    def test_plan_uses_encoded_sizes_from_previous_payloads(self):
+        self.planner._provider_state('openai')['max_request_bytes'] = 4096 + 3 * (16 * 1024 + 96)
+        pairs = make_pairs(7)
+        self.planner.record_result('openai', 7, 7 * 4096, 1.0, inline_bytes=7 * 4000, inline_count=7,
+                                   encoded_sizes={url: 4000 for _, url in pairs})
+
+        # 실제로 인라인된 크기가 평균 추정치보다 작으므로 한 청크에 모두 들어갑니다.
+        chunks = self.planner.plan(pairs, ['cat'], ['openai'], lambda url: True)
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(self.planner.get_stats()['encoded_sizes'], 7)
+
+    def test_payload_error_halves_limit(self):
+        self.planner.record_result('gemini', 20, 400000, 3.0, error=Exception("413 Request Entity Too Large"))
+
+        limits = self.planner.get_limits(['gemini'])
+        self.assertEqual(limits['max_images'], 10)
+        self.assertEqual(limits['max_request_bytes'], 320000)
+
+    def test_success_at_limit_grows_and_slow_request_shrinks(self):
+        self.planner._provider_state('gemini')['max_images'] = 10
+        self.planner.record_result('gemini', 10, 100000, 5.0, inline_bytes=80000, inline_count=10)
+        self.assertEqual(self.planner.get_limits(['gemini'])['max_images'], 11)
+
+        self.planner.record_result('gemini', 8, 100000, 60.0)
+        self.assertEqual(self.planner.get_limits(['gemini'])['max_images'], 6)
+        self.assertLess(self.planner.get_stats()['inline_image_bytes'], 16 * 1024)
+
+    def test_is_payload_error(self):
+        self.assertTrue(is_payload_error(Exception("This model's maximum context length is 128000 tokens")))
+        self.assertTrue(is_payload_error(Exception("Too many images in request")))
+        self.assertFalse(is_payload_error(Exception("Rate limit exceeded")))
+
+
+if __name__ == '__main__':
+    unittest.main()
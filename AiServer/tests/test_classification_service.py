@@ -1,8 +1,14 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import asyncio
+import time
+from types import SimpleNamespace
+from exceptions.custom_exceptions import RateLimitError
 from services.classification_service import ClassificationService
+from services.key_pool import get_key_pool
+from services.provider_health import provider_health
 from services.image_service import ImageService
+from services.image_fetcher import negative_cache
 
 class TestClassificationService(unittest.TestCase):
     def setUp(self):
@@ -59,10 +65,232 @@ class TestClassificationService(unittest.TestCase):
 
         self.assertEqual(result, ["cat", "dog"])
 
+    def test_parse_compact_classification_response(self):
+        mock_response = MagicMock()
+        mock_response.choices[0].message.tool_calls[0].function.name = "classify_images"
+        mock_response.choices[0].message.tool_calls[0].function.arguments = '{"labels": [2, 0, 9, 1]}'
+
+        result = self.classification_service._parse_classification_response(
+            mock_response, ["cat", "dog"], 4)
+
+        # 범위 밖 코드는 'NONE'이 됩니다.
+        self.assertEqual(result, ["dog", "NONE", "NONE", "cat"])
+
+    def test_compact_labels_with_wrong_count_are_missing(self):
+        # 레이블 하나가 빠지면 뒤의 레이블이 모두 한 칸씩 밀리므로 위치로 매칭하지 않습니다.
+        labels = self.classification_service._labels_from_arguments(
+            '{"labels": [2, 1, 2]}', ["cat", "dog"], 4)
+
+        self.assertEqual(labels, [None] * 4)
+
+    def test_streamed_compact_labels_wait_for_matching_count(self):
+        def chunk(arguments):
+            tool_call = SimpleNamespace(index=0, function=SimpleNamespace(arguments=arguments))
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(tool_calls=[tool_call]))])
+
+        async def consume(fragments, image_count):
+            async def stream():
+                for fragment in fragments:
+                    yield chunk(fragment)
+            emitted = []
+            request = {'categories': ['cat', 'dog'], 'image_count': image_count, 'schema': 'compact',
+                       'on_label': lambda index, label: emitted.append((index, label))}
+            result = await self.classification_service._consume_stream(
+                stream(), request, 0, [None] * image_count)
+            return result, emitted
+
+        result, emitted = asyncio.run(consume(['{"labels": [2, 1', ', 2]}'], 4))
+        self.assertEqual((result, emitted), ([None] * 4, []))
+
+        result, emitted = asyncio.run(consume(['{"labels": [2, 1', ', 2,', ']}'], 3))
+        self.assertEqual(result, ['dog', 'cat', 'dog'])
+        self.assertEqual(emitted, [(0, 'dog'), (1, 'cat'), (2, 'dog')])
+
+    def test_uncertain_images_are_escalated_to_high_detail(self):
+        calls = []
+
+        async def fake_classify_once(images, categories, image_data, grid_size, on_label, detail=None,
+                                     tier=None, min_confidence=None, category_notes=None):
+            calls.append((images, detail))
+            if detail == 'low':
+                return ['cat', 'NONE', None], 'model-a', [None] * 3
+            return ['dog', None], 'model-a', [None] * 2
+
+        self.classification_service._classify_once = fake_classify_once
+        report = {}
+        with patch.object(self.classification_service.config, 'LLM_RESOLUTION_ESCALATION', True), \
+                patch.object(self.classification_service.config, 'LLM_MISSING_RETRY_COUNT', 0):
+            labels, _ = asyncio.run(self.classification_service.classify_images_detailed(
+                ['a', 'b', 'c'], ['cat', 'dog'], report=report))
+
+        self.assertEqual(labels, ['cat', 'dog', 'NONE'])
+        self.assertEqual(calls, [(['a', 'b', 'c'], 'low'), (['b', 'c'], 'high')])
+        self.assertEqual(report, {'resolution': {'first_pass_images': 3, 'escalated_images': 2}})
+
+    def test_low_confidence_images_cascade_to_stronger_model(self):
+        self.classification_service.available_configs = [
+            {'provider': 'openai', 'model': 'strong', 'cascade_models': ['cheap', 'strong']}]
+        calls = []
+
+        async def fake_classify_once(images, categories, image_data, grid_size, on_label, detail=None,
+                                     tier=None, min_confidence=None, category_notes=None):
+            calls.append((images, tier, min_confidence))
+            if tier == 0:
+                return ['cat', 'dog', 'NONE'], 'cheap', [0.95, 0.4, None]
+            return ['cat', 'NONE'], 'strong', [0.9, 0.7]
+
+        self.classification_service._classify_once = fake_classify_once
+        report = {}
+        with patch.object(self.classification_service.config, 'LLM_CASCADE_ENABLED', True), \
+                patch.object(self.classification_service.config, 'LLM_CASCADE_THRESHOLDS', '0.8'), \
+                patch.object(self.classification_service.config, 'LLM_RESOLUTION_ESCALATION', False):
+            labels, model = asyncio.run(self.classification_service.classify_images_detailed(
+                ['a', 'b', 'c'], ['cat', 'dog'], report=report))
+
+        self.assertEqual((labels, model), (['cat', 'cat', 'NONE'], 'cheap'))
+        self.assertEqual(calls, [(['a', 'b', 'c'], 0, 0.8), (['b', 'c'], 1, None)])
+        self.assertEqual({tier: stats['images'] for tier, stats in report['cascade'].items()}, {0: 3, 1: 2})
+
+    def test_confidence_is_parsed_for_both_schemas(self):
+        service = self.classification_service
+        confidences = [None] * 3
+        labels = service._labels_from_arguments(
+            '{"classifications": [{"index": 0, "category": "cat", "confidence": 0.9}, '
+            '{"index": 1, "category": "dog", "confidence": 7}]}', ['cat', 'dog'], 3, confidences)
+        self.assertEqual((labels, confidences), (['cat', 'dog', None], [0.9, None, None]))
+
+        confidences = [None] * 2
+        labels = service._labels_from_arguments('{"labels": [2, 1], "confidences": [0.3]}',
+                                                ['cat', 'dog'], 2, confidences)
+        self.assertEqual((labels, confidences), (['dog', 'cat'], [0.3, None]))
+
+    def test_provider_payload_uses_provider_detail_sizes(self):
+        request = {'payload': None, 'payloads': {}, 'detail': 'low', 'images': ['a'], 'image_data': {'a': b'x'}}
+        images = [{'type': 'image_url', 'image_url': {'url': 'data:image/jpeg;base64,AAAA', 'detail': 'low'}}]
+        with patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                   AsyncMock(return_value=images)) as prepare:
+            asyncio.run(self.classification_service._provider_payload(
+                request, {'provider': 'openai', 'detail_sizes': (64, 512)}))
+            asyncio.run(self.classification_service._provider_payload(
+                request, {'provider': 'gemini', 'detail_sizes': (64, 512)}))
+
+        self.assertEqual([call.kwargs['detail'] for call in prepare.call_args_list], ['low', None])
+        self.assertEqual({call.kwargs['max_size'] for call in prepare.call_args_list}, {(64, 64)})
+        self.assertEqual(len(request['payloads']), 2)
+
+    def test_hierarchical_classification_picks_group_then_category(self):
+        groups = {'animals': ['cat', 'dog'], 'vehicles': ['car', 'bus']}
+        calls = []
+        notes = {}
+
+        async def fake_classify_flat(images, categories, image_data=None, grid_size=None, on_label=None,
+                                     report=None, category_notes=None):
+            calls.append((images, categories))
+            notes[tuple(categories)] = category_notes
+            if categories == ['animals', 'vehicles']:
+                return ['vehicles', 'animals', 'NONE', 'animals'], 'model-a'
+            if len(categories) == 4:
+                return ['car'], 'model-a'
+            labels = {'animals': ['dog', 'cat'], 'vehicles': ['bus']}['animals' if 'cat' in categories else 'vehicles']
+            for index, label in enumerate(labels):
+                on_label(index, label)
+            return labels, 'model-a'
+
+        self.classification_service._classify_flat = fake_classify_flat
+        emitted = {}
+        report = {}
+        labels, model = asyncio.run(self.classification_service.classify_images_detailed(
+            ['a', 'b', 'c', 'd'], ['cat', 'dog', 'car', 'bus'], on_label=emitted.__setitem__, report=report,
+            category_groups=groups))
+
+        self.assertEqual((labels, model), (['bus', 'dog', 'car', 'cat'], 'model-a'))
+        self.assertEqual(emitted, {1: 'dog', 3: 'cat', 0: 'bus'})
+        self.assertIn((['b', 'd'], ['cat', 'dog']), calls)
+        # 1단계에서 그룹을 고르지 못한 이미지는 전체 카테고리로 다시 분류합니다.
+        self.assertIn((['c'], ['cat', 'dog', 'car', 'bus']), calls)
+        self.assertEqual((report['hierarchical']['chunks'], report['hierarchical']['requests']), (1, 4))
+        self.assertEqual(report['hierarchical']['flat_fallback_images'], 1)
+        # 그룹 구성은 그룹 단계의 도구 설명에만 한 번 들어갑니다.
+        self.assertEqual(notes[('animals', 'vehicles')], 'Groups: animals = cat, dog; vehicles = car, bus')
+        self.assertIsNone(notes[('cat', 'dog')])
+
+    def test_missing_indices_are_requeried(self):
+        def make_response(arguments):
+            response = MagicMock()
+            response.choices[0].message.tool_calls[0].function.name = "classify_images"
+            response.choices[0].message.tool_calls[0].function.arguments = arguments
+            return response
+
+        responses = [
+            make_response('{"classifications": [{"index": 0, "category": "cat"}, {"index": 2, "category": "fish"}]}'),
+            make_response('{"classifications": [{"index": 0, "category": "dog"}, {"index": 1, "category": "NONE"}]}'),
+        ]
+        service = self.classification_service
+        service.available_configs = [{'provider': 'requery-test', 'model': 'm', 'api_key': 'k', 'base_url': None}]
+        images = ["http://example.com/a.jpg", "http://example.com/b.jpg", "http://example.com/c.jpg"]
+
+        with patch('services.classification_service.acompletion', AsyncMock(side_effect=responses)) as mock_call, \
+                patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                      AsyncMock(return_value=[])) as mock_prepare:
+            labels, model = asyncio.run(service.classify_images_detailed(images, ["cat", "dog"]))
+
+        self.assertEqual(labels, ["cat", "dog", "NONE"])
+        self.assertEqual(mock_call.call_count, 2)
+        # 두 번째 요청에는 누락/무효 인덱스의 이미지만 보냅니다.
+        self.assertEqual(mock_prepare.call_args.args[0], images[1:])
+
+    def test_revoked_key_retries_next_key_without_opening_provider_circuit(self):
+        class AuthError(Exception):
+            status_code = 401
+
+        response = MagicMock()
+        response.choices[0].message.tool_calls[0].function.name = "classify_images"
+        response.choices[0].message.tool_calls[0].function.arguments = \
+            '{"classifications": [{"index": 0, "category": "cat"}]}'
+        service = self.classification_service
+        service.available_configs = [{'provider': 'revoked-key-test', 'model': 'm', 'api_key': 'revoked',
+                                      'api_keys': ['revoked', 'valid'], 'base_url': None}]
+
+        async def fake_completion(api_key, **kwargs):
+            if api_key == 'revoked':
+                raise AuthError("Error code: 401 - invalid api key")
+            return response
+
+        with patch('services.classification_service.acompletion', AsyncMock(side_effect=fake_completion)), \
+                patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                      AsyncMock(return_value=[])):
+            labels = [asyncio.run(service.classify_images(["http://example.com/a.jpg"], ["cat", "dog"]))
+                      for _ in range(5)]
+
+        self.assertEqual(labels, [["cat"]] * 5)
+        self.assertEqual(provider_health.get_state('revoked-key-test'), 'CLOSED')
+        key_stats = get_key_pool(service.available_configs[0]).get_stats()
+        self.assertEqual(sorted(stats['successes'] for stats in key_stats.values()), [0, 5])
+
+    def test_last_provider_rate_limit_wait_is_capped_at_request_timeout(self):
+        service = self.classification_service
+        service.available_configs = [{'provider': 'rate-limit-cap-test', 'model': 'm', 'api_key': 'k',
+                                      'base_url': None}]
+        for key in get_key_pool(service.available_configs[0]).keys:
+            key.rate_limiter.blocked_until = time.monotonic() + 3600
+
+        completion = AsyncMock()
+        started = time.monotonic()
+        with patch.object(service.config, 'LLM_REQUEST_TIMEOUT', 5), \
+                patch('services.classification_service.acompletion', completion), \
+                patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                      AsyncMock(return_value=[])):
+            with self.assertRaises(RateLimitError):
+                asyncio.run(service.classify_images(["http://example.com/a.jpg"], ["cat", "dog"]))
+
+        # 한 시간을 기다리지 않고 바로 실패하며 요청도 보내지 않습니다.
+        self.assertLess(time.monotonic() - started, 5)
+        completion.assert_not_called()
+
 class TestImageService(unittest.TestCase):
-    @patch('services.image_service.requests.get')
-    def test_encode_image(self, mock_get):
-        mock_get.return_value.content = b'fake image content'
+    @patch('services.image_service.get_http_session')
+    def test_encode_image(self, mock_session):
+        mock_session.return_value.get.return_value.content = b'fake image content'
         
         url = "http://example.com/image.jpg"
         result = ImageService.encode_image(url)
@@ -70,24 +298,37 @@ class TestImageService(unittest.TestCase):
         self.assertTrue(isinstance(result, str))
         self.assertTrue(result.startswith('ZmFrZSBpbWFnZSBjb250ZW50'))  # Base64로 인코딩된 '가짜 이미지 콘텐츠'
 
-    @patch('services.image_service.requests.head')
-    def test_is_url_image(self, mock_head):
+    @patch('services.image_service.get_http_session')
+    def test_is_url_image(self, mock_session):
+        mock_head = mock_session.return_value.head
+        mock_head.return_value.status_code = 200
         mock_head.return_value.headers = {"content-type": "image/jpeg"}
         self.assertTrue(ImageService.is_url_image("http://example.com/valid.jpg"))
 
         mock_head.return_value.headers = {"content-type": "text/html"}
         self.assertFalse(ImageService.is_url_image("http://example.com/invalid.html"))
 
-    @patch('services.image_service.requests.get')
-    @patch('services.image_service.Image.open')
-    def test_resize_image(self, mock_image_open, mock_get):
+    @patch('services.image_service.get_http_session')
+    def test_is_url_image_caches_only_permanent_failures(self, mock_session):
+        mock_head = mock_session.return_value.head
+        mock_head.return_value.headers = {"content-type": "text/html"}
+        for status_code, cached in [(200, True), (404, True), (410, True), (429, False), (503, False)]:
+            url = f"http://example.com/status-{status_code}.jpg"
+            mock_head.return_value.status_code = status_code
+            self.assertFalse(ImageService.is_url_image(url))
+            self.assertEqual(negative_cache.get(url) is not None, cached, status_code)
+
+    @patch('services.image_service.get_http_session')
+    @patch('utils.image_resize.Image.open')
+    def test_resize_image(self, mock_image_open, mock_session):
         mock_image = MagicMock()
-        mock_image.save.side_effect = lambda f, format: f.write(b'resized image content')
+        mock_image.mode = "RGB"
+        mock_image.save.side_effect = lambda f, format, **kwargs: f.write(b'resized image content')
         mock_image_open.return_value = mock_image
 
         mock_response = MagicMock()
         mock_response.content = b'original image content'
-        mock_get.return_value = mock_response
+        mock_session.return_value.get.return_value = mock_response
 
         url = "http://example.com/image.jpg"
         result = ImageService.resize_image(url)
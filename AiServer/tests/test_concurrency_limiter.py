@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from services.concurrency_limiter import (
+    AIMDLimiter, OUTCOME_ERROR, OUTCOME_OVERLOAD, OUTCOME_SUCCESS, classify_outcome
+)
+
+
+class TestAIMDLimiter(unittest.TestCase):
+    def make_limiter(self, initial=4):
+        return AIMDLimiter('test', initial_limit=initial, min_limit=1, max_limit=8,
+                           latency_spike_ratio=3)
+
+    def test_additive_increase_per_healthy_round(self):
+        limiter = self.make_limiter()
+        for _ in range(4):
+            slot = asyncio.run(limiter.acquire())
+            limiter.release(slot, OUTCOME_SUCCESS, latency=1.0)
+        self.assertAlmostEqual(limiter.limit, 5.0, delta=0.2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_overload_halves_limit_once_per_congestion_event(self):
+        limiter = self.make_limiter(initial=8)
+        slots = [asyncio.run(limiter.acquire()) for _ in range(3)]
+        for slot in slots:
+            limiter.release(slot, OUTCOME_OVERLOAD, latency=1.0)
+        # 같은 혼잡 신호 이전에 시작된 요청의 실패는 추가로 줄이지 않습니다.
+        self.assertEqual(limiter.limit, 4.0)
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_OVERLOAD, latency=1.0)
+        self.assertEqual(limiter.limit, 2.0)
+
+    def test_latency_spike_decreases_and_plain_error_does_not(self):
+        limiter = self.make_limiter()
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=1.0)
+        before = limiter.limit
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_ERROR, latency=1.0)
+        self.assertEqual(limiter.limit, before)
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=10.0)
+        self.assertAlmostEqual(limiter.limit, before / 2)
+        self.assertEqual(limiter.get_stats()['latency_spikes'], 1)
+
+    def test_limit_recovers_when_latency_rises_gradually(self):
+        limiter = self.make_limiter()
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=0.5)
+        # 지연이 첫 샘플의 4배까지 늘어난 뒤 유지되어도 기준이 따라 올라가 한도가 회복되어야 합니다.
+        for latency in [1.0, 1.5] + [2.0] * 200:
+            limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=latency)
+        stats = limiter.get_stats()
+        self.assertEqual(limiter.limit, 8)
+        self.assertLess(stats['latency_spikes'], 10)
+        self.assertAlmostEqual(stats['baseline_latency'], 2.0, places=2)
+
+    def test_latency_is_compared_per_image(self):
+        limiter = self.make_limiter()
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=1.0, image_count=1)
+        limiter.release(asyncio.run(limiter.acquire()), OUTCOME_SUCCESS, latency=8.0, image_count=8)
+        self.assertEqual(limiter.get_stats()['latency_spikes'], 0)
+
+    def test_acquire_waits_for_free_slot(self):
+        limiter = self.make_limiter(initial=1)
+
+        async def scenario():
+            slot = await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.1)
+            self.assertFalse(waiter.done())
+            limiter.release(slot, OUTCOME_ERROR)
+            await asyncio.wait_for(waiter, 1)
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_classify_outcome(self):
+        self.assertEqual(classify_outcome(Exception("Error code: 429 - Too Many Requests")), OUTCOME_OVERLOAD)
+        self.assertEqual(classify_outcome(asyncio.TimeoutError()), OUTCOME_OVERLOAD)
+        self.assertEqual(classify_outcome(ValueError("bad request")), OUTCOME_ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import io
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from PIL import Image
+
+from services.classification_service import ClassificationService, GRID_INSTRUCTION
+from services.data_processor import DataProcessor
+from utils.contact_sheet import build_contact_sheet
+
+
+def make_jpeg(color):
+    buffered = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+class TestContactSheet(unittest.TestCase):
+    def test_sheet_layout(self):
+        sheet = Image.open(io.BytesIO(build_contact_sheet([make_jpeg("red")] * 5, 3, 100)))
+        self.assertEqual(sheet.size, (300, 200))  # 빈 세 번째 행은 잘라냄
+
+        single_row = Image.open(io.BytesIO(build_contact_sheet([make_jpeg("red")] * 2, 3, 100)))
+        self.assertEqual(single_row.size, (200, 100))
+
+    def test_too_many_images(self):
+        with self.assertRaises(ValueError):
+            build_contact_sheet([make_jpeg("red")] * 5, 2, 100)
+
+    def test_undecodable_image_leaves_blank_cell(self):
+        sheet = build_contact_sheet([b'broken', make_jpeg("blue")], 2, 64)
+        self.assertEqual(Image.open(io.BytesIO(sheet)).size, (128, 64))
+
+    @patch('services.classification_service.acompletion', new_callable=AsyncMock)
+    def test_grid_mode_sends_sheets_and_maps_cells_to_indices(self, mock_acompletion):
+        tool_call = MagicMock()
+        tool_call.function.name = "classify_images"
+        tool_call.function.arguments = ('{"classifications": [{"index": 0, "category": "cat"}, '
+                                        '{"index": 4, "category": "dog"}]}')
+        mock_acompletion.return_value.choices = [MagicMock()]
+        mock_acompletion.return_value.choices[0].message.tool_calls = [tool_call]
+
+        service = ClassificationService()
+        service.available_configs = [{'provider': 'test', 'model': 'test-model', 'api_key': 'k', 'base_url': None}]
+        images = [f"http://example.com/{index}.jpg" for index in range(5)]
+        image_data = {url: make_jpeg("red") for url in images}
+
+        # 누락된 칸의 재질의는 이 테스트의 범위가 아니므로 끕니다.
+        with patch.object(service.config, 'LLM_MISSING_RETRY_COUNT', 0):
+            labels, model = asyncio.run(service.classify_images_detailed(images, ['cat', 'dog'], image_data,
+                                                                         grid_size=2))
+
+        self.assertEqual(labels, ['cat', 'NONE', 'NONE', 'NONE', 'dog'])
+        self.assertEqual(model, 'test-model')
+        content = mock_acompletion.call_args.kwargs['messages'][0]['content']
+        self.assertEqual(content[0]['text'], GRID_INSTRUCTION)
+        self.assertEqual(sum(part['type'] == 'image_url' for part in content), 2)  # 4칸 격자 2장
+
+    def test_grid_mode_chunk_size(self):
+        processor = DataProcessor()
+        processor.grid_size = 3
+        processor.grid_capacity = 18
+
+        self.assertEqual(processor._get_adaptive_chunk_size(100), 18)
+        self.assertEqual(processor._get_adaptive_chunk_size(4), 4)
+        self.assertEqual(processor._result_cache_model_key('m'), 'm#grid3')
+        self.assertEqual(processor._result_cache_model_key('m', hierarchical=True), 'm#grid3#hier')
+
+
+if __name__ == '__main__':
+    unittest.main()
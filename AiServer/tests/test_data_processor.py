@@ -1,8 +1,49 @@
+import asyncio
+import io
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from PIL import Image, ImageDraw
 from services.data_processor import DataProcessor
 from flask import Flask
 from config import config
+from services.image_fetcher import FetchResult
+from services.result_cache import ResultCache
+
+
+def make_image(shape, size=(256, 256)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    if shape == "circle":
+        draw.ellipse((64, 64, 192, 192), fill="black")
+    else:
+        draw.rectangle((0, 0, 128, 256), fill="black")
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+class FakeFetcher:
+    def __init__(self, contents):
+        self.contents = contents
+        self.cache = None
+        self.fetched_urls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def fetch_many(self, urls, validate=False):
+        self.fetched_urls.extend(urls)
+        return {url: FetchResult(url, content=self.contents[url], status_code=200) for url in dict.fromkeys(urls)}
+
+    def get_stats(self):
+        return {'succeeded': len(self.fetched_urls), 'images_per_second': 0, 'mbytes_per_second': 0,
+                'retries': 0, 'failed': 0}
+
 
 class TestDataProcessor(unittest.TestCase):
     def setUp(self):
@@ -47,6 +88,211 @@ class TestDataProcessor(unittest.TestCase):
         expected_result = {'cat': ['1'], 'dog': ['2']}
         self.assertEqual(result, expected_result)
 
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_process_chunks_classifies_duplicates_once(self, mock_fetcher_class, _):
+        circle, bar = make_image("circle"), make_image("bar")
+        contents = {
+            'http://example.com/a.jpg': circle,
+            'http://example.com/b.jpg': bar,
+            'http://example.com/c.jpg': circle,
+        }
+        fetcher = FakeFetcher(contents)
+        mock_fetcher_class.return_value = fetcher
+        self.data_processor.dedup_enabled = True
+        self.data_processor.classification_service.classify_images = AsyncMock(return_value=['cat', 'dog'])
+        chunks = [[({'id': '1'}, 'http://example.com/a.jpg'),
+                   ({'id': '2'}, 'http://example.com/b.jpg'),
+                   ({'id': '3'}, 'http://example.com/c.jpg')]]
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'test', 1))
+
+        self.assertEqual(result, {'cat': ['1', '3'], 'dog': ['2']})
+        classify_call = self.data_processor.classification_service.classify_images.call_args
+        self.assertEqual(classify_call.args[0], ['http://example.com/a.jpg', 'http://example.com/b.jpg'])
+        # 각 이미지는 자기 청크에서 한 번만 받습니다.
+        self.assertEqual(len(fetcher.fetched_urls), 3)
+
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_process_chunks_deduplicates_across_chunks(self, mock_fetcher_class, _):
+        circle = make_image("circle")
+        fetcher = FakeFetcher({'http://example.com/a.jpg': circle, 'http://example.com/c.jpg': circle})
+        mock_fetcher_class.return_value = fetcher
+        self.data_processor.dedup_enabled = True
+        self.data_processor.classification_service.classify_images = AsyncMock(return_value=['cat'])
+        chunks = [[({'id': '1'}, 'http://example.com/a.jpg')], [({'id': '2'}, 'http://example.com/c.jpg')]]
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'test', 1))
+
+        self.assertEqual(sorted(result['cat']), ['1', '2'])
+        self.data_processor.classification_service.classify_images.assert_awaited_once()
+
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_duplicates_of_failed_representative_are_unclassified(self, mock_fetcher_class, _):
+        circle = make_image("circle")
+        mock_fetcher_class.return_value = FakeFetcher({'http://example.com/a.jpg': circle,
+                                                       'http://example.com/c.jpg': circle})
+        self.data_processor.dedup_enabled = True
+        self.data_processor.bisect_max_extra_calls = 0
+        self.data_processor.classification_service.classify_images = AsyncMock(side_effect=Exception("boom"))
+        chunks = [[({'id': '1'}, 'http://example.com/a.jpg'), ({'id': '2'}, 'http://example.com/c.jpg')]]
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'test', 1))
+
+        self.assertEqual(sorted(result['NONE']), ['1', '2'])
+
+    @patch('services.data_processor.ImageService')
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_process_chunks_saves_streamed_labels_early(self, mock_fetcher_class, _, mock_image_service):
+        contents = {'http://example.com/a.jpg': b'a', 'http://example.com/b.jpg': b'b'}
+        mock_fetcher_class.return_value = FakeFetcher(contents)
+        saved = []
+        mock_image_service.save_image.side_effect = lambda url, label, *args, **kwargs: saved.append((url, label))
+        saved_before_response_end = []
+
+        async def fake_classify(images, categories, image_data=None, grid_size=None, on_label=None, report=None,
+                                category_groups=None):
+            on_label(1, 'dog')
+            await asyncio.sleep(0.05)
+            saved_before_response_end.extend(saved)
+            return ['cat', 'dog']
+
+        self.data_processor.dedup_enabled = False
+        self.data_processor.classification_service.classify_images = fake_classify
+        chunks = [[({'id': '1', 'fileName': 'a.jpg'}, 'http://example.com/a.jpg'),
+                   ({'id': '2', 'fileName': 'b.jpg'}, 'http://example.com/b.jpg')]]
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'classify', 1))
+
+        self.assertEqual(result, {'dog': ['2'], 'cat': ['1']})
+        self.assertEqual(saved_before_response_end, [('http://example.com/b.jpg', 'dog')])
+        self.assertEqual(len(saved), 2)
+
+    @patch('services.data_processor.ImageService')
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_partial_save_failure_reports_each_image_once(self, mock_fetcher_class, _, mock_image_service):
+        urls = ['http://example.com/a.jpg', 'http://example.com/b.jpg', 'http://example.com/c.jpg']
+        mock_fetcher_class.return_value = FakeFetcher(dict(zip(urls, [b'a', b'b', b'c'])))
+        mock_image_service.save_image.side_effect = [None, IOError("disk full"), None]
+        self.data_processor.dedup_enabled = False
+        self.data_processor.classification_service.classify_images = AsyncMock(return_value=['cat', 'dog', 'cat'])
+        chunks = [[({'id': str(i), 'fileName': f'{i}.jpg'}, url) for i, url in enumerate(urls)]]
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'classify', 1))
+
+        # 저장을 마친 이미지는 레이블로만, 나머지는 NONE으로만 보고합니다.
+        self.assertEqual(result, {'cat': ['0'], 'NONE': ['1', '2']})
+
+    @patch('services.data_processor.ImageService')
+    @patch('services.data_processor.get_result_cache', return_value=None)
+    @patch('services.data_processor.ImageFetcher')
+    def test_process_chunks_sends_only_uncertain_images_past_local_classifier(self, mock_fetcher_class, _,
+                                                                            mock_image_service):
+        urls = ['http://example.com/a.jpg', 'http://example.com/b.jpg', 'http://example.com/c.jpg']
+        fetcher = FakeFetcher(dict(zip(urls, [b'a', b'b', b'c'])))
+        mock_fetcher_class.return_value = fetcher
+        yolo_service = MagicMock()
+        yolo_service.get_cascade_threshold.return_value = {'version': 'v1', 'threshold': 0.9}
+        # c는 임계값을 넘지만 요청 카테고리에 없는 레이블이므로 LLM으로 보냅니다.
+        yolo_service.predict_batch.return_value = [('cat', 0.97), ('dog', 0.6), ('bird', 0.99)]
+        self.data_processor.yolo_service = yolo_service
+        self.data_processor.local_cascade_enabled = True
+        self.data_processor.dedup_enabled = False
+        self.data_processor.classification_service.classify_images = AsyncMock(return_value=['dog', 'NONE'])
+        chunks = [[({'id': str(i), 'fileName': f'{i}.jpg'}, url) for i, url in enumerate(urls)]]
+        report = {}
+
+        result = asyncio.run(self.data_processor._process_chunks(chunks, ['cat', 'dog'], 'classify', 1,
+                                                                 report=report))
+
+        self.assertEqual(result, {'cat': ['0'], 'dog': ['1'], 'NONE': ['2']})
+        self.assertEqual(self.data_processor.classification_service.classify_images.call_args.args[0], urls[1:])
+        self.assertEqual((report['local']['served_locally'], report['local']['local_fraction']), (1, 0.3333))
+        # 로컬 분류 단계에서 받은 이미지를 LLM 청크에서 다시 받지 않습니다.
+        self.assertEqual(len(fetcher.fetched_urls), 3)
+
+    def test_classify_locally_keeps_only_images_sent_to_llm(self):
+        urls = ['http://example.com/a.jpg', 'http://example.com/b.jpg']
+        fetcher = FakeFetcher(dict(zip(urls, [b'a', b'b'])))
+        yolo_service = MagicMock()
+        yolo_service.get_cascade_threshold.return_value = {'version': 'v1', 'threshold': 0.9}
+        yolo_service.predict_batch.return_value = [('cat', 0.97), ('dog', 0.6)]
+        self.data_processor.yolo_service = yolo_service
+        store_label = AsyncMock()
+        chunks = [[({'id': str(i)}, url) for i, url in enumerate(urls)]]
+        prefetched = {}
+
+        remaining, _ = asyncio.run(self.data_processor._classify_locally(
+            chunks, ['cat', 'dog'], 1, fetcher, prefetched, False, store_label))
+
+        # 로컬에서 저장한 이미지의 바이트는 남기지 않습니다.
+        self.assertEqual([[url for _, url in chunk] for chunk in remaining], [urls[1:]])
+        self.assertEqual(list(prefetched), urls[1:])
+
+    def test_classify_with_cache_sends_only_misses(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_cache = ResultCache(db_path=os.path.join(temp_dir, 'results.db'), ttl_seconds=60, max_entries=100)
+            service = self.data_processor.classification_service
+            service.available_configs = [{'model': 'model-a'}]
+            service.classify_images_detailed = AsyncMock(return_value=(['cat', 'dog'], 'model-a'))
+            images = ['http://example.com/a.jpg', 'http://example.com/b.jpg']
+            image_data = {images[0]: b'a', images[1]: b'b'}
+
+            first = asyncio.run(self.data_processor._classify_with_cache(
+                images, ['cat', 'dog'], image_data, result_cache, 1))
+            service.classify_images_detailed = AsyncMock(return_value=(['dog'], 'model-a'))
+            second = asyncio.run(self.data_processor._classify_with_cache(
+                images + ['http://example.com/c.jpg'], ['dog', 'cat'],
+                {**image_data, 'http://example.com/c.jpg': b'c'}, result_cache, 1))
+
+        self.assertEqual(first, ['cat', 'dog'])
+        self.assertEqual(second, ['cat', 'dog', 'dog'])
+        self.assertEqual(service.classify_images_detailed.call_args.args[0], ['http://example.com/c.jpg'])
+
+    def test_classify_with_bisect_isolates_failing_image(self):
+        async def fake_classify(images, *args):
+            if 'bad' in ' '.join(images):
+                raise ValueError("corrupt image")
+            return ['cat'] * len(images)
+
+        self.data_processor._classify_with_cache = fake_classify
+        bisect = self.data_processor._new_bisect_stats()
+        images = ['http://example.com/a.jpg', 'http://example.com/bad.jpg',
+                  'http://example.com/c.jpg', 'http://example.com/d.jpg']
+
+        labels, tree = asyncio.run(self.data_processor._classify_with_bisect(
+            images, ['cat'], {}, None, 1, bisect))
+
+        self.assertEqual(labels, ['cat', 'NONE', 'cat', 'cat'])
+        self.assertFalse(tree['ok'])
+        self.assertEqual([child['ok'] for child in tree['children']], [False, True])
+        self.assertEqual((bisect['extra_calls'], bisect['max_depth']), (4, 2))
+        self.assertEqual((bisect['recovered_images'], bisect['isolated_failures']), (3, 1))
+
+    def test_classify_with_bisect_respects_budget(self):
+        self.data_processor._classify_with_cache = AsyncMock(side_effect=ValueError("payload too large"))
+        self.data_processor.bisect_max_extra_calls = 2
+        bisect = self.data_processor._new_bisect_stats()
+
+        labels, _ = asyncio.run(self.data_processor._classify_with_bisect(
+            ['a', 'b', 'c', 'd'], ['cat'], {}, None, 1, bisect))
+
+        self.assertEqual(labels, ['NONE'] * 4)
+        self.assertEqual((bisect['extra_calls'], bisect['abandoned_images']), (2, 4))
+
+    def test_cascade_summary_reports_escalation_rate(self):
+        summary = DataProcessor._cascade_summary({
+            1: {'images': 5, 'calls': 2, 'seconds': 6.0},
+            0: {'images': 20, 'calls': 4, 'seconds': 4.0},
+        })
+
+        self.assertEqual([(tier['tier'], tier['avg_latency_seconds'], tier['escalation_rate']) for tier in summary],
+                         [(0, 1.0, None), (1, 3.0, 0.25)])
+
     def test_chunk_list(self):
         test_list = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
         result = list(self.data_processor._chunk_list(test_list, 3))
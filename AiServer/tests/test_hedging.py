@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.classification_service import ClassificationService
+from services.hedging import HedgeBudget
+
+
+def make_response(category):
+    tool_call = MagicMock()
+    tool_call.function.name = 'classify_images'
+    tool_call.function.arguments = '{"classifications": [{"index": 0, "category": "%s"}]}' % category
+    response = MagicMock()
+    response.choices[0].message.tool_calls = [tool_call]
+    response.usage.total_tokens = 100
+    return response
+
+
+class TestHedgeBudget(unittest.TestCase):
+    def test_budget_caps_hedge_ratio(self):
+        budget = HedgeBudget(percentile=0.9, min_delay=0, min_samples=1, budget_ratio=0.25)
+        allowed = 0
+        for _ in range(20):
+            budget.record_request()
+            allowed += budget.try_hedge()
+        self.assertEqual(allowed, 5)
+        self.assertEqual(budget.get_stats()['hedge_rate'], 0.25)
+
+    def test_no_delay_without_samples(self):
+        budget = HedgeBudget(percentile=0.9, min_delay=0, min_samples=5, budget_ratio=1)
+        self.assertIsNone(budget.get_delay('provider-without-history'))
+
+
+class TestHedgedClassification(unittest.TestCase):
+    def setUp(self):
+        self.service = ClassificationService()
+        self.service.available_configs = [
+            {'provider': 'hedge-slow', 'model': 'slow-model', 'api_key': 'a', 'base_url': None},
+            {'provider': 'hedge-fast', 'model': 'fast-model', 'api_key': 'b', 'base_url': None},
+        ]
+        self.service.config = MagicMock(LLM_HEDGING_ENABLED=True, LLM_RATE_LIMIT_MAX_WAIT=30,
+                                        LLM_REQUEST_TIMEOUT=120,
+                                        LLM_MISSING_RETRY_COUNT=0, LLM_STREAMING_ENABLED=False,
+                                        LLM_RESOLUTION_ESCALATION=False, LLM_CASCADE_ENABLED=False,
+                                        LLM_HIERARCHICAL_MIN_CATEGORIES=0)
+
+    def run_classify(self, budget, acompletion):
+        images = [{'type': 'image_url', 'image_url': {'url': 'http://example.com/a.jpg'}}]
+        with patch('services.classification_service.hedge_budget', budget), \
+                patch('services.classification_service.acompletion', acompletion), \
+                patch('services.classification_service.ImageService.prepare_images_for_ai_async',
+                      AsyncMock(return_value=images)):
+            return asyncio.run(self.service.classify_images_detailed(['http://example.com/a.jpg'], ['cat', 'dog']))
+
+    def test_slow_primary_loses_to_hedge(self):
+        cancelled = []
+
+        async def fake_acompletion(model, **kwargs):
+            if model == 'slow-model':
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(model)
+                    raise
+                return make_response('cat')
+            return make_response('dog')
+
+        budget = HedgeBudget(percentile=0.9, min_delay=0, min_samples=1, budget_ratio=1)
+        budget.get_delay = MagicMock(return_value=0.05)
+        labels, model = self.run_classify(budget, fake_acompletion)
+
+        self.assertEqual((labels, model), (['dog'], 'fast-model'))
+        self.assertEqual(cancelled, ['slow-model'])
+        self.assertEqual(budget.get_stats()['hedge_wins'], 1)
+
+    def test_exhausted_budget_waits_for_primary(self):
+        budget = HedgeBudget(percentile=0.9, min_delay=0, min_samples=1, budget_ratio=0)
+        budget.get_delay = MagicMock(return_value=0.01)
+
+        async def fake_acompletion(model, **kwargs):
+            await asyncio.sleep(0.05)
+            return make_response('cat')
+
+        labels, model = self.run_classify(budget, fake_acompletion)
+
+        self.assertEqual((labels, model), (['cat'], 'slow-model'))
+        self.assertEqual(budget.get_stats()['hedged'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import time
+import unittest
+
+from services.image_cache import ImageCache
+
+JPEG_BYTES = b'\xff\xd8\xff\xe0' + b'0' * 100
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ImageCache(cache_dir=self.temp_dir.name, max_bytes=1024 * 1024, freshness_seconds=60)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_store_and_lookup(self):
+        url = 'http://example.com/a.jpg'
+        self.cache.store(url, JPEG_BYTES, {'etag': '"abc"', 'content-type': 'image/jpeg'})
+
+        entry = self.cache.lookup(url)
+
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry['etag'], '"abc"')
+        self.assertTrue(self.cache.is_fresh(entry))
+        self.assertEqual(self.cache.conditional_headers(entry), {'If-None-Match': '"abc"'})
+        self.assertEqual(self.cache.read(entry), JPEG_BYTES)
+
+    def test_identical_content_shares_blob(self):
+        first = self.cache.store('http://example.com/a.jpg', JPEG_BYTES)
+        second = self.cache.store('http://example.com/b.jpg', JPEG_BYTES)
+
+        self.assertEqual(first['digest'], second['digest'])
+        blob_count = sum(len(files) for _, _, files in os.walk(self.cache.blob_dir))
+        self.assertEqual(blob_count, 1)
+
+    def test_lookup_missing_url(self):
+        self.assertIsNone(self.cache.lookup('http://example.com/missing.jpg'))
+
+    def test_link_to_creates_file_with_cached_content(self):
+        url = 'http://example.com/a.jpg'
+        entry = self.cache.store(url, JPEG_BYTES)
+        dest = os.path.join(self.temp_dir.name, 'saved.jpg')
+
+        self.assertTrue(self.cache.link_to(url, dest, expected_digest=entry['digest']))
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), JPEG_BYTES)
+        self.assertFalse(self.cache.link_to(url, dest, expected_digest='other'))
+
+    def test_evict_removes_least_recently_used_blobs(self):
+        cache = ImageCache(cache_dir=self.temp_dir.name, max_bytes=250, freshness_seconds=60)
+        old = cache.store('http://example.com/old.jpg', JPEG_BYTES + b'1')
+        past = time.time() - 100
+        os.utime(cache._blob_path(old['digest']), (past, past))
+        cache.store('http://example.com/new.jpg', JPEG_BYTES + b'2')
+        cache.store('http://example.com/newer.jpg', JPEG_BYTES + b'3')
+
+        cache.evict()
+
+        self.assertIsNone(cache.lookup('http://example.com/old.jpg'))
+        self.assertIsNotNone(cache.lookup('http://example.com/newer.jpg'))
+        self.assertGreater(cache.get_stats()['evictions'], 0)
+        # 제거된 blob을 가리키던 인덱스 항목도 남지 않습니다.
+        self.assertFalse(os.path.exists(cache._index_path('http://example.com/old.jpg')))
+        self.assertTrue(os.path.exists(cache._index_path('http://example.com/newer.jpg')))
+
+
+if __name__ == '__main__':
+    unittest.main()
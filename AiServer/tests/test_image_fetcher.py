@@ -0,0 +1,187 @@
+import asyncio
+import tempfile
+import unittest
+
+import httpx
+
+from services.image_cache import ImageCache
+from services.image_fetcher import ImageFetcher, negative_cache, sniff_image_type
+
+JPEG_BYTES = b'\xff\xd8\xff\xe0' + b'0' * 16
+
+
+class TestImageFetcher(unittest.TestCase):
+    def _run(self, coro):
+        return asyncio.run(coro)
+
+    def test_fetch_many_shares_client_and_reports_stats(self):
+        def handler(request):
+            return httpx.Response(200, content=b'image-bytes', headers={'content-type': 'image/jpeg'})
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler)) as fetcher:
+                results = await fetcher.fetch_many([
+                    'http://example.com/a.jpg',
+                    'http://example.com/b.jpg',
+                    'http://example.com/a.jpg',
+                ])
+                return results, fetcher.get_stats()
+
+        results, stats = self._run(run())
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(results['http://example.com/a.jpg'].content_type, 'image/jpeg')
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['succeeded'], 2)
+        self.assertEqual(stats['bytes'], len(b'image-bytes') * 2)
+        self.assertIn('images_per_second', stats)
+
+    def test_fetch_retries_transient_errors(self):
+        calls = {'count': 0}
+
+        def handler(request):
+            calls['count'] += 1
+            if calls['count'] == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, content=b'ok')
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler), max_retries=2) as fetcher:
+                fetcher.BACKOFF_BASE = 0
+                return await fetcher.fetch('http://example.com/a.jpg'), fetcher.get_stats()
+
+        result, stats = self._run(run())
+
+        self.assertTrue(result.ok)
+        self.assertEqual(stats['retries'], 1)
+
+    def test_fetch_returns_error_result_on_client_error(self):
+        def handler(request):
+            return httpx.Response(404)
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler)) as fetcher:
+                return await fetcher.fetch('http://example.com/missing.jpg')
+
+        result = self._run(run())
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status_code, 404)
+
+    def test_url_resolver_is_applied(self):
+        seen = []
+
+        def handler(request):
+            seen.append(str(request.url))
+            return httpx.Response(200, content=b'ok')
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler),
+                                    url_resolver=lambda url: url.replace('localhost', 'userserver')) as fetcher:
+                return await fetcher.fetch('http://localhost:8080/a.jpg')
+
+        result = self._run(run())
+
+        self.assertEqual(result.url, 'http://localhost:8080/a.jpg')
+        self.assertEqual(seen, ['http://userserver:8080/a.jpg'])
+
+    def test_sniff_image_type(self):
+        self.assertEqual(sniff_image_type(JPEG_BYTES), 'image/jpeg')
+        self.assertEqual(sniff_image_type(b'\x89PNG\r\n\x1a\n...'), 'image/png')
+        self.assertIsNone(sniff_image_type(b'<html></html>'))
+
+    def test_validate_rejects_non_images_and_caches_them(self):
+        negative_cache.clear()
+        calls = []
+
+        def handler(request):
+            calls.append(str(request.url))
+            if request.url.path.endswith('.html'):
+                return httpx.Response(200, content=b'<html></html>', headers={'content-type': 'text/html'})
+            return httpx.Response(200, content=JPEG_BYTES, headers={'content-type': 'image/jpeg'})
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler)) as fetcher:
+                first = await fetcher.fetch_many(['http://example.com/a.jpg', 'http://example.com/b.html'],
+                                                 validate=True)
+                second = await fetcher.fetch('http://example.com/b.html', validate=True)
+                return first, second, fetcher.get_stats()
+
+        first, second, stats = self._run(run())
+
+        self.assertTrue(first['http://example.com/a.jpg'].ok)
+        self.assertFalse(first['http://example.com/b.html'].ok)
+        self.assertFalse(second.ok)
+        self.assertEqual(calls.count('http://example.com/b.html'), 1)
+        self.assertEqual(stats['invalid'], 2)
+        self.assertEqual(stats['negative_cache_hits'], 1)
+        negative_cache.clear()
+
+    def test_validate_does_not_cache_transient_errors(self):
+        negative_cache.clear()
+
+        def handler(request):
+            raise httpx.ConnectError('connection refused')
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler), max_retries=0) as fetcher:
+                return await fetcher.fetch('http://example.com/a.jpg', validate=True)
+
+        result = self._run(run())
+
+        self.assertFalse(result.ok)
+        self.assertIsNone(negative_cache.get('http://example.com/a.jpg'))
+
+    def test_validate_caches_only_permanent_http_errors(self):
+        negative_cache.clear()
+        statuses = {'/gone.jpg': 410, '/missing.jpg': 404, '/limited.jpg': 429, '/denied.jpg': 403,
+                    '/unauthorized.jpg': 401}
+
+        def handler(request):
+            return httpx.Response(statuses[request.url.path])
+
+        async def run():
+            async with ImageFetcher(cache=None, transport=httpx.MockTransport(handler), max_retries=0) as fetcher:
+                return await fetcher.fetch_many([f'http://example.com{path}' for path in statuses], validate=True)
+
+        results = self._run(run())
+
+        self.assertFalse(any(result.ok for result in results.values()))
+        cached = {path for path in statuses if negative_cache.get(f'http://example.com{path}') is not None}
+        self.assertEqual(cached, {'/gone.jpg', '/missing.jpg'})
+        negative_cache.clear()
+
+    def test_cache_serves_fresh_entries_and_revalidates_stale_ones(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(dict(request.headers))
+            if request.headers.get('if-none-match') == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, content=JPEG_BYTES, headers={'content-type': 'image/jpeg', 'etag': '"v1"'})
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ImageCache(cache_dir=cache_dir, max_bytes=1024 * 1024, freshness_seconds=60)
+
+            async def run():
+                async with ImageFetcher(cache=cache, transport=httpx.MockTransport(handler)) as fetcher:
+                    first = await fetcher.fetch('http://example.com/a.jpg', validate=True)
+                    second = await fetcher.fetch('http://example.com/a.jpg', validate=True)
+                    cache.freshness_seconds = 0
+                    third = await fetcher.fetch('http://example.com/a.jpg', validate=True)
+                    return first, second, third, fetcher.get_stats()
+
+            first, second, third, stats = self._run(run())
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertTrue(third.from_cache)
+        self.assertEqual(third.content, JPEG_BYTES)
+        self.assertEqual(len(requests_seen), 2)
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['cache_revalidated'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
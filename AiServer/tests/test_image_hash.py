@@ -0,0 +1,69 @@
+import io
+import unittest
+
+from PIL import Image, ImageDraw
+
+from utils.image_hash import dhash, group_similar_hashes, hamming_distance, image_fingerprint
+
+
+def make_image(shape, size=(256, 256), image_format="JPEG", quality=90, background="white"):
+    img = Image.new("RGB", size, background)
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    if shape == "flat":
+        pass
+    elif shape == "circle":
+        draw.ellipse((w // 4, h // 4, 3 * w // 4, 3 * h // 4), fill="black")
+    else:
+        draw.rectangle((0, 0, w // 2, h), fill="black")
+    buffered = io.BytesIO()
+    img.save(buffered, format=image_format, quality=quality)
+    return buffered.getvalue()
+
+
+class TestImageHash(unittest.TestCase):
+    def test_near_duplicates_have_close_hashes(self):
+        original = dhash(make_image("circle"))
+        resized = dhash(make_image("circle", size=(640, 640), quality=60))
+        other = dhash(make_image("bar"))
+
+        self.assertLessEqual(hamming_distance(original, resized), 3)
+        self.assertGreater(hamming_distance(original, other), 10)
+
+    def test_undecodable_image(self):
+        self.assertIsNone(dhash(b'not an image'))
+
+    def test_flat_images_are_not_hashed(self):
+        # 단색 이미지는 색과 무관하게 해시가 0이 되므로 중복 판정에서 제외합니다.
+        self.assertIsNone(dhash(make_image("flat", background="red")))
+        self.assertIsNone(image_fingerprint(make_image("flat", background="blue")))
+
+    def test_same_pattern_with_different_colors_is_not_grouped(self):
+        red = image_fingerprint(make_image("circle", background="red"))
+        blue = image_fingerprint(make_image("circle", background="blue"))
+        again = image_fingerprint(make_image("circle", background="red", quality=60))
+
+        groups = group_similar_hashes([red[0], blue[0], again[0]], threshold=3,
+                                      colors=[red[1], blue[1], again[1]])
+
+        self.assertEqual(groups, [[0, 2], [1]])
+
+    def test_group_similar_hashes(self):
+        hashes = [0b0000, 0b0001, 0b1111_0000, None, 0b0010, 0b1111_0001]
+
+        groups = group_similar_hashes(hashes, threshold=1)
+
+        self.assertEqual(groups, [[0, 1, 4], [2, 5], [3]])
+
+    def test_group_compares_against_representative_only(self):
+        # 1은 0과 가깝고 2는 1과 가깝지만 0과는 멀기 때문에 별도 그룹이 됩니다.
+        hashes = [0b0000, 0b0001, 0b0011]
+
+        self.assertEqual(group_similar_hashes(hashes, threshold=1), [[0, 1], [2]])
+
+    def test_zero_threshold_groups_exact_matches(self):
+        self.assertEqual(group_similar_hashes([5, 5, 6], threshold=0), [[0, 1], [2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import io
+import unittest
+
+from PIL import Image
+
+from utils.image_resize import cv2, fit_size, render_thumbnail
+
+
+def make_image_bytes(size, image_format="JPEG", mode="RGB"):
+    buffered = io.BytesIO()
+    color = (255, 0, 0, 128) if mode == "RGBA" else "red"
+    Image.new(mode, size, color).save(buffered, format=image_format)
+    return buffered.getvalue()
+
+
+class TestImageResize(unittest.TestCase):
+    def test_fit_size_matches_thumbnail_rule(self):
+        self.assertEqual(fit_size((4000, 3000), (224, 224)), (224, 168))
+        self.assertEqual(fit_size((100, 50), (224, 224)), (100, 50))
+
+    def test_large_jpeg_is_reduced(self):
+        result = Image.open(io.BytesIO(render_thumbnail(make_image_bytes((4000, 3000)), (224, 224))))
+
+        self.assertEqual(result.format, "JPEG")
+        self.assertEqual(result.size, (224, 168))
+
+    def test_webp_output_keeps_alpha(self):
+        png = make_image_bytes((600, 600), "PNG", "RGBA")
+        result = Image.open(io.BytesIO(render_thumbnail(png, (224, 224), image_format="WEBP", quality=60)))
+
+        self.assertEqual(result.format, "WEBP")
+        self.assertEqual(result.mode, "RGBA")
+        self.assertEqual(result.size, (224, 224))
+
+    def test_rgba_png_to_jpeg_is_converted(self):
+        png = make_image_bytes((600, 300), "PNG", "RGBA")
+        result = Image.open(io.BytesIO(render_thumbnail(png, (224, 224))))
+
+        self.assertEqual(result.mode, "RGB")
+        self.assertEqual(result.size, (224, 112))
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            render_thumbnail(make_image_bytes((10, 10)), (224, 224), image_format="GIF")
+
+    def assert_rotated_exif_is_applied(self, decoder):
+        # 저장된 이미지는 400x200이고 왼쪽 절반이 검정입니다. 방향 6(시계 방향 90도 회전)을 적용하면
+        # 200x400 세로 이미지가 되고 검정은 위쪽 절반으로 옵니다.
+        img = Image.new("RGB", (400, 200), "white")
+        img.paste((0, 0, 0), (0, 0, 200, 200))
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffered = io.BytesIO()
+        img.save(buffered, format="JPEG", exif=exif.tobytes())
+
+        result = Image.open(io.BytesIO(render_thumbnail(buffered.getvalue(), (224, 160), decoder=decoder)))
+
+        self.assertEqual(result.size, (80, 160))
+        self.assertLess(sum(result.getpixel((40, 20))), 100)
+        self.assertGreater(sum(result.getpixel((40, 140))), 600)
+
+    def test_rotated_exif_is_applied(self):
+        self.assert_rotated_exif_is_applied("pil")
+
+    @unittest.skipIf(cv2 is None, "OpenCV is not installed")
+    def test_opencv_rotated_exif_is_applied(self):
+        self.assert_rotated_exif_is_applied("opencv")
+
+    @unittest.skipIf(cv2 is None, "OpenCV is not installed")
+    def test_opencv_decoder_matches_size(self):
+        jpeg = make_image_bytes((4000, 3000))
+        result = Image.open(io.BytesIO(render_thumbnail(jpeg, (224, 224), decoder="opencv")))
+
+        self.assertEqual(result.format, "JPEG")
+        self.assertEqual(result.size, (224, 168))
+
+
+if __name__ == '__main__':
+    unittest.main()
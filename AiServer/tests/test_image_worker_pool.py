@@ -0,0 +1,62 @@
+import asyncio
+import base64
+import io
+import pickle
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from services.image_service import ImageService
+from services.image_worker_pool import run_in_image_pool, get_pool_size
+
+
+def make_jpeg(color, size=(320, 240)):
+    buffered = io.BytesIO()
+    Image.new("RGB", size, color).save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+class TestImageWorkerPool(unittest.TestCase):
+    def test_pool_size_defaults_to_cpu_count(self):
+        self.assertGreaterEqual(get_pool_size(), 1)
+
+    def test_render_thumbnail_is_picklable_for_process_pool(self):
+        func = pickle.loads(pickle.dumps(ImageService._render_thumbnail))
+        self.assertIs(func, ImageService._render_thumbnail)
+
+    def test_run_in_image_pool(self):
+        encoded = asyncio.run(run_in_image_pool(ImageService._render_thumbnail, make_jpeg("blue"), (32, 32)))
+        img = Image.open(io.BytesIO(base64.b64decode(encoded)))
+        self.assertLessEqual(max(img.size), 32)
+
+    @patch('services.image_service.get_thumbnail_cache', return_value=None)
+    def test_prepare_images_for_ai_async_matches_sync(self, _):
+        images = ["http://localhost:8080/a.jpg", "http://example.com/b.jpg", "http://localhost:8080/c.jpg"]
+        image_data = {images[0]: make_jpeg("red"), images[2]: make_jpeg("green")}
+
+        expected = ImageService.prepare_images_for_ai(images, image_data)
+        result = asyncio.run(ImageService.prepare_images_for_ai_async(images, image_data))
+
+        self.assertEqual(result, expected)
+        self.assertEqual(result[3], {"type": "image_url", "image_url": {"url": "http://example.com/b.jpg"}})
+        self.assertTrue(result[1]["image_url"]["url"].startswith("data:image/jpeg;base64,"))
+
+    def test_thumbnail_cache_is_used_off_the_event_loop(self):
+        threads = []
+        thumbnail_cache = MagicMock()
+        thumbnail_cache.get.side_effect = lambda key: threads.append(threading.current_thread())
+        thumbnail_cache.put.side_effect = lambda key, value: threads.append(threading.current_thread())
+        images = ["http://localhost:8080/a.jpg"]
+
+        with patch('services.image_service.get_thumbnail_cache', return_value=thumbnail_cache):
+            asyncio.run(ImageService.prepare_images_for_ai_async(images, {images[0]: make_jpeg("red")}))
+
+        # 캐시 키 해시 계산과 디스크 spill 조회/저장이 이벤트 루프 스레드를 막지 않습니다.
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
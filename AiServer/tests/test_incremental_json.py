@@ -0,0 +1,40 @@
+import json
+import unittest
+
+from utils.incremental_json import ArrayItemStreamParser, IntArrayStreamParser
+
+
+class TestArrayItemStreamParser(unittest.TestCase):
+    def test_items_are_emitted_as_soon_as_complete(self):
+        text = ('{"classifications": [{"index": 0, "category": "cat"}, '
+                '{"index": 1, "category": "a \\"quoted\\" {brace}"}, {"index": 2, "category": "dog"}]}')
+        parser = ArrayItemStreamParser()
+        emitted = []
+        for start in range(0, len(text), 7):
+            emitted.append(parser.feed(text[start:start + 7]))
+
+        items = [item for batch in emitted for item in batch]
+        self.assertEqual(items, json.loads(text)['classifications'])
+        # 첫 항목은 마지막 조각 전에 나옵니다.
+        first_batch = next(index for index, batch in enumerate(emitted) if batch)
+        self.assertLess(first_batch, len(emitted) - 1)
+        self.assertEqual(parser.text, text)
+
+    def test_incomplete_item_is_not_emitted(self):
+        parser = ArrayItemStreamParser()
+        self.assertEqual(parser.feed('{"classifications": [{"index": 0, "categ'), [])
+        self.assertEqual(parser.feed('ory": "cat"}'), [{"index": 0, "category": "cat"}])
+
+
+class TestIntArrayStreamParser(unittest.TestCase):
+    def test_codes_are_emitted_when_delimited(self):
+        parser = IntArrayStreamParser()
+        self.assertEqual(parser.feed('{"labels": [1'), [])
+        self.assertEqual(parser.feed('2, 0,'), [(0, 12), (1, 0)])
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.feed(' "x", 3]}'), [(2, None), (3, 3)])
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.feed(' [4]'), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from config.config import Config
+from services.key_pool import KeyPool
+
+
+class TestKeyPool(unittest.TestCase):
+    def make_pool(self, rpm=0):
+        return KeyPool({'provider': 'pool-test-%d' % rpm, 'api_key': 'key-a', 'api_keys': ['key-a', 'key-b'],
+                        'rpm': rpm, 'tpm': 0})
+
+    def test_least_loaded_key_is_selected(self):
+        pool = self.make_pool()
+        first = pool.acquire(100)
+        second = pool.acquire(100)
+        self.assertNotEqual(first.api_key, second.api_key)
+        pool.release(first)
+        self.assertIs(pool.acquire(100), first)
+
+    def test_rate_limited_key_is_avoided(self):
+        pool = self.make_pool(rpm=1)
+        first = pool.acquire(100)
+        first.rate_limiter.reserve(100)
+        pool.release(first)
+        self.assertIsNot(pool.acquire(100), first)
+
+    def test_failing_key_is_isolated_and_usage_is_counted(self):
+        pool = self.make_pool()
+        for _ in range(pool.keys[0].breaker.failure_threshold):
+            key = pool.keys[0]
+            key.in_flight += 1
+            pool.release(key, error=ValueError("invalid api key"))
+        for _ in range(3):
+            key = pool.acquire(100)
+            self.assertEqual(key.api_key, 'key-b')
+            pool.release(key, tokens=50)
+        stats = pool.get_stats()[pool.keys[1].key_id]
+        self.assertEqual((stats['successes'], stats['tokens']), (3, 150))
+        self.assertEqual(pool.get_stats()[pool.keys[0].key_id]['state'], 'OPEN')
+
+    def test_config_merges_single_and_listed_keys(self):
+        self.assertEqual(Config._collect_api_keys('key-a', ' key-b, key-a,,key-c '), ['key-a', 'key-b', 'key-c'])
+        self.assertEqual(Config._collect_api_keys('', 'key-b'), ['key-b'])
+        self.assertEqual(Config._collect_api_keys('', ''), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
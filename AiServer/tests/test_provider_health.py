@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from services.circuit_breaker import CircuitBreaker
+from services.provider_health import ProviderHealthRegistry, is_health_failure, is_key_failure
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_allows_limited_probes(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0, half_open_max_calls=1)
+        breaker.record_failure()
+        self.assertTrue(breaker.can_execute())
+        self.assertEqual(breaker.state, 'HALF_OPEN')
+        self.assertFalse(breaker.can_execute())
+        breaker.release()
+        self.assertTrue(breaker.can_execute())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'CLOSED')
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0)
+        for _ in range(3):
+            breaker.record_failure()
+        self.assertTrue(breaker.can_execute())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'OPEN')
+
+
+class TestProviderHealthRegistry(unittest.TestCase):
+    def test_open_provider_is_skipped_until_recovery(self):
+        registry = ProviderHealthRegistry(failure_threshold=2, recovery_timeout=30, window=10)
+        for _ in range(2):
+            self.assertTrue(registry.can_attempt('openrouter'))
+            registry.record('openrouter', 30.0, error=TimeoutError("Request timed out"))
+        self.assertFalse(registry.can_attempt('openrouter'))
+        self.assertEqual(registry.get_stats()['openrouter']['skipped'], 1)
+
+        with patch('services.circuit_breaker.time.time', return_value=10 ** 12):
+            self.assertTrue(registry.can_attempt('openrouter'))
+            self.assertFalse(registry.can_attempt('openrouter'))
+        registry.record('openrouter', 1.0)
+        self.assertEqual(registry.get_state('openrouter'), 'CLOSED')
+
+    def test_rate_limit_is_not_a_health_failure(self):
+        registry = ProviderHealthRegistry(failure_threshold=1, recovery_timeout=30, window=10)
+        registry.record('gemini', 1.0, error=Exception("Error code: 429 - Too Many Requests"))
+        self.assertTrue(registry.can_attempt('gemini'))
+
+    def test_only_provider_wide_errors_are_health_failures(self):
+        class StatusError(Exception):
+            def __init__(self, status_code):
+                super().__init__(f"Error code: {status_code}")
+                self.status_code = status_code
+
+        self.assertFalse(is_health_failure(StatusError(401)))
+        self.assertFalse(is_health_failure(Exception("insufficient_quota: check your plan and billing details")))
+        self.assertFalse(is_health_failure(StatusError(400)))
+        self.assertTrue(is_health_failure(StatusError(503)))
+        self.assertTrue(is_health_failure(TimeoutError("Request timed out")))
+        self.assertTrue(is_key_failure(StatusError(403)))
+
+    def test_stats_report_success_rate_and_percentiles(self):
+        registry = ProviderHealthRegistry(failure_threshold=5, recovery_timeout=30, window=10)
+        for latency in range(1, 10):
+            registry.record('openai', float(latency))
+        registry.record('openai', 2.0, error=ValueError("bad gateway"))
+        stats = registry.get_stats()['openai']
+        self.assertEqual(stats['success_rate'], 0.9)
+        self.assertEqual(stats['latency_p50'], 5.0)
+        self.assertEqual(stats['latency_p95'], 9.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch
+
+from services.provider_health import ProviderHealthRegistry
+from services.provider_router import ProviderRouter
+
+CONFIGS = [
+    {'provider': 'openrouter', 'model': 'a', 'weight': 1.0},
+    {'provider': 'gemini', 'model': 'b', 'weight': 1.0},
+    {'provider': 'openai', 'model': 'c', 'weight': 2.0},
+]
+
+
+class TestProviderRouter(unittest.TestCase):
+    def setUp(self):
+        self.health = ProviderHealthRegistry(failure_threshold=1, recovery_timeout=60, window=20)
+        patcher = patch('services.provider_router.provider_health', self.health)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def first_choices(self, router, rounds):
+        counts = {}
+        for _ in range(rounds):
+            provider = router.order(CONFIGS)[0]['provider']
+            counts[provider] = counts.get(provider, 0) + 1
+        return counts
+
+    def test_fallback_policy_keeps_priority_order(self):
+        router = ProviderRouter('fallback')
+        self.assertEqual([c['provider'] for c in router.order(CONFIGS)], ['openrouter', 'gemini', 'openai'])
+
+    def test_weighted_policy_spreads_by_configured_share(self):
+        router = ProviderRouter('weighted')
+        self.assertEqual(self.first_choices(router, 8), {'openrouter': 2, 'gemini': 2, 'openai': 4})
+        # 첫 번째 이후는 우선순위 순서로 폴백합니다.
+        order = [c['provider'] for c in router.order(CONFIGS)]
+        self.assertEqual(sorted(order), ['gemini', 'openai', 'openrouter'])
+
+    def test_weighted_policy_prefers_faster_and_skips_open_providers(self):
+        for _ in range(5):
+            self.health.record('openrouter', 1.0)
+            self.health.record('gemini', 4.0)
+        self.health.record('openai', 30.0, error=TimeoutError("timed out"))
+        router = ProviderRouter('weighted')
+
+        counts = self.first_choices(router, 10)
+
+        self.assertEqual(counts, {'openrouter': 8, 'gemini': 2})
+
+    def test_unknown_policy_falls_back(self):
+        self.assertEqual(ProviderRouter('random').policy, 'fallback')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from exceptions.custom_exceptions import RateLimitError
+from services.rate_limiter import ProviderRateLimiter, is_rate_limit_error, parse_retry_after
+
+
+class TestProviderRateLimiter(unittest.TestCase):
+    def test_requests_wait_for_refill_once_bucket_is_empty(self):
+        limiter = ProviderRateLimiter('test', rpm=60)
+        waits = [limiter.reserve(1) for _ in range(61)]
+        self.assertEqual(waits[:60], [0.0] * 60)
+        # 분당 60건이면 1초에 한 건씩 채워집니다.
+        self.assertAlmostEqual(waits[60], 1.0, delta=0.05)
+
+    def test_token_bucket_and_max_wait(self):
+        limiter = ProviderRateLimiter('test', tpm=6000)
+        self.assertEqual(limiter.reserve(6000), 0.0)
+        with self.assertRaises(RateLimitError):
+            limiter.reserve(1000, max_wait=1)
+        # 예약하지 않고 거절했으므로 대기 시간은 누적되지 않습니다.
+        self.assertAlmostEqual(limiter.reserve(1000), 10.0, delta=0.1)
+
+    def test_record_usage_corrects_estimate(self):
+        limiter = ProviderRateLimiter('test', tpm=6000)
+        limiter.reserve(3000)
+        limiter.record_usage(3000, 1000)
+        self.assertAlmostEqual(limiter.tokens.tokens, 5000, delta=1)
+
+    def test_penalize_blocks_until_retry_after(self):
+        limiter = ProviderRateLimiter('test')
+        limiter.penalize(5)
+        self.assertAlmostEqual(limiter.reserve(10), 5.0, delta=0.1)
+        with self.assertRaises(RateLimitError):
+            limiter.reserve(10, max_wait=1)
+
+    def test_acquire_sleeps_for_reserved_wait(self):
+        limiter = ProviderRateLimiter('test')
+        limiter.penalize(0.05)
+        with patch('services.rate_limiter.asyncio.sleep') as mock_sleep:
+            asyncio.run(limiter.acquire(1))
+        self.assertGreater(mock_sleep.call_args.args[0], 0)
+
+
+class TestRetryAfterParsing(unittest.TestCase):
+    def test_parse_from_headers(self):
+        error = Exception("429")
+        error.response = MagicMock(headers={'retry-after': '12'})
+        self.assertEqual(parse_retry_after(error), 12.0)
+        error.litellm_response_headers = {'retry-after-ms': '1500'}
+        self.assertEqual(parse_retry_after(error), 1.5)
+
+    def test_parse_from_message(self):
+        self.assertEqual(parse_retry_after(Exception('{"retryDelay": "27s"}')), 27.0)
+        self.assertEqual(parse_retry_after(Exception("Please try again in 350ms.")), 0.35)
+        self.assertIsNone(parse_retry_after(Exception("bad request")))
+
+    def test_is_rate_limit_error(self):
+        self.assertTrue(is_rate_limit_error(Exception("Error code: 429 - Too Many Requests")))
+        self.assertFalse(is_rate_limit_error(ValueError("invalid image")))
+
+
+if __name__ == '__main__':
+    unittest.main()
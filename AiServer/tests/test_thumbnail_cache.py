@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from services.image_service import ImageService
+from services.thumbnail_cache import ThumbnailCache
+
+
+def make_jpeg(color):
+    buffered = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def test_make_key_depends_on_content_and_parameters(self):
+        key = ThumbnailCache.make_key(b'abc', (224, 224))
+
+        self.assertEqual(key, ThumbnailCache.make_key(b'abc', (224, 224)))
+        self.assertNotEqual(key, ThumbnailCache.make_key(b'abd', (224, 224)))
+        self.assertNotEqual(key, ThumbnailCache.make_key(b'abc', (512, 512)))
+        self.assertNotEqual(key, ThumbnailCache.make_key(b'abc', (224, 224), quality=50))
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ThumbnailCache(max_bytes=10, spill_dir='')
+        cache.put('a', '12345')
+        cache.put('b', '12345')
+        cache.get('a')
+        cache.put('c', '12345')
+
+        self.assertEqual(cache.get('a'), '12345')
+        self.assertIsNone(cache.get('b'))
+        stats = cache.get_stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['bytes'], 10)
+
+    def test_evicted_entries_spill_to_disk(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            cache = ThumbnailCache(max_bytes=5, spill_dir=spill_dir, spill_max_bytes=1024)
+            cache.put('a', '12345')
+            cache.put('b', '67890')
+
+            self.assertEqual(cache.get('a'), '12345')
+            stats = cache.get_stats()
+            self.assertEqual(stats['spills'], 1)
+            self.assertEqual(stats['disk_hits'], 1)
+            self.assertTrue(any(files for _, _, files in os.walk(spill_dir)))
+
+    def test_resize_image_reuses_cached_thumbnail(self):
+        cache = ThumbnailCache(max_bytes=1024 * 1024, spill_dir='')
+        image_bytes = make_jpeg("red")
+
+        with patch('services.image_service.get_thumbnail_cache', return_value=cache), \
+                patch('utils.image_resize.Image.open', wraps=Image.open) as mock_open:
+            first = ImageService.resize_image("http://localhost:8080/a.jpg", image_bytes=image_bytes)
+            second = ImageService.resize_image("http://localhost:8080/b.jpg", image_bytes=image_bytes)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_open.call_count, 1)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
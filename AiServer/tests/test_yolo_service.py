@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import json
+import shutil
+import tempfile
 from services.yolo_service import YOLOService
 from config import config
 
@@ -94,6 +96,57 @@ class TestYOLOService(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.yolo_service.predict("test_image.jpg", self.test_workspace_id, "nonexistent_version")
 
+    def _make_workspace(self, base_dir, counts):
+        for label, count in counts.items():
+            label_dir = os.path.join(base_dir, "workspace", str(self.test_workspace_id), label)
+            os.makedirs(label_dir)
+            for i in range(count):
+                open(os.path.join(label_dir, f"{i}.jpg"), 'a').close()
+
+    @patch('services.yolo_service.YOLO')
+    def test_train_holds_out_calibration_images_without_touching_workspace(self, mock_yolo):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        self._make_workspace(base_dir, {"cat": 20, "dog": 5})
+        workspace_dir = os.path.join(base_dir, "workspace", str(self.test_workspace_id))
+        trained_on = {}
+
+        def train(data, **kwargs):
+            trained_on.update({label: sorted(os.listdir(os.path.join(data, label))) for label in os.listdir(data)})
+            return MagicMock(metrics={}, best_accuracy=0.9, final_accuracy=0.9)
+
+        mock_yolo.return_value.to.return_value.train.side_effect = train
+        with patch.object(config, 'BASE_DIR', base_dir), \
+                patch.object(config, 'YOLO_CASCADE_ENABLED', True), \
+                patch.object(config, 'YOLO_CASCADE_CALIBRATION_FRACTION', 0.2):
+            result = self.yolo_service.train(self.test_workspace_id)
+            samples = self.yolo_service._calibration_samples(self.test_workspace_id, result['model_version'], 500)
+
+        # 작업 공간의 이미지는 그대로이고, 보정용 이미지는 훈련 데이터에서만 빠집니다.
+        self.assertEqual(len(os.listdir(os.path.join(workspace_dir, "cat"))), 20)
+        self.assertEqual(sorted(label for _, label in samples), ["cat"] * 4 + ["dog"])
+        self.assertEqual((len(trained_on["cat"]), len(trained_on["dog"])), (16, 4))
+        held_cat = {os.path.basename(path) for path, label in samples if label == "cat"}
+        self.assertFalse(held_cat & set(trained_on["cat"]))
+        self.assertTrue(all(path.startswith(workspace_dir) for path, _ in samples))
+        self.assertFalse(os.path.exists(os.path.join(base_dir, "training", str(self.test_workspace_id))))
+
+    def test_cascade_threshold_without_calibration_split(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        self._make_workspace(base_dir, {"cat": 20})
+
+        with patch.object(config, 'BASE_DIR', base_dir), \
+                patch.object(self.yolo_service, 'predict_batch') as predict_batch:
+            result = self.yolo_service.get_cascade_threshold(self.test_workspace_id, self.test_model_version)
+
+        # 훈련 이미지로 보정하지 않고 로컬 분류를 끕니다.
+        self.assertIsNone(result['threshold'])
+        self.assertEqual(result['samples'], 0)
+        predict_batch.assert_not_called()
+        self.assertFalse(os.path.exists(os.path.join(
+            self.yolo_service.models_dir, f"calibration_{self.test_workspace_id}_{self.test_model_version}.json")))
+
     def tearDown(self):
         # 테스트 후 정리
         if os.path.exists(self.yolo_service.models_dir):
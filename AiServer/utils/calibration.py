@@ -0,0 +1,26 @@
+def calibrate_confidence_threshold(scored, target_precision, min_accepted=1):
+    """
+    정답이 있는 예측으로 목표 정밀도를 만족하는 가장 낮은 confidence 임계값을 찾습니다.
+
+    confidence가 높은 순으로 예측을 받아들일 때, 받아들인 예측의 정밀도가 target_precision 이상이고
+    받아들인 수가 min_accepted 이상인 지점 중 가장 많이 받아들이는 지점의 confidence를 임계값으로 합니다.
+    같은 confidence 사이에서는 자르지 않습니다 (임계값 이상이면 모두 받아들여지기 때문입니다).
+
+    Args:
+        scored (list of tuple): (confidence, 정답 여부) 목록.
+        target_precision (float): 받아들인 예측이 만족해야 하는 최소 정밀도 (0~1).
+        min_accepted (int): 임계값을 신뢰하기 위한 최소 수락 샘플 수.
+
+    Returns:
+        float | None: confidence 임계값 (이 값 이상이면 수락). 조건을 만족하는 지점이 없으면 None.
+    """
+    ordered = sorted(scored, key=lambda item: item[0], reverse=True)
+    threshold = None
+    correct = 0
+    for count, (confidence, is_correct) in enumerate(ordered, start=1):
+        correct += bool(is_correct)
+        if count < len(ordered) and ordered[count][0] == confidence:
+            continue
+        if count >= min_accepted and correct / count >= target_precision:
+            threshold = confidence
+    return threshold
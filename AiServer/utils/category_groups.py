@@ -0,0 +1,114 @@
+import math
+import re
+
+NAME_SEPARATORS = re.compile(r'[\s_\-/.:,()\[\]]+')
+
+
+def _name_key(category):
+    """카테고리 이름의 첫 단어(구분자 기준)를 소문자로 반환합니다. 구분자가 없으면 이름 전체입니다."""
+    tokens = [token for token in NAME_SEPARATORS.split(category) if token]
+    return (tokens[0] if tokens else category).lower()
+
+
+def group_category_names(categories, group_size=0):
+    """
+    카테고리 이름을 자동으로 그룹으로 묶습니다.
+
+    이름의 첫 단어를 실제로 공유하는 카테고리(dog_beagle, dog_poodle)는 그 첫 단어("dog")를 이름으로 하는
+    그룹이 됩니다. 한 묶음이 group_size보다 커도 나누지 않습니다 (임의로 나눈 그룹은 1차 분류에서 구분할 수
+    없기 때문입니다). 첫 단어를 공유하지 않는 카테고리만 이름 순으로 그룹당 약 group_size개씩 모아
+    "group 1", "group 2"처럼 짧은 이름을 붙입니다 (한 개뿐이면 카테고리 이름 그대로). 이런 그룹의 소속
+    카테고리는 enum 값이 아니라 describe_category_groups로 도구 설명에 한 번만 적습니다.
+
+    Args:
+        categories (list of str): 분류 카테고리 목록.
+        group_size (int): 그룹당 목표 카테고리 수. 0이면 카테고리 수의 제곱근입니다.
+
+    Returns:
+        dict: 그룹 이름을 키로 하는 카테고리 목록 (입력 순서 유지).
+    """
+    target = group_size or max(2, math.ceil(math.sqrt(len(categories))))
+    buckets = {}
+    for category in dict.fromkeys(categories):
+        buckets.setdefault(_name_key(category), []).append(category)
+
+    bins = []
+    singles = []
+    for key in sorted(buckets):
+        if len(buckets[key]) > 1:
+            bins.append((key, buckets[key]))
+        elif singles and len(singles[-1]) < target:
+            singles[-1].extend(buckets[key])
+        else:
+            singles.append(list(buckets[key]))
+
+    groups = {}
+    for key, members in bins:
+        groups[_unique_group_name(key, groups)] = members
+    for number, members in enumerate(singles, start=1):
+        name = members[0] if len(members) == 1 else f"group {number}"
+        groups[_unique_group_name(name, groups)] = members
+    return groups
+
+
+def describe_category_groups(groups):
+    """
+    이름만으로 소속 카테고리를 알 수 없는 그룹의 구성을 도구 설명에 넣을 문장으로 만듭니다.
+
+    그룹 이름이 카테고리 하나의 이름이거나 모든 소속 카테고리가 공유하는 첫 단어이면 생략합니다.
+
+    Args:
+        groups (dict): 그룹 이름을 키로 하는 카테고리 목록.
+
+    Returns:
+        str | None: "Groups: group 1 = bird, fish; ..." 형식의 문장. 설명할 그룹이 없으면 None.
+    """
+    described = [f"{name} = {', '.join(members)}" for name, members in groups.items()
+                 if members != [name] and any(_name_key(member) != name.lower() for member in members)]
+    return f"Groups: {'; '.join(described)}" if described else None
+
+
+def resolve_category_groups(categories, user_groups=None, min_categories=0, group_size=0):
+    """
+    계층 분류에 사용할 카테고리 그룹을 결정합니다.
+
+    사용자가 그룹을 주면 알려진 카테고리만 남기고, 어느 그룹에도 없는 카테고리는 'Other' 그룹에
+    넣습니다. 그룹이 없으면 카테고리 수가 min_categories 이상일 때만 이름으로 자동 그룹을 만듭니다.
+
+    Args:
+        categories (list of str): 분류 카테고리 목록.
+        user_groups (dict, optional): 그룹 이름을 키로 하는 카테고리 목록.
+        min_categories (int): 자동 그룹을 만들 최소 카테고리 수. 0이면 자동 그룹을 만들지 않습니다.
+        group_size (int): 자동 그룹의 그룹당 목표 카테고리 수 (0이면 제곱근).
+
+    Returns:
+        dict: 그룹 이름을 키로 하는 카테고리 목록. 그룹이 둘 미만이면 빈 딕셔너리(평면 분류).
+    """
+    known = list(dict.fromkeys(categories))
+    if user_groups:
+        groups = {}
+        assigned = set()
+        for name, members in user_groups.items():
+            members = [category for category in dict.fromkeys(members or []) if category in known
+                       and category not in assigned]
+            if members:
+                groups[_unique_group_name(str(name), groups)] = members
+                assigned.update(members)
+        rest = [category for category in known if category not in assigned]
+        if rest:
+            groups[_unique_group_name("Other", groups)] = rest
+    elif min_categories and len(known) >= min_categories:
+        groups = group_category_names(known, group_size)
+    else:
+        return {}
+    return groups if len(groups) >= 2 else {}
+
+
+def _unique_group_name(name, groups):
+    """'NONE'이나 이미 있는 그룹 이름과 겹치지 않는 그룹 이름을 만듭니다."""
+    candidate = name if name and name != "NONE" else f"{name or 'group'} group"
+    suffix = 2
+    while candidate in groups:
+        candidate = f"{name} ({suffix})"
+        suffix += 1
+    return candidate
@@ -0,0 +1,77 @@
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+LABEL_PADDING = 3
+BACKGROUND_COLOR = (255, 255, 255)
+GRID_LINE_COLOR = (255, 0, 0)
+GRID_LINE_WIDTH = 2
+
+
+def build_contact_sheet(images_bytes, grid_size, cell_size, start_index=0, quality=85):
+    """
+    여러 이미지를 번호가 붙은 격자 한 장으로 합칩니다.
+
+    셀은 왼쪽에서 오른쪽, 위에서 아래 순서로 채워지며 각 셀의 왼쪽 위에 전역 인덱스
+    (start_index부터 시작)가 표시됩니다. 이미지는 비율을 유지한 채 셀 안에 맞춰지고,
+    셀 사이에는 경계를 구분하기 위한 선이 그려집니다.
+
+    Args:
+        images_bytes (list of bytes): 셀에 넣을 이미지 바이트 목록 (최대 grid_size * grid_size개).
+        grid_size (int): 격자 한 변의 셀 수.
+        cell_size (int): 셀 한 변의 픽셀 크기.
+        start_index (int): 첫 셀에 표시할 인덱스.
+        quality (int): 결과 JPEG 품질.
+
+    Returns:
+        bytes: JPEG으로 인코딩된 격자 이미지.
+
+    Raises:
+        ValueError: 이미지 수가 격자 칸 수를 넘는 경우.
+    """
+    if len(images_bytes) > grid_size * grid_size:
+        raise ValueError(f"{len(images_bytes)} images do not fit in a {grid_size}x{grid_size} grid")
+
+    # 사용하지 않는 아래쪽 행은 잘라내어 토큰을 아낍니다.
+    rows = max(1, -(-len(images_bytes) // grid_size))
+    columns = grid_size if rows > 1 else max(1, len(images_bytes))
+    sheet = Image.new("RGB", (columns * cell_size, rows * cell_size), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(sheet)
+    font = _load_font(max(12, cell_size // 10))
+
+    for position, image_bytes in enumerate(images_bytes):
+        row, column = divmod(position, grid_size)
+        left, top = column * cell_size, row * cell_size
+        try:
+            cell = Image.open(io.BytesIO(image_bytes))
+            if cell.format == "JPEG":
+                cell.draft("RGB", (cell_size, cell_size))
+            cell.thumbnail((cell_size, cell_size))
+            cell = cell.convert("RGB")
+            sheet.paste(cell, (left + (cell_size - cell.width) // 2, top + (cell_size - cell.height) // 2))
+        except (OSError, ValueError):
+            pass  # 디코딩할 수 없는 이미지는 빈 셀로 둡니다 (모델이 NONE으로 분류).
+
+        label = str(start_index + position)
+        text_box = draw.textbbox((left + LABEL_PADDING, top + LABEL_PADDING), label, font=font)
+        draw.rectangle((text_box[0] - LABEL_PADDING, text_box[1] - LABEL_PADDING,
+                        text_box[2] + LABEL_PADDING, text_box[3] + LABEL_PADDING), fill=(0, 0, 0))
+        draw.text((left + LABEL_PADDING, top + LABEL_PADDING), label, fill=(255, 255, 0), font=font)
+
+    for column in range(1, columns):
+        draw.line((column * cell_size, 0, column * cell_size, sheet.height), fill=GRID_LINE_COLOR,
+                  width=GRID_LINE_WIDTH)
+    for row in range(1, rows):
+        draw.line((0, row * cell_size, sheet.width, row * cell_size), fill=GRID_LINE_COLOR,
+                  width=GRID_LINE_WIDTH)
+
+    buffered = io.BytesIO()
+    sheet.save(buffered, format="JPEG", quality=quality)
+    return buffered.getvalue()
+
+
+def _load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow 10.1 미만은 크기 지정을 지원하지 않습니다.
+        return ImageFont.load_default()
@@ -1,4 +1,16 @@
-def get_image_classification_tool(categories):
+CONFIDENCE_PROPERTY = {
+    "type": "number",
+    "minimum": 0,
+    "maximum": 1,
+    "description": "How confident you are in the category, from 0 (guess) to 1 (certain).",
+}
+
+
+def _with_notes(description, notes):
+    return f"{description}. {notes}" if notes else description
+
+
+def get_image_classification_tool(categories, with_confidence=False, notes=None):
     """
     이미지 분류를 위한 함수 스키마를 생성합니다.
 
@@ -7,15 +19,26 @@ def get_image_classification_tool(categories):
 
     Args:
         categories (list): 유효한 분류 카테고리 목록.
+        with_confidence (bool): True이면 항목마다 0~1 사이의 confidence를 함께 반환하게 합니다.
+        notes (str, optional): 함수 설명 뒤에 덧붙일 카테고리 설명 (예: 그룹 구성).
 
     Returns:
         dict: 이미지 분류를 위한 함수 스키마를 나타내는 딕셔너리.
     """
+    item_properties = {
+        "index": {"type": "integer"},
+        "category": {
+            "type": "string",
+            "enum": categories + ["NONE"],
+        },
+    }
+    if with_confidence:
+        item_properties["confidence"] = CONFIDENCE_PROPERTY
     return {
         "type": "function",
         "function": {
             "name": "classify_images",
-            "description": "Classifies images into predefined categories",
+            "description": _with_notes("Classifies images into predefined categories", notes),
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -23,14 +46,8 @@ def get_image_classification_tool(categories):
                         "type": "array",
                         "items": {
                             "type": "object",
-                            "properties": {
-                                "index": {"type": "integer"},
-                                "category": {
-                                    "type": "string",
-                                    "enum": categories + ["NONE"],
-                                },
-                            },
-                            "required": ["index", "category"],
+                            "properties": item_properties,
+                            "required": list(item_properties),
                         },
                         "description": "Classification results and indices for each image. Use 'NONE' if no suitable category exists.",
                     }
@@ -39,3 +56,65 @@ def get_image_classification_tool(categories):
             },
         },
     }
+
+
+def get_compact_classification_tool(categories, with_confidence=False, notes=None):
+    """
+    출력 토큰을 줄이기 위한 압축 분류 함수 스키마를 생성합니다.
+
+    카테고리 이름 대신 작은 정수 코드를 이미지 순서대로 나열하게 합니다.
+    코드 0은 'NONE', 코드 i(1부터)는 categories[i - 1]이며 코드표는 서버가 보관하고
+    decode_compact_label로 되돌립니다.
+
+    Args:
+        categories (list): 유효한 분류 카테고리 목록.
+        with_confidence (bool): True이면 labels와 같은 순서의 confidences 배열을 함께 반환하게 합니다.
+        notes (str, optional): 함수 설명 뒤에 덧붙일 카테고리 설명 (예: 그룹 구성).
+
+    Returns:
+        dict: 압축 이미지 분류 함수 스키마를 나타내는 딕셔너리.
+    """
+    codes = ", ".join(f"{code}={category}" for code, category in enumerate(categories, start=1))
+    properties = {
+        "labels": {
+            "type": "array",
+            "items": {"type": "integer", "minimum": 0, "maximum": len(categories)},
+            "description": "One category code per image, in image index order starting at index 0. "
+                           "Use 0 if no suitable category exists.",
+        }
+    }
+    if with_confidence:
+        properties["confidences"] = {
+            "type": "array",
+            "items": CONFIDENCE_PROPERTY,
+            "description": "Confidence for each entry of labels, in the same order.",
+        }
+    return {
+        "type": "function",
+        "function": {
+            "name": "classify_images",
+            "description": _with_notes(f"Classifies images into predefined categories given as codes: "
+                                       f"0=NONE, {codes}", notes),
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+            },
+        },
+    }
+
+
+def decode_compact_label(code, categories):
+    """
+    압축 스키마의 카테고리 코드를 카테고리 이름으로 변환합니다.
+
+    Args:
+        code: 모델이 반환한 코드.
+        categories (list): 스키마를 만들 때 사용한 카테고리 목록.
+
+    Returns:
+        str | None: 카테고리 이름 ('NONE' 포함). 유효하지 않은 코드이면 None.
+    """
+    if isinstance(code, bool) or not isinstance(code, int) or not 0 <= code <= len(categories):
+        return None
+    return "NONE" if code == 0 else categories[code - 1]
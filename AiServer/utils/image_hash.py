@@ -0,0 +1,152 @@
+import io
+
+from PIL import Image, ImageStat
+
+HASH_SIZE = 8  # 8x8 = 64비트 해시
+# 축소한 회색조 이미지의 밝기 표준편차가 이보다 작으면 단색/저질감 이미지로 보고 해시하지 않습니다.
+# (이런 이미지는 색과 무관하게 해시가 모두 0에 가까워 서로 다른 이미지가 중복으로 묶입니다.)
+MIN_HASH_STDDEV = 4.0
+# 같은 그룹으로 볼 채널별 평균 색 차이의 최댓값 (0~255)
+COLOR_TOLERANCE = 16
+
+
+def image_fingerprint(image_bytes, hash_size=HASH_SIZE):
+    """
+    이미지의 차분 해시(dHash)와 평균 색을 계산합니다.
+
+    이미지를 (hash_size + 1) x hash_size로 줄인 뒤 회색조에서 가로로 인접한 픽셀의 밝기 대소를
+    비트로 기록합니다. 재인코딩, 크기 변경, 약간의 색 보정에는 해시가 거의 변하지 않습니다.
+    해시는 밝기 변화만 보므로 질감이 같고 색이 다른 이미지를 구분할 수 있도록 평균 색을 함께 반환합니다.
+
+    Args:
+        image_bytes (bytes): 이미지 바이트.
+        hash_size (int): 해시 한 변의 크기. 결과는 hash_size * hash_size 비트입니다.
+
+    Returns:
+        tuple | None: (해시 값, (R, G, B) 평균 색). 디코딩할 수 없거나 밝기 변화가 거의 없는
+            (단색/저질감) 이미지이면 None.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        if img.format == "JPEG":
+            # 해시에는 아주 작은 이미지만 필요하므로 디코더 단계에서 최대한 축소합니다.
+            img.draft("RGB", (hash_size * 8, hash_size * 8))
+        img = img.convert("RGB").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    gray = img.convert("L")
+    if ImageStat.Stat(gray).stddev[0] < MIN_HASH_STDDEV:
+        return None
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value, tuple(round(channel) for channel in ImageStat.Stat(img).mean)
+
+
+def dhash(image_bytes, hash_size=HASH_SIZE):
+    """
+    이미지의 차분 해시(dHash)를 계산합니다.
+
+    Args:
+        image_bytes (bytes): 이미지 바이트.
+        hash_size (int): 해시 한 변의 크기.
+
+    Returns:
+        int | None: 해시 값. 디코딩할 수 없거나 단색/저질감 이미지이면 None (image_fingerprint 참고).
+    """
+    fingerprint = image_fingerprint(image_bytes, hash_size)
+    return fingerprint[0] if fingerprint else None
+
+
+def hamming_distance(a, b):
+    """두 해시 사이의 해밍 거리를 반환합니다."""
+    return bin(a ^ b).count("1")
+
+
+def colors_match(a, b, tolerance=COLOR_TOLERANCE):
+    """두 평균 색의 채널별 차이가 모두 tolerance 이하인지 반환합니다. 색이 없으면 비교하지 않습니다."""
+    return a is None or b is None or all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+class HashIndex:
+    """
+    대표 해시를 모아 두고 새 해시와 가까운 대표를 찾는 인덱스.
+
+    새 해시는 해밍 거리가 threshold 이하이고 평균 색이 가까운 첫 대표와 같은 그룹이 되며, 없으면
+    새 대표로 등록됩니다 (대표와 직접 비교하므로 a~b, b~c라는 이유만으로 a와 c가 묶이지 않음).
+    후보 대표는 해시를 threshold + 1개의 구간으로 나눈 인덱스에서 찾습니다. 비둘기집 원리에 따라
+    거리가 threshold 이하인 두 해시는 적어도 한 구간이 완전히 같으므로 전체 비교가 필요 없습니다.
+    해시만 보관하므로 작업 전체의 이미지를 청크 단위로 나눠 넣어도 메모리 사용량이 작습니다.
+
+    Attributes:
+        threshold (int): 같은 그룹으로 볼 최대 해밍 거리.
+    """
+
+    def __init__(self, threshold, bits=HASH_SIZE * HASH_SIZE):
+        self.threshold = threshold
+        self._band_count = min(max(threshold, 0) + 1, bits)
+        self._band_width = -(-bits // self._band_count)
+        self._band_mask = (1 << self._band_width) - 1
+        self._band_index = [{} for _ in range(self._band_count)]
+        self._entries = {}
+
+    def find_or_add(self, key, value, color=None):
+        """
+        가까운 대표의 키를 찾고, 없으면 key를 새 대표로 등록합니다.
+
+        Args:
+            key: 대표를 식별하는 키.
+            value (int | None): 해시 값. None이면 항상 새 대표(단독 그룹)입니다 (인덱스에 넣지 않음).
+            color (tuple, optional): 평균 색.
+
+        Returns:
+            가까운 대표의 키. 새 대표가 되었으면 None.
+        """
+        if value is None:
+            return None
+        bands = [(value >> (band * self._band_width)) & self._band_mask for band in range(self._band_count)]
+        seen = set()
+        for band, band_key in enumerate(bands):
+            for candidate in self._band_index[band].get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                candidate_value, candidate_color = self._entries[candidate]
+                if (hamming_distance(value, candidate_value) <= self.threshold
+                        and colors_match(color, candidate_color)):
+                    return candidate
+
+        self._entries[key] = (value, color)
+        for band, band_key in enumerate(bands):
+            self._band_index[band].setdefault(band_key, []).append(key)
+        return None
+
+
+def group_similar_hashes(hashes, threshold, bits=HASH_SIZE * HASH_SIZE, colors=None):
+    """
+    해밍 거리가 threshold 이하이고 (colors가 주어지면) 평균 색이 가까운 해시끼리 묶습니다.
+
+    Args:
+        hashes (list of int | None): 해시 목록. None은 항상 단독 그룹이 됩니다.
+        threshold (int): 같은 그룹으로 볼 최대 해밍 거리.
+        bits (int): 해시의 비트 수.
+        colors (list of tuple, optional): 해시별 평균 색.
+
+    Returns:
+        list of list of int: 입력 인덱스의 그룹 목록. 각 그룹의 첫 인덱스가 대표입니다 (HashIndex 참고).
+    """
+    index = HashIndex(threshold, bits)
+    groups = []
+    group_of_representative = {}
+    for position, value in enumerate(hashes):
+        match = index.find_or_add(position, value, colors[position] if colors else None)
+        if match is not None:
+            groups[group_of_representative[match]].append(position)
+            continue
+        group_of_representative[position] = len(groups)
+        groups.append([position])
+    return groups
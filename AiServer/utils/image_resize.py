@@ -0,0 +1,150 @@
+import io
+
+from PIL import Image, ImageOps
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # OpenCV는 ultralytics와 함께 설치되지만 필수 의존성은 아닙니다.
+    cv2 = None
+    np = None
+
+THUMBNAIL_FORMATS = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+DECODERS = ("pil", "opencv")
+EXIF_ORIENTATION_TAG = 0x0112
+# 이 EXIF 방향 값들은 90도 회전(또는 전치)을 포함하므로 표시 크기의 너비와 높이가 저장된 크기와 반대입니다.
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_ORIENTATIONS_TO_APPLY = (2, 3, 4) + _TRANSPOSED_ORIENTATIONS
+
+_OPENCV_REDUCTION_FLAGS = {}
+_OPENCV_ORIENTATION_OPS = {}
+if cv2 is not None:
+    # EXIF 방향은 Pillow 경로와 같은 방식으로 축소 후에 직접 적용하므로 디코더의 자동 회전은 끕니다.
+    _OPENCV_REDUCTION_FLAGS = {
+        factor: flag | cv2.IMREAD_IGNORE_ORIENTATION for factor, flag in {
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            1: cv2.IMREAD_COLOR,
+        }.items()
+    }
+    # ImageOps.exif_transpose와 같은 변환
+    _OPENCV_ORIENTATION_OPS = {
+        2: lambda a: cv2.flip(a, 1),
+        3: lambda a: cv2.rotate(a, cv2.ROTATE_180),
+        4: lambda a: cv2.flip(a, 0),
+        5: cv2.transpose,
+        6: lambda a: cv2.rotate(a, cv2.ROTATE_90_CLOCKWISE),
+        7: lambda a: cv2.flip(cv2.transpose(a), -1),
+        8: lambda a: cv2.rotate(a, cv2.ROTATE_90_COUNTERCLOCKWISE),
+    }
+
+
+def fit_size(size, max_size):
+    """
+    가로세로 비율을 유지하면서 max_size 안에 들어가는 크기를 계산합니다 (Image.thumbnail과 동일한 규칙).
+
+    Args:
+        size (tuple): 원본 너비와 높이.
+        max_size (tuple): 최대 너비와 높이.
+
+    Returns:
+        tuple: 축소된 너비와 높이. 이미 작으면 원본 크기.
+    """
+    width, height = size
+    if width <= max_size[0] and height <= max_size[1]:
+        return size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def render_thumbnail(image_bytes, max_size, image_format="JPEG", quality=75, decoder="pil"):
+    """
+    이미지를 디코더 단계에서 축소하여 썸네일로 인코딩합니다.
+
+    JPEG은 DCT 스케일링(1/2, 1/4, 1/8)으로 목표 크기 이상인 가장 작은 해상도로만 디코딩하므로
+    전체 해상도 디코딩 비용을 피합니다. 색 공간 변환은 축소가 끝난 뒤 한 번만 수행합니다.
+    EXIF 방향 정보는 두 디코더 모두 축소 후에 적용하므로 결과는 표시 방향 기준으로 max_size 안에 들어갑니다.
+
+    Args:
+        image_bytes (bytes): 원본 이미지 바이트.
+        max_size (tuple): 썸네일 최대 너비와 높이.
+        image_format (str): 출력 포맷 ('JPEG' 또는 'WEBP').
+        quality (int): 출력 품질 (1-100).
+        decoder (str): 'pil' 또는 'opencv'. OpenCV가 없거나 디코딩에 실패하면 Pillow를 사용합니다.
+
+    Returns:
+        bytes: 인코딩된 썸네일.
+
+    Raises:
+        ValueError: 지원하지 않는 출력 포맷인 경우.
+        PIL.UnidentifiedImageError: 이미지 형식을 인식할 수 없는 경우.
+    """
+    image_format = image_format.upper()
+    if image_format not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Unsupported thumbnail format: {image_format}")
+    if decoder == "opencv" and cv2 is not None:
+        encoded = _render_with_opencv(image_bytes, max_size, image_format, quality)
+        if encoded is not None:
+            return encoded
+    return _render_with_pil(image_bytes, max_size, image_format, quality)
+
+
+def _stored_bounds(orientation, max_size):
+    """표시 방향 기준의 max_size를 저장된 픽셀 방향 기준으로 바꿉니다."""
+    return (max_size[1], max_size[0]) if orientation in _TRANSPOSED_ORIENTATIONS else max_size
+
+
+def _render_with_pil(image_bytes, max_size, image_format, quality):
+    img = Image.open(io.BytesIO(image_bytes))
+    orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    bounds = _stored_bounds(orientation, max_size)
+    if img.format == "JPEG":
+        # 디코더가 목표 크기 이상을 유지하는 범위에서 축소된 해상도로 바로 디코딩합니다.
+        img.draft("RGB", bounds)
+    img.thumbnail(bounds)
+    if orientation in _ORIENTATIONS_TO_APPLY:
+        img = ImageOps.exif_transpose(img)
+
+    keep_alpha = image_format == "WEBP" and (img.mode in ("RGBA", "LA") or "transparency" in img.info)
+    target_mode = "RGBA" if keep_alpha else "RGB"
+    if img.mode != target_mode:
+        img = img.convert(target_mode)
+
+    buffered = io.BytesIO()
+    img.save(buffered, format=image_format, quality=quality)
+    return buffered.getvalue()
+
+
+def _render_with_opencv(image_bytes, max_size, image_format, quality):
+    # 헤더만 읽어 원본 크기를 구한 뒤, 목표 크기 이상을 유지하는 가장 큰 축소 비율로 디코딩합니다.
+    # 크기는 저장된 픽셀 방향 기준이고, EXIF 방향은 축소가 끝난 뒤 Pillow 경로와 같은 방식으로 적용합니다.
+    with Image.open(io.BytesIO(image_bytes)) as probe:
+        size = probe.size
+        is_jpeg = probe.format == "JPEG"
+        orientation = probe.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    target = fit_size(size, _stored_bounds(orientation, max_size))
+
+    factor = 1
+    if is_jpeg:
+        for candidate in (8, 4, 2):
+            if size[0] // candidate >= target[0] and size[1] // candidate >= target[1]:
+                factor = candidate
+                break
+
+    array = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), _OPENCV_REDUCTION_FLAGS[factor])
+    if array is None:
+        return None
+    if (array.shape[1], array.shape[0]) != target:
+        array = cv2.resize(array, target, interpolation=cv2.INTER_AREA)
+    if orientation in _OPENCV_ORIENTATION_OPS:
+        array = _OPENCV_ORIENTATION_OPS[orientation](array)
+
+    if image_format == "WEBP":
+        ok, buffer = cv2.imencode(".webp", array, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    else:
+        ok, buffer = cv2.imencode(".jpg", array, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
@@ -0,0 +1,125 @@
+import json
+
+
+class ArrayItemStreamParser:
+    """
+    스트리밍되는 JSON 텍스트에서 최상위 객체 안 배열의 객체 항목을 완성되는 즉시 꺼내는 파서.
+
+    도구 호출 인자 {"classifications": [{"index": 0, "category": "cat"}, ...]}가 조각으로 도착할 때,
+    문자열/이스케이프 상태와 중괄호 깊이만 추적하여 깊이 2의 객체가 닫히는 순간 그 부분만
+    json.loads로 파싱합니다. 이미 검사한 위치부터 이어서 읽으므로 전체 텍스트를 다시 파싱하지 않습니다.
+
+    Attributes:
+        text (str): 지금까지 받은 전체 텍스트.
+    """
+
+    ITEM_DEPTH = 2
+
+    def __init__(self):
+        self.text = ''
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+
+    def feed(self, fragment):
+        """
+        텍스트 조각을 추가하고 새로 완성된 항목을 반환합니다.
+
+        Args:
+            fragment (str): 스트림에서 받은 텍스트 조각.
+
+        Returns:
+            list of dict: 이번 조각으로 완성된 배열 항목 (파싱할 수 없는 항목은 건너뜁니다).
+        """
+        if not fragment:
+            return []
+        self.text += fragment
+        items = []
+        text = self.text
+        for position in range(self._position, len(text)):
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+                if self._depth == self.ITEM_DEPTH:
+                    self._item_start = position
+            elif char == '}':
+                if self._depth == self.ITEM_DEPTH and self._item_start is not None:
+                    try:
+                        item = json.loads(text[self._item_start:position + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item_start = None
+                self._depth -= 1
+        self._position = len(text)
+        return items
+
+
+class IntArrayStreamParser:
+    """
+    스트리밍되는 JSON 텍스트에서 첫 번째 배열의 정수 항목을 완성되는 즉시 꺼내는 파서.
+
+    압축 스키마의 도구 호출 인자 {"labels": [1, 0, 2, ...]}용입니다. 숫자 뒤에 ',' 또는 ']'가
+    도착해야 항목이 완성된 것으로 보므로 조각 경계에서 잘린 숫자를 잘못 읽지 않습니다.
+
+    Attributes:
+        text (str): 지금까지 받은 전체 텍스트.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self._position = 0
+        self._in_array = False
+        self._done = False
+        self._token = ''
+        self._count = 0
+
+    def feed(self, fragment):
+        """
+        텍스트 조각을 추가하고 새로 완성된 항목을 반환합니다.
+
+        Args:
+            fragment (str): 스트림에서 받은 텍스트 조각.
+
+        Returns:
+            list of tuple: 이번 조각으로 완성된 (배열 위치, 값) 목록. 정수가 아닌 값은 None입니다.
+        """
+        if not fragment:
+            return []
+        self.text += fragment
+        items = []
+        text = self.text
+        for position in range(self._position, len(text)):
+            if self._done:
+                break
+            char = text[position]
+            if not self._in_array:
+                self._in_array = char == '['
+            elif char in ',]':
+                token = self._token.strip()
+                if token:
+                    items.append((self._count, int(token) if token.lstrip('-').isdigit() else None))
+                    self._count += 1
+                self._token = ''
+                self._done = char == ']'
+            else:
+                self._token += char
+        self._position = len(text)
+        return items
+
+    @property
+    def done(self):
+        """첫 번째 배열이 닫혔는지 여부."""
+        return self._done
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+
+
+class MetricsRegistry:
+    """
+    프로세스 전역 메트릭을 수집하는 싱글톤 레지스트리.
+
+    카운터, 게이지, 관측값(count/sum/max)과 최근 작업(job) 요약을 보관하며,
+    각 서비스가 등록한 수집기(collector)의 스냅샷을 함께 제공합니다.
+    여러 Flask 스레드와 이벤트 루프에서 동시에 호출되므로 모든 접근은 락으로 보호됩니다.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    MAX_RECENT_JOBS = 20
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(MetricsRegistry, cls).__new__(cls)
+                    instance._data_lock = threading.Lock()
+                    instance.counters = {}
+                    instance.gauges = {}
+                    instance.observations = {}
+                    instance.recent_jobs = deque(maxlen=cls.MAX_RECENT_JOBS)
+                    instance.collectors = {}
+                    cls._instance = instance
+        return cls._instance
+
+    def increment(self, name, value=1):
+        """카운터 값을 증가시킵니다."""
+        with self._data_lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """게이지 값을 설정합니다."""
+        with self._data_lock:
+            self.gauges[name] = value
+
+    def observe(self, name, value):
+        """
+        관측값을 기록합니다.
+
+        Args:
+            name (str): 메트릭 이름.
+            value (float): 관측값 (예: 지연 시간 초).
+        """
+        with self._data_lock:
+            stats = self.observations.setdefault(name, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['sum'] += value
+            stats['max'] = max(stats['max'], value)
+
+    def record_job(self, summary):
+        """
+        완료된 작업의 요약 정보를 최근 작업 목록에 추가합니다.
+
+        Args:
+            summary (dict): 작업 통계 요약.
+        """
+        with self._data_lock:
+            self.recent_jobs.append({**summary, 'recorded_at': time.time()})
+
+    def register_collector(self, name, collector):
+        """
+        스냅샷 생성 시 호출될 수집기를 등록합니다.
+
+        Args:
+            name (str): 수집기 이름 (스냅샷의 키로 사용됨).
+            collector (callable): 인자 없이 호출되어 dict를 반환하는 함수.
+        """
+        with self._data_lock:
+            self.collectors[name] = collector
+
+    def snapshot(self):
+        """
+        현재 메트릭 전체의 스냅샷을 반환합니다.
+
+        Returns:
+            dict: 카운터, 게이지, 관측값, 최근 작업, 수집기 결과를 포함하는 딕셔너리.
+        """
+        with self._data_lock:
+            observations = {
+                name: {**stats, 'avg': stats['sum'] / stats['count'] if stats['count'] else 0.0}
+                for name, stats in self.observations.items()
+            }
+            result = {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'observations': observations,
+                'recent_jobs': list(self.recent_jobs),
+            }
+            collectors = dict(self.collectors)
+
+        # 수집기는 자체 락을 사용할 수 있으므로 레지스트리 락 밖에서 호출합니다.
+        for name, collector in collectors.items():
+            try:
+                result[name] = collector()
+            except Exception as e:
+                result[name] = {'error': str(e)}
+        return result
+
+    def reset(self):
+        """모든 메트릭을 초기화합니다 (주로 테스트용)."""
+        with self._data_lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.observations.clear()
+            self.recent_jobs.clear()
+
+
+metrics = MetricsRegistry()